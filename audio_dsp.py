@@ -0,0 +1,522 @@
+# 프로세스 내 오디오 DSP 체인 - ffmpeg 필터 그래프(highpass/lowpass/volume/dynaudnorm/amix/compand/aresample)를 NumPy 블록 처리로 대체
+import math
+import wave
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from wav_stream_writer import StreamingWavWriter
+
+BLOCK_SIZE = 8192
+
+
+# ---- 바이쿼드 필터 ----
+
+def biquad_coefficients(kind: str, cutoff: float, sample_rate: int, q: float = 0.7071) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """RBJ cookbook 2차 필터 계수 ((b0, b1, b2), (1, a1, a2)) - ffmpeg highpass/lowpass 기본값(poles=2, Q=0.707)과 같음"""
+    w0 = 2 * math.pi * cutoff / sample_rate
+    cos_w0 = math.cos(w0)
+    alpha = math.sin(w0) / (2 * q)
+    if kind == 'lowpass':
+        b = ((1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2)
+    elif kind == 'highpass':
+        b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+    else:
+        raise ValueError(f"지원하지 않는 필터 종류: {kind}")
+    a0 = 1 + alpha
+    return tuple(v / a0 for v in b), (1.0, -2 * cos_w0 / a0, (1 - alpha) / a0)
+
+
+@lru_cache(maxsize=32)
+def _impulse_response(sections: Tuple[Tuple[str, float, int, float], ...], taps: int) -> np.ndarray:
+    """바이쿼드 직렬 연결의 임펄스 응답 (최대 taps, 최대값의 1e-13 아래 꼬리는 버림)"""
+    response = np.zeros(taps)
+    response[0] = 1.0
+    for kind, cutoff, sample_rate, q in sections:
+        (b0, b1, b2), (_, a1, a2) = biquad_coefficients(kind, cutoff, sample_rate, q)
+        x1 = x2 = y1 = y2 = 0.0
+        out = np.empty(taps)
+        for i, x0 in enumerate(response.tolist()):
+            y0 = b0 * x0 + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+            out[i] = y0
+            x2, x1, y2, y1 = x1, x0, y1, y0
+        response = out
+    # float64 정밀도 아래로 감쇠한 꼬리는 잘라 FFT 크기를 줄임
+    significant = np.nonzero(np.abs(response) > 1e-13 * np.abs(response).max())[0]
+    response = response[:max(64, significant[-1] + 1)].copy()
+    response.flags.writeable = False
+    return response
+
+
+class BiquadFilter:
+    """바이쿼드 high/low-pass 직렬 필터
+
+    재귀식을 샘플마다 돌리는 대신, 필터의 임펄스 응답을 float64 정밀도 아래로 감쇠하는
+    길이(최대 taps)에서 잘라 FFT 합성곱(overlap-save)으로 블록 단위 처리한다. 이 필터들의
+    극점 반지름은 0.97 이하라서 수백~천여 탭이면 재귀 필터와 결과가 같다.
+    """
+
+    def __init__(self, sections: Sequence[Tuple[str, float]], sample_rate: int, q: float = 0.7071, taps: int = 4096):
+        # 나이퀴스트 이상 차단 주파수는 효과가 없으므로 생략 (ffmpeg lowpass=f=8000 @16kHz)
+        usable = tuple((kind, float(cutoff), sample_rate, q) for kind, cutoff in sections if cutoff < sample_rate / 2)
+        self.response = _impulse_response(usable, taps) if usable else None
+        self._history = np.zeros(len(self.response) - 1 if usable else 0)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.response is None or not len(block):
+            return block
+        extended = np.concatenate((self._history, block))
+        self._history = extended[-len(self._history):]
+        taps = len(self.response)
+        if len(block) < 256:
+            return np.convolve(extended, self.response, mode='valid')
+        size = 1 << (len(extended) + taps - 2).bit_length()
+        spectrum = np.fft.rfft(extended, size) * np.fft.rfft(self.response, size)
+        return np.fft.irfft(spectrum, size)[taps - 1:len(extended)]
+
+    def flush(self) -> np.ndarray:
+        return np.zeros(0)
+
+
+class Gain:
+    """고정 게인 (ffmpeg volume)"""
+
+    def __init__(self, factor: float):
+        self.factor = factor
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        return block * self.factor
+
+    def flush(self) -> np.ndarray:
+        return np.zeros(0)
+
+
+# ---- 동적 정규화 ----
+
+def _bound(threshold: float, value: float) -> float:
+    """ffmpeg dynaudnorm의 부드러운 최대 게인 제한"""
+    return math.erf(0.8862269254527580 * (value / threshold)) * threshold
+
+
+class DynamicNormalizer:
+    """ffmpeg dynaudnorm 기본 모드를 단순화한 동적 정규화
+
+    frame_ms 프레임마다 peak/최대진폭(최대 max_gain, erf로 부드럽게 제한)을 구하고, window
+    프레임 최소 필터와 가우시안 필터로 게인을 매끄럽게 한 뒤 프레임 안에서 직전 게인과
+    선형 보간해 곱한다. 앞쪽은 ffmpeg와 같이 min(1, 첫 게인)과 1.0으로 채우고, 끝에서는
+    게인 1의 가상 프레임으로 큐를 비운다. 출력은 window 프레임만큼 늦게 나오며 메모리는
+    그 프레임 수로 제한된다.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: float = 500, window: int = 31, peak: float = 0.95, max_gain: float = 10.0):
+        frame_len = int(round(sample_rate * frame_ms / 1000.0))
+        self.frame_len = frame_len + frame_len % 2
+        self.window = window + (1 - window % 2)
+        self.peak = peak
+        self.max_gain = max_gain
+        sigma = ((self.window / 2.0) - 1.0) / 3.0 + 1.0 / 3.0
+        offsets = np.arange(self.window) - self.window // 2
+        weights = np.exp(-(offsets ** 2) / (2.0 * sigma * sigma))
+        self._weights = weights / weights.sum()
+        self._pending = np.zeros(0)
+        self._frames = deque()
+        self._original = deque()
+        self._minimum = deque()
+        self._smoothed = deque()
+        self._previous_gain = None
+
+    def _local_gain(self, frame: np.ndarray) -> float:
+        peak = float(np.max(np.abs(frame))) if len(frame) else 0.0
+        return _bound(self.max_gain, self.peak / peak if peak > 0 else float('inf'))
+
+    def _push_gain(self, gain: float):
+        if not self._original:
+            initial = min(1.0, gain)
+            self._previous_gain = initial
+            self._original.extend([initial] * (self.window // 2))
+        self._original.append(gain)
+        while len(self._original) >= self.window:
+            if not self._minimum:
+                self._minimum.extend([1.0] * (self.window // 2))
+            self._minimum.append(min(self._original))
+            self._original.popleft()
+        while len(self._minimum) >= self.window:
+            self._smoothed.append(float(np.dot(self._weights, self._minimum)))
+            self._minimum.popleft()
+
+    def _amplify(self) -> List[np.ndarray]:
+        out = []
+        while self._frames and self._smoothed:
+            frame = self._frames.popleft()
+            gain = self._smoothed.popleft()
+            ramp = np.arange(len(frame)) / len(frame)
+            out.append(frame * (self._previous_gain * (1.0 - ramp) + gain * ramp))
+            self._previous_gain = gain
+        return out
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        data = np.concatenate((self._pending, block)) if len(self._pending) else block
+        count = len(data) // self.frame_len
+        for index in range(count):
+            frame = data[index * self.frame_len:(index + 1) * self.frame_len]
+            self._frames.append(frame)
+            self._push_gain(self._local_gain(frame))
+        self._pending = data[count * self.frame_len:]
+        out = self._amplify()
+        return np.concatenate(out) if out else np.zeros(0)
+
+    def flush(self) -> np.ndarray:
+        if len(self._pending):
+            self._frames.append(self._pending)
+            self._push_gain(self._local_gain(self._pending))
+            self._pending = np.zeros(0)
+        out = []
+        while self._frames:
+            # 게인 1인 가상 프레임(진폭 = peak)으로 큐를 밀어냄
+            self._push_gain(_bound(self.max_gain, 1.0))
+            out.extend(self._amplify())
+        return np.concatenate(out) if out else np.zeros(0)
+
+
+class Compander:
+    """ffmpeg compand (attack/decay 엔벨로프 + dB 전달 곡선)
+
+    엔벨로프는 ffmpeg와 같이 샘플마다 |x|로 갱신한다 (블록 최대값으로 갱신하면 레벨을 높게 잡아
+    게인이 수 dB 작아짐). 샘플마다 attack/decay 중 하나를 고르는 1차 재귀라 _envelope에서
+    블록 단위로 푼다.
+    """
+
+    def __init__(self, sample_rate: int, attack: float = 0.3, decay: float = 0.8,
+                 points: Sequence[Tuple[float, float]] = ((-80, -80), (-45, -15), (-27, -9), (0, -7)),
+                 initial_volume_db: float = 0.0, envelope_block: int = 256, max_passes: int = 8):
+        self.attack = 1.0 - math.exp(-1.0 / (sample_rate * attack)) if attack > 1.0 / sample_rate else 1.0
+        self.decay = 1.0 - math.exp(-1.0 / (sample_rate * decay)) if decay > 1.0 / sample_rate else 1.0
+        self.points_in = np.array([p[0] for p in points], dtype=np.float64)
+        self.points_out = np.array([p[1] for p in points], dtype=np.float64)
+        self.volume = 10 ** (initial_volume_db / 20.0)
+        self.envelope_block = envelope_block
+        self.max_passes = max_passes
+
+    def _gain_db(self, level_db: np.ndarray) -> np.ndarray:
+        out_db = np.interp(level_db, self.points_in, self.points_out)
+        # 첫 점보다 작은 입력은 기울기 1로 연장
+        below = level_db < self.points_in[0]
+        out_db[below] = level_db[below] + (self.points_out[0] - self.points_in[0])
+        return out_db - level_db
+
+    def _envelope_loop(self, magnitude: np.ndarray) -> np.ndarray:
+        """샘플 단위 재귀 (블록 풀이가 수렴하지 않을 때)"""
+        attack, decay, volume = self.attack, self.decay, self.volume
+        envelope = []
+        append = envelope.append
+        for sample in magnitude.tolist():
+            delta = sample - volume
+            volume += delta * (attack if delta > 0 else decay)
+            append(volume)
+        self.volume = volume
+        return np.array(envelope)
+
+    def _envelope(self, magnitude: np.ndarray) -> np.ndarray:
+        """v[n] = v[n-1] + c[n] * (|x[n]| - v[n-1]), c[n] = attack if |x[n]| > v[n-1] else decay
+
+        c가 정해지면 블록(envelope_block 샘플) 안은 v[n] = P[n] * (v0 + sum(c*x/P)) (P = cumprod(1-c))로
+        벡터 계산하고 블록 시작값만 순서대로 잇는다. c는 블록 평균으로 근사한 엔벨로프에서 시작해
+        계산된 엔벨로프로 다시 고르고, 바뀐 블록만 다시 푼다 (보통 2~3회에 샘플 단위 재귀와 같아짐).
+        """
+        size, block = len(magnitude), self.envelope_block
+        count = -(-size // block)
+        x = np.zeros(count * block)
+        x[:size] = magnitude
+        x = x.reshape(count, block)
+        attack, decay, v0 = self.attack, self.decay, self.volume
+
+        # 초기 추정: 블록 평균 |x|를 블록 단위로 따라가는 엔벨로프
+        guess = np.empty(count)
+        volume, attack_block, decay_block = v0, (1.0 - attack) ** block, (1.0 - decay) ** block
+        for index, mean in enumerate(x.mean(axis=1).tolist()):
+            guess[index] = volume
+            volume = mean + (volume - mean) * (attack_block if mean > volume else decay_block)
+        rising = x > guess[:, None]
+
+        scale, total = np.empty_like(x), np.empty_like(x)
+        rows = np.arange(count)
+        for _ in range(self.max_passes):
+            coefficient = np.where(rising[rows], attack, decay)
+            scale[rows] = np.cumprod(1.0 - coefficient, axis=1)
+            total[rows] = np.cumsum(coefficient * x[rows] / scale[rows], axis=1)
+            starts = np.empty(count)
+            volume = v0
+            for index, (last_scale, last_total) in enumerate(zip(scale[:, -1].tolist(), total[:, -1].tolist())):
+                starts[index] = volume
+                volume = last_scale * (volume + last_total)
+            envelope = scale * (starts[:, None] + total)
+            previous = np.empty_like(envelope)
+            previous[:, 1:] = envelope[:, :-1]
+            previous[1:, 0] = envelope[:-1, -1]
+            previous[0, 0] = v0
+            now_rising = x > previous
+            rows = np.flatnonzero((now_rising != rising).any(axis=1))
+            if not len(rows):
+                envelope = envelope.ravel()[:size]
+                self.volume = float(envelope[-1])
+                return envelope
+            rising = now_rising
+        return self._envelope_loop(magnitude)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if not len(block):
+            return block
+        level_db = 20.0 * np.log10(np.maximum(self._envelope(np.abs(block)), 1e-9))
+        return block * 10 ** (self._gain_db(level_db) / 20.0)
+
+    def flush(self) -> np.ndarray:
+        return np.zeros(0)
+
+
+# ---- 리샘플러 ----
+
+class PolyphaseResampler:
+    """정수비 polyphase 리샘플러 (Kaiser 창 sinc, 위상당 2*half_taps+1 탭)
+
+    출력 샘플마다 해당 위상 계수와 주변 입력을 곱해 더하며, 블록 경계에 걸친 입력은
+    필요한 만큼만 보관한다. 지연은 보정되어 출력 k는 입력 시각 k*src/dst에 맞춰진다.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, half_taps: int = 16, beta: float = 9.0, cutoff: float = 0.97):
+        divisor = math.gcd(src_rate, dst_rate)
+        self.up = dst_rate // divisor
+        self.down = src_rate // divisor
+        self.half = half_taps
+        self.passthrough = self.up == self.down
+        length = 2 * half_taps * self.up + 1
+        offsets = np.arange(length) - half_taps * self.up
+        fc = cutoff / max(self.up, self.down)
+        prototype = fc * np.sinc(fc * offsets) * np.kaiser(length, beta)
+        prototype /= prototype.sum()
+        # poly[r, j + half] = up * h[r + j*up] (r = 출력 위치의 위상)
+        self._poly = np.zeros((self.up, 2 * half_taps + 1))
+        for phase in range(self.up):
+            for j in range(-half_taps, half_taps + 1):
+                offset = phase + j * self.up
+                if abs(offset) <= half_taps * self.up:
+                    self._poly[phase, j + half_taps] = self.up * prototype[offset + half_taps * self.up]
+        self._buffer = np.zeros(half_taps)  # 스트림 앞의 0 채움
+        self._base = -half_taps              # _buffer[0]의 입력 인덱스
+        self._consumed = 0                   # 받은 입력 샘플 수
+        self._next = 0                       # 다음 출력 인덱스
+
+    def _produce(self, last_output: int) -> np.ndarray:
+        if last_output <= self._next:
+            return np.zeros(0)
+        out = np.empty(last_output - self._next)
+        # 출력 k, k+up, k+2up, ...는 같은 위상 계수를 쓰고 입력은 down씩 이동하므로
+        # 위상마다 상관(correlate) 한 번으로 계산한 뒤 down 간격으로 골라냄
+        for offset in range(min(self.up, len(out))):
+            first = self._next + offset
+            count = len(out[offset::self.up])
+            position = first * self.down
+            start = position // self.up - self.half - self._base
+            stop = start + (count - 1) * self.down + 2 * self.half + 1
+            weights = self._poly[position % self.up][::-1]
+            out[offset::self.up] = np.correlate(self._buffer[start:stop], weights, 'valid')[::self.down]
+        self._next = last_output
+        # 다음 출력에 필요한 가장 이른 입력부터만 보관
+        keep_from = (self._next * self.down) // self.up - self.half - self._base
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._base += keep_from
+        return out
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.passthrough:
+            return block
+        self._buffer = np.concatenate((self._buffer, block))
+        self._consumed += len(block)
+        # q + half <= 마지막 입력 인덱스인 출력까지 계산 가능
+        last_output = ((self._consumed - 1 - self.half) * self.up) // self.down + 1
+        return self._produce(max(last_output, 0))
+
+    def flush(self) -> np.ndarray:
+        if self.passthrough:
+            return np.zeros(0)
+        self._buffer = np.concatenate((self._buffer, np.zeros(self.half + 1)))
+        total = -(-self._consumed * self.up // self.down)
+        return self._produce(total)
+
+
+# ---- 믹서 ----
+
+class Mixer:
+    """두 입력 믹서 (ffmpeg amix normalize=1: 활성 입력 수로 나눔)
+
+    한 입력이 끝나면 남은 입력의 배율을 dropout_transition초에 걸쳐 1/2에서 1로 올린다.
+    """
+
+    def __init__(self, sample_rate: int, dropout_transition: float = 2.0):
+        self.transition = max(1, int(sample_rate * dropout_transition))
+        self._since_drop = None
+
+    def mix(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """같은 구간의 두 블록을 믹싱. 짧은 쪽은 그 입력이 끝난 것으로 봄"""
+        both = min(len(first), len(second))
+        longer = first if len(first) >= len(second) else second
+        out = np.empty(len(longer))
+        out[:both] = (first[:both] + second[:both]) * 0.5
+        rest = longer[both:]
+        if len(rest):
+            if self._since_drop is None:
+                self._since_drop = 0
+            ramp = (self._since_drop + np.arange(len(rest))) / self.transition
+            out[both:] = rest * (0.5 + 0.5 * np.minimum(ramp, 1.0))
+            self._since_drop += len(rest)
+        return out
+
+
+# ---- 체인과 WAV 입출력 ----
+
+class DspChain:
+    """단계들을 순서대로 적용하는 스트리밍 체인 (int16 입력 → int16 출력)
+
+    block_size보다 작은 입력은 모아 두었다 처리하므로 패킷 단위(160샘플)로 넣어도 된다.
+    """
+
+    def __init__(self, stages: Iterable, block_size: int = 0):
+        self.stages = list(stages)
+        self.block_size = block_size
+        self._pending: List[np.ndarray] = []
+        self._pending_len = 0
+
+    def _run(self, data: np.ndarray, final: bool = False) -> np.ndarray:
+        for stage in self.stages:
+            data = stage.process(data)
+            if final:
+                tail = stage.flush()
+                if len(tail):
+                    data = np.concatenate((data, tail))
+        return data
+
+    @staticmethod
+    def to_float(samples) -> np.ndarray:
+        if not isinstance(samples, np.ndarray):
+            samples = np.frombuffer(samples, dtype='<i2')
+        return samples.astype(np.float64) / 32768.0
+
+    @staticmethod
+    def to_int16(data: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(data * 32768.0), -32768, 32767).astype('<i2')
+
+    def process(self, samples) -> np.ndarray:
+        """int16 PCM(배열/바이트) → 처리된 int16 배열 (지연 때문에 비어 있을 수 있음)"""
+        data = self.to_float(samples)
+        if self.block_size:
+            self._pending.append(data)
+            self._pending_len += len(data)
+            if self._pending_len < self.block_size:
+                return np.zeros(0, dtype='<i2')
+            data = np.concatenate(self._pending)
+            self._pending, self._pending_len = [], 0
+        return self.to_int16(self._run(data))
+
+    def flush(self) -> np.ndarray:
+        data = np.concatenate(self._pending) if self._pending else np.zeros(0)
+        self._pending, self._pending_len = [], 0
+        return self.to_int16(self._run(data, final=True))
+
+
+def transcription_chain(sample_rate: int, out_rate: int = 16000, gain: float = 2.0, normalize: bool = True,
+                        block_size: int = 0) -> DspChain:
+    """highpass=f=300,lowpass=f=3400,volume=2.0,dynaudnorm=f=500:g=31 + -ar 16000
+
+    normalize=False면 dynaudnorm을 빼서 지연 없이(프레임 window개 선읽기 없음) 실시간 녹음에 쓴다.
+    """
+    stages = [BiquadFilter((('highpass', 300), ('lowpass', 3400)), sample_rate), Gain(gain)]
+    if normalize:
+        stages.append(DynamicNormalizer(sample_rate, frame_ms=500, window=31))
+    stages.append(PolyphaseResampler(sample_rate, out_rate))
+    return DspChain(stages, block_size)
+
+
+def merger_chain(sample_rate: int) -> DspChain:
+    """WavMerger: dynaudnorm=p=0.9:m=30, highpass=f=80, lowpass=f=8000, compand"""
+    return DspChain([
+        DynamicNormalizer(sample_rate, peak=0.9, max_gain=30.0),
+        BiquadFilter((('highpass', 80), ('lowpass', 8000)), sample_rate),
+        Compander(sample_rate),
+    ])
+
+
+def _read_blocks(path, rate: Optional[int] = None, block: int = BLOCK_SIZE):
+    """WAV를 블록 단위 모노 float로 읽음 (rate를 주면 그 샘플레이트로 변환)"""
+    with wave.open(str(path), 'rb') as wav_file:
+        channels, width, source_rate = wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate()
+        if width not in (1, 2):
+            raise ValueError(f"지원하지 않는 샘플 폭: {width}")
+        resampler = PolyphaseResampler(source_rate, rate) if rate and rate != source_rate else None
+        while True:
+            frames = wav_file.readframes(block)
+            if not frames:
+                break
+            if width == 2:
+                data = np.frombuffer(frames, dtype='<i2').astype(np.float64) / 32768.0
+            else:
+                data = (np.frombuffer(frames, dtype=np.uint8).astype(np.float64) - 128.0) / 128.0
+            if channels > 1:
+                data = data.reshape(-1, channels).mean(axis=1)
+            yield resampler.process(data) if resampler else data
+        if resampler:
+            yield resampler.flush()
+
+
+def write_pcm(samples, sample_rate: int, out_path, chain: DspChain, block: int = BLOCK_SIZE) -> int:
+    """메모리의 int16 PCM에 체인을 적용해 WAV로 저장. 기록한 프레임 수 반환"""
+    if not isinstance(samples, np.ndarray):
+        samples = np.frombuffer(samples, dtype='<i2')
+    out_rate = _output_rate(chain, sample_rate)
+    with StreamingWavWriter(out_path, framerate=out_rate) as writer:
+        for start in range(0, len(samples), block):
+            writer.write(chain.process(samples[start:start + block]).tobytes())
+        writer.write(chain.flush().tobytes())
+        return writer.frames_written
+
+
+def mix_wav_files(paths: Sequence, out_path, chain: DspChain, sample_rate: int = 16000,
+                  input_gain: float = 1.0, dropout_transition: float = 2.0, block: int = BLOCK_SIZE) -> int:
+    """WAV 한두 개를 sample_rate로 맞춰 블록 단위로 믹싱하고 체인을 적용해 저장 (amix duration=longest)"""
+    readers = [_read_blocks(path, sample_rate, block) for path in paths]
+    mixer = Mixer(sample_rate, dropout_transition)
+    buffers = [np.zeros(0) for _ in readers]
+    done = [False for _ in readers]
+    out_rate = _output_rate(chain, sample_rate)
+    with StreamingWavWriter(out_path, framerate=out_rate) as writer:
+        while not all(done) or any(len(buffer) for buffer in buffers):
+            for index, reader in enumerate(readers):
+                while not done[index] and len(buffers[index]) < block:
+                    data = next(reader, None)
+                    if data is None:
+                        done[index] = True
+                    else:
+                        buffers[index] = np.concatenate((buffers[index], data))
+            # 아직 끝나지 않은 입력이 있으면 그 입력이 가진 만큼만 진행
+            size = min((len(buffer) for buffer, finished in zip(buffers, done) if not finished), default=None)
+            if size is None:
+                size = max(len(buffer) for buffer in buffers)
+            if size == 0:
+                continue
+            blocks = [buffer[:size] for buffer in buffers]
+            buffers = [buffer[size:] for buffer in buffers]
+            if len(blocks) == 1:
+                mixed = blocks[0]
+            else:
+                mixed = mixer.mix(blocks[0] * input_gain, blocks[1] * input_gain)
+            writer.write(chain.process(DspChain.to_int16(mixed)).tobytes())
+        writer.write(chain.flush().tobytes())
+        return writer.frames_written
+
+
+def _output_rate(chain: DspChain, sample_rate: int) -> int:
+    for stage in chain.stages:
+        if isinstance(stage, PolyphaseResampler):
+            sample_rate = sample_rate * stage.up // stage.down
+    return sample_rate
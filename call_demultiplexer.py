@@ -0,0 +1,179 @@
+# 단일 패스 콜 분리기 - 전역 캡처 파일을 한 번만 읽어 Call-ID별 pcapng로 나눈다
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from pcap_io import PcapReader, PcapngWriter, decode_udp
+from sip_parser import parse_sip
+
+def parse_sip_fields(payload) -> Optional[Dict]:
+    """UDP 페이로드가 SIP 메시지이면 Call-ID, From/To user, SDP c=/m= 정보를 반환"""
+    message = parse_sip(payload)
+    if message is None:
+        return None
+    fields = {name: message.get(name, '') for name in ('call_id', 'from_user', 'to_user')}
+    fields['rtp_ip'] = message.get('sdp_ip', '')
+    fields['rtp_port'] = str(message.get('sdp_port', ''))
+    return fields
+
+
+def safe_call_id(call_id: str) -> str:
+    """Call-ID를 파일 이름으로 쓸 수 있게 변환"""
+    return re.sub(r'[<>:"/\\|?*@]', '_', call_id)
+
+
+def _new_digest():
+    return hashlib.blake2b(digest_size=16)
+
+
+def capture_digest(pcap_path) -> Tuple[int, str]:
+    """추출된 콜 캡처의 (패킷 수, 패킷 내용 해시) - CallDemultiplexer의 세션 digest와 같은 방식"""
+    digest = _new_digest()
+    count = 0
+    with PcapReader(pcap_path) as reader:
+        for packet in reader.packets():
+            digest.update(packet.data)
+            count += 1
+    return count, digest.hexdigest()
+
+
+class _NullWriter:
+    """파일을 만들지 않는 writer (hash_only 콜의 패킷 수·해시만 계산)"""
+    is_open = True
+
+    def write(self, timestamp, linktype, data):
+        pass
+
+    def close(self):
+        pass
+
+
+class CallDemultiplexer:
+    """캡처를 한 번 읽으면서 SIP는 Call-ID로, RTP는 SDP에서 협상된 (IP, 포트)로 콜에 배분
+
+    비용은 읽은 패킷 수에 비례하며 콜 수와 무관하다. 같은 미디어 endpoint를 나중의
+    콜이 다시 협상하면 그 시점부터 해당 콜로 배분한다. 미디어 endpoint가 생기기 전의
+    SIP 패킷은 메모리에 보관했다가 첫 endpoint가 생길 때 pcapng에 기록하므로
+    REGISTER/OPTIONS처럼 미디어가 없는 Call-ID는 파일을 만들지 않는다.
+
+    세션마다 기록한 패킷 내용의 해시(digest)를 계산한다. hash_only의 Call-ID는 파일을
+    만들지 않고 packet_count와 digest만 계산하므로, 이미 변환한 콜에 새 패킷이
+    들어왔는지 파일 쓰기 없이 확인할 수 있다.
+    """
+
+    def __init__(self, output_dir, call_ids: Iterable[str] = None, max_open_files: int = 64,
+                 hash_only: Iterable[str] = ()):
+        self.output_dir = Path(output_dir)
+        self.call_ids = set(call_ids) if call_ids is not None else None
+        self.hash_only = set(hash_only)
+        self.max_open_files = max_open_files
+        self.logger = logging.getLogger(__name__)
+        self.sessions = {}
+        self._endpoint_owner = {}  # (ip, port) -> call_id
+        self._pending = {}  # call_id -> [(timestamp, linktype, bytes)]
+        self._writers = {}  # call_id -> PcapngWriter
+        self._digests = {}  # call_id -> blake2b
+        self._open_writers = OrderedDict()  # 핸들이 열린 writer (LRU)
+
+    def add_endpoint(self, call_id: str, ip: str, port):
+        """SDP 외 경로(active_calls 등)로 알려진 미디어 endpoint 등록"""
+        session = self._get_session(call_id)
+        session['endpoints'].add(f"{ip}:{port}")
+        self._endpoint_owner[(ip, int(port))] = call_id
+
+    def run(self, pcap_path) -> Dict[str, Dict]:
+        """캡처 파일을 분리하고 {call_id: {'from','to','endpoints','pcapng_path','packet_count','digest'}} 반환"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            with PcapReader(pcap_path) as reader:
+                for packet in reader.packets():
+                    decoded = decode_udp(packet.linktype, packet.data)
+                    if decoded is None:
+                        continue
+                    src_ip, dst_ip, src_port, dst_port, payload = decoded
+
+                    fields = parse_sip_fields(payload)
+                    if fields is not None:
+                        if fields['call_id']:
+                            self._route_sip(fields, packet)
+                        continue
+
+                    call_id = self._endpoint_owner.get((src_ip, src_port)) or \
+                        self._endpoint_owner.get((dst_ip, dst_port))
+                    if call_id is not None:
+                        self._write(call_id, packet.timestamp, packet.linktype, packet.data)
+        finally:
+            for writer in self._writers.values():
+                writer.close()
+            self._open_writers.clear()
+            self._pending.clear()
+
+        for call_id, digest in self._digests.items():
+            self.sessions[call_id]['digest'] = digest.hexdigest()
+        return self.sessions
+
+    def _get_session(self, call_id: str) -> Dict:
+        session = self.sessions.get(call_id)
+        if session is None:
+            session = self.sessions[call_id] = {
+                'from': '', 'to': '', 'endpoints': set(), 'pcapng_path': None, 'packet_count': 0, 'digest': None,
+            }
+        return session
+
+    def _route_sip(self, fields: Dict, packet):
+        call_id = fields['call_id']
+        session = self._get_session(call_id)
+        if not session['from'] and not session['to']:
+            session['from'] = fields['from_user']
+            session['to'] = fields['to_user']
+
+        if fields['rtp_ip'] and fields['rtp_port']:
+            session['endpoints'].add(f"{fields['rtp_ip']}:{fields['rtp_port']}")
+            self._endpoint_owner[(fields['rtp_ip'], int(fields['rtp_port']))] = call_id
+
+        self._write(call_id, packet.timestamp, packet.linktype, packet.data)
+
+    def _write(self, call_id: str, timestamp: float, linktype: int, data):
+        if self.call_ids is not None and call_id not in self.call_ids:
+            return
+        session = self.sessions[call_id]
+
+        writer = self._writers.get(call_id)
+        if writer is None:
+            if not session['endpoints']:
+                self._pending.setdefault(call_id, []).append((timestamp, linktype, bytes(data)))
+                return
+            writer = self._create_writer(call_id)
+            digest = self._digests[call_id] = _new_digest()
+            for pending in self._pending.pop(call_id, ()):
+                writer.write(*pending)
+                digest.update(pending[2])
+                session['packet_count'] += 1
+        elif not writer.is_open:
+            self._track_open(call_id, writer)
+        elif call_id in self._open_writers:
+            self._open_writers.move_to_end(call_id)
+
+        writer.write(timestamp, linktype, data)
+        self._digests[call_id].update(data)
+        session['packet_count'] += 1
+
+    def _create_writer(self, call_id: str) -> PcapngWriter:
+        if call_id in self.hash_only:
+            writer = self._writers[call_id] = _NullWriter()
+            return writer
+        path = self.output_dir / f"{safe_call_id(call_id)}.pcapng"
+        writer = self._writers[call_id] = PcapngWriter(path)
+        self.sessions[call_id]['pcapng_path'] = str(path)
+        self._track_open(call_id, writer)
+        return writer
+
+    def _track_open(self, call_id: str, writer: PcapngWriter):
+        self._open_writers[call_id] = writer
+        while len(self._open_writers) > self.max_open_files:
+            _, oldest = self._open_writers.popitem(last=False)
+            oldest.close()
+
@@ -0,0 +1,434 @@
+# 증가하는 캡처 파일에 대한 바이트 오프셋 인덱스 - dumpcap이 쓰는 파일을 꼬리부터 따라가며 기록
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from call_demultiplexer import parse_sip_fields
+from pcap_io import PcapReader, PcapngWriter, decode_udp, parse_rtp
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    inode INTEGER NOT NULL,
+    indexed_until INTEGER NOT NULL,
+    tail BLOB NOT NULL DEFAULT x'',
+    first_ts REAL,
+    last_ts REAL,
+    sealed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS calls (
+    capture_id INTEGER NOT NULL,
+    call_id TEXT NOT NULL,
+    from_user TEXT,
+    to_user TEXT,
+    first_ts REAL,
+    last_ts REAL,
+    PRIMARY KEY (capture_id, call_id)
+);
+CREATE TABLE IF NOT EXISTS call_endpoints (
+    capture_id INTEGER NOT NULL,
+    call_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    PRIMARY KEY (capture_id, call_id, endpoint)
+);
+CREATE TABLE IF NOT EXISTS endpoint_owners (
+    capture_id INTEGER NOT NULL,
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    call_id TEXT NOT NULL,
+    PRIMARY KEY (capture_id, ip, port)
+);
+CREATE TABLE IF NOT EXISTS flows (
+    id INTEGER PRIMARY KEY,
+    capture_id INTEGER NOT NULL,
+    src_ip TEXT NOT NULL,
+    src_port INTEGER NOT NULL,
+    dst_ip TEXT NOT NULL,
+    dst_port INTEGER NOT NULL,
+    UNIQUE (capture_id, src_ip, src_port, dst_ip, dst_port)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    capture_id INTEGER NOT NULL,
+    call_id TEXT,
+    flow_id INTEGER,
+    first_offset INTEGER NOT NULL,
+    first_ts REAL NOT NULL,
+    last_ts REAL NOT NULL,
+    packet_count INTEGER NOT NULL,
+    deltas BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_call ON chunks (call_id, capture_id);
+CREATE INDEX IF NOT EXISTS idx_chunks_flow ON chunks (flow_id);
+CREATE TABLE IF NOT EXISTS time_marks (
+    capture_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_time_marks ON time_marks (capture_id, ts);
+CREATE TABLE IF NOT EXISTS converted_calls (
+    call_id TEXT PRIMARY KEY,
+    converted_at REAL NOT NULL
+);
+"""
+
+
+class _Chunk:
+    """한 번의 갱신에서 모인 (콜, 흐름)별 오프셋 묶음 - 첫 오프셋 + uint32 차분으로 저장"""
+    __slots__ = ('first_offset', 'last_offset', 'first_ts', 'last_ts', 'count', 'deltas')
+
+    def __init__(self, offset: int, ts: float):
+        self.first_offset = self.last_offset = offset
+        self.first_ts = self.last_ts = ts
+        self.count = 1
+        self.deltas = array('I')
+
+    def add(self, offset: int, ts: float):
+        self.deltas.append(offset - self.last_offset)
+        self.last_offset = offset
+        self.last_ts = ts
+        self.count += 1
+
+
+class CaptureIndex:
+    """캡처 파일의 Call-ID/RTP 흐름별 패킷 오프셋과 시간→오프셋 표를 SQLite에 유지
+
+    update()는 마지막으로 인덱싱한 위치부터 새로 추가된 블록만 읽는다. SIP는 Call-ID로,
+    RTP는 SDP에서 협상된 (IP, 포트)로 콜에 배정하며 배정 상태도 저장하므로 재시작 후에도
+    이어서 인덱싱한다. dumpcap 재시작으로 파일이 새로 만들어지면 해당 파일의 인덱스를 초기화한다.
+    """
+
+    TIME_MARK_INTERVAL = 10.0  # 초
+    SCHEMA_VERSION = 2
+
+    def __init__(self, db_path="temp_captures/capture_index.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self):
+        # 인덱스는 캡처 파일에서 다시 만들 수 있으므로 스키마가 바뀌면 비우고 새로 생성
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            tables = [name for (name,) in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            for table in tables:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---- 인덱싱 ----
+
+    def update(self, capture_path, inherit_from=None) -> int:
+        """캡처 파일의 새로 추가된 부분을 인덱싱하고 인덱싱된 패킷 수를 반환
+
+        inherit_from: 링 버퍼의 직전 세그먼트. 새 세그먼트를 처음 인덱싱할 때 SDP로 배정된
+        미디어 endpoint를 이어받아 세그먼트 경계를 넘는 RTP도 같은 콜로 배정한다.
+        """
+        capture_path = os.path.abspath(capture_path)
+        if not os.path.exists(capture_path) or os.path.getsize(capture_path) == 0:
+            return 0
+
+        with self._lock:
+            capture_id, start_offset = self._get_capture(capture_path)
+            if start_offset == 0 and inherit_from is not None:
+                self._inherit_endpoint_owners(capture_id, inherit_from)
+            owners = {(ip, port): call_id for ip, port, call_id in self._conn.execute(
+                "SELECT ip, port, call_id FROM endpoint_owners WHERE capture_id = ?", (capture_id,))}
+            flow_ids = {}
+            chunks = {}  # (call_id, flow_id) -> _Chunk
+            calls = {}  # call_id -> [from, to, first_ts, last_ts]
+            new_endpoints = set()
+            changed_owners = {}
+            time_marks = []
+            last_mark = self._conn.execute(
+                "SELECT MAX(ts) FROM time_marks WHERE capture_id = ?", (capture_id,)).fetchone()[0]
+            count = 0
+            first_ts = last_ts = None
+
+            with PcapReader(capture_path, start_offset) as reader:
+                for packet in reader.packets():
+                    if first_ts is None:
+                        first_ts = packet.timestamp
+                    last_ts = packet.timestamp
+                    if last_mark is None or packet.timestamp >= last_mark + self.TIME_MARK_INTERVAL:
+                        last_mark = packet.timestamp
+                        time_marks.append((capture_id, packet.timestamp, packet.offset))
+
+                    decoded = decode_udp(packet.linktype, packet.data)
+                    if decoded is None:
+                        continue
+                    src_ip, dst_ip, src_port, dst_port, payload = decoded
+
+                    fields = parse_sip_fields(payload)
+                    if fields is not None:
+                        call_id = fields['call_id']
+                        if not call_id:
+                            continue
+                        call = calls.get(call_id)
+                        if call is None:
+                            call = calls[call_id] = [fields['from_user'], fields['to_user'], packet.timestamp, packet.timestamp]
+                        call[3] = packet.timestamp
+                        if fields['rtp_ip'] and fields['rtp_port']:
+                            key = (fields['rtp_ip'], int(fields['rtp_port']))
+                            owners[key] = changed_owners[key] = call_id
+                            new_endpoints.add((capture_id, call_id, f"{key[0]}:{key[1]}"))
+                        flow_id = None
+                    else:
+                        call_id = owners.get((src_ip, src_port)) or owners.get((dst_ip, dst_port))
+                        if parse_rtp(payload) is None and call_id is None:
+                            continue
+                        flow_key = (src_ip, src_port, dst_ip, dst_port)
+                        flow_id = flow_ids.get(flow_key)
+                        if flow_id is None:
+                            flow_id = flow_ids[flow_key] = self._get_flow(capture_id, flow_key)
+
+                    chunk = chunks.get((call_id, flow_id))
+                    if chunk is None:
+                        chunks[(call_id, flow_id)] = _Chunk(packet.offset, packet.timestamp)
+                    else:
+                        chunk.add(packet.offset, packet.timestamp)
+                    count += 1
+
+                end_offset = reader.end_offset
+
+            tail = self._read_tail(capture_path, end_offset)
+            self._save(capture_id, end_offset, tail, first_ts, last_ts, chunks, calls, new_endpoints, changed_owners, time_marks)
+            return count
+
+    def _get_capture(self, capture_path: str):
+        """캡처 파일 id와 인덱싱을 이어갈 위치 반환 (파일이 바뀌었으면 초기화)
+
+        inode만으로는 삭제 후 재생성된 파일을 구분하지 못할 수 있어 마지막으로
+        인덱싱한 위치 직전의 바이트가 그대로인지도 확인한다.
+        """
+        stat = os.stat(capture_path)
+        row = self._conn.execute(
+            "SELECT id, inode, indexed_until, tail FROM captures WHERE path = ?", (capture_path,)).fetchone()
+        if row is not None:
+            capture_id, inode, indexed_until, tail = row
+            if inode == stat.st_ino and indexed_until <= stat.st_size and \
+                    self._read_tail(capture_path, indexed_until) == tail:
+                return capture_id, indexed_until
+            self.logger.info(f"캡처 파일이 새로 생성됨, 인덱스 초기화: {capture_path}")
+            self._delete_capture(capture_id)
+
+        cursor = self._conn.execute(
+            "INSERT INTO captures (path, inode, indexed_until) VALUES (?, ?, 0)", (capture_path, stat.st_ino))
+        self._conn.commit()
+        return cursor.lastrowid, 0
+
+    @staticmethod
+    def _read_tail(capture_path: str, offset: int) -> bytes:
+        start = max(0, offset - 32)
+        with open(capture_path, 'rb') as f:
+            f.seek(start)
+            return f.read(offset - start)
+
+    def _get_flow(self, capture_id: int, flow_key) -> int:
+        row = self._conn.execute(
+            "SELECT id FROM flows WHERE capture_id = ? AND src_ip = ? AND src_port = ? AND dst_ip = ? AND dst_port = ?",
+            (capture_id, *flow_key)).fetchone()
+        if row is not None:
+            return row[0]
+        return self._conn.execute(
+            "INSERT INTO flows (capture_id, src_ip, src_port, dst_ip, dst_port) VALUES (?, ?, ?, ?, ?)",
+            (capture_id, *flow_key)).lastrowid
+
+    def _inherit_endpoint_owners(self, capture_id: int, previous_path):
+        row = self._conn.execute(
+            "SELECT id FROM captures WHERE path = ?", (os.path.abspath(previous_path),)).fetchone()
+        if row is None:
+            return
+        self._conn.execute(
+            "INSERT OR IGNORE INTO endpoint_owners (capture_id, ip, port, call_id) "
+            "SELECT ?, ip, port, call_id FROM endpoint_owners WHERE capture_id = ?", (capture_id, row[0]))
+        self._conn.execute(
+            "INSERT OR IGNORE INTO call_endpoints (capture_id, call_id, endpoint) "
+            "SELECT ?, call_id, endpoint FROM call_endpoints WHERE capture_id = ?", (capture_id, row[0]))
+
+    def _save(self, capture_id, end_offset, tail, first_ts, last_ts, chunks, calls, new_endpoints, changed_owners, time_marks):
+        conn = self._conn
+        conn.executemany(
+            "INSERT INTO chunks (capture_id, call_id, flow_id, first_offset, first_ts, last_ts, packet_count, deltas) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(capture_id, call_id, flow_id, c.first_offset, c.first_ts, c.last_ts, c.count, c.deltas.tobytes())
+             for (call_id, flow_id), c in chunks.items()])
+        for call_id, (from_user, to_user, first_ts, last_ts) in calls.items():
+            conn.execute(
+                "INSERT INTO calls (capture_id, call_id, from_user, to_user, first_ts, last_ts) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (capture_id, call_id) DO UPDATE SET last_ts = excluded.last_ts",
+                (capture_id, call_id, from_user, to_user, first_ts, last_ts))
+        conn.executemany("INSERT OR IGNORE INTO call_endpoints (capture_id, call_id, endpoint) VALUES (?, ?, ?)",
+                         list(new_endpoints))
+        conn.executemany("INSERT OR REPLACE INTO endpoint_owners (capture_id, ip, port, call_id) VALUES (?, ?, ?, ?)",
+                         [(capture_id, ip, port, call_id) for (ip, port), call_id in changed_owners.items()])
+        conn.executemany("INSERT INTO time_marks (capture_id, ts, offset) VALUES (?, ?, ?)", time_marks)
+        conn.execute("UPDATE captures SET indexed_until = ?, tail = ?, first_ts = COALESCE(first_ts, ?), "
+                     "last_ts = COALESCE(?, last_ts) WHERE id = ?", (end_offset, tail, first_ts, last_ts, capture_id))
+        conn.commit()
+
+    def _delete_capture(self, capture_id: int):
+        for table in ('calls', 'call_endpoints', 'endpoint_owners', 'flows', 'chunks', 'time_marks'):
+            self._conn.execute(f"DELETE FROM {table} WHERE capture_id = ?", (capture_id,))
+        self._conn.execute("DELETE FROM captures WHERE id = ?", (capture_id,))
+        self._conn.commit()
+
+    def forget(self, capture_path):
+        """삭제된 캡처 파일의 인덱스 제거"""
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM captures WHERE path = ?", (os.path.abspath(capture_path),)).fetchone()
+            if row is not None:
+                self._delete_capture(row[0])
+
+    # ---- 세그먼트 카탈로그 ----
+
+    def seal(self, capture_path):
+        """dumpcap이 더 이상 쓰지 않는 세그먼트로 표시"""
+        with self._lock:
+            self._conn.execute("UPDATE captures SET sealed = 1 WHERE path = ?", (os.path.abspath(capture_path),))
+            self._conn.commit()
+
+    def is_sealed(self, capture_path) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sealed FROM captures WHERE path = ?", (os.path.abspath(capture_path),)).fetchone()
+        return bool(row and row[0])
+
+    def capture_info(self, capture_path) -> Optional[Dict]:
+        """세그먼트의 시간 범위와 포함된 Call-ID 목록"""
+        with self._lock:
+            capture_id = self._capture_id(capture_path)
+            if capture_id is None:
+                return None
+            first_ts, last_ts, sealed = self._conn.execute(
+                "SELECT first_ts, last_ts, sealed FROM captures WHERE id = ?", (capture_id,)).fetchone()
+            call_ids = [call_id for (call_id,) in self._conn.execute(
+                "SELECT DISTINCT call_id FROM chunks WHERE capture_id = ? AND call_id IS NOT NULL", (capture_id,))]
+        return {'first_ts': first_ts, 'last_ts': last_ts, 'sealed': bool(sealed), 'call_ids': call_ids}
+
+    def captures_for_call(self, call_id: str) -> List[str]:
+        """콜의 패킷이 들어 있는 캡처 파일 경로 (시간 순)"""
+        with self._lock:
+            return [path for (path,) in self._conn.execute(
+                "SELECT path FROM captures WHERE id IN (SELECT DISTINCT capture_id FROM chunks WHERE call_id = ?) "
+                "ORDER BY first_ts", (call_id,))]
+
+    def pending_calls(self, capture_path) -> List[str]:
+        """세그먼트에 들어 있으면서 아직 변환되지 않은 미디어 콜 (endpoint 2개 이상)"""
+        with self._lock:
+            capture_id = self._capture_id(capture_path)
+            if capture_id is None:
+                return []
+            return [call_id for (call_id,) in self._conn.execute(
+                "SELECT DISTINCT c.call_id FROM chunks c WHERE c.capture_id = ? AND c.call_id IS NOT NULL "
+                "AND c.call_id NOT IN (SELECT call_id FROM converted_calls) "
+                "AND (SELECT COUNT(DISTINCT e.endpoint) FROM call_endpoints e WHERE e.call_id = c.call_id) >= 2",
+                (capture_id,))]
+
+    def mark_converted(self, call_id: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO converted_calls (call_id, converted_at) VALUES (?, ?)",
+                               (call_id, time.time()))
+            self._conn.commit()
+
+    # ---- 조회 ----
+
+    def get_call(self, capture_path, call_id: str) -> Optional[Dict]:
+        """인덱싱된 콜 정보 {'from','to','endpoints','first_ts','last_ts'} 반환"""
+        with self._lock:
+            capture_id = self._capture_id(capture_path)
+            if capture_id is None:
+                return None
+            row = self._conn.execute(
+                "SELECT from_user, to_user, first_ts, last_ts FROM calls WHERE capture_id = ? AND call_id = ?",
+                (capture_id, call_id)).fetchone()
+            if row is None:
+                return None
+            endpoints = {endpoint for (endpoint,) in self._conn.execute(
+                "SELECT endpoint FROM call_endpoints WHERE capture_id = ? AND call_id = ?", (capture_id, call_id))}
+            return {'from': row[0] or '', 'to': row[1] or '', 'endpoints': endpoints,
+                    'first_ts': row[2], 'last_ts': row[3]}
+
+    def call_offsets(self, capture_path, call_id: str) -> List[int]:
+        """콜에 속한 SIP/RTP 패킷의 블록 오프셋 (파일 순서)"""
+        return self._offsets(capture_path, "call_id = ?", (call_id,))
+
+    def flow_offsets(self, capture_path, src_ip: str, src_port: int, dst_ip: str, dst_port: int) -> List[int]:
+        """한 방향 UDP 흐름의 블록 오프셋 (파일 순서)"""
+        with self._lock:
+            capture_id = self._capture_id(capture_path)
+            if capture_id is None:
+                return []
+            row = self._conn.execute(
+                "SELECT id FROM flows WHERE capture_id = ? AND src_ip = ? AND src_port = ? AND dst_ip = ? AND dst_port = ?",
+                (capture_id, src_ip, src_port, dst_ip, dst_port)).fetchone()
+        if row is None:
+            return []
+        return self._offsets(capture_path, "flow_id = ?", (row[0],))
+
+    def offset_at(self, capture_path, timestamp: float) -> int:
+        """timestamp 이전의 가장 가까운 시간 표지의 오프셋 (그 지점부터 읽으면 timestamp 이후 패킷을 모두 포함)"""
+        with self._lock:
+            capture_id = self._capture_id(capture_path)
+            if capture_id is None:
+                return 0
+            row = self._conn.execute(
+                "SELECT offset FROM time_marks WHERE capture_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+                (capture_id, timestamp)).fetchone()
+        return row[0] if row else 0
+
+    def _offsets(self, capture_path, condition: str, params) -> List[int]:
+        with self._lock:
+            capture_id = self._capture_id(capture_path)
+            if capture_id is None:
+                return []
+            rows = self._conn.execute(
+                f"SELECT first_offset, deltas FROM chunks WHERE capture_id = ? AND {condition}",
+                (capture_id, *params)).fetchall()
+        offsets = []
+        for first_offset, deltas in rows:
+            offset = first_offset
+            offsets.append(offset)
+            chunk_deltas = array('I')
+            chunk_deltas.frombytes(deltas)
+            for delta in chunk_deltas:
+                offset += delta
+                offsets.append(offset)
+        offsets.sort()
+        return offsets
+
+    def _capture_id(self, capture_path) -> Optional[int]:
+        row = self._conn.execute("SELECT id FROM captures WHERE path = ?", (os.path.abspath(capture_path),)).fetchone()
+        return row[0] if row else None
+
+    # ---- 추출 ----
+
+    def extract_call(self, capture_path, call_id: str, output_path) -> Optional[Dict]:
+        """인덱스의 오프셋만 읽어 콜 하나를 pcapng로 추출하고 콜 정보(+pcapng_path, packet_count) 반환"""
+        call = self.get_call(capture_path, call_id)
+        if call is None:
+            return None
+        offsets = self.call_offsets(capture_path, call_id)
+
+        with PcapReader(capture_path) as reader, PcapngWriter(output_path) as writer:
+            for offset in offsets:
+                packet = reader.packet_at(offset)
+                if packet is not None:
+                    writer.write(packet.timestamp, packet.linktype, packet.data)
+
+        call['pcapng_path'] = str(output_path)
+        call['packet_count'] = writer.packet_count
+        return call
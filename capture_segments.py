@@ -0,0 +1,165 @@
+# dumpcap 링 버퍼 세그먼트 카탈로그 - 세그먼트별 시간 범위/Call-ID 기록, 변환이 끝난 세그먼트 삭제
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from capture_index import CaptureIndex
+from pcap_io import PcapReader, PcapngWriter
+
+# dumpcap -b 로 생성되는 파일 이름: <base>_<5자리 순번>_<YYYYmmddHHMMSS>.pcapng
+_SEGMENT_RE = re.compile(r'_(\d{5,})_(\d{14})$')
+
+
+def ring_buffer_args(filesize_kb: int, duration_sec: int) -> List[str]:
+    """dumpcap 링 버퍼 옵션 (0이면 해당 조건 미사용)"""
+    args = []
+    if filesize_kb > 0:
+        args += ["-b", f"filesize:{filesize_kb}"]
+    if duration_sec > 0:
+        args += ["-b", f"duration:{duration_sec}"]
+    return args
+
+
+class CaptureSegmentCatalog:
+    """링 버퍼 세그먼트를 순서대로 인덱싱하고 보존 정책에 따라 정리
+
+    가장 최근 세그먼트만 dumpcap이 쓰고 있으므로 더 새로운 세그먼트가 생긴 세그먼트는
+    마지막으로 한 번 더 인덱싱한 뒤 봉인(sealed)하고 다시 읽지 않는다. 봉인된 세그먼트는
+    포함된 미디어 콜이 모두 변환되면 삭제하고, 변환되지 않은 콜이 남아 있더라도
+    max_files / max_age_hours를 넘으면 디스크 사용량을 지키기 위해 오래된 것부터 삭제한다.
+    """
+
+    def __init__(self, capture_path, index: CaptureIndex = None, max_files: int = 50, max_age_hours: float = 24):
+        self.capture_path = Path(capture_path)
+        self.index = index or CaptureIndex(self.capture_path.parent / "capture_index.db")
+        self.max_files = max_files
+        self.max_age_hours = max_age_hours
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._follow_thread = None
+        self._stop_event = threading.Event()
+
+    def segments(self) -> List[str]:
+        """현재 존재하는 세그먼트 파일 (오래된 순). 링 버퍼를 쓰지 않으면 캡처 파일 한 개"""
+        stem, suffix = self.capture_path.stem, self.capture_path.suffix
+        found = []
+        for path in self.capture_path.parent.glob(f"{stem}_*{suffix}"):
+            match = _SEGMENT_RE.search(path.stem[len(stem):])
+            if match:
+                # dumpcap을 다시 시작하면 순번이 1부터 다시 시작하므로 생성 시각을 먼저 비교
+                found.append((match.group(2), int(match.group(1)), str(path)))
+        found.sort()
+        segments = [path for _, _, path in found]
+        if self.capture_path.exists():
+            segments.append(str(self.capture_path))
+        return segments
+
+    def refresh(self) -> int:
+        """새로 추가된 패킷을 인덱싱하고 봉인/보존 정책을 적용. 인덱싱한 패킷 수 반환"""
+        with self._lock:
+            segments = self.segments()
+            count = 0
+            previous = None
+            for position, segment in enumerate(segments):
+                if not self.index.is_sealed(segment):
+                    count += self.index.update(segment, inherit_from=previous)
+                    if position < len(segments) - 1:
+                        self.index.seal(segment)
+                previous = segment
+            self.apply_retention(segments)
+            return count
+
+    def apply_retention(self, segments: List[str] = None):
+        segments = segments if segments is not None else self.segments()
+        # 현재 쓰고 있는 마지막 세그먼트는 제외
+        sealed = [segment for segment in segments[:-1] if self.index.is_sealed(segment)]
+        remaining = len(segments)
+        now = time.time()
+        for segment in sealed:
+            pending = self.index.pending_calls(segment)
+            if pending:
+                too_old = now - os.path.getmtime(segment) > self.max_age_hours * 3600
+                too_many = self.max_files and remaining > self.max_files
+                if not (too_old or too_many):
+                    continue
+                self.logger.warning(f"보존 한도 초과로 미변환 콜이 있는 세그먼트 삭제: {segment} (콜: {pending})")
+            self._delete_segment(segment)
+            remaining -= 1
+
+    def _delete_segment(self, segment: str):
+        try:
+            os.remove(segment)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.error(f"세그먼트 삭제 실패: {segment} - {e}")
+            return
+        self.index.forget(segment)
+        self.logger.info(f"캡처 세그먼트 삭제: {segment}")
+
+    def mark_converted(self, call_id: str):
+        self.index.mark_converted(call_id)
+
+    def get_call(self, call_id: str) -> Optional[Dict]:
+        """콜이 걸친 모든 세그먼트의 정보를 합쳐 {'from','to','endpoints','segments'} 반환"""
+        segments = [path for path in self.index.captures_for_call(call_id) if os.path.exists(path)]
+        merged = None
+        for segment in segments:
+            info = self.index.get_call(segment, call_id)
+            if info is None:
+                # SIP 없이 RTP만 들어 있는 세그먼트
+                continue
+            if merged is None:
+                merged = info
+            else:
+                merged['endpoints'] |= info['endpoints']
+                merged['last_ts'] = info['last_ts']
+        if merged is not None:
+            merged['segments'] = segments
+        return merged
+
+    def extract_call(self, call_id: str, output_path) -> Optional[Dict]:
+        """콜과 겹치는 세그먼트만 열어 콜의 패킷을 pcapng 하나로 추출"""
+        with self._lock:
+            call = self.get_call(call_id)
+            if call is None:
+                return None
+            with PcapngWriter(output_path) as writer:
+                for segment in call['segments']:
+                    offsets = self.index.call_offsets(segment, call_id)
+                    with PcapReader(segment) as reader:
+                        for offset in offsets:
+                            packet = reader.packet_at(offset)
+                            if packet is not None:
+                                writer.write(packet.timestamp, packet.linktype, packet.data)
+        call['pcapng_path'] = str(output_path)
+        call['packet_count'] = writer.packet_count
+        return call
+
+    # ---- 백그라운드 추적 ----
+
+    def start_following(self, interval: float = 1.0):
+        """백그라운드 스레드에서 interval초마다 refresh()"""
+        self.stop_following()
+        self._stop_event.clear()
+
+        def follow():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.logger.error(f"캡처 세그먼트 인덱싱 오류: {e}")
+
+        self._follow_thread = threading.Thread(target=follow, daemon=True)
+        self._follow_thread.start()
+        self.logger.info(f"캡처 세그먼트 인덱싱 시작: {self.capture_path}")
+
+    def stop_following(self):
+        if self._follow_thread is not None:
+            self._stop_event.set()
+            self._follow_thread.join(timeout=5)
+            self._follow_thread = None
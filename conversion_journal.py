@@ -0,0 +1,191 @@
+# 변환 작업 저널 - 통화별 변환 작업과 단계별 완료 상태를 SQLite에 기록해 비정상 종료 후 재시작 시 이어서 처리
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 변환 단계 (캡처에서 콜 추출 → 방향별 WAV → MERGE → 녹음 카탈로그 기록 → FLAC/Opus 인코딩)
+STAGES = ('extract', 'in', 'out', 'merge', 'db_insert', 'archive')
+# 실시간 녹음으로 끝난 콜의 처리 원장 표시 (추출한 패킷이 없으므로 개수/해시 대신 기록)
+LIVE_RECORDED = 'live'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    call_id TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    capture_path TEXT,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state);
+CREATE TABLE IF NOT EXISTS stages (
+    call_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    result TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (call_id, stage)
+);
+CREATE TABLE IF NOT EXISTS processed_calls (
+    call_id TEXT PRIMARY KEY,
+    packet_count INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    processed_at REAL NOT NULL
+);
+"""
+
+
+def _encode(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=lambda item: item.isoformat() if isinstance(item, datetime)
+                      else sorted(item) if isinstance(item, set) else str(item))
+
+
+class ConversionJournal:
+    """통화별 변환 작업(pending → running → done/failed)과 완료된 단계의 결과를 저장
+
+    작업은 통화 종료 시 큐에 넣기 전에 기록하고, 단계는 결과 파일이 만들어진 직후
+    결과(경로 등)와 함께 기록한다. 재시작하면 unfinished()의 작업을 다시 큐에 넣고,
+    각 단계는 stage_result()가 있고 결과 파일이 남아 있으면 건너뛴다. WAL 모드라 기록은
+    파일 끝에 덧붙는 수준이며 프로세스가 죽어도 커밋된 내용은 남는다.
+
+    processed_calls는 변환을 마친 Call-ID와 추출된 패킷의 (개수, 해시) 원장이다. 전역
+    캡처 전체를 다시 분리할 때 해시가 같은 콜은 파일을 쓰지 않고 건너뛴다. 실시간 녹음으로
+    끝난 콜은 해시 대신 LIVE_RECORDED로 기록해 항상 건너뛴다.
+    """
+
+    def __init__(self, db_path="temp_captures/conversion_journal.db", max_attempts: int = 3):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---- 작업 ----
+
+    def add_job(self, call_id: str, info: Dict, capture_path: str = None):
+        """변환 작업 기록 (이미 있으면 정보만 갱신하고 완료된 단계는 유지)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (call_id, info, capture_path, state, created_at, updated_at) VALUES (?, ?, ?, 'pending', ?, ?) "
+                "ON CONFLICT(call_id) DO UPDATE SET info = excluded.info, "
+                "capture_path = COALESCE(excluded.capture_path, capture_path), state = 'pending', updated_at = excluded.updated_at",
+                (call_id, _encode(info), capture_path, now, now))
+            self._conn.commit()
+
+    def start_job(self, call_id: str, capture_path: str = None):
+        """실행 시작 - 시도 횟수 증가"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, "
+                "capture_path = COALESCE(?, capture_path), updated_at = ? WHERE call_id = ?",
+                (capture_path, time.time(), call_id))
+            self._conn.commit()
+
+    def finish_job(self, call_id: str, error: str = None):
+        """완료(error 없음) 또는 실패 기록"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE call_id = ?",
+                               ('failed' if error else 'done', error, time.time(), call_id))
+            self._conn.commit()
+
+    def job(self, call_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info, capture_path, state, attempts, error FROM jobs WHERE call_id = ?", (call_id,)).fetchone()
+        if row is None:
+            return None
+        info, capture_path, state, attempts, error = row
+        return {'call_id': call_id, 'info': json.loads(info), 'capture_path': capture_path,
+                'state': state, 'attempts': attempts, 'error': error}
+
+    def unfinished(self) -> List[Dict]:
+        """재시작 시 다시 실행할 작업 (대기·실행 중이던 것, 시도 횟수가 남은 실패)"""
+        with self._lock:
+            call_ids = [call_id for (call_id,) in self._conn.execute(
+                "SELECT call_id FROM jobs WHERE state IN ('pending', 'running') OR (state = 'failed' AND attempts < ?) "
+                "ORDER BY created_at", (self.max_attempts,))]
+        return [self.job(call_id) for call_id in call_ids]
+
+    def prune(self, max_age_days: float = 7) -> int:
+        """오래된 완료 작업과 단계 기록, 처리 원장 삭제"""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            self._conn.execute("DELETE FROM processed_calls WHERE processed_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM stages WHERE call_id IN "
+                               "(SELECT call_id FROM jobs WHERE state = 'done' AND updated_at < ?)", (cutoff,))
+            deleted = self._conn.execute("DELETE FROM jobs WHERE state = 'done' AND updated_at < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        return deleted
+
+    # ---- 단계 ----
+
+    def mark_stage(self, call_id: str, stage: str, result: Dict = None):
+        """단계 완료 기록 (결과 파일 경로 등)"""
+        if stage not in STAGES:
+            raise ValueError(f"알 수 없는 변환 단계: {stage}")
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO stages (call_id, stage, result, finished_at) VALUES (?, ?, ?, ?)",
+                               (call_id, stage, _encode(result or {}), time.time()))
+            self._conn.commit()
+
+    def stage_result(self, call_id: str, stage: str) -> Optional[Dict]:
+        """완료된 단계의 결과, 완료되지 않았으면 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM stages WHERE call_id = ? AND stage = ?",
+                                     (call_id, stage)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def completed_file(self, call_id: str, stage: str) -> Optional[Path]:
+        """단계가 완료됐고 결과 파일('path')이 아직 있으면 그 경로 (건너뛰어도 되는 단계)"""
+        result = self.stage_result(call_id, stage)
+        if not result or not result.get('path'):
+            return None
+        path = Path(result['path'])
+        return path if path.exists() and path.stat().st_size > 0 else None
+
+    def clear_stages(self, call_id: str):
+        """콜의 단계 기록 삭제 (새 패킷이 들어와 처음부터 다시 변환할 때)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM stages WHERE call_id = ?", (call_id,))
+            self._conn.commit()
+
+    def stages(self, call_id: str) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT stage, result FROM stages WHERE call_id = ?", (call_id,)).fetchall()
+        return {stage: json.loads(result) for stage, result in rows}
+
+    # ---- 처리 원장 ----
+
+    def mark_processed(self, call_id: str, packet_count: int, digest: str):
+        """변환을 마친 콜의 추출 패킷 (개수, 해시) 기록"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO processed_calls (call_id, packet_count, digest, processed_at) VALUES (?, ?, ?, ?)",
+                (call_id, packet_count, digest, time.time()))
+            self._conn.commit()
+
+    def mark_recorded_live(self, call_id: str):
+        """실시간 녹음으로 변환을 마친 콜 기록 - 전체 분리에서 패킷 수와 관계없이 건너뜀"""
+        self.mark_processed(call_id, 0, LIVE_RECORDED)
+
+    def processed_calls(self) -> Dict[str, Tuple[int, str]]:
+        """{call_id: (packet_count, digest)}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT call_id, packet_count, digest FROM processed_calls").fetchall()
+        return {call_id: (packet_count, digest) for call_id, packet_count, digest in rows}
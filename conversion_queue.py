@@ -0,0 +1,203 @@
+# 변환 작업 스케줄러 - 고정 크기 워커 풀 + 크기 제한 우선순위 큐 (콜마다 스레드를 띄우지 않음)
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+_local = threading.local()
+
+
+class JobTimeout(Exception):
+    """작업이 허용 시간을 넘김 (check_deadline에서 발생)"""
+
+
+def remaining(default: float = None) -> Optional[float]:
+    """현재 작업의 남은 시간(초). 작업 밖이거나 제한이 없으면 default
+
+    작업 안에서 subprocess.run(timeout=...) 등에 넘겨 외부 프로세스도 제한 시간 안에 끝나게 한다.
+    """
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is None:
+        return default
+    left = max(deadline - time.monotonic(), 0.0)
+    return left if default is None else min(left, default)
+
+
+def check_deadline():
+    """현재 작업이 제한 시간을 넘겼으면 JobTimeout (단계 사이에서 호출)"""
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is not None and time.monotonic() > deadline:
+        raise JobTimeout(getattr(_local, 'job_name', ''))
+
+
+class _Job:
+    __slots__ = ('name', 'func', 'args', 'priority', 'not_before', 'timeout', 'submitted', 'order')
+
+    def __init__(self, name, func, args, priority, not_before, timeout, order):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.not_before = not_before
+        self.timeout = timeout
+        self.submitted = time.monotonic()
+        self.order = order
+
+    def __lt__(self, other):
+        return (self.priority, self.order) < (other.priority, other.order)
+
+
+class ConversionScheduler:
+    """통화 종료 후 변환 작업을 고정된 워커 수로 처리하는 스케줄러
+
+    - 큐가 max_queue개로 차면 submit()이 wait초까지 기다리고(backpressure) 그래도 자리가
+      없으면 거절한다.
+    - priority가 작은 작업부터 실행한다(짧은 통화 먼저). 같으면 먼저 들어온 순서.
+    - delay를 주면 그 시간이 지난 뒤에 실행한다(캡처 파일 안정화 대기). 워커는 그동안
+      다른 작업을 처리한다.
+    - 작업마다 timeout을 두어 remaining()/check_deadline()으로 외부 프로세스와 단계별
+      처리를 제한하고, 넘기면 timed_out으로 집계한다.
+    - 같은 name의 작업이 이미 대기 중이면 다시 넣지 않는다.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 64, timeout: float = 300.0, name: str = 'conversion'):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.timeout = timeout
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._jobs = []
+        self._queued_names = set()
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._running = 0
+        self._closed = False
+        self._threads = []
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timed_out': 0, 'rejected': 0,
+                       'coalesced': 0, 'max_depth': 0, 'wait_total': 0.0, 'wait_max': 0.0,
+                       'run_total': 0.0, 'run_max': 0.0}
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, name: str, func: Callable, *args, priority: float = 0.0, delay: float = 0.0,
+               timeout: float = None, wait: float = None) -> bool:
+        """작업 등록. 큐가 가득 차면 wait초(None이면 무한)까지 대기하고, 실패하면 False"""
+        with self._cond:
+            if self._closed:
+                return False
+            if name in self._queued_names:
+                self._stats['coalesced'] += 1
+                return True
+            deadline = None if wait is None else time.monotonic() + wait
+            while len(self._jobs) >= self.max_queue and not self._closed:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    self._stats['rejected'] += 1
+                    self.logger.error(f"변환 큐 가득 참 ({self.max_queue}개) - 작업 거절: {name}")
+                    return False
+                self._cond.wait(left)
+            if self._closed:
+                return False
+            self._start_workers()
+            job = _Job(name, func, args, priority, time.monotonic() + delay,
+                       self.timeout if timeout is None else timeout, next(self._order))
+            self._jobs.append(job)
+            self._queued_names.add(name)
+            self._stats['submitted'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], len(self._jobs))
+            self._cond.notify_all()
+        return True
+
+    def _next_job(self) -> Optional[_Job]:
+        """실행 가능한(지연이 끝난) 작업 중 우선순위가 가장 높은 것. 없으면 기다림, 종료 시 None"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                now = time.monotonic()
+                ready = [job for job in self._jobs if job.not_before <= now]
+                if ready:
+                    job = min(ready)
+                    self._jobs.remove(job)
+                    self._queued_names.discard(job.name)
+                    self._running += 1
+                    self._cond.notify_all()
+                    return job
+                wake = min((job.not_before for job in self._jobs), default=None)
+                self._cond.wait(None if wake is None else wake - now)
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            started = time.monotonic()
+            waited = started - job.submitted
+            _local.deadline = started + job.timeout if job.timeout else None
+            _local.job_name = job.name
+            outcome = 'completed'
+            try:
+                job.func(*job.args)
+            except JobTimeout:
+                outcome = 'timed_out'
+            except Exception as e:
+                outcome = 'failed'
+                self.logger.error(f"변환 작업 오류: {job.name} - {e}")
+            finally:
+                _local.deadline = None
+                _local.job_name = None
+            elapsed = time.monotonic() - started
+            if outcome == 'completed' and job.timeout and elapsed > job.timeout:
+                outcome = 'timed_out'
+            if outcome == 'timed_out':
+                self.logger.warning(f"변환 작업 시간 초과: {job.name} ({elapsed:.1f}초 > {job.timeout:g}초)")
+            with self._cond:
+                self._running -= 1
+                stats = self._stats
+                stats[outcome] += 1
+                stats['wait_total'] += waited
+                stats['wait_max'] = max(stats['wait_max'], waited)
+                stats['run_total'] += elapsed
+                stats['run_max'] = max(stats['run_max'], elapsed)
+                self._cond.notify_all()
+            self.logger.info(f"변환 작업 {outcome}: {job.name} (대기 {waited:.2f}초, 실행 {elapsed:.2f}초, 남은 작업 {len(self._jobs)}개)")
+
+    def metrics(self) -> Dict[str, float]:
+        """큐 깊이, 실행 중 작업 수, 누적 대기/실행 시간 통계"""
+        with self._cond:
+            stats = dict(self._stats)
+            finished = stats['completed'] + stats['failed'] + stats['timed_out']
+            stats['depth'] = len(self._jobs)
+            stats['running'] = self._running
+            stats['wait_avg'] = stats['wait_total'] / finished if finished else 0.0
+            stats['run_avg'] = stats['run_total'] / finished if finished else 0.0
+        return stats
+
+    def join(self, timeout: float = None) -> bool:
+        """대기 중·실행 중 작업이 모두 끝날 때까지 기다림. 시간 안에 끝나면 True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._jobs or self._running:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def shutdown(self, wait: float = 0.0):
+        """새 작업을 받지 않고 워커 종료. wait초 동안은 남은 작업을 처리하도록 기다림"""
+        if wait:
+            self.join(wait)
+        with self._cond:
+            dropped = len(self._jobs)
+            self._closed = True
+            self._jobs.clear()
+            self._queued_names.clear()
+            self._cond.notify_all()
+        if dropped:
+            self.logger.warning(f"종료로 처리하지 못한 변환 작업: {dropped}개")
@@ -0,0 +1,144 @@
+# 내선 디렉터리 캐시 - internalnumber / members 컬렉션을 메모리에 올려 캡처·알림 경로에서 MongoDB 조회를 없앤다
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+_MEMBER_FIELDS = ('default_ip', 'per_lv8', 'per_lv9')
+
+
+class ExtensionDirectory:
+    """내선번호 → IP / 권한 메모리 캐시
+
+    attach(db)에서 두 컬렉션을 한 번에 읽고, 백그라운드 스레드가 change stream으로
+    변경을 받아 다시 읽는다. change stream을 쓸 수 없는 단독 서버(replica set 아님)면
+    ttl초마다 다시 읽는다. 조회 메서드는 메모리의 dict만 읽으므로 MongoDB가 느리거나
+    끊겨도 호출한 스레드가 멈추지 않고, 마지막으로 읽은 값을 그대로 돌려준다.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._db = None
+        self._internal_ips: Dict[str, str] = {}
+        self._members: Dict[str, Dict[str, str]] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+
+    def attach(self, db, watch: bool = True):
+        """MongoDB 연결 후 백그라운드 스레드에서 전체 로드와 갱신 시작"""
+        self.close()
+        self._db = db
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, args=(watch,), daemon=True)
+        self._refresh_thread.start()
+
+    def close(self):
+        if self._refresh_thread is not None:
+            self._stop_event.set()
+            self._refresh_thread.join(timeout=5)
+            self._refresh_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at > 0
+
+    def reload(self) -> bool:
+        """두 컬렉션을 한 번씩 읽어 캐시를 통째로 교체. 실패하면 기존 캐시 유지"""
+        if self._db is None:
+            return False
+        try:
+            internal_ips = {}
+            for doc in self._db['internalnumber'].find({}, {'internal_number': 1, 'ip_address': 1, '_id': 0}):
+                number = str(doc.get('internal_number', ''))
+                if number:
+                    internal_ips[number] = doc.get('ip_address', '')
+            members = {}
+            for doc in self._db['members'].find({}, {'extension_num': 1, **{field: 1 for field in _MEMBER_FIELDS}, '_id': 0}):
+                extension = str(doc.get('extension_num', ''))
+                if extension:
+                    members[extension] = {field: doc.get(field, '') for field in _MEMBER_FIELDS}
+        except Exception as e:
+            self.logger.error(f"내선 디렉터리 로드 실패 (기존 캐시 유지): {e}")
+            return False
+        with self._lock:
+            self._internal_ips = internal_ips
+            self._members = members
+            self._loaded_at = time.time()
+        self.logger.info(f"내선 디렉터리 로드: internalnumber {len(internal_ips)}개, members {len(members)}개")
+        return True
+
+    def _refresh_loop(self, watch: bool):
+        # 첫 로드도 백그라운드에서 - 연결이 느려도 호출한 스레드(UI)를 막지 않음
+        self.reload()
+        while not self._stop_event.is_set():
+            if watch:
+                try:
+                    self._watch_changes()
+                    continue
+                except Exception as e:
+                    self.logger.info(f"change stream 사용 불가, {self.ttl:.0f}초 주기 갱신으로 전환: {e}")
+                    watch = False
+            if self._stop_event.wait(self.ttl):
+                return
+            self.reload()
+
+    def _watch_changes(self):
+        pipeline = [{'$match': {'ns.coll': {'$in': ['internalnumber', 'members']}}}]
+        with self._db.watch(pipeline, max_await_time_ms=1000) as stream:
+            while not self._stop_event.is_set():
+                change = stream.try_next()
+                # 변경이 있거나 ttl이 지나면 다시 로드 (놓친 이벤트 대비)
+                if change is not None or time.time() - self._loaded_at > self.ttl:
+                    self.reload()
+
+    # ---- 조회 (메모리만 사용) ----
+
+    def internal_ip(self, number) -> Optional[str]:
+        """internalnumber 컬렉션의 내선 IP"""
+        return self._internal_ips.get(str(number)) or None
+
+    def member(self, extension) -> Optional[Dict[str, str]]:
+        """members 컬렉션의 {'default_ip', 'per_lv8', 'per_lv9'}"""
+        member = self._members.get(str(extension))
+        return dict(member) if member is not None else None
+
+    def lookup_member(self, extension) -> Optional[Dict[str, str]]:
+        """녹음 권한 조회용 member - 캐시가 로드됐으면 캐시, 첫 로드 전(또는 로드 실패)이면 MongoDB members를 한 번 조회
+
+        녹음 저장은 첫 로드를 기다리지 않으므로 캐시만 보면 시작 직후 녹음의 권한이 비게 된다.
+        조회에 실패하면 캐시 값(update_member로 들어온 값, 없으면 None)을 돌려준다.
+        """
+        if self.loaded or self._db is None:
+            return self.member(extension)
+        extension = str(extension)
+        projection = {**{field: 1 for field in _MEMBER_FIELDS}, '_id': 0}
+        try:
+            doc = self._db['members'].find_one({'extension_num': extension}, projection)
+        except Exception as e:
+            self.logger.warning(f"내선 디렉터리 로드 전 members 조회 실패: {extension} - {e}")
+            return self.member(extension)
+        if doc is None:
+            return self.member(extension)
+        return {field: doc.get(field, '') for field in _MEMBER_FIELDS}
+
+    def default_ip(self, extension) -> Optional[str]:
+        member = self._members.get(str(extension))
+        return (member.get('default_ip') or None) if member else None
+
+    def permissions(self, extension) -> Tuple[str, str]:
+        """(per_lv8, per_lv9), 없으면 빈 문자열"""
+        member = self._members.get(str(extension)) or {}
+        return member.get('per_lv8', ''), member.get('per_lv9', '')
+
+    def update_member(self, extension, **fields):
+        """다른 경로에서 members를 갱신했을 때 캐시에 바로 반영 (웹소켓 내선 등록 등)"""
+        extension = str(extension)
+        with self._lock:
+            members = dict(self._members)
+            member = dict(members.get(extension) or {field: '' for field in _MEMBER_FIELDS})
+            member.update({key: value for key, value in fields.items() if key in _MEMBER_FIELDS})
+            members[extension] = member
+            self._members = members
@@ -0,0 +1,305 @@
+# filesinfo 기록기 - counters 컬렉션의 원자적 $inc로 id를 발급하고 문서를 모아 insert_many로 한 번에 저장
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+COUNTER_ID = 'filesinfo'
+
+
+def _only_duplicates(error) -> bool:
+    """insert_many 실패가 모두 중복 키(이전 시도에서 이미 저장된 문서)인지"""
+    details = getattr(error, 'details', None) or {}
+    write_errors = details.get('writeErrors') or []
+    return bool(write_errors) and not details.get('writeConcernErrors') and \
+        all(item.get('code') == 11000 for item in write_errors)
+
+
+def _encode_doc(doc: Dict) -> str:
+    # datetime(created_at)은 되돌릴 때 다시 datetime이 되도록 표시, insert_many가 붙인 _id는 버림
+    return json.dumps({key: value for key, value in doc.items() if key != '_id'}, ensure_ascii=False,
+                      default=lambda value: {'$date': value.isoformat()} if isinstance(value, datetime) else str(value))
+
+
+def _decode_doc(text: str) -> Dict:
+    return json.loads(text, object_hook=lambda item: datetime.fromisoformat(item['$date'])
+                      if len(item) == 1 and '$date' in item else item)
+
+
+class SpillQueue:
+    """MongoDB에 저장하지 못한 filesinfo 문서를 순서대로 보관하는 로컬 SQLite 큐
+
+    같은 call_id는 한 번만 보관한다. WAL 모드라 프로세스가 죽어도 커밋된 문서는 남고,
+    다음 실행에서 연결되면 그대로 이어서 저장된다.
+    """
+
+    def __init__(self, db_path="temp_captures/filesinfo_spill.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS spill (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                           "call_id TEXT UNIQUE, doc TEXT NOT NULL, queued_at REAL NOT NULL)")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def push(self, docs: List[Dict]) -> int:
+        """문서 추가 (이미 보관 중인 call_id는 무시). 추가한 수 반환"""
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO spill (call_id, doc, queued_at) VALUES (?, ?, ?)",
+                                   [(doc.get('call_id') or None, _encode_doc(doc), now) for doc in docs])
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def peek(self, limit: int) -> List[Tuple[int, Dict]]:
+        """가장 오래된 문서부터 limit개 [(seq, doc)]"""
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, doc FROM spill ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [(seq, _decode_doc(doc)) for seq, doc in rows]
+
+    def update(self, rows: List[Tuple[int, Dict]]):
+        """발급받은 id 등을 문서에 기록 (재시도해도 같은 id로 저장)"""
+        with self._lock:
+            self._conn.executemany("UPDATE spill SET doc = ? WHERE seq = ?", [(_encode_doc(doc), seq) for seq, doc in rows])
+            self._conn.commit()
+
+    def remove(self, seqs: List[int]):
+        with self._lock:
+            self._conn.executemany("DELETE FROM spill WHERE seq = ?", [(seq,) for seq in seqs])
+            self._conn.commit()
+
+    def stats(self) -> Tuple[int, float]:
+        """(보관 중인 문서 수, 가장 오래된 문서의 보관 시각 - 없으면 0)"""
+        with self._lock:
+            count, oldest = self._conn.execute("SELECT COUNT(*), MIN(queued_at) FROM spill").fetchone()
+        return count, oldest or 0.0
+
+
+class FilesInfoWriter:
+    """filesinfo 문서를 큐에 모아 batch_size개가 차거나 flush_interval초가 지나면 insert_many로 저장
+
+    id는 저장할 때 counters 컬렉션({'_id': 'filesinfo', 'seq': n})을 find_one_and_update($inc)로
+    배치 크기만큼 한 번에 올려 발급하므로 병렬 변환에서도 겹치지 않고, 컬렉션 크기와 무관하게
+    한 번의 요청으로 끝난다. 처음 연결할 때 한 번만 기존 최대 id로 카운터를 맞춘다($max).
+
+    spill_path가 있으면 연결 전이거나 저장에 실패한 문서를 SpillQueue에 옮기고, 연결되면 오래된
+    것부터 배치로 다시 저장한다. 이미 filesinfo에 있는 call_id는 건너뛰므로 중간에 끊겨 다시
+    보내도 중복되지 않는다. 보관 문서가 남아 있는 동안 새 문서도 보관 큐 뒤에 붙여 순서를 지킨다.
+    put()은 메모리 큐에 넣기만 하므로 MongoDB가 느리거나 끊겨도 호출한 스레드는 기다리지 않는다.
+    spill_path가 없으면 실패한 문서를 메모리 큐 앞에 되돌린다 (max_pending 초과분은 오래된 것부터 버림).
+    """
+
+    def __init__(self, batch_size: int = 50, flush_interval: float = 1.0, max_pending: int = 10000,
+                 spill_path=None):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(__name__)
+        self.inserted = 0
+        self.spilled = 0
+        self.drained = 0
+        self.spill = SpillQueue(spill_path) if spill_path else None
+        self._db = None
+        self._seeded = False
+        self._failed = False
+        self._pending: List[Dict] = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """백그라운드 저장 스레드 시작 (연결 전에는 보관 큐로만 옮김)"""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="filesinfo-writer", daemon=True)
+            self._thread.start()
+
+    def attach(self, db):
+        """MongoDB 연결(재연결) 후 저장 시작 - 연결 전에 쌓인 문서와 보관 문서도 이때 저장"""
+        with self._flush_lock:
+            self._db = db
+            self._seeded = False
+            self._failed = False
+        self.start()
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self, flush: bool = True, timeout: float = 5.0):
+        """저장 스레드 종료. flush면 남은 문서를 마지막으로 저장 (저장하지 못하면 보관 큐에 남김)"""
+        if self._thread is not None:
+            self._stop_event.set()
+            with self._condition:
+                self._condition.notify_all()
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if flush:
+            self.flush()
+        self.logger.info(f"filesinfo 저장 통계: {self.metrics()}")
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+    def put(self, doc: Dict):
+        """문서를 저장 큐에 추가 (id가 없으면 저장할 때 발급)"""
+        with self._condition:
+            self._pending.append(doc)
+            self._trim_locked()
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def metrics(self) -> Dict[str, float]:
+        """메모리 큐 깊이, 보관 큐 깊이와 가장 오래된 문서의 나이(초), 누적 저장/보관/재저장 수"""
+        spilled, oldest = self.spill.stats() if self.spill is not None else (0, 0.0)
+        return {'pending': self.pending(), 'spill_depth': spilled,
+                'spill_age': time.time() - oldest if oldest else 0.0, 'connected': self._db is not None,
+                'inserted': self.inserted, 'spilled': self.spilled, 'drained': self.drained}
+
+    def allocate_ids(self, count: int = 1) -> range:
+        """counters 컬렉션에서 연속된 id count개 발급"""
+        counters = self._db['counters']
+        if not self._seeded:
+            self._seed_counter()
+        # return_document=True: ReturnDocument.AFTER (증가한 뒤의 값)
+        counter = counters.find_one_and_update({'_id': COUNTER_ID}, {'$inc': {'seq': count}},
+                                               upsert=True, return_document=True)
+        last = counter['seq']
+        return range(last - count + 1, last + 1)
+
+    def _seed_counter(self):
+        # 카운터 도입 전에 저장된 문서의 최대 id (id 인덱스로 한 건만 읽음)
+        latest = self._db['filesinfo'].find_one({}, {'id': 1}, sort=[('id', -1)])
+        max_id = int(latest.get('id') or 0) if latest else 0
+        self._db['counters'].update_one({'_id': COUNTER_ID}, {'$max': {'seq': max_id}}, upsert=True)
+        self._seeded = True
+
+    def _assign_ids(self, docs: List[Dict]) -> bool:
+        without_id = [doc for doc in docs if 'id' not in doc]
+        for doc, doc_id in zip(without_id, self.allocate_ids(len(without_id)) if without_id else ()):
+            doc['id'] = doc_id
+        return bool(without_id)
+
+    def _insert(self, docs: List[Dict]):
+        try:
+            self._db['filesinfo'].insert_many(docs, ordered=False)
+        except Exception as e:
+            if not _only_duplicates(e):
+                raise
+
+    def flush(self) -> int:
+        """큐의 문서를 batch_size개씩 저장 (보관 문서가 먼저). 저장한 문서 수 반환"""
+        with self._flush_lock:
+            if self.spill is not None and (self._db is None or self._failed or self.spill.stats()[0]):
+                # 끊겨 있거나 보관 문서가 남아 있으면 새 문서도 보관 큐 뒤에 붙여 순서 유지
+                self._spill_pending()
+            if self._db is None:
+                return 0
+            self._failed = False
+            saved = self._drain_spill() if self.spill is not None else 0
+            while not self._failed:
+                with self._condition:
+                    batch = self._pending[:self.batch_size]
+                    del self._pending[:self.batch_size]
+                if not batch:
+                    break
+                try:
+                    # 이미 id가 있는 문서는 실패/시간 초과 뒤 재시도 - 일부가 저장됐을 수 있으므로 call_id로 거름
+                    retry = any('id' in doc for doc in batch)
+                    self._assign_ids(batch)
+                    fresh = self._unsaved(batch) if retry else batch
+                    if fresh:
+                        self._insert(fresh)
+                except Exception as e:
+                    self.logger.error(f"filesinfo 저장 실패 ({len(batch)}건, 다음 주기에 재시도): {e}")
+                    self._failed = True
+                    if self.spill is not None:
+                        self.spilled += self.spill.push(batch)
+                    else:
+                        self._requeue(batch)
+                    break
+                saved += len(fresh)
+                self.inserted += len(fresh)
+                self.logger.info(f"filesinfo {len(fresh)}건 저장 (id {batch[0]['id']}~{batch[-1]['id']}, "
+                                 f"이미 저장된 문서 {len(batch) - len(fresh)}건 건너뜀)")
+            return saved
+
+    def _unsaved(self, docs: List[Dict]) -> List[Dict]:
+        """filesinfo에 아직 없는 문서만 (call_id가 없는 문서는 그대로 저장)"""
+        call_ids = [doc['call_id'] for doc in docs if doc.get('call_id')]
+        existing = {item.get('call_id') for item in self._db['filesinfo'].find(
+            {'call_id': {'$in': call_ids}}, {'call_id': 1})} if call_ids else set()
+        return [doc for doc in docs if not doc.get('call_id') or doc['call_id'] not in existing]
+
+    def _spill_pending(self):
+        with self._condition:
+            docs, self._pending = self._pending, []
+        if docs:
+            self.spilled += self.spill.push(docs)
+
+    def _drain_spill(self) -> int:
+        """보관 문서를 오래된 순서로 배치 저장. 이미 filesinfo에 있는 call_id는 건너뜀"""
+        saved = 0
+        while True:
+            rows = self.spill.peek(self.batch_size)
+            if not rows:
+                return saved
+            docs = [doc for _, doc in rows]
+            try:
+                if self._assign_ids(docs):
+                    self.spill.update(rows)
+                fresh = self._unsaved(docs)
+                if fresh:
+                    self._insert(fresh)
+            except Exception as e:
+                self.logger.error(f"filesinfo 보관 문서 재저장 실패 ({len(rows)}건 보관 유지): {e}")
+                self._failed = True
+                return saved
+            self.spill.remove([seq for seq, _ in rows])
+            saved += len(fresh)
+            self.inserted += len(fresh)
+            self.drained += len(rows)
+            self.logger.info(f"filesinfo 보관 문서 {len(fresh)}건 재저장 (중복 {len(rows) - len(fresh)}건 건너뜀)")
+
+    def _requeue(self, batch: List[Dict]):
+        with self._condition:
+            self._pending[:0] = batch
+            self._trim_locked()
+
+    def _trim_locked(self):
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.logger.error(f"filesinfo 저장 대기 초과 - 오래된 문서 {overflow}건 버림")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            with self._condition:
+                while len(self._pending) < self.batch_size and not self._stop_event.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"filesinfo 저장 스레드 오류: {e}")
+                self._failed = True
+            if self._failed:
+                # 연결 장애 중에는 큐가 차 있어도 주기마다 한 번만 시도
+                self._stop_event.wait(self.flush_interval)
@@ -0,0 +1,97 @@
+# G.711 (PCMU/PCMA) 코덱 - 256개 항목 int16 조회 테이블로 NumPy 배열을 한 번에 디코딩 (audioop 대체)
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+PCMU = 0
+PCMA = 8
+
+_SEG_UEND = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+_SEG_AEND = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+
+
+def _ulaw_decode_table() -> np.ndarray:
+    u_val = ~np.arange(256, dtype=np.int32) & 0xFF
+    t = (((u_val & 0x0F) << 3) + 0x84) << ((u_val & 0x70) >> 4)
+    return np.where(u_val & 0x80, 0x84 - t, t - 0x84).astype(np.int16)
+
+
+def _alaw_decode_table() -> np.ndarray:
+    a_val = np.arange(256, dtype=np.int32) ^ 0x55
+    t = (a_val & 0x0F) << 4
+    seg = (a_val & 0x70) >> 4
+    t = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+    return np.where(a_val & 0x80, t, -t).astype(np.int16)
+
+
+def _ulaw_encode_table() -> np.ndarray:
+    """int16 전체 값(65536개) → μ-law 바이트, 인덱스는 uint16로 본 샘플 값"""
+    pcm = np.arange(65536, dtype=np.int32).astype(np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), 8159) + 33
+    seg = np.searchsorted(_SEG_UEND, pcm, side='left')
+    uval = (seg << 4) | ((pcm >> (seg + 1)) & 0x0F)
+    return np.where(seg >= 8, 0x7F ^ mask, uval ^ mask).astype(np.uint8)
+
+
+def _alaw_encode_table() -> np.ndarray:
+    pcm = np.arange(65536, dtype=np.int32).astype(np.uint16).view(np.int16).astype(np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg = np.searchsorted(_SEG_AEND, pcm, side='left')
+    aval = (seg << 4) | (np.where(seg < 2, pcm >> 1, pcm >> np.minimum(seg, 7)) & 0x0F)
+    return np.where(seg >= 8, 0x7F ^ mask, aval ^ mask).astype(np.uint8)
+
+
+_DECODE_TABLES = {PCMU: _ulaw_decode_table(), PCMA: _alaw_decode_table()}
+_ENCODE_TABLES = {PCMU: _ulaw_encode_table(), PCMA: _alaw_encode_table()}
+# (payload_type, gain) → 게인과 클리핑을 미리 적용한 테이블
+_gain_tables: Dict[Tuple[int, float], np.ndarray] = {}
+
+
+def decode_table(payload_type: int, gain: float = 1.0) -> np.ndarray:
+    """게인 적용·int16 클리핑까지 끝낸 256개 항목 디코딩 테이블 (audioop.mul과 같이 내림)"""
+    table = _gain_tables.get((payload_type, gain))
+    if table is None:
+        if payload_type not in _DECODE_TABLES:
+            raise ValueError(f"지원하지 않는 G.711 페이로드 타입: {payload_type}")
+        table = _DECODE_TABLES[payload_type]
+        if gain != 1.0:
+            table = np.floor(np.clip(table.astype(np.float64) * gain, -32768, 32767)).astype(np.int16)
+        table.flags.writeable = False
+        _gain_tables[(payload_type, gain)] = table
+    return table
+
+
+def decode(data, payload_type: int, gain: float = 1.0) -> np.ndarray:
+    """G.711 바이트열 → int16 배열. 디코딩·게인·클리핑이 테이블 조회 한 번"""
+    return decode_table(payload_type, gain)[np.frombuffer(data, dtype=np.uint8)]
+
+
+def decode_bytes(data, payload_type: int, gain: float = 1.0) -> bytes:
+    """audioop.alaw2lin/ulaw2lin(data, 2) (+ audioop.mul)과 같은 16비트 리틀엔디언 PCM"""
+    return decode(data, payload_type, gain).astype('<i2', copy=False).tobytes()
+
+
+def decode_batch(payloads: Iterable[bytes], payload_type: int, gain: float = 1.0) -> np.ndarray:
+    """여러 패킷의 페이로드를 이어 붙여 한 번에 디코딩"""
+    return decode(b''.join(payloads), payload_type, gain)
+
+
+def encode(samples, payload_type: int) -> bytes:
+    """int16 PCM(배열 또는 16비트 바이트열) → G.711 바이트열"""
+    if not isinstance(samples, np.ndarray):
+        samples = np.frombuffer(samples, dtype='<i2')
+    return _ENCODE_TABLES[payload_type][samples.astype(np.int16, copy=False).view(np.uint16)].tobytes()
+
+
+def apply_gain(samples: np.ndarray, gain: float) -> np.ndarray:
+    """이미 디코딩된 int16 PCM에 게인과 클리핑 적용 (audioop.mul 대체)"""
+    if gain == 1.0:
+        return samples
+    return np.floor(np.clip(samples * float(gain), -32768, 32767)).astype(np.int16)
+
+
+def mix(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """길이가 같은 두 int16 PCM을 더하고 클리핑 (audioop.add 대체)"""
+    return np.clip(first.astype(np.int32) + second, -32768, 32767).astype(np.int16)
@@ -0,0 +1,232 @@
+# 실시간 통화 녹음 - 캡처 스레드가 받은 RTP 페이로드를 바로 디코딩해 IN/OUT/MERGE WAV에 덧붙인다
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+import audio_dsp
+import g711_codec
+import recording_storage
+from rtp_jitter_buffer import RtpJitterBuffer, SILENCE_BYTES
+from wav_stream_writer import StreamingWavWriter
+
+DIRECTIONS = ('IN', 'OUT')
+
+# G.711만 실시간 디코딩 (0 = PCMU, 8 = PCMA). DTMF/CN 등 나머지 페이로드는 무시
+_G711_PAYLOAD_TYPES = (g711_codec.PCMU, g711_codec.PCMA)
+
+
+class _LiveCall:
+    """녹음 중인 콜 한 개 - 방향별 writer, MERGE writer, 믹싱 대기 버퍼"""
+
+    def __init__(self, call_id: str, part_dir: Path, sample_rate: int, gain: float, header_interval: float,
+                 archival: bool = False):
+        self.call_id = call_id
+        self.started = time.time()
+        self.last_packet = self.started
+        self.packets = 0
+        self.archival = archival
+        self.header_interval = header_interval
+        safe_id = re.sub(r'[<>:"/\\|?*@;]', '_', call_id)[:60]
+        self.part_paths = {name: part_dir / f"{safe_id}_{name}.wav.part" for name in DIRECTIONS + ('MERGE',)}
+        if archival:
+            # 원본 G.711 보관: 방향별 파일은 첫 프레임의 페이로드 타입(A-law/μ-law)으로 열고,
+            # MERGE는 8kHz 합을 A-law로 기록. 필터·리샘플은 하지 않음
+            self.writers = {'MERGE': recording_storage.g711_writer(self.part_paths['MERGE'],
+                                                                   header_interval=header_interval)}
+            self.chains = {}
+        else:
+            self.writers = {name: StreamingWavWriter(path, framerate=sample_rate, header_interval=header_interval)
+                            for name, path in self.part_paths.items()}
+        self.pending = {direction: bytearray() for direction in DIRECTIONS}
+        self.jitter_buffers = {direction: None for direction in DIRECTIONS}
+        self.payload_types = {direction: None for direction in DIRECTIONS}
+        self.encoded = {direction: bytearray() for direction in DIRECTIONS}
+        if not archival:
+            # 파일별 대역 제한 + 게인 + 8kHz→sample_rate 리샘플 (0.1초 블록). MERGE는 양방향 합이므로
+            # amix처럼 절반으로 줄여 게인을 맞춤
+            self.chains = {name: audio_dsp.transcription_chain(8000, sample_rate, gain if name in DIRECTIONS else gain / 2,
+                                                               normalize=False, block_size=800)
+                           for name in self.writers}
+
+
+class LiveCallRecorder:
+    """RTP 패킷 단위로 통화를 녹음하는 실시간 녹음기
+
+    start_call()로 콜별 writer를 열고, feed()가 G.711 페이로드를 디코딩해 방향별
+    파일에 바로 덧붙인다. 각 파일은 후처리 경로와 같은 300~3400Hz 대역 제한, 볼륨 2배,
+    polyphase 리샘플을 거치며, 선읽기가 필요한 동적 정규화는 실시간 경로에서 뺀다. MERGE는 양방향 PCM을 도착 순서대로 맞춰 더하고,
+    한쪽이 merge_lag초 이상 조용하면(무음 억제, 단방향 오디오) 다른 쪽만 내보낸다.
+    finish_call()은 남은 샘플을 내보내고 헤더를 닫은 뒤 최종 경로로 이름만 바꾸므로
+    BYE 직후 바로 끝난다. 녹음 중인 파일은 save_path 아래 .live 폴더에 .wav.part로 두어
+    최종 폴더와 같은 볼륨에서 rename 된다.
+    storage_format이 pcm이 아니면(recording_storage) 방향별 파일에 수신한 G.711 바이트를
+    그대로 쓰고 MERGE는 8kHz A-law로 기록한다.
+    """
+
+    def __init__(self, base_path, sample_rate: int = 16000, gain: float = 2.0,
+                 merge_lag: float = 0.5, header_interval: float = 1.0, storage_format: str = 'pcm'):
+        self.base_path = Path(base_path)
+        self.part_dir = self.base_path / '.live'
+        self.sample_rate = sample_rate
+        self.gain = gain
+        self.archival = recording_storage.is_archival(storage_format)
+        self.merge_lag_bytes = int(8000 * merge_lag) * 2
+        self.header_interval = header_interval
+        self.logger = logging.getLogger(__name__)
+        self._calls: Dict[str, _LiveCall] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, call_id):
+        return call_id in self._calls
+
+    def __len__(self):
+        return len(self._calls)
+
+    def start_call(self, call_id: str) -> bool:
+        """콜의 IN/OUT/MERGE 파일을 열고 녹음 시작. 이미 녹음 중이면 그대로 둠"""
+        with self._lock:
+            if call_id in self._calls:
+                return True
+            try:
+                self.part_dir.mkdir(parents=True, exist_ok=True)
+                self._calls[call_id] = _LiveCall(call_id, self.part_dir, self.sample_rate, self.gain, self.header_interval,
+                                                 self.archival)
+            except OSError as e:
+                self.logger.error(f"실시간 녹음 파일 생성 실패: {call_id} - {e}")
+                return False
+        self.logger.info(f"실시간 녹음 시작: {call_id}")
+        return True
+
+    def feed(self, call_id: str, direction: str, payload_type: int, sequence: int, audio_data: bytes,
+             timestamp: int = None) -> bool:
+        """RTP 페이로드 한 개를 녹음에 추가. 녹음 중이 아니거나 G.711이 아니면 False
+
+        방향별 지터 버퍼가 순서를 맞춘 뒤 윈도우를 벗어난 프레임부터 디코딩해 기록한다.
+        """
+        if payload_type not in _G711_PAYLOAD_TYPES or call_id not in self._calls:
+            return False
+        with self._lock:
+            call = self._calls.get(call_id)
+            if call is None or direction not in call.pending:
+                return False
+            jitter_buffer = call.jitter_buffers[direction]
+            if jitter_buffer is None:
+                jitter_buffer = RtpJitterBuffer(silence_byte=SILENCE_BYTES[payload_type])
+                call.jitter_buffers[direction] = jitter_buffer
+                call.payload_types[direction] = payload_type
+            duplicates = jitter_buffer.stats['duplicate']
+            jitter_buffer.push(sequence, timestamp, audio_data, call.encoded[direction])
+            # 같은 패킷이 두 번 캡처된 경우 (미러 포트 중복)
+            if jitter_buffer.stats['duplicate'] != duplicates:
+                return False
+            self._decode(call, direction)
+            self._mix(call)
+            call.packets += 1
+            call.last_packet = time.time()
+        return True
+
+    def _decode(self, call: _LiveCall, direction: str):
+        """지터 버퍼가 내보낸 G.711 프레임을 디코딩해 방향별 파일과 믹싱 대기 버퍼에 추가"""
+        encoded = call.encoded[direction]
+        if not encoded:
+            return
+        payload_type = call.payload_types[direction]
+        pcm = g711_codec.decode_bytes(encoded, payload_type)
+        if call.archival:
+            writer = call.writers.get(direction)
+            if writer is None:
+                writer = call.writers[direction] = recording_storage.g711_writer(
+                    call.part_paths[direction], payload_type, header_interval=call.header_interval)
+            writer.write(bytes(encoded))
+        else:
+            self._write(call, direction, pcm)
+        call.pending[direction] += pcm
+        encoded.clear()
+
+    def _write(self, call: _LiveCall, name: str, pcm: bytes):
+        if call.archival:
+            call.writers[name].write(g711_codec.encode(pcm, g711_codec.PCMA))
+        else:
+            call.writers[name].write(call.chains[name].process(pcm).tobytes())
+
+    def _mix(self, call: _LiveCall, drain: bool = False):
+        """양방향 대기 PCM을 겹치는 만큼 더해 MERGE에 쓰고, 한쪽이 오래 비면 다른 쪽만 씀"""
+        pending_in, pending_out = call.pending['IN'], call.pending['OUT']
+        size = min(len(pending_in), len(pending_out))
+        if size:
+            mixed = g711_codec.mix(np.frombuffer(pending_in, dtype='<i2', count=size // 2),
+                                   np.frombuffer(pending_out, dtype='<i2', count=size // 2))
+            self._write(call, 'MERGE', mixed.tobytes())
+            del pending_in[:size]
+            del pending_out[:size]
+        for pending in (pending_in, pending_out):
+            keep = 0 if drain else self.merge_lag_bytes
+            if len(pending) > keep:
+                self._write(call, 'MERGE', bytes(pending[:len(pending) - keep]))
+                del pending[:len(pending) - keep]
+
+    def finish_call(self, call_id: str, final_paths: Dict[str, Path]) -> Optional[Dict[str, Path]]:
+        """녹음을 닫고 {'IN', 'OUT', 'MERGE'} 최종 경로로 옮김. 녹음된 패킷이 없으면 파일을 지우고 None"""
+        with self._lock:
+            call = self._calls.pop(call_id, None)
+            if call is None:
+                return None
+            for direction, jitter_buffer in call.jitter_buffers.items():
+                if jitter_buffer is not None:
+                    jitter_buffer.flush(call.encoded[direction])
+                    self._decode(call, direction)
+            self._mix(call, drain=True)
+            for name, writer in call.writers.items():
+                if name in call.chains:
+                    writer.write(call.chains[name].flush().tobytes())
+                writer.close()
+        if call.packets == 0:
+            self._discard(call)
+            self.logger.info(f"실시간 녹음 RTP 없음: {call_id}")
+            return None
+
+        finished = {}
+        for name, part_path in call.part_paths.items():
+            # 한 방향도 오지 않은 파일은 남기지 않음 (후처리 경로와 동일)
+            writer = call.writers.get(name)
+            if writer is None or writer.data_bytes == 0:
+                part_path.unlink(missing_ok=True)
+                continue
+            final_path = Path(final_paths[name])
+            final_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part_path, final_path)
+            finished[name] = final_path
+        self.logger.info(f"실시간 녹음 완료: {call_id} ({call.packets}개 패킷, "
+                         f"{time.time() - call.started:.1f}초) → {[path.name for path in finished.values()]}")
+        for direction, jitter_buffer in call.jitter_buffers.items():
+            if jitter_buffer is not None:
+                self.logger.info(f"{direction} RTP 수신 통계: {jitter_buffer.stats}")
+        return finished
+
+    def discard_call(self, call_id: str):
+        """녹음을 저장하지 않고 버림 (CANCEL 등)"""
+        with self._lock:
+            call = self._calls.pop(call_id, None)
+            if call is None:
+                return
+            for writer in call.writers.values():
+                writer.close()
+        self._discard(call)
+
+    def _discard(self, call: _LiveCall):
+        for part_path in call.part_paths.values():
+            part_path.unlink(missing_ok=True)
+
+    def close(self):
+        """종료 시 열린 파일의 헤더만 확정 (.wav.part는 재생 가능한 상태로 남음)"""
+        with self._lock:
+            for call in self._calls.values():
+                for writer in call.writers.values():
+                    writer.close()
+            self._calls.clear()
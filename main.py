@@ -8,6 +8,7 @@ import configparser
 import datetime
 import gc
 import json
+import multiprocessing
 import os
 import platform
 import psutil
@@ -24,9 +25,7 @@ import win32process
 from enum import Enum, auto
 
 # 서드파티 라이브러리
-import pyshark
 import requests
-from pydub import AudioSegment
 from pymongo import MongoClient
 from PySide6.QtCore import *
 from PySide6.QtGui import *
@@ -37,11 +36,22 @@ from PySide6.QtWidgets import *
 from callstate_machine import CallStateMachine, CallState
 from config_loader import load_config, get_wireshark_path
 from sip_rtp_session_grouper import get_recording_manager
+from capture_segments import ring_buffer_args
+from packet_capture import RawPacketCapture
+from rtp_flow_table import RtpFlowTable
+from live_call_recorder import LiveCallRecorder
+from extension_directory import ExtensionDirectory
+from filesinfo_writer import FilesInfoWriter
+import recording_storage
+from recording_catalog import RecordingCatalog, ensure_mongo_indexes
 from flow_layout import FlowLayout
 from settings_popup import SettingsPopup
 from wav_merger import WavMerger
 from websocketserver import WebSocketServer
 
+# 오디오 Payload Type (0=PCMU, 8=PCMA, 9=G722, 18=G729 등) - 96~127 동적 타입은 별도 허용
+AUDIO_PAYLOAD_TYPES = frozenset((0, 8, 9, 10, 11, 18, 96, 97, 98, 99, 100, 101, 102, 103))
+
 def resource_path(relative_path):
 		"""리소스 파일의 절대 경로를 반환"""
 		if hasattr(sys, '_MEIPASS'):
@@ -303,11 +313,15 @@ class Dashboard(QMainWindow):
 								# RTP 패킷 카운터 시스템
 								self.rtp_counters = {}  # 연결별 패킷 카운터 저장
 								self.rtp_display_lines = {}  # 각 연결의 콘솔 표시 관리
+								# RTP 패킷 → (Call-ID, 방향) 흐름 테이블
+								self.rtp_flows = RtpFlowTable(idle_timeout=self.get_rtp_flow_idle_timeout())
 								self.packet_get = 0
 								# 토글 기능 제거 - 관련 변수들 제거
 
 								# 통화별 녹음 관리자 초기화
 								self.recording_manager = get_recording_manager(dashboard_instance=self)
+								# 실시간 녹음기 (설정에서 끄면 None - 통화 종료 후 캡처 파일에서 변환)
+								self.live_recorder = self.create_live_recorder()
 
 								# 녹음 상태 모니터링 타이머 설정 - 제거됨
 								# self.recording_status_timer = QTimer()
@@ -343,6 +357,30 @@ class Dashboard(QMainWindow):
 						except Exception as e:
 								self.log_error("타이머 및 유틸리티 초기화 실패", e)
 
+						# 내선번호 → IP/권한 캐시 (캡처·알림 경로는 MongoDB 대신 이 캐시만 조회)
+						self.extension_directory = ExtensionDirectory(
+								ttl=load_config().getfloat('MongoDB', 'directory_ttl_sec', fallback=300.0)
+						)
+
+						# filesinfo 저장 (원자적 id 발급, insert_many 일괄 저장, MongoDB 장애 중에는 로컬 보관 후 재저장)
+						self.filesinfo_writer = FilesInfoWriter(
+								batch_size=load_config().getint('MongoDB', 'filesinfo_batch_size', fallback=50),
+								flush_interval=load_config().getfloat('MongoDB', 'filesinfo_flush_sec', fallback=1.0),
+								spill_path=load_config().get('MongoDB', 'spill_path', fallback='temp_captures/filesinfo_spill.db')
+						)
+						self.filesinfo_writer.start()
+
+						# 녹음 카탈로그 (번호·날짜·Call-ID 검색 색인) - 비어 있으면 저장 경로를 스캔해 채움
+						try:
+								self.recording_catalog = RecordingCatalog(
+										load_config().get('Recording', 'catalog_path', fallback='temp_captures/recording_catalog.db')
+								)
+								if self.recording_catalog.count() == 0:
+										threading.Thread(target=self.rebuild_recording_catalog, daemon=True).start()
+						except Exception as e:
+								self.recording_catalog = None
+								self.log_error("녹음 카탈로그 초기화 실패", e)
+
 						# MongoDB 연결 (타임아웃 설정 포함)
 						try:
 								# MongoDB 설정 읽기
@@ -376,6 +414,9 @@ class Dashboard(QMainWindow):
 								# 연결 테스트
 								self.mongo_client.admin.command('ping')
 								self.log_error("MongoDB 연결 성공", level="info")
+								self.extension_directory.attach(self.db)
+								self._ensure_filesinfo_indexes()
+								self.filesinfo_writer.attach(self.db)
 
 						except Exception as e:
 								# 초기 연결 실패는 로그에 남기지 않음 (재시도에서 해결될 가능성 높음)
@@ -463,7 +504,11 @@ class Dashboard(QMainWindow):
 								while retry_count < max_retry:
 										try:
 												print(f"WebSocket 서버 시작 시도 (포트: {websocket_port})...")
-												self.websocket_server = WebSocketServer(port=websocket_port, log_callback=self.log_error)
+												self.websocket_server = WebSocketServer(
+														port=websocket_port,
+														log_callback=self.log_error,
+														extension_directory=self.extension_directory
+												)
 												self.websocket_thread = threading.Thread(target=self.websocket_server.run_in_thread, daemon=True)
 												self.websocket_thread.start()
 												print(f"WebSocket 서버가 포트 {websocket_port}에서 시작되었습니다.")
@@ -530,6 +575,9 @@ class Dashboard(QMainWindow):
 						# 연결 테스트
 						self.mongo_client.admin.command('ping')
 						self.log_error("MongoDB 연결 성공", level="info")
+						self.extension_directory.attach(self.db)
+						self._ensure_filesinfo_indexes()
+						self.filesinfo_writer.attach(self.db)
 
 				except Exception as e:
 						# 재시도도 실패한 경우에만 로그 기록
@@ -566,13 +614,24 @@ class Dashboard(QMainWindow):
 				except Exception as e:
 						print(f"타이머 정리 중 오류: {e}")
 
+				# 대기 중인 filesinfo 문서 저장
+				if getattr(self, 'filesinfo_writer', None) is not None:
+						try:
+								self.filesinfo_writer.close()
+						except Exception as e:
+								print(f"filesinfo 저장 정리 오류: {e}")
+
+				# 녹음 중인 파일 헤더 확정
+				if getattr(self, 'live_recorder', None) is not None:
+						try:
+								self.live_recorder.close()
+						except Exception as e:
+								print(f"실시간 녹음 정리 오류: {e}")
+
 				# 기존 cleanup 코드
 				if hasattr(self, 'capture') and self.capture:
 						try:
-								if hasattr(self, 'loop') and self.loop and self.loop.is_running():
-										self.loop.run_until_complete(self.capture.close_async())
-								else:
-										self.capture.close()
+								self.capture.close()
 						except Exception as e:
 								print(f"Cleanup error: {e}")
 
@@ -950,16 +1009,19 @@ class Dashboard(QMainWindow):
 										os.makedirs(temp_captures_dir)
 										self.log_error(f"temp_captures 디렉토리 생성: {temp_captures_dir}", level="info")
 
-								# 강제로 dumpcap 실행 (간단한 방법)
+								# 강제로 dumpcap 실행 (간단한 방법) - 링 버퍼 세그먼트로 기록
 								dumpcap_cmd = [
 										"C:\\Program Files\\Wireshark\\dumpcap.exe",
 										"-i", "6",  # 이더넷 3은 보통 인터페이스 6번
 										"-f", "port 5060 or (udp and portrange 10000-65535)",
 										"-w", "temp_captures/temp_capture.pcapng"
-								]
+								] + self.get_capture_ring_args(config)
 								self.dumpcap_process = subprocess.Popen(dumpcap_cmd, creationflags=subprocess.CREATE_NO_WINDOW)
 								self.temp_capture_file = "temp_captures/temp_capture.pcapng"
 								self.log_error("강제 전역 Dumpcap 시작 완료", level="info")
+								# 콜 종료 시 전체 파일을 다시 읽지 않도록 캡처 파일 인덱싱
+								if hasattr(self, 'recording_manager') and self.recording_manager:
+										self.recording_manager.follow_capture(self.temp_capture_file)
 						except Exception as e:
 								self.log_error(f"강제 Dumpcap 시작 실패: {e}")
 
@@ -1016,12 +1078,13 @@ class Dashboard(QMainWindow):
 						# Dumpcap 명령어 구성 - SIP + RTP 포트 범위 캡처
 						capture_filter = "port 5060 or (udp and portrange 10000-65535)"
 
+						# 링 버퍼 세그먼트로 기록하여 디스크 사용량 제한
 						dumpcap_cmd = [
 								dumpcap_path,
 								"-i", str(interface_number),
 								"-f", capture_filter,
 								"-w", "temp_captures/temp_capture.pcapng"
-						]
+						] + self.get_capture_ring_args(load_config())
 
 						# Dumpcap 프로세스 시작
 						self.dumpcap_process = subprocess.Popen(
@@ -1033,9 +1096,23 @@ class Dashboard(QMainWindow):
 
 						self.log_error(f"전역 Dumpcap 시작: {self.selected_interface} → {self.temp_capture_file}", level="info")
 
+						# 콜 종료 시 전체 파일을 다시 읽지 않도록 캡처 파일 인덱싱
+						if hasattr(self, 'recording_manager') and self.recording_manager:
+								self.recording_manager.follow_capture(self.temp_capture_file)
+
 				except Exception as e:
 						self.log_error(f"Dumpcap 시작 실패: {e}")
 
+		def get_capture_ring_args(self, config):
+				"""settings.ini [Capture]의 링 버퍼 설정으로 dumpcap -b 옵션 생성"""
+				try:
+						filesize_kb = config.getint('Capture', 'ring_filesize_kb', fallback=102400)
+						duration_sec = config.getint('Capture', 'ring_duration_sec', fallback=600)
+						return ring_buffer_args(filesize_kb, duration_sec)
+				except Exception as e:
+						self.log_error(f"링 버퍼 설정 로드 실패: {e}")
+						return ring_buffer_args(102400, 600)
+
 		def get_interface_number(self, interface_list, interface_name):
 				"""인터페이스 목록에서 선택된 인터페이스의 번호 찾기"""
 				try:
@@ -1102,6 +1179,7 @@ class Dashboard(QMainWindow):
 										try:
 												# capture 종료 플래그 설정 (나중에 capture_packets에서 확인)
 												self.capture_stop_requested = True
+												self.capture.close()
 												self.capture = None
 
 												# tshark와 dumpcap 프로세스 종료
@@ -1162,181 +1240,91 @@ class Dashboard(QMainWindow):
 						return False
 
 		def capture_packets(self, interface):
-				"""패킷 캡처 실행"""
+				"""패킷 캡처 실행 - dumpcap 파이프의 원시 프레임을 직접 디코딩"""
 				if not interface:
 						self.log_error("유효하지 않은 인터페이스")
 						return
 
 				capture = None
-				loop = None
 
 				try:
 						# 캡처 중지 플래그 초기화 (필요시)
 						if not hasattr(self, 'capture_stop_requested'):
 								self.capture_stop_requested = False
 
-						# 이벤트 루프 설정
-						loop = asyncio.new_event_loop()
-						asyncio.set_event_loop(loop)
-
-						# settings.ini에서 포트미러링 대상 IP 가져오기
+						# settings.ini에서 포트미러링 대상 IP와 SIP 포트 가져오기
 						config = load_config()
 						target_ip = config.get('Network', 'ip', fallback=None)
+						sip_ports = self.get_sip_ports(config)
 
-						# 포트미러링 환경을 위한 캡처 필터 설정 (단순화)
+						# UDP만 캡처 - 포트미러링 대상 IP가 있으면 해당 호스트와 SIP 포트로 제한
 						if target_ip:
-								# Wireshark와 동일한 단순 필터
-								display_filter = f'(host {target_ip}) and (sip or udp)'
-								self.safe_log(f"포트미러링 필터 적용: {display_filter}", "INFO")
-								print(f"사용중인 필터: {display_filter}")
+								capture_filter = f'udp and (host {target_ip} or ' + ' or '.join(f'port {port}' for port in sip_ports) + ')'
+								self.safe_log(f"포트미러링 필터 적용: {capture_filter}", "INFO")
 						else:
-								# 모든 SIP 패킷 캡처 (테스트용)
-								display_filter = 'sip'
-								self.safe_log(f"SIP 전용 필터 적용: {display_filter}", "INFO")
-								print(f"사용중인 필터: {display_filter}")
-
-						# 개선된 필터링 및 디버깅 모드
-						debug_mode = False  # 디버깅 모드 활성화 여부
-
-						if debug_mode:
-								print("🔍 디버깅 모드: 모든 패킷 캡처 시작")
-								self.safe_log("디버깅 모드: 모든 패킷 캡처", "INFO")
-								capture = pyshark.LiveCapture(interface=interface)  # 필터 없음
-						else:
-								# 개선된 필터: 더 넓은 범위로 SIP 패킷 캡처
-								if target_ip:
-										# IP 기반 필터를 더 관대하게 변경
-										fallback_filter = f'host {target_ip} or sip or (udp and port 5060)'
-										print(f"폴백 필터: {fallback_filter}")
-								else:
-										# SIP 및 RTP 패킷을 모두 캡처
-										fallback_filter = 'sip or (udp and portrange 5060-5080) or (udp and portrange 10000-20000)'
-
-								try:
-										# 먼저 필터 없이 시도 (가장 안정적)
-										print("필터 없이 모든 패킷 캡처 시도...")
-										capture = pyshark.LiveCapture(interface=interface)
-										self.safe_log("필터 없는 패킷 캡처로 시작", "INFO")
-								except Exception as filter_error:
-										print(f"LiveCapture 생성 실패: {filter_error}")
-										self.safe_log(f"캡처 객체 생성 실패: {filter_error}", "ERROR")
-										return
-
-						# 전역 변수로 capture 객체 저장 (재시작 시 사용)
-						self.capture = capture
-
-						# 패킷 캡처 시작
-						self.safe_log(f"패킷 캡처 시작 - 인터페이스: {interface}", "INFO")
+								capture_filter = 'udp'
+								self.safe_log(f"UDP 전체 캡처 필터 적용: {capture_filter}", "INFO")
+						print(f"사용중인 필터: {capture_filter}")
 
-						# tshark 프로세스 실행 테스트 및 강제 실행
-						tshark_path = os.path.join(get_wireshark_path(), "tshark.exe")
-						self.safe_log(f"tshark 경로: {tshark_path}", "INFO")
-
-						# tshark 직접 실행 테스트
+						# dumpcap은 인터페이스 이름 대신 -D 목록의 번호도 받음
+						dumpcap_path = os.path.join(get_wireshark_path(), "dumpcap.exe")
+						capture_interface = interface
 						try:
-								test_cmd = [tshark_path, "-D"]
-								result = subprocess.run(test_cmd, capture_output=True, text=True, timeout=10, encoding='utf-8', errors='replace')
-								if result.returncode == 0:
-										self.safe_log("tshark 실행 가능 확인", "INFO")
-								else:
-										error_msg = result.stderr
-										self.safe_log(f"tshark 실행 실패: {error_msg}", "ERROR")
-										return
+								dumpcap_interfaces = subprocess.run([dumpcap_path, "-D"], capture_output=True, text=True, timeout=10, encoding='utf-8', errors='replace')
+								interface_number = self.get_interface_number(dumpcap_interfaces.stdout, interface)
+								if interface_number is not None:
+										capture_interface = interface_number
 						except Exception as e:
-								error_str = str(e)
-								self.safe_log(f"tshark 테스트 실패: {error_str}", "ERROR")
-								return
-
-						# pyshark 캡처 프로세스 강제 시작
-						try:
-								self.safe_log("패킷 캡처 시작 중...", "INFO")
-
-								# 실제로 dumpcap/tshark를 시작하려면 패킷을 읽어야 함
-								packet_iter = iter(capture.sniff_continuously())
-
-								# 첫 패킷 시도 (5초 타임아웃)
-								import time
-								import threading
-
-								first_packet = None
-
-								def get_first_packet():
-										nonlocal first_packet
-										try:
-												first_packet = next(packet_iter)
-												self.safe_log("✅ 첫 패킷 획득 성공 - tshark/dumpcap 실행됨", "INFO")
-										except Exception as e:
-												self.safe_log(f"첫 패킷 획득 실패: {e}", "ERROR")
-
-								# 별도 스레드에서 첫 패킷 시도
-								packet_thread = threading.Thread(target=get_first_packet, daemon=True)
-								packet_thread.start()
-								packet_thread.join(timeout=5)
-
-								if packet_thread.is_alive():
-										self.safe_log("⚠️ SIP 패킷 캡처 타임아웃 - 더 넓은 필터로 재시도", "WARNING")
-										# SIP 필터를 제거하고 모든 UDP 패킷 캡처
-										capture = pyshark.LiveCapture(interface=interface, bpf_filter="udp")
-										packet_iter = iter(capture.sniff_continuously())
-
-										packet_thread = threading.Thread(target=get_first_packet, daemon=True)
-										packet_thread.start()
-										packet_thread.join(timeout=3)
-
-										if packet_thread.is_alive():
-												self.safe_log("❌ 패킷 캡처 완전 실패 - tshark/dumpcap 시작 안됨", "ERROR")
-												return
-										else:
-												self.safe_log("✅ UDP 패킷 캡처 시작됨 - tshark/dumpcap 실행됨", "INFO")
-
-								packet_count = 1 if first_packet else 0
+								self.safe_log(f"dumpcap 인터페이스 목록 확인 실패: {e}", "WARNING")
+
+						backend = config.get('Capture', 'live_backend', fallback='dumpcap')
+						capture = RawPacketCapture(
+								capture_interface,
+								dumpcap_path=dumpcap_path,
+								capture_filter=capture_filter,
+								sip_ports=sip_ports,
+								backend=backend
+						)
+						capture.start()
 
-						except Exception as e:
-								self.safe_log(f"패킷 캡처 시작 실패: {e}", "ERROR")
-								return
+						# 전역 변수로 capture 객체 저장 (재시작 시 사용)
+						self.capture = capture
+						self.safe_log(f"패킷 캡처 시작 - 인터페이스: {interface} ({backend})", "INFO")
 
-						# 계속해서 패킷 처리
-						for packet in packet_iter:
+						packet_count = 0
+						for packet in capture.packets():
 								try:
 										# 캡처 중지 요청 확인
-										if hasattr(self, 'capture_stop_requested') and self.capture_stop_requested:
+										if self.capture_stop_requested:
 												print("패킷 캡처 중지 요청 감지됨")
 												self.safe_log("패킷 캡처 중지 요청으로 종료", "INFO")
 												break
 
 										packet_count += 1
-										# 패킷 개수 로깅 제거 (너무 많음)
 
 										# 처음 5개 패킷만 기본 정보 로깅
 										if packet_count <= 5:
-												try:
-														src_ip = getattr(packet.ip, 'src', 'unknown') if hasattr(packet, 'ip') else 'no_ip'
-														dst_ip = getattr(packet.ip, 'dst', 'unknown') if hasattr(packet, 'ip') else 'no_ip'
-														protocol = packet.highest_layer
-														print(f"패킷 #{packet_count}: {src_ip} → {dst_ip}, 프로토콜: {protocol}")
-												except Exception as e:
-														print(f"패킷 정보 추출 오류: {e}")
-
-										# 메모리 사용량 모니터링
-										process = psutil.Process()
-										memory_percent = process.memory_percent()
-										if memory_percent > 80:
-												self.safe_log(f"높은 메모리 사용량: {memory_percent}%", "WARNING")
+												print(f"패킷 #{packet_count}: {packet.ip.src} → {packet.ip.dst}, 프로토콜: {packet.highest_layer}")
+
+										# 메모리 사용량 모니터링 (패킷마다 확인하지 않음)
+										if packet_count % 10000 == 0:
+												memory_percent = psutil.Process().memory_percent()
+												if memory_percent > 80:
+														self.safe_log(f"높은 메모리 사용량: {memory_percent}%", "WARNING")
 
 										# SIP 패킷 처리 - 메인 스레드로 Signal 발송
 										if hasattr(packet, 'sip'):
 												self.safe_log(f"★ SIP 패킷 감지됨! (#{packet_count})", "SIP")
 												# 백그라운드 스레드에서 메인 스레드로 SIP 패킷 분석 요청
 												self.sip_packet_signal.emit(packet)
-										elif hasattr(packet, 'udp'):
-												if self.is_rtp_packet(packet):
-														self.log_rtp_with_counter(packet)
-														self.handle_rtp_packet(packet)
+										elif self.is_rtp_packet(packet):
+												self.log_rtp_with_counter(packet)
+												self.handle_rtp_packet(packet)
 
 								except Exception as packet_error:
 										self.safe_log(f"패킷 처리 중 오류: {packet_error}", "ERROR")
 										# 중지 요청이 있으면 오류 상황에서도 종료
-										if hasattr(self, 'capture_stop_requested') and self.capture_stop_requested:
+										if self.capture_stop_requested:
 												break
 										continue
 
@@ -1348,24 +1336,44 @@ class Dashboard(QMainWindow):
 				finally:
 						try:
 								if capture:
-										if loop and not loop.is_closed():
-												loop.run_until_complete(capture.close_async())
-										else:
-												capture.close()
+										capture.close()
 								else:
 										self.safe_log("캡처 프로세스가 초기화되지 않았습니다", "ERROR")
 						except Exception as close_error:
 								self.safe_log(f"캡처 종료 실패: {close_error}", "ERROR")
 
-						try:
-								if loop and not loop.is_closed():
-										loop.close()
-								else:
-										self.safe_log("이벤트 루프가 초기화되지 않았습니다", "ERROR")
-						except Exception as loop_error:
-								self.safe_log(f"이벤트 루프 종료 실패: {loop_error}", "ERROR")
+		def get_rtp_flow_idle_timeout(self):
+				"""settings.ini [Capture] rtp_flow_idle_sec"""
+				try:
+						return load_config().getfloat('Capture', 'rtp_flow_idle_sec', fallback=120.0)
+				except Exception as e:
+						self.log_error(f"RTP 흐름 유휴 시간 설정 오류: {e}")
+						return 120.0
 
-						# self.cleanup_existing_dumpcap()  # 캡처 종료 후 프로세스 정리
+		def create_live_recorder(self):
+				"""settings.ini [Recording] live_recording이 켜져 있으면 실시간 녹음기 생성"""
+				try:
+						config = load_config()
+						if not config.getboolean('Recording', 'live_recording', fallback=True):
+								return None
+						return LiveCallRecorder(
+								config.get('Recording', 'save_path', fallback='D:/PacketWaveRecord'),
+								header_interval=config.getfloat('Recording', 'wav_header_interval_sec', fallback=1.0),
+								storage_format=config.get('Recording', 'storage_format', fallback='pcm').strip().lower()
+						)
+				except Exception as e:
+						self.log_error(f"실시간 녹음기 생성 실패: {e}")
+						return None
+
+		def get_sip_ports(self, config):
+				"""settings.ini [Capture] sip_ports (쉼표 구분)"""
+				try:
+						value = config.get('Capture', 'sip_ports', fallback='5060')
+						ports = tuple(int(port) for port in value.split(',') if port.strip())
+						return ports or (5060,)
+				except Exception as e:
+						self.log_error(f"SIP 포트 설정 오류: {e}")
+						return (5060,)
 
 		def _create_header(self):
 				header = QWidget()
@@ -2697,6 +2705,7 @@ class Dashboard(QMainWindow):
 						else:
 								call_id = sip_layer.call_id
 								self.log_to_sip_console(f"Call-ID: {call_id}", "SIP")
+								self._register_rtp_flow_endpoints(sip_layer, call_id)
 
 						# 내선번호 추출 로직...
 						try:
@@ -2790,19 +2799,11 @@ class Dashboard(QMainWindow):
 																		if hasattr(self, 'websocket_server') and self.db is not None:
 																				print(f"SIP 패킷 분석: 내선번호 {to_number}로 전화 수신 (발신: {from_number})")
 																				self.log_to_sip_console(f"내선번호 {to_number}로 전화 수신 (발신: {from_number})", "SIP")
-																				# 비동기 알림 전송을 위한 helper 함수
-																				async def send_notification():
-																						print(f"알림 전송 시작: 내선번호 {to_number}에 전화 수신 알림 (발신: {from_number})")
-																						await self.websocket_server.notify_client(to_number, from_number, call_id, self)
-																						print(f"알림 전송 완료: 내선번호 {to_number}")
-
-																				# 별도 스레드에서 비동기 함수 실행
-																				notification_thread = threading.Thread(
-																						target=lambda: asyncio.run(send_notification()),
-																						daemon=True
-																				)
-																				notification_thread.start()
-																				print(f"알림 전송 스레드 시작: {to_number}")
+																				# WebSocket 서버 루프에 알림 요청 (같은 알림이 처리 중이면 합쳐짐)
+																				if self.websocket_server.dispatch_incoming_call(to_number, from_number, call_id, self) is None:
+																						print(f"알림 요청 생략 (서버 미실행 또는 중복): {to_number}")
+																				else:
+																						print(f"알림 요청 완료: {to_number}")
 																				self.log_error("클라이언트 알림 전송 시작", additional_info={
 																						"to": to_number,
 																						"from": from_number,
@@ -3128,19 +3129,11 @@ class Dashboard(QMainWindow):
 												# WebSocket 서버가 있고 MongoDB가 연결되어 있는 경우에만 실행
 												if hasattr(self, 'websocket_server') and self.db is not None:
 														print(f"BYE 패킷 분석: 내선번호 {to_number}로 통화 종료 알림 (발신: {from_number})")
-														# 비동기 알림 전송을 위한 helper 함수
-														async def send_bye_notification():
-																print(f"BYE 알림 전송 시작: 내선번호 {to_number}에 통화 종료 알림 (발신: {from_number})")
-																await self.websocket_server.notify_client_call_end(to_number, from_number, call_id, "BYE")
-																print(f"BYE 알림 전송 완료: 내선번호 {to_number}")
-
-														# 별도 스레드에서 비동기 함수 실행
-														notification_thread = threading.Thread(
-																target=lambda: asyncio.run(send_bye_notification()),
-																daemon=True
-														)
-														notification_thread.start()
-														print(f"BYE 알림 전송 스레드 시작: {to_number}")
+														# WebSocket 서버 루프에 알림 요청 (같은 알림이 처리 중이면 합쳐짐)
+														if self.websocket_server.dispatch_call_end(to_number, from_number, call_id, "BYE", self) is None:
+																print(f"BYE 알림 요청 생략 (서버 미실행 또는 중복): {to_number}")
+														else:
+																print(f"BYE 알림 요청 완료: {to_number}")
 														self.log_error("BYE 클라이언트 알림 전송 시작", additional_info={
 																"to": to_number,
 																"from": from_number,
@@ -3177,19 +3170,11 @@ class Dashboard(QMainWindow):
 												# WebSocket 서버가 있고 MongoDB가 연결되어 있는 경우에만 실행
 												if hasattr(self, 'websocket_server') and self.db is not None:
 														print(f"CANCEL 패킷 분석: 내선번호 {to_number}로 통화 취소 알림 (발신: {from_number})")
-														# 비동기 알림 전송을 위한 helper 함수
-														async def send_cancel_notification():
-																print(f"CANCEL 알림 전송 시작: 내선번호 {to_number}에 통화 취소 알림 (발신: {from_number})")
-																await self.websocket_server.notify_client_call_end(to_number, from_number, call_id, "CANCEL")
-																print(f"CANCEL 알림 전송 완료: 내선번호 {to_number}")
-
-														# 별도 스레드에서 비동기 함수 실행
-														notification_thread = threading.Thread(
-																target=lambda: asyncio.run(send_cancel_notification()),
-																daemon=True
-														)
-														notification_thread.start()
-														print(f"CANCEL 알림 전송 스레드 시작: {to_number}")
+														# WebSocket 서버 루프에 알림 요청 (같은 알림이 처리 중이면 합쳐짐)
+														if self.websocket_server.dispatch_call_end(to_number, from_number, call_id, "CANCEL", self) is None:
+																print(f"CANCEL 알림 요청 생략 (서버 미실행 또는 중복): {to_number}")
+														else:
+																print(f"CANCEL 알림 요청 완료: {to_number}")
 														self.log_error("CANCEL 클라이언트 알림 전송 시작", additional_info={
 																"to": to_number,
 																"from": from_number,
@@ -3235,42 +3220,28 @@ class Dashboard(QMainWindow):
 								print(f"To User: {to_user}")
 								extension = self.extract_number(to_user)
 
-						# 3. Contact 헤더에서 확인
-						if not extension and hasattr(sip_layer, 'contact'):
-								contact = str(sip_layer.contact)
-								print(f"Contact: {contact}")
-								# Contact 헤더에서 sip:1234@domain 형태 추출
-								import re
-								contact_match = re.search(r'sip:(\d{4})@', contact)
-								if contact_match:
-										extension = contact_match.group(1)
-
-						# 4. Authorization 헤더에서 username 확인
-						if not extension and hasattr(sip_layer, 'authorization'):
-								auth_header = str(sip_layer.authorization)
-								print(f"Authorization: {auth_header}")
-								# username="1234" 형태 추출
-								auth_match = re.search(r'username="?(\d{4})"?', auth_header)
-								if auth_match:
-										extension = auth_match.group(1)
-
-						# 5. 모든 SIP 헤더 출력 (디버깅용)
+						# 3. Contact 헤더에서 확인 (sip:1234@domain)
 						if not extension:
-								print("=== 모든 SIP 헤더 확인 ===")
-								for field_name in dir(sip_layer):
-										if not field_name.startswith('_'):
-												try:
-														field_value = getattr(sip_layer, field_name)
-														if field_value and str(field_value) != '<bound method':
-																print(f"{field_name}: {field_value}")
-																# 4자리 숫자 패턴 검색
-																digit_match = re.search(r'\b(\d{4})\b', str(field_value))
-																if digit_match and digit_match.group(1)[0] in ['1','2','3','4','5','6','7','8','9']:
-																		extension = digit_match.group(1)
-																		print(f"헤더 {field_name}에서 내선번호 발견: {extension}")
-																		break
-												except Exception:
-														continue
+								contact_user = sip_layer.get('contact_user', '')
+								print(f"Contact: {sip_layer.get('contact', '')}")
+								if len(contact_user) == 4 and contact_user.isdigit():
+										extension = contact_user
+
+						# 4. Authorization 헤더의 username 확인
+						if not extension:
+								auth_username = sip_layer.get('auth_username', '')
+								print(f"Authorization username: {auth_username}")
+								if len(auth_username) == 4 and auth_username.isdigit():
+										extension = auth_username
+
+						# 5. 헤더 전체에서 4자리 내선번호 패턴 검색 (디버깅용)
+						if not extension:
+								msg_hdr = sip_layer.get('msg_hdr', '')
+								print(f"=== 모든 SIP 헤더 확인 ===\n{msg_hdr}")
+								for digit_match in re.finditer(r'\b([1-9]\d{3})\b', msg_hdr):
+										extension = digit_match.group(1)
+										print(f"헤더에서 내선번호 발견: {extension}")
+										break
 
 						print(f"최종 추출된 내선번호: {extension}")
 
@@ -3325,16 +3296,11 @@ class Dashboard(QMainWindow):
 								print(f"🎵 SDP 본문 감지: {sdp_body[:200]}..." if len(sdp_body) > 200 else f"🎵 SDP 본문: {sdp_body}")
 
 								# m=audio 포트 추출
-								import re
-								audio_matches = re.findall(r'm=audio (\d+) RTP', sdp_body)
-								for port_str in audio_matches:
-										try:
-												port = int(port_str)
-												if 1024 <= port <= 65535:
-														rtp_ports.append(port)
-														rtp_ports.append(port + 1)  # RTCP 포트도 포함
-										except ValueError:
-												continue
+								_, media = sip_layer.sdp_media()
+								for media_type, port in media:
+										if media_type == 'audio' and 1024 <= port <= 65535:
+												rtp_ports.append(port)
+												rtp_ports.append(port + 1)  # RTCP 포트도 포함
 
 								if rtp_ports:
 										print(f"📡 RTP 포트 추출됨: {rtp_ports}")
@@ -3494,6 +3460,8 @@ class Dashboard(QMainWindow):
 
 		def update_packet_status(self):
 				try:
+						# 오래된 RTP 흐름 정리
+						self.rtp_flows.expire()
 						with self.active_calls_lock:
 								for call_id, call_info in self.active_calls.items():
 										if call_info.get('status_changed', False):
@@ -3515,75 +3483,18 @@ class Dashboard(QMainWindow):
 
 		def is_rtp_packet(self, packet):
 				try:
-						if not hasattr(packet, 'udp') or not hasattr(packet.udp, 'payload'):
-								return False
-						payload_hex = packet.udp.payload.replace(':', '')
-						try:
-								payload = bytes.fromhex(payload_hex)
-						except ValueError:
-								return False
+						payload = packet.udp.payload
 						if len(payload) < 12:
 								return False
 						version = (payload[0] >> 6) & 0x03
 						if version != 2:
 								return False
 						payload_type = payload[1] & 0x7F
-						# 오디오 Payload Type 범위 확장 (0-127 중 일반적인 오디오 타입들)
-						# 0=PCMU, 8=PCMA, 9=G722, 18=G729 등 포함
-						audio_payload_types = [0, 8, 9, 10, 11, 18, 96, 97, 98, 99, 100, 101, 102, 103]
-						return payload_type in audio_payload_types or (96 <= payload_type <= 127)
+						return payload_type in AUDIO_PAYLOAD_TYPES or (96 <= payload_type <= 127)
 				except Exception as e:
 						print(f"RTP 패킷 확인 중 오류: {e}")
 						return False
 
-		def determine_stream_direction(self, packet, call_id):
-				try:
-						if call_id not in self.active_calls:
-								return None
-						call_info = self.active_calls[call_id]
-						if 'media_endpoints' not in call_info:
-								call_info['media_endpoints'] = []
-						if 'media_endpoints_set' not in call_info:
-								call_info['media_endpoints_set'] = {'local': set(), 'remote': set()}
-						src_ip = packet.ip.src
-						dst_ip = packet.ip.dst
-						try:
-								pbx_ip = call_id.split('@')[1].split(';')[0].split(':')[0]
-						except:
-								print(f"PBX IP 추출 실패 - Call-ID: {call_id}")
-								return None
-						src_endpoint = f"{src_ip}:{packet.udp.srcport}"
-						dst_endpoint = f"{dst_ip}:{packet.udp.dstport}"
-						if src_ip == pbx_ip:
-								endpoint_info = {"ip": src_ip, "port": packet.udp.srcport}
-								if endpoint_info not in call_info['media_endpoints']:
-										call_info['media_endpoints'].append(endpoint_info)
-								call_info['media_endpoints_set']['local'].add(src_endpoint)
-								call_info['media_endpoints_set']['remote'].add(dst_endpoint)
-								#print(f"OUT 패킷: {src_endpoint} -> {dst_endpoint}")
-								return "OUT"
-						elif dst_ip == pbx_ip:
-								endpoint_info = {"ip": dst_ip, "port": packet.udp.dstport}
-								if endpoint_info not in call_info['media_endpoints']:
-										call_info['media_endpoints'].append(endpoint_info)
-								call_info['media_endpoints_set']['local'].add(dst_endpoint)
-								call_info['media_endpoints_set']['remote'].add(src_endpoint)
-								#print(f"IN 패킷: {src_endpoint} -> {dst_endpoint}")
-								return "IN"
-						if src_endpoint in call_info['media_endpoints_set']['local']:
-								return "OUT"
-						elif src_endpoint in call_info['media_endpoints_set']['remote']:
-								return "IN"
-						elif dst_endpoint in call_info['media_endpoints_set']['local']:
-								return "IN"
-						elif dst_endpoint in call_info['media_endpoints_set']['remote']:
-								return "OUT"
-						return None
-				except Exception as e:
-						print(f"방향 결정 중 오류: {e}")
-						print(traceback.format_exc())
-						return None
-
 		def extract_number(self, sip_user):
 				try:
 						if not sip_user:
@@ -3890,96 +3801,79 @@ class Dashboard(QMainWindow):
 
 		def handle_rtp_packet(self, packet):
 				try:
-						# RTPStreamManager 완전 제거 - ExtensionRecordingManager가 녹음 처리
-						pass
-
 						# SIP 정보 확인 및 처리
 						if hasattr(packet, 'sip'):
 								self.analyze_sip_packet(packet)
 								return
 
 						# UDP 페이로드가 없으면 처리하지 않음
-						if not hasattr(packet, 'udp') or not hasattr(packet.udp, 'payload'):
+						payload = packet.udp.payload
+						if not payload:
 								return
 
-						active_calls = []
-						with self.active_calls_lock:
-								# 상태가 '통화중'인 통화만 필터링
-								for cid, info in self.active_calls.items():
-										if info.get('status') == '통화중':  # '벨울림' 상태는 제외
-												active_calls.append((cid, info))
-
-						if not active_calls:
+						# SDP endpoint/5-tuple 흐름 테이블에서 콜과 방향을 한 번에 조회
+						flow = self.rtp_flows.lookup(packet.ip.src, packet.udp.srcport, packet.ip.dst, packet.udp.dstport, len(payload))
+						if flow is None:
 								return
 
-						#멀티 전화 통화 처리
-						for call_id, call_info in active_calls:
-								try:
-										# 파일 경로 생성 전에 phone_ip 유효성 검사
-										if '@' not in call_id:
-												self.log_error("유효하지 않은 call_id 형식", additional_info={"call_id": call_id})
-												continue
-
-										phone_ip = call_id.split('@')[1].split(';')[0].split(':')[0]
-
-										if not phone_ip:
-												self.log_error("phone_ip를 추출할 수 없음", additional_info={"call_id": call_id})
-												continue
-
-										direction = self.determine_stream_direction(packet, call_id)
+						call_info = self.active_calls.get(flow.call_id)
+						# 상태가 '통화중'인 통화만 처리 ('벨울림' 상태는 제외)
+						if not call_info or call_info.get('status') != '통화중':
+								return
 
-										if not direction:
-												continue
+						if flow.packets == 1:
+								self._record_media_endpoint(flow)
 
-										# SIP 정보가 있는 경우 로그 기록
-										if 'packet' in call_info and hasattr(call_info['packet'], 'sip'):
-												sip_info = call_info['packet'].sip
-												from_user = getattr(sip_info, 'from_user', 'unknown')
-												to_user = getattr(sip_info, 'to_user', 'unknown')
-
-												if(len(from_user) > 4):
-														# 정규식 분할 결과가 비어있을 수 있으므로 안전하게 처리
-														from_user = re.split(r'[a-zA-Z]+', from_user)
-												if(len(to_user) > 4):
-														to_user = re.split(r'[a-zA-Z]+', to_user)
-
-												#내선 간 통화인 경우
-												if is_extension(to_user):
-														# mongodb 찾기
-														internalnumber_doc = self.internalnumber.find_one({"internal_number": to_user})
-														if internalnumber_doc:
-																phone_ip_str = internalnumber_doc.get('ip_address', '')
-														else:
-																phone_ip_str = phone_ip
-												# 내부 외부 간 통화인 경우
-												else:
-														phone_ip_str = phone_ip
-
-										payload_hex = packet.udp.payload.replace(':', '')
-										try:
-												payload = bytes.fromhex(payload_hex)
-												version = (payload[0] >> 6) & 0x03
-												payload_type = payload[1] & 0x7F
-												sequence = int.from_bytes(payload[2:4], byteorder='big')
-												audio_data = payload[12:]
+						try:
+								version = (payload[0] >> 6) & 0x03
+								payload_type = payload[1] & 0x7F
+								sequence = int.from_bytes(payload[2:4], byteorder='big')
+								timestamp = int.from_bytes(payload[4:8], byteorder='big')
+								audio_data = payload[12:]
 
-												if len(audio_data) == 0:
-														continue
+								if len(audio_data) == 0:
+										return
 
-												# RTPStreamManager 완전 제거 - ExtensionRecordingManager가 녹음 처리
-												pass
+								# 실시간 녹음기로 바로 전달 (통화 종료 후 변환 불필요)
+								if self.live_recorder is not None:
+										self.live_recorder.feed(flow.call_id, flow.direction, payload_type, sequence, audio_data, timestamp)
 
-										except Exception as payload_error:
-												self.log_error("페이로드 분석 오류", payload_error)
-												continue
-								except Exception as call_error:
-										self.log_error("통화별 RTP 처리 오류", call_error, {"call_id": call_id})
-										continue
+						except Exception as payload_error:
+								self.log_error("페이로드 분석 오류", payload_error)
 
 				except Exception as e:
 						self.log_error("RTP 패킷 처리 중 심각한 오류", e)
 						self.log_error("상세 오류 정보", additional_info={"traceback": traceback.format_exc()})
 
+		def _record_media_endpoint(self, flow):
+				"""새 RTP 흐름의 PBX 쪽 endpoint를 active_calls의 media_endpoints에 기록"""
+				local, remote = (flow.src, flow.dst) if flow.direction == 'OUT' else (flow.dst, flow.src)
+				with self.active_calls_lock:
+						call_info = self.active_calls.get(flow.call_id)
+						if call_info is None:
+								return
+						endpoints = call_info.setdefault('media_endpoints', [])
+						endpoint_info = {"ip": local[0], "port": local[1]}
+						if endpoint_info not in endpoints:
+								endpoints.append(endpoint_info)
+						endpoint_sets = call_info.setdefault('media_endpoints_set', {'local': set(), 'remote': set()})
+						endpoint_sets['local'].add(f"{local[0]}:{local[1]}")
+						endpoint_sets['remote'].add(f"{remote[0]}:{remote[1]}")
+
+		def _register_rtp_flow_endpoints(self, sip_layer, call_id):
+				"""SDP의 c=/m= 주소를 RTP 흐름 테이블에 등록 (Call-ID 호스트 = PBX 쪽)"""
+				try:
+						pbx_ip = call_id.split('@')[1].split(';')[0].split(':')[0] if '@' in call_id else ''
+						if pbx_ip:
+								self.rtp_flows.set_pbx_ip(call_id, pbx_ip)
+						sdp_ip = sip_layer.get('sdp_ip')
+						sdp_port = sip_layer.get('sdp_port')
+						if sdp_ip and sdp_port:
+								side = 'local' if sdp_ip == pbx_ip else 'remote'
+								self.rtp_flows.add_endpoint(call_id, sdp_ip, sdp_port, side)
+								self.log_to_sip_console(f"RTP endpoint 등록: {sdp_ip}:{sdp_port} ({side})", "SIP")
+				except Exception as e:
+						self.log_error("RTP endpoint 등록 실패", e)
 
 		def update_call_duration(self):
 				try:
@@ -4509,13 +4403,27 @@ class Dashboard(QMainWindow):
 						print(f"관리사이트 열기 실패: {e}")
 						QMessageBox.warning(self, "오류", "관리사이트를 열 수 없습니다.")
 
+		def _ensure_filesinfo_indexes(self):
+				"""filesinfo 검색 인덱스 생성 (call_id, created_at, 발신/수신 번호, 권한)"""
+				try:
+						ensure_mongo_indexes(self.filesinfo)
+				except Exception as e:
+						self.log_error("filesinfo 인덱스 생성 실패", e)
+
+		def rebuild_recording_catalog(self):
+				"""저장 경로를 병렬 스캔해 녹음 카탈로그 재구성 (백그라운드 스레드에서 호출)"""
+				try:
+						save_path = load_config().get('Recording', 'save_path', fallback='D:/PacketWaveRecord')
+						count = self.recording_catalog.rebuild(save_path, workers=min(8, os.cpu_count() or 1))
+						self.log_error(f"녹음 카탈로그 재구성 완료: {count}개", level="info")
+				except Exception as e:
+						self.log_error("녹음 카탈로그 재구성 실패", e)
+
 		def _save_to_mongodb(self, merged_file, html_file, local_num, remote_num, call_id, packet):
 				try:
-						max_id_doc = self.filesinfo.find_one(sort=[("id", -1)])
-						next_id = 1 if max_id_doc is None else max_id_doc["id"] + 1
 						now_kst = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=9)))
-						audio = AudioSegment.from_wav(merged_file)
-						duration_seconds = int(len(audio) / 1000.0)
+						# 재생 시간은 WAV 헤더로 계산 (파일 전체를 디코딩하지 않음)
+						duration_seconds = int(recording_storage.duration(merged_file))
 						hours = duration_seconds // 3600
 						minutes = (duration_seconds % 3600) // 60
 						seconds = duration_seconds % 60
@@ -4535,19 +4443,19 @@ class Dashboard(QMainWindow):
 						if packet is None:
 								# 내선번호를 기반으로 기본 권한 설정
 								if is_extension(local_num):
-										member_doc = self.members.find_one({"extension_num": local_num})
+										member_doc = self.extension_directory.lookup_member(local_num)
 										if member_doc:
 												per_lv8 = member_doc.get('per_lv8', '')
 												per_lv9 = member_doc.get('per_lv9', '')
 								elif is_extension(remote_num):
-										member_doc = self.members.find_one({"extension_num": remote_num})
+										member_doc = self.extension_directory.lookup_member(remote_num)
 										if member_doc:
 												per_lv8 = member_doc.get('per_lv8', '')
 												per_lv9 = member_doc.get('per_lv9', '')
 
 						elif is_extension(remote_num) and not is_extension(local_num):
 								# 외부 -> 내선 통화
-								member_doc = self.members.find_one({"extension_num": remote_num})
+								member_doc = self.extension_directory.lookup_member(remote_num)
 								if member_doc:
 										per_lv8 = member_doc.get('per_lv8', '')
 										per_lv9 = member_doc.get('per_lv9', '')
@@ -4565,7 +4473,7 @@ class Dashboard(QMainWindow):
 
 														if hasattr(sip_layer, 'msg_hdr'):
 																msg_hdr = sip_layer.msg_hdr
-																member_doc = self.members.find_one({"extension_num": local_num_str})
+																member_doc = self.extension_directory.lookup_member(local_num_str)
 																if member_doc:
 																		per_lv8 = member_doc.get('per_lv8', '')
 																		per_lv9 = member_doc.get('per_lv9', '')
@@ -4580,13 +4488,13 @@ class Dashboard(QMainWindow):
 														"per_lv9": per_lv9
 												})
 										else:
-												member_doc = self.members.find_one({"extension_num": local_num})
+												member_doc = self.extension_directory.lookup_member(local_num)
 												if member_doc:
 														per_lv8 = member_doc.get('per_lv8', '')
 														per_lv9 = member_doc.get('per_lv9', '')
 
+						# id는 저장 스레드가 counters 컬렉션에서 발급
 						doc = {
-								"id": next_id,
 								"user_id": local_num,
 								"filename": merged_file,
 								"from_number": local_num,
@@ -4603,8 +4511,13 @@ class Dashboard(QMainWindow):
 								"call_id": call_id,
 						}
 
-						result = self.filesinfo.insert_one(doc)
-						print(f"MongoDB 저장 완료: {result.inserted_id} (재생시간: {duration_formatted})")
+						self.filesinfo_writer.put(doc)
+						print(f"MongoDB 저장 대기열 추가: {call_id} (재생시간: {duration_formatted})")
+						if self.recording_catalog is not None:
+								self.recording_catalog.add(
+										merged_file, call_id, local_num, remote_num, now_kst, per_lv8, per_lv9,
+										filesize=filesize, duration=duration_seconds
+								)
 
 				except Exception as e:
 						print(f"MongoDB 저장 중 오류: {e}")
@@ -4831,6 +4744,8 @@ class Dashboard(QMainWindow):
 						)
 
 						if success:
+								if self.live_recorder is not None:
+										self.live_recorder.start_call(call_id)
 								self.log_error(f"통화 녹음 시작: {call_id} (내선: {extension})", level="info")
 						else:
 								self.log_error(f"통화 녹음 시작 실패: {call_id}", level="error")
@@ -4841,40 +4756,25 @@ class Dashboard(QMainWindow):
 		def _on_call_terminated(self, call_id: str):
 				"""통화 종료 시 호출되는 훅 메서드 (CallState.IN_CALL → TERMINATED)"""
 				try:
-						# 통화별 녹음 종료
+						# 실시간 녹음이 있으면 파일을 닫고 최종 경로로 옮기기만 함
+						if self.live_recorder is not None and call_id in self.live_recorder:
+								if self.recording_manager.finish_live_recording(call_id, self.live_recorder, self.latest_terminated_call_id):
+										self.log_error(f"실시간 녹음 저장 완료: {call_id}", level="info")
+										return
+								self.log_error(f"실시간 녹음 없음, 캡처 파일에서 변환: {call_id}", level="warning")
+
+						# 통화별 녹음 종료 (변환은 recording_manager의 작업 큐 워커가 처리)
 						recording_info = self.recording_manager.stop_call_recording(call_id)
 
 						if recording_info:
-								# 별도 스레드에서 변환 및 저장
-								conversion_thread = threading.Thread(
-										target=self._handle_recording_conversion,
-										args=(recording_info,),
-										daemon=True
-								)
-								conversion_thread.start()
-
 								extension = recording_info.get('extension', 'unknown')
-								self.log_error(f"통화 녹음 종료 및 변환 시작: {call_id} (내선: {extension})", level="info")
+								self.log_error(f"통화 녹음 종료 및 변환 대기열 등록: {call_id} (내선: {extension})", level="info")
 						else:
-								self.log_error(f"통화 녹음 정보 없음: {call_id}", level="warning")
+								self.log_error(f"통화 녹음 정보 없음 또는 변환 큐 등록 실패: {call_id}", level="warning")
 
 				except Exception as e:
 						self.log_error(f"통화 종료 처리 실패: {call_id}", e)
 
-		def _handle_recording_conversion(self, recording_info: dict):
-				"""녹음 파일 변환 및 저장 처리 (별도 스레드)"""
-				try:
-						success = self.recording_manager.convert_and_save(recording_info)
-
-						if success:
-								extension = recording_info.get('extension', 'unknown')
-								self.log_error(f"통화 녹음 변환 완료: {extension}", level="info")
-						else:
-								self.log_error(f"통화 녹음 변환 실패", level="error")
-
-				except Exception as e:
-						self.log_error(f"녹음 변환 처리 실패", e)
-
 		def get_active_recordings_status(self) -> str:
 				"""현재 진행 중인 녹음 상태 반환"""
 				try:
@@ -4953,4 +4853,6 @@ def main():
 
 
 if __name__ == "__main__":
+		# 변환 프로세스 풀 워커가 패키징된 실행 파일에서 시작될 때 필요
+		multiprocessing.freeze_support()
 		main()
\ No newline at end of file
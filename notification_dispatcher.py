@@ -0,0 +1,240 @@
+# WebSocket 알림 디스패처 - SIP 스레드의 알림을 서버 이벤트 루프 하나에서 처리 (이벤트마다 스레드/루프를 만들지 않음)
+# 세션(연결)마다 송신 큐를 두고, 내선번호 → 세션 구독 목록으로 바로 찾아 보냄
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Hashable, Optional
+
+DROP_OLDEST = 'drop_oldest'
+DISCONNECT = 'disconnect'
+
+
+class _ClientOutbox:
+    """세션 하나의 크기 제한 송신 큐 - 송신 태스크 하나가 순서대로 보냄 (서버 루프 안에서만 사용)"""
+
+    def __init__(self, websocket, address, maxsize, dispatcher):
+        self.websocket = websocket
+        self.address = address
+        self.extensions = set()  # 이 세션이 구독한 내선번호
+        self.queue = asyncio.Queue(maxsize)
+        self.keys = set()  # 큐에 있거나 보내는 중인 알림 키
+        self.dispatcher = dispatcher
+        self.task = asyncio.ensure_future(self._run())
+
+    def put(self, key, payload, submitted) -> bool:
+        """큐에 추가. 같은 키가 대기 중이거나 가득 차서 연결을 끊으면 False"""
+        if key is not None and key in self.keys:
+            return False
+        if self.queue.full():
+            if self.dispatcher.overflow_policy == DISCONNECT:
+                # 응답 없는 세션은 끊음 (클라이언트가 다시 연결하면 새 큐로 시작)
+                self.dispatcher._count('disconnected')
+                self.dispatcher.close_client(self.address, self.websocket)
+                asyncio.ensure_future(self.websocket.close())
+                return False
+            # 가득 차면 가장 오래된 알림을 버림 (오래된 벨울림/종료 알림은 의미가 없음)
+            old_key, _, _ = self.queue.get_nowait()
+            self.keys.discard(old_key)
+            self.dispatcher._count('dropped')
+        self.queue.put_nowait((key, payload, submitted))
+        if key is not None:
+            self.keys.add(key)
+        return True
+
+    async def _run(self):
+        while True:
+            key, payload, submitted = await self.queue.get()
+            try:
+                await self.websocket.send(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.dispatcher._count('failed')
+                self.dispatcher.logger.warning(f"알림 송신 실패: {e}")
+            else:
+                self.dispatcher._sent(time.monotonic() - submitted)
+            finally:
+                self.keys.discard(key)
+
+
+class NotificationDispatcher:
+    """다른 스레드에서 받은 알림 코루틴을 WebSocket 서버 루프에 run_coroutine_threadsafe로 넘김
+
+    - 같은 키의 알림이 처리 중(조회 중/큐 대기/송신 중)이면 새로 받지 않고 합침
+    - 세션마다 크기 제한 송신 큐와 송신 태스크 하나 (소켓은 자기 루프에서만 send).
+      큐가 가득 차면 overflow_policy에 따라 가장 오래된 알림을 버리거나(drop_oldest) 연결을 끊음(disconnect)
+    - 세션은 접속 주소와 구독한 내선번호로 찾음 (한 주소/한 내선에 여러 세션 가능 - NAT 뒤 여러 소프트폰)
+    - 요청 시점부터 송신 완료까지 지연 시간 기록
+    """
+
+    def __init__(self, queue_size: int = 32, latency_window: int = 1000, overflow_policy: str = DROP_OLDEST):
+        if overflow_policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"알 수 없는 송신 큐 정책: {overflow_policy}")
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._outboxes: Dict[object, _ClientOutbox] = {}  # websocket -> 송신 큐
+        self._by_address: Dict[Hashable, dict] = {}  # 접속 주소 -> {websocket: None} (연결 순서 유지)
+        self._by_extension: Dict[str, dict] = {}  # 내선번호 -> {websocket: None}
+        self._pending = set()  # 루프에 넘겼지만 아직 큐에 넣지 못한 알림 키
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._stats = {'submitted': 0, 'coalesced': 0, 'sent': 0, 'dropped': 0, 'failed': 0, 'undeliverable': 0,
+                       'disconnected': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """알림을 처리할 서버 이벤트 루프 지정"""
+        self.loop = loop
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _sent(self, latency):
+        with self._lock:
+            self._stats['sent'] += 1
+            self._latencies.append(latency)
+
+    def submit(self, key: Hashable, coro_func, *args):
+        """알림 요청 (아무 스레드에서나 호출). coro_func(*args, submitted=...)를 서버 루프에서 실행
+
+        루프가 없거나 같은 키가 처리 중이면 None, 아니면 concurrent.futures.Future
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            self._count('undeliverable')
+            return None
+        with self._lock:
+            if key in self._pending or self._queued(key):
+                self._stats['coalesced'] += 1
+                return None
+            self._pending.add(key)
+            self._stats['submitted'] += 1
+        submitted = time.monotonic()
+
+        async def run():
+            try:
+                return await coro_func(*args, submitted=submitted)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        try:
+            return asyncio.run_coroutine_threadsafe(run(), loop)
+        except RuntimeError:
+            # 루프가 막 종료된 경우
+            with self._lock:
+                self._pending.discard(key)
+            self._count('undeliverable')
+            return None
+
+    def _queued(self, key):
+        return any(key in outbox.keys for outbox in list(self._outboxes.values()))
+
+    def open(self, address, websocket):
+        """세션 연결 - 송신 큐/태스크 생성 (서버 루프에서 호출). 같은 주소의 다른 세션은 그대로 둠"""
+        if websocket in self._outboxes:
+            return
+        self._outboxes[websocket] = _ClientOutbox(websocket, address, self.queue_size, self)
+        self._by_address.setdefault(address, {})[websocket] = None
+
+    def subscribe(self, websocket, extension) -> bool:
+        """세션이 내선번호 알림을 구독 (등록 요청 시). 연결되지 않은 세션이면 False"""
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            return False
+        extension = str(extension)
+        outbox.extensions.add(extension)
+        self._by_extension.setdefault(extension, {})[websocket] = None
+        return True
+
+    def close_client(self, address, websocket=None):
+        """세션 연결 종료 - 보내지 못한 알림은 버림. websocket이 없으면 그 주소의 모든 세션 정리"""
+        sessions = [websocket] if websocket is not None else list(self._by_address.get(address, ()))
+        for session in sessions:
+            outbox = self._outboxes.pop(session, None)
+            if outbox is None:
+                continue
+            self._unindex(self._by_address, outbox.address, session)
+            for extension in outbox.extensions:
+                self._unindex(self._by_extension, extension, session)
+            outbox.task.cancel()
+            if outbox.queue.qsize():
+                self._count('dropped', outbox.queue.qsize())
+
+    @staticmethod
+    def _unindex(index, name, session):
+        sessions = index.get(name)
+        if sessions is not None:
+            sessions.pop(session, None)
+            if not sessions:
+                del index[name]
+
+    def sessions(self, extension=None) -> int:
+        """연결된 세션 수 (extension을 주면 그 내선을 구독한 세션 수)"""
+        if extension is None:
+            return len(self._outboxes)
+        return len(self._by_extension.get(str(extension), ()))
+
+    def _put(self, sessions, key, payload, submitted) -> int:
+        submitted = time.monotonic() if submitted is None else submitted
+        queued = 0
+        for session in list(sessions):
+            outbox = self._outboxes.get(session)
+            if outbox is None:
+                continue
+            if outbox.put(key, payload, submitted):
+                queued += 1
+            elif session in self._outboxes:
+                self._count('coalesced')
+        return queued
+
+    def publish(self, extension, key: Hashable, payload, submitted: float = None) -> int:
+        """내선번호를 구독한 모든 세션의 송신 큐에 추가 (서버 루프에서 호출). 큐에 넣은 세션 수"""
+        sessions = self._by_extension.get(str(extension))
+        if not sessions:
+            return 0
+        return self._put(sessions, key, payload, submitted)
+
+    def enqueue(self, address, key: Hashable, payload, submitted: float = None) -> int:
+        """접속 주소의 모든 세션 송신 큐에 추가 (서버 루프에서 호출). 큐에 넣은 세션 수 (연결 없음/중복이면 0)"""
+        sessions = self._by_address.get(address)
+        if not sessions:
+            self._count('undeliverable')
+            return 0
+        return self._put(sessions, key, payload, submitted)
+
+    def close(self):
+        """모든 송신 태스크 종료. 다른 스레드에서 호출하면 서버 루프에 넘겨 처리"""
+        loop, self.loop = self.loop, None
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                loop.call_soon_threadsafe(self._close_all)
+                return
+        self._close_all()
+
+    def _close_all(self):
+        for websocket, outbox in list(self._outboxes.items()):
+            self.close_client(outbox.address, websocket)
+
+    def metrics(self) -> Dict[str, float]:
+        """요청/합침/송신/버림/실패 건수, 대기 중 알림 수, 송신 지연(ms) 평균·p95·최대"""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+            stats['pending'] = len(self._pending)
+        stats['queued'] = sum(outbox.queue.qsize() for outbox in list(self._outboxes.values()))
+        if latencies:
+            stats['latency_avg_ms'] = sum(latencies) / len(latencies) * 1000
+            stats['latency_p95_ms'] = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000
+            stats['latency_max_ms'] = latencies[-1] * 1000
+        else:
+            stats['latency_avg_ms'] = stats['latency_p95_ms'] = stats['latency_max_ms'] = 0.0
+        return stats
@@ -0,0 +1,217 @@
+# 실시간 패킷 캡처 - pyshark 해석 없이 dumpcap 파이프/AF_PACKET 원시 프레임에서 UDP/SIP/RTP를 직접 디코딩
+import logging
+import socket
+import struct
+import subprocess
+import sys
+import time
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from pcap_io import (
+    LINKTYPE_ETHERNET,
+    PCAP_MAGIC_NS,
+    PCAP_MAGIC_US,
+    CapturedPacket,
+    PcapFormatError,
+    decode_udp,
+)
+from sip_parser import parse_sip
+
+DEFAULT_SIP_PORTS = (5060,)
+
+# AF_PACKET 소켓으로 모든 이더넷 프레임 수신 (Linux)
+_ETH_P_ALL = 0x0003
+
+
+class IpLayer:
+    """pyshark packet.ip 호환 (src, dst)"""
+    __slots__ = ('src', 'dst')
+
+    def __init__(self, src: str, dst: str):
+        self.src = src
+        self.dst = dst
+
+
+class UdpLayer:
+    """pyshark packet.udp 호환. payload는 16진 문자열이 아닌 원시 bytes"""
+    __slots__ = ('srcport', 'dstport', 'payload')
+
+    def __init__(self, srcport: int, dstport: int, payload: bytes):
+        self.srcport = srcport
+        self.dstport = dstport
+        self.payload = payload
+
+
+class LivePacket:
+    """캡처된 UDP 패킷 한 개. pyshark 패킷 객체 대신 사용
+
+    ip/udp 속성은 pyshark와 같은 이름을 쓰고, SIP 포트의 패킷에만 sip 속성이 생긴다.
+    """
+    __slots__ = ('timestamp', 'ip', 'udp', 'sip')
+
+    def __init__(self, timestamp: float, src_ip: str, dst_ip: str, src_port: int, dst_port: int, payload: bytes):
+        self.timestamp = timestamp
+        self.ip = IpLayer(src_ip, dst_ip)
+        self.udp = UdpLayer(src_port, dst_port, payload)
+
+    @property
+    def highest_layer(self) -> str:
+        if hasattr(self, 'sip'):
+            return 'SIP'
+        payload = self.udp.payload
+        if len(payload) >= 12 and payload[0] >> 6 == 2:
+            return 'RTP'
+        return 'UDP'
+
+
+def read_pcap_stream(stream: BinaryIO) -> Iterator[CapturedPacket]:
+    """파이프로 들어오는 classic pcap 스트림(dumpcap -F pcap -w -)을 레코드 단위로 읽기"""
+    header = _read_exact(stream, 24)
+    if header is None:
+        return
+    magic_le = struct.unpack('<I', header[:4])[0]
+    magic_be = struct.unpack('>I', header[:4])[0]
+    if magic_le in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+        endian, magic = '<', magic_le
+    elif magic_be in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+        endian, magic = '>', magic_be
+    else:
+        raise PcapFormatError("pcap 스트림이 아닙니다 (dumpcap에 -F pcap 옵션 필요)")
+    linktype = struct.unpack(endian + 'I', header[20:24])[0] & 0x0FFFFFFF
+    divisor = 1e9 if magic == PCAP_MAGIC_NS else 1e6
+    record = struct.Struct(endian + 'IIII')
+    offset = 24
+    while True:
+        raw = _read_exact(stream, 16)
+        if raw is None:
+            return
+        seconds, fraction, caplen, _ = record.unpack(raw)
+        data = _read_exact(stream, caplen)
+        if data is None:
+            return
+        yield CapturedPacket(seconds + fraction / divisor, linktype, memoryview(data), offset)
+        offset += 16 + caplen
+
+
+def _read_exact(stream: BinaryIO, size: int) -> Optional[bytes]:
+    data = stream.read(size)
+    if len(data) == size:
+        return data
+    chunks = [data] if data else []
+    received = len(data)
+    while received < size:
+        chunk = stream.read(size - received)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        received += len(chunk)
+    return b''.join(chunks)
+
+
+def decode_packets(frames: Iterable[CapturedPacket], sip_ports=DEFAULT_SIP_PORTS) -> Iterator[LivePacket]:
+    """원시 프레임에서 UDP만 골라 LivePacket으로 변환. SIP 포트의 패킷만 SIP 파서로 보냄"""
+    sip_ports = frozenset(sip_ports)
+    for frame in frames:
+        udp = decode_udp(frame.linktype, frame.data)
+        if udp is None:
+            continue
+        src_ip, dst_ip, src_port, dst_port, payload = udp
+        packet = LivePacket(frame.timestamp, src_ip, dst_ip, src_port, dst_port, bytes(payload))
+        if src_port in sip_ports or dst_port in sip_ports:
+            # keep-alive 등 SIP 형식이 아닌 페이로드는 None
+            message = parse_sip(packet.udp.payload)
+            if message is not None:
+                packet.sip = message
+        yield packet
+
+
+class RawPacketCapture:
+    """dumpcap 파이프 또는 AF_PACKET 소켓에서 UDP 패킷을 읽는 실시간 캡처
+
+    backend='dumpcap'은 dumpcap이 캡처 필터를 적용한 classic pcap을 stdout으로 내보내고,
+    backend='af_packet'은 Linux에서 소켓으로 프레임을 직접 받는다 (캡처 필터 없음).
+    """
+
+    def __init__(self, interface: str, dumpcap_path: str = None, capture_filter: str = "udp",
+                 sip_ports=DEFAULT_SIP_PORTS, backend: str = "dumpcap"):
+        self.interface = interface
+        self.dumpcap_path = dumpcap_path
+        self.capture_filter = capture_filter
+        self.sip_ports = tuple(sip_ports)
+        self.backend = backend
+        self.logger = logging.getLogger(__name__)
+        self._process = None
+        self._socket = None
+        self._closed = False
+
+    def start(self):
+        if self.backend == "af_packet":
+            if not hasattr(socket, 'AF_PACKET'):
+                raise OSError("AF_PACKET은 Linux에서만 사용할 수 있습니다")
+            self._socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(_ETH_P_ALL))
+            self._socket.bind((self.interface, 0))
+            self._socket.settimeout(1.0)
+        else:
+            cmd = [self.dumpcap_path or "dumpcap", "-i", str(self.interface), "-q", "-F", "pcap", "-w", "-"]
+            if self.capture_filter:
+                cmd[3:3] = ["-f", self.capture_filter]
+            creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+            self._process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=1024 * 1024,
+                creationflags=creationflags
+            )
+        self._closed = False
+        self.logger.info(f"원시 패킷 캡처 시작 ({self.backend}): {self.interface}")
+        return self
+
+    def packets(self) -> Iterator[LivePacket]:
+        """캡처된 UDP 패킷을 도착 순서대로 반환. close()하면 종료"""
+        if self._process is None and self._socket is None:
+            self.start()
+        frames = self._socket_frames() if self._socket is not None else read_pcap_stream(self._process.stdout)
+        return decode_packets(frames, self.sip_ports)
+
+    def __iter__(self):
+        return self.packets()
+
+    def _socket_frames(self) -> Iterator[CapturedPacket]:
+        buffer = bytearray(65536)
+        view = memoryview(buffer)
+        while not self._closed:
+            try:
+                size = self._socket.recv_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self._closed:
+                    return
+                raise
+            # recv_into 버퍼는 다음 패킷에서 재사용되므로 디코딩은 바로 이어서 끝나야 함
+            yield CapturedPacket(time.time(), LINKTYPE_ETHERNET, view[:size], 0)
+
+    def close(self):
+        self._closed = True
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
+        if self._process is not None:
+            try:
+                self._process.terminate()
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            except OSError:
+                pass
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
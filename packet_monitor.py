@@ -9,8 +9,8 @@ from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import *
 import threading
 import asyncio
-import audioop
 from config_loader import load_config
+import g711_codec
 
 class AudioManager:
 		"""오디오 처리 관련 클래스"""
@@ -96,14 +96,12 @@ class AudioManager:
 								return False
 								
 						# G.711 디코딩 및 쓰기
-						decoded_data = (audioop.alaw2lin(voice_data, 2) 
-														if payload_type == 8 
-														else audioop.ulaw2lin(voice_data, 2))
+						decoded_data = g711_codec.decode_bytes(voice_data, payload_type)
 															
 						self.wav_files[stream_key].writeframes(decoded_data)
 						return True
 								
-				except audioop.error as e:
+				except ValueError as e:
 						logging.error(f"오디오 디코딩 실패: {str(e)}")
 						return False
 								
@@ -0,0 +1,479 @@
+# pcap/pcapng 스트리밍 리더 - tshark 없이 캡처 파일을 직접 파싱
+import mmap
+import os
+import socket
+import struct
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+# 링크 타입 (https://www.tcpdump.org/linktypes.html)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+# pcapng 블록 타입
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 0x00000001
+PCAPNG_OPB = 0x00000002  # obsolete Packet Block
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# classic pcap 매직 (마이크로초 / 나노초)
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPPROTO_UDP = 17
+
+
+class CapturedPacket(NamedTuple):
+    """캡처 파일의 패킷 한 개 (data는 파일 매핑에 대한 zero-copy 뷰)"""
+    timestamp: float
+    linktype: int
+    data: memoryview
+    offset: int  # 블록(레코드) 시작 위치
+
+
+class UdpDatagram(NamedTuple):
+    """Ethernet/IP 헤더를 벗긴 UDP 데이터그램"""
+    timestamp: float
+    src_ip: str
+    dst_ip: str
+    src_port: int
+    dst_port: int
+    payload: memoryview
+    offset: int
+
+
+class RtpHeader(NamedTuple):
+    """RTP 고정 헤더 + 페이로드 뷰"""
+    payload_type: int
+    marker: bool
+    sequence: int
+    timestamp: int
+    ssrc: int
+    payload: memoryview
+
+
+class PcapFormatError(Exception):
+    """pcap/pcapng 형식이 아닌 파일"""
+
+
+def _strip_link_header(linktype: int, frame: memoryview) -> Tuple[int, int]:
+    """링크 계층 헤더를 건너뛰고 (ethertype, L3 시작 위치) 반환. 지원하지 않으면 (0, -1)"""
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return 0, -1
+        ethertype = (frame[12] << 8) | frame[13]
+        pos = 14
+        # 802.1Q / QinQ VLAN 태그
+        while ethertype in ETHERTYPE_VLAN and len(frame) >= pos + 4:
+            ethertype = (frame[pos + 2] << 8) | frame[pos + 3]
+            pos += 4
+        return ethertype, pos
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if not frame:
+            return 0, -1
+        version = frame[0] >> 4
+        return (ETHERTYPE_IPV4 if version == 4 else ETHERTYPE_IPV6 if version == 6 else 0), 0
+    if linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16:
+            return 0, -1
+        return (frame[14] << 8) | frame[15], 16
+    if linktype == LINKTYPE_LINUX_SLL2:
+        if len(frame) < 20:
+            return 0, -1
+        return (frame[0] << 8) | frame[1], 20
+    if linktype == LINKTYPE_NULL:
+        if len(frame) < 4:
+            return 0, -1
+        # 호스트 바이트 순서의 address family (2 = IPv4, 24/28/30 = IPv6)
+        family = frame[0] if frame[0] else frame[3]
+        return (ETHERTYPE_IPV4 if family == 2 else ETHERTYPE_IPV6), 4
+    return 0, -1
+
+
+def decode_udp(linktype: int, frame: memoryview) -> Optional[Tuple[str, str, int, int, memoryview]]:
+    """프레임에서 UDP를 찾아 (src_ip, dst_ip, src_port, dst_port, payload) 반환. UDP가 아니면 None"""
+    ethertype, pos = _strip_link_header(linktype, frame)
+    if pos < 0:
+        return None
+
+    if ethertype == ETHERTYPE_IPV4:
+        if len(frame) < pos + 20:
+            return None
+        ihl = (frame[pos] & 0x0F) * 4
+        if frame[pos + 9] != IPPROTO_UDP or ihl < 20:
+            return None
+        # 두 번째 이후 IP 조각은 UDP 헤더가 없음
+        if ((frame[pos + 6] & 0x1F) << 8) | frame[pos + 7]:
+            return None
+        total_length = (frame[pos + 2] << 8) | frame[pos + 3]
+        src_ip = socket.inet_ntoa(frame[pos + 12:pos + 16])
+        dst_ip = socket.inet_ntoa(frame[pos + 16:pos + 20])
+        udp = pos + ihl
+        ip_end = pos + total_length if total_length else len(frame)
+    elif ethertype == ETHERTYPE_IPV6:
+        # 확장 헤더 없는 UDP만 처리
+        if len(frame) < pos + 40 or frame[pos + 6] != IPPROTO_UDP:
+            return None
+        src_ip = socket.inet_ntop(socket.AF_INET6, bytes(frame[pos + 8:pos + 24]))
+        dst_ip = socket.inet_ntop(socket.AF_INET6, bytes(frame[pos + 24:pos + 40]))
+        udp = pos + 40
+        ip_end = udp + ((frame[pos + 4] << 8) | frame[pos + 5])
+    else:
+        return None
+
+    if len(frame) < udp + 8:
+        return None
+    src_port = (frame[udp] << 8) | frame[udp + 1]
+    dst_port = (frame[udp + 2] << 8) | frame[udp + 3]
+    udp_length = (frame[udp + 4] << 8) | frame[udp + 5]
+    end = min(len(frame), ip_end, udp + udp_length if udp_length >= 8 else ip_end)
+    return src_ip, dst_ip, src_port, dst_port, frame[udp + 8:end]
+
+
+def parse_rtp(payload: memoryview) -> Optional[RtpHeader]:
+    """UDP 페이로드를 RTP로 해석. RTP v2가 아니면 None"""
+    if len(payload) < 12 or (payload[0] >> 6) != 2:
+        return None
+    first = payload[0]
+    second = payload[1]
+    if 192 <= second <= 223:  # RTCP (RFC 5761)
+        return None
+    header_len = 12 + (first & 0x0F) * 4  # CSRC
+    if first & 0x10:  # 확장 헤더
+        if len(payload) < header_len + 4:
+            return None
+        header_len += 4 + ((payload[header_len + 2] << 8) | payload[header_len + 3]) * 4
+    end = len(payload)
+    if first & 0x20 and end > header_len:  # 패딩
+        end -= payload[end - 1]
+    if header_len > end:
+        return None
+    return RtpHeader(
+        second & 0x7F,
+        bool(second & 0x80),
+        (payload[2] << 8) | payload[3],
+        int.from_bytes(payload[4:8], 'big'),
+        int.from_bytes(payload[8:12], 'big'),
+        payload[header_len:end],
+    )
+
+
+class PcapReader:
+    """mmap 기반 pcap/pcapng 리더
+
+    파일을 한 번만 매핑하고 패킷 데이터를 복사 없이 memoryview로 돌려준다.
+    yield된 뷰는 close() 전까지만 유효하므로 보관하려면 bytes()로 복사해야 한다.
+    dumpcap이 아직 쓰고 있는 파일도 읽을 수 있으며, 끝의 미완성 블록은 건너뛰고
+    end_offset에 마지막 완전한 블록의 끝 위치를 기록한다.
+    """
+
+    def __init__(self, path, start_offset: int = 0):
+        self.path = str(path)
+        self.start_offset = start_offset
+        self.end_offset = start_offset
+        self.format = None  # 'pcap' | 'pcapng'
+        self.interfaces = []  # pcapng: [(linktype, snaplen, divisor)]
+        self._header_end = 0
+        self._endian = '<'
+        self._linktype = 0
+        self._divisor = 1e6
+        self._record = None
+        self._file = None
+        self._mmap = None
+        self._view = None
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._view = memoryview(b'')
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._view) >= 4:
+            magic = struct.unpack_from('<I', self._view, 0)[0]
+            if magic == PCAPNG_SHB:
+                self.format = 'pcapng'
+            elif magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS) or \
+                    struct.unpack_from('>I', self._view, 0)[0] in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+                self.format = 'pcap'
+            else:
+                raise PcapFormatError(f"지원하지 않는 캡처 형식: {self.path}")
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 호출자가 아직 패킷 뷰를 들고 있으면 GC 시점에 해제됨
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[CapturedPacket]:
+        return self.packets()
+
+    def packets(self) -> Iterator[CapturedPacket]:
+        if self.format == 'pcapng':
+            return self._iter_pcapng()
+        if self.format == 'pcap':
+            return self._iter_pcap()
+        return iter(())
+
+    def udp_datagrams(self) -> Iterator[UdpDatagram]:
+        """UDP 패킷만 디코딩하여 반환"""
+        for packet in self.packets():
+            decoded = decode_udp(packet.linktype, packet.data)
+            if decoded is not None:
+                yield UdpDatagram(packet.timestamp, *decoded, packet.offset)
+
+    def rtp_packets(self) -> Iterator[Tuple[UdpDatagram, RtpHeader]]:
+        """RTP로 해석 가능한 UDP 패킷만 반환"""
+        for datagram in self.udp_datagrams():
+            rtp = parse_rtp(datagram.payload)
+            if rtp is not None:
+                yield datagram, rtp
+
+    def packet_at(self, offset: int) -> Optional[CapturedPacket]:
+        """인덱스에 기록해 둔 블록(레코드) 위치의 패킷 한 개를 읽음"""
+        if self.format == 'pcap':
+            self._read_pcap_header()
+            if offset + 16 > len(self._view):
+                return None
+            ts_sec, ts_frac, incl_len, _orig_len = self._record.unpack_from(self._view, offset)
+            data_end = offset + 16 + incl_len
+            if data_end > len(self._view):
+                return None
+            return CapturedPacket(ts_sec + ts_frac / self._divisor, self._linktype, self._view[offset + 16:data_end], offset)
+        if self.format == 'pcapng':
+            self._read_pcapng_header()
+            if offset + 12 > len(self._view):
+                return None
+            block_type, block_len = struct.unpack_from(self._endian + 'II', self._view, offset)
+            if block_len < 12 or offset + block_len > len(self._view):
+                return None
+            return self._pcapng_packet(offset, block_type, block_len)
+        return None
+
+    def _read_pcap_header(self):
+        if self._header_end:
+            return
+        view = self._view
+        magic_le = struct.unpack_from('<I', view, 0)[0]
+        self._endian = '<' if magic_le in (PCAP_MAGIC_US, PCAP_MAGIC_NS) else '>'
+        magic = struct.unpack_from(self._endian + 'I', view, 0)[0]
+        self._divisor = 1e9 if magic == PCAP_MAGIC_NS else 1e6
+        if len(view) >= 24:
+            self._linktype = struct.unpack_from(self._endian + 'I', view, 20)[0] & 0x0FFFFFFF
+        self._record = struct.Struct(self._endian + 'IIII')
+        self._header_end = 24
+
+    def _iter_pcap(self) -> Iterator[CapturedPacket]:
+        view = self._view
+        if len(view) < 24:
+            return
+        self._read_pcap_header()
+        linktype, divisor, record = self._linktype, self._divisor, self._record
+
+        pos = max(self.start_offset, 24)
+        self.end_offset = pos
+        size = len(view)
+        while pos + 16 <= size:
+            ts_sec, ts_frac, incl_len, _orig_len = record.unpack_from(view, pos)
+            data_end = pos + 16 + incl_len
+            if data_end > size:
+                break
+            yield CapturedPacket(ts_sec + ts_frac / divisor, linktype, view[pos + 16:data_end], pos)
+            pos = data_end
+            self.end_offset = pos
+
+    def _read_pcapng_header(self):
+        """파일 앞부분의 SHB/IDB 블록에서 바이트 순서와 인터페이스 정보를 읽음
+
+        dumpcap은 인터페이스 블록을 파일 앞에 모아 쓰므로 start_offset부터 읽을 때
+        중간 블록을 모두 훑지 않고 바로 건너뛸 수 있다.
+        """
+        if self._header_end:
+            return
+        view = self._view
+        size = len(view)
+        pos = 0
+        while pos + 12 <= size:
+            block_type = struct.unpack_from(self._endian + 'I', view, pos)[0]
+            if block_type == PCAPNG_SHB:
+                magic = struct.unpack_from('<I', view, pos + 8)[0]
+                self._endian = '<' if magic == PCAPNG_BYTE_ORDER_MAGIC else '>'
+                self.interfaces = []
+            elif block_type != PCAPNG_IDB:
+                break
+            block_len = struct.unpack_from(self._endian + 'I', view, pos + 4)[0]
+            if block_len < 12 or block_len % 4 or pos + block_len > size:
+                break
+            if block_type == PCAPNG_IDB:
+                self.interfaces.append(self._parse_idb(view, pos, block_len, self._endian))
+            pos += block_len
+        self._header_end = pos
+
+    def _pcapng_packet(self, pos: int, block_type: int, block_len: int) -> Optional[CapturedPacket]:
+        view = self._view
+        endian = self._endian
+        interfaces = self.interfaces
+        if block_type == PCAPNG_EPB and block_len >= 32:
+            iface_id, ts_high, ts_low, cap_len = struct.unpack_from(endian + 'IIII', view, pos + 8)
+            if iface_id < len(interfaces):
+                linktype, _snaplen, divisor = interfaces[iface_id]
+                data_start = pos + 28
+                data_end = min(data_start + cap_len, pos + block_len - 4)
+                return CapturedPacket(((ts_high << 32) | ts_low) / divisor, linktype, view[data_start:data_end], pos)
+        elif block_type == PCAPNG_SPB and block_len >= 16 and interfaces:
+            linktype, snaplen, _divisor = interfaces[0]
+            orig_len = struct.unpack_from(endian + 'I', view, pos + 8)[0]
+            cap_len = min(orig_len, block_len - 16, snaplen or orig_len)
+            return CapturedPacket(0.0, linktype, view[pos + 12:pos + 12 + cap_len], pos)
+        elif block_type == PCAPNG_OPB and block_len >= 32:
+            iface_id = struct.unpack_from(endian + 'H', view, pos + 8)[0]
+            ts_high, ts_low, cap_len = struct.unpack_from(endian + 'III', view, pos + 12)
+            if iface_id < len(interfaces):
+                linktype, _snaplen, divisor = interfaces[iface_id]
+                data_start = pos + 28
+                data_end = min(data_start + cap_len, pos + block_len - 4)
+                return CapturedPacket(((ts_high << 32) | ts_low) / divisor, linktype, view[data_start:data_end], pos)
+        return None
+
+    def _iter_pcapng(self) -> Iterator[CapturedPacket]:
+        self._read_pcapng_header()
+        view = self._view
+        size = len(view)
+        pos = max(self.start_offset, self._header_end)
+        self.end_offset = pos
+        while pos + 12 <= size:
+            block_type, block_len = struct.unpack_from(self._endian + 'II', view, pos)
+            if block_type == PCAPNG_SHB:
+                # 새 섹션: 바이트 순서와 인터페이스 목록을 다시 읽음
+                magic = struct.unpack_from('<I', view, pos + 8)[0]
+                self._endian = '<' if magic == PCAPNG_BYTE_ORDER_MAGIC else '>'
+                block_len = struct.unpack_from(self._endian + 'I', view, pos + 4)[0]
+                self.interfaces = []
+            if block_len < 12 or block_len % 4 or pos + block_len > size:
+                break
+
+            if block_type == PCAPNG_IDB:
+                self.interfaces.append(self._parse_idb(view, pos, block_len, self._endian))
+            else:
+                packet = self._pcapng_packet(pos, block_type, block_len)
+                if packet is not None:
+                    yield packet
+
+            pos += block_len
+            self.end_offset = pos
+
+    @staticmethod
+    def _parse_idb(view: memoryview, pos: int, block_len: int, endian: str) -> Tuple[int, int, float]:
+        linktype, _reserved, snaplen = struct.unpack_from(endian + 'HHI', view, pos + 8)
+        divisor = 1e6
+        opt = pos + 16
+        end = pos + block_len - 4
+        while opt + 4 <= end:
+            code, length = struct.unpack_from(endian + 'HH', view, opt)
+            if code == 0:
+                break
+            if code == 9 and length >= 1:  # if_tsresol
+                resol = view[opt + 4]
+                divisor = float(2 ** (resol & 0x7F)) if resol & 0x80 else float(10 ** resol)
+            opt += 4 + ((length + 3) & ~3)
+        return linktype, snaplen, divisor
+
+
+def summarize_rtp_streams(path, min_packets: int = 1) -> Dict[int, Dict]:
+    """캡처 파일을 한 번 읽어 SSRC별 RTP 스트림 정보와 페이로드를 수집"""
+    streams = {}
+    with PcapReader(path) as reader:
+        for datagram, rtp in reader.rtp_packets():
+            stream = streams.get(rtp.ssrc)
+            if stream is None:
+                stream = streams[rtp.ssrc] = {
+                    'ssrc': rtp.ssrc,
+                    'src_ip': datagram.src_ip,
+                    'dst_ip': datagram.dst_ip,
+                    'src_port': datagram.src_port,
+                    'dst_port': datagram.dst_port,
+                    'payload_type': rtp.payload_type,
+                    'packet_count': 0,
+                    'first_timestamp': datagram.timestamp,
+                    'payload': bytearray(),
+                }
+            stream['packet_count'] += 1
+            stream['payload'] += rtp.payload
+    return {ssrc: info for ssrc, info in streams.items() if info['packet_count'] >= min_packets}
+
+
+class PcapngWriter:
+    """최소 pcapng 작성기 (SHB + 링크 타입별 IDB + EPB, 마이크로초 타임스탬프)
+
+    close() 후에도 write()를 호출하면 파일을 append 모드로 다시 열어 이어 쓴다.
+    여러 파일을 동시에 쓰는 쪽에서 열린 핸들 수를 제한할 때 사용한다.
+    """
+
+    def __init__(self, path, snaplen: int = 262144):
+        self.path = str(path)
+        self.snaplen = snaplen
+        self.packet_count = 0
+        self._interfaces = {}  # linktype -> interface id
+        self._file = open(self.path, 'wb')
+        # Section Header Block (section length 미지정 = -1)
+        self._file.write(struct.pack('<IIIHHqI', PCAPNG_SHB, 28, PCAPNG_BYTE_ORDER_MAGIC, 1, 0, -1, 28))
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def write(self, timestamp: float, linktype: int, data):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        iface_id = self._interfaces.get(linktype)
+        if iface_id is None:
+            iface_id = self._interfaces[linktype] = len(self._interfaces)
+            self._file.write(struct.pack('<IIHHII', PCAPNG_IDB, 20, linktype, 0, self.snaplen, 20))
+
+        ts = int(round(timestamp * 1e6))
+        cap_len = len(data)
+        padding = -cap_len % 4
+        block_len = 32 + cap_len + padding
+        self._file.write(struct.pack('<IIIIIII', PCAPNG_EPB, block_len, iface_id,
+                                     ts >> 32, ts & 0xFFFFFFFF, cap_len, cap_len))
+        self._file.write(data)
+        self._file.write(b'\x00' * padding + struct.pack('<I', block_len))
+        self.packet_count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
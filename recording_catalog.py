@@ -0,0 +1,332 @@
+# 녹음 카탈로그 - 저장 경로의 MERGE 녹음을 SQLite에 색인해 번호·날짜·Call-ID 검색에서 디렉터리 순회와 컬렉션 스캔을 없앤다
+import logging
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import recording_storage
+from utils.helpers import is_extension
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    call_id TEXT,
+    created_at REAL NOT NULL,
+    from_number TEXT NOT NULL DEFAULT '',
+    to_number TEXT NOT NULL DEFAULT '',
+    extension TEXT NOT NULL DEFAULT '',
+    per_lv8 TEXT NOT NULL DEFAULT '',
+    per_lv9 TEXT NOT NULL DEFAULT '',
+    filesize INTEGER NOT NULL DEFAULT 0,
+    duration REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_call ON recordings (call_id);
+CREATE INDEX IF NOT EXISTS idx_recordings_created ON recordings (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_recordings_from ON recordings (from_number, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_recordings_to ON recordings (to_number, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_recordings_extension ON recordings (extension, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_recordings_perm ON recordings (per_lv8, per_lv9, created_at, id);
+"""
+
+_COLUMNS = ('id', 'path', 'call_id', 'created_at', 'from_number', 'to_number', 'extension',
+            'per_lv8', 'per_lv9', 'filesize', 'duration')
+
+# filesinfo 컬렉션 인덱스 (이름, 키) - 검색은 항상 created_at, _id 역순으로 정렬
+MONGO_INDEXES = (
+    ('id', [('id', -1)], {}),
+    # 콜당 문서 하나 - insert_many(ordered=False) 재시도 때 이미 저장된 문서는 E11000으로 걸러짐 (call_id 없는 이전 문서 제외)
+    ('call_id', [('call_id', 1)], {'unique': True, 'partialFilterExpression': {'call_id': {'$type': 'string'}}}),
+    ('created_at', [('created_at', -1), ('_id', -1)], {}),
+    ('from_number_created_at', [('from_number', 1), ('created_at', -1), ('_id', -1)], {}),
+    ('to_number_created_at', [('to_number', 1), ('created_at', -1), ('_id', -1)], {}),
+    ('per_lv_created_at', [('per_lv8', 1), ('per_lv9', 1), ('created_at', -1), ('_id', -1)], {}),
+)
+# 같은 이름의 인덱스가 다른 옵션으로 이미 있음 (IndexOptionsConflict, IndexKeySpecsConflict)
+_INDEX_CONFLICT_CODES = (85, 86)
+
+# 저장 경로의 녹음 파일명
+#   SipRtpSessionGrouper: save_path/YYYY-MM-DD/from_to/{YYYYMMDD}_MERGE_{from}_{to}_{call_id}.wav
+#   RTPStreamManager/WavMerger: save_path/YYYYMMDD/phone_ip/time/{HHMMSSfff}_MERGE_{from}_{to}_{YYYYMMDD}_{hash}.wav
+_GROUPER_NAME = re.compile(r'^(?P<date>\d{8})_(?P<kind>IN|OUT|MERGE)_(?P<from>[^_]*)_(?P<to>[^_]*)_(?P<key>.+)$')
+_STREAM_NAME = re.compile(r'^(?P<time>\d{6}|\d{9})_(?P<kind>IN|OUT|MERGE)_(?P<from>[^_]*)_(?P<to>[^_]*)_(?P<date>\d{8})(?:_(?P<key>.+))?$')
+_AUDIO_SUFFIXES = set(recording_storage.EXTENSIONS.values())
+
+
+def _normalize(path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+def _timestamp(value) -> float:
+    """datetime / epoch 초 → epoch 초 (naive datetime은 로컬 시각)"""
+    if value is None:
+        return datetime.now().timestamp()
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _extension_of(from_number: str, to_number: str) -> str:
+    """통화의 내선 쪽 번호 (양쪽이 내선이면 발신 내선)"""
+    for number in (from_number, to_number):
+        if is_extension(number):
+            return str(number)
+    return ''
+
+
+def parse_recording_name(path) -> Optional[Dict]:
+    """녹음 파일명에서 {'kind', 'from_number', 'to_number', 'date', 'time', 'key'} 추출. 녹음이 아니면 None"""
+    path = Path(path)
+    if path.suffix.lower() not in _AUDIO_SUFFIXES:
+        return None
+    match = _GROUPER_NAME.match(path.stem) or _STREAM_NAME.match(path.stem)
+    if not match:
+        return None
+    try:
+        date = datetime.strptime(match.group('date'), '%Y%m%d').date()
+    except ValueError:
+        return None
+    fields = match.groupdict()
+    return {'kind': fields['kind'], 'from_number': fields['from'], 'to_number': fields['to'],
+            'date': date, 'time': fields.get('time'), 'key': fields.get('key')}
+
+
+def _scan_entry(path: Path) -> Optional[Dict]:
+    """MERGE 녹음 파일 하나의 카탈로그 항목 (생성 시각은 파일명, 시각이 없으면 같은 날짜의 수정 시각)"""
+    parsed = parse_recording_name(path)
+    if parsed is None or parsed['kind'] != 'MERGE':
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if parsed['time']:
+        created = datetime.strptime(parsed['date'].strftime('%Y%m%d') + parsed['time'][:6], '%Y%m%d%H%M%S')
+    else:
+        modified = datetime.fromtimestamp(stat.st_mtime)
+        created = modified if modified.date() == parsed['date'] else datetime.combine(parsed['date'], datetime.min.time())
+    return {'path': _normalize(path), 'created_at': created.timestamp(),
+            'from_number': parsed['from_number'], 'to_number': parsed['to_number'],
+            'extension': _extension_of(parsed['from_number'], parsed['to_number']),
+            'filesize': stat.st_size, 'duration': recording_storage.duration(path)}
+
+
+def _scan_tree(directory: Path) -> List[Dict]:
+    entries = []
+    for current, _, files in os.walk(directory):
+        for name in files:
+            entry = _scan_entry(Path(current, name))
+            if entry:
+                entries.append(entry)
+    return entries
+
+
+class RecordingCatalog:
+    """MERGE 녹음 한 건당 한 행 - 경로, Call-ID, 생성 시각, 번호, 내선, 권한(per_lv8/9), 크기, 재생 시간
+
+    녹음을 저장할 때 add()로 기록하고, 카탈로그가 없거나 파일을 옮긴 뒤에는 rebuild()가 저장 경로를
+    날짜 폴더 단위로 나눠 병렬로 훑어 다시 채운다. search()는 (created_at, id) 역순 keyset
+    페이지네이션이라 몇 번째 페이지든 인덱스 범위만 읽는다.
+    """
+
+    def __init__(self, db_path="temp_captures/recording_catalog.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def add(self, path, call_id: str = None, from_number: str = '', to_number: str = '', created_at=None,
+            per_lv8: str = '', per_lv9: str = '', filesize: int = None, duration: float = None):
+        """녹음 기록 (같은 경로가 있으면 갱신). filesize/duration을 생략하면 파일에서 읽음"""
+        file_path = Path(path)
+        if filesize is None:
+            filesize = file_path.stat().st_size if file_path.exists() else 0
+        if duration is None:
+            duration = recording_storage.duration(file_path)
+        from_number, to_number = str(from_number or ''), str(to_number or '')
+        row = (_normalize(path), call_id, _timestamp(created_at), from_number, to_number,
+               _extension_of(from_number, to_number), per_lv8 or '', per_lv9 or '', filesize, duration)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO recordings (path, call_id, created_at, from_number, to_number, extension, per_lv8, per_lv9, "
+                "filesize, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                "call_id = COALESCE(excluded.call_id, call_id), created_at = excluded.created_at, "
+                "from_number = excluded.from_number, to_number = excluded.to_number, extension = excluded.extension, "
+                "per_lv8 = excluded.per_lv8, per_lv9 = excluded.per_lv9, filesize = excluded.filesize, "
+                "duration = excluded.duration", row)
+            self._conn.commit()
+
+    def move(self, old_path, new_path) -> bool:
+        """파일을 옮기거나 다시 인코딩한 뒤 경로·크기·재생 시간 갱신 (FLAC/Opus 인코딩 등)"""
+        new_path = Path(new_path)
+        filesize = new_path.stat().st_size if new_path.exists() else 0
+        # FLAC/Opus는 헤더로 재생 시간을 알 수 없으므로 원본 WAV에서 계산한 값 유지
+        duration = recording_storage.duration(new_path)
+        with self._lock:
+            updated = self._conn.execute("UPDATE recordings SET path = ?, filesize = ?, duration = "
+                                         "CASE WHEN ? > 0 THEN ? ELSE duration END WHERE path = ?",
+                                         (_normalize(new_path), filesize, duration, duration,
+                                          _normalize(old_path))).rowcount
+            self._conn.commit()
+        return updated > 0
+
+    def remove(self, path) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM recordings WHERE path = ?", (_normalize(path),)).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def by_call_id(self, call_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM recordings WHERE call_id = ? "
+                                      "ORDER BY created_at DESC, id DESC", (call_id,)).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def search(self, number: str = None, extension: str = None, start=None, end=None,
+               per_lv8: str = None, per_lv9: str = None, limit: int = 50,
+               cursor: Tuple[float, int] = None) -> Tuple[List[Dict], Optional[Tuple[float, int]]]:
+        """최신순 검색 - (행 목록, 다음 페이지 cursor). cursor가 None이면 마지막 페이지
+
+        number는 발신/수신 어느 쪽이든 일치, extension은 통화의 내선 쪽 번호. start/end는
+        datetime 또는 epoch 초 (start 이상, end 미만). 다음 페이지는 반환된 cursor를 그대로 넘긴다.
+        """
+        conditions, params = [], []
+        if extension:
+            conditions.append("extension = ?")
+            params.append(str(extension))
+        if start is not None:
+            conditions.append("created_at >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            conditions.append("created_at < ?")
+            params.append(_timestamp(end))
+        for column, value in (('per_lv8', per_lv8), ('per_lv9', per_lv9)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if cursor is not None:
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend((cursor[0], cursor[0], cursor[1]))
+
+        columns = ', '.join(_COLUMNS)
+        order = f"ORDER BY created_at DESC, id DESC LIMIT {int(limit) + 1}"
+        if number:
+            # 발신/수신 인덱스를 각각 limit+1개까지만 읽고 합침 (OR 조건은 두 인덱스를 모두 정렬해야 함)
+            branches = []
+            for column in ('from_number', 'to_number'):
+                where = ' AND '.join([f"{column} = ?"] + conditions)
+                branches.append(f"SELECT * FROM (SELECT {columns} FROM recordings WHERE {where} {order})")
+            sql = f"SELECT * FROM ({' UNION '.join(branches)}) {order}"
+            params = [str(number)] + params + [str(number)] + params
+        else:
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            sql = f"SELECT {columns} FROM recordings {where} {order}"
+        with self._lock:
+            rows = [dict(zip(_COLUMNS, row)) for row in self._conn.execute(sql, params).fetchall()]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1]['created_at'], rows[-1]['id'])
+
+    def rebuild(self, root, workers: int = 4) -> int:
+        """저장 경로를 최상위 폴더(날짜)별로 병렬 스캔해 카탈로그 갱신. 색인된 녹음 수 반환
+
+        이미 있는 행은 Call-ID·권한·생성 시각을 유지하고 크기와 재생 시간만 갱신한다. root 아래에
+        있던 행 중 파일이 사라진 것은 삭제한다.
+        """
+        root = Path(root)
+        if not root.is_dir():
+            return 0
+        children = list(root.iterdir())
+        directories = [child for child in children if child.is_dir()]
+        entries = [entry for entry in map(_scan_entry, [child for child in children if child.is_file()]) if entry]
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="catalog-scan") as executor:
+            for found in executor.map(_scan_tree, directories):
+                entries.extend(found)
+
+        prefix = _normalize(root).rstrip(os.sep) + os.sep
+        seen = {entry['path'] for entry in entries}
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO recordings (path, created_at, from_number, to_number, extension, filesize, duration) "
+                "VALUES (:path, :created_at, :from_number, :to_number, :extension, :filesize, :duration) "
+                "ON CONFLICT(path) DO UPDATE SET filesize = excluded.filesize, duration = excluded.duration", entries)
+            stale = [(path,) for (path,) in self._conn.execute(
+                "SELECT path FROM recordings WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)) if path not in seen]
+            self._conn.executemany("DELETE FROM recordings WHERE path = ?", stale)
+            self._conn.commit()
+        self.logger.info(f"녹음 카탈로그 재구성: {root} - {len(entries)}개 색인, {len(stale)}개 삭제")
+        return len(entries)
+
+
+def ensure_mongo_indexes(collection) -> List[str]:
+    """filesinfo 컬렉션에 검색용 인덱스 생성 (이미 있으면 그대로). 생성/확인한 인덱스 이름 반환
+
+    unique 없이 만들어진 이전 call_id 인덱스는 다시 만든다. 기존 문서에 중복 call_id가 있어
+    unique로 만들 수 없으면 일반 인덱스로 두고 경고만 남긴다 (기록기는 재시도 때 call_id를 조회해 거름).
+    """
+    logger = logging.getLogger(__name__)
+    names = []
+    for name, keys, options in MONGO_INDEXES:
+        try:
+            names.append(collection.create_index(keys, name=name, background=True, **options))
+            continue
+        except Exception as e:
+            if getattr(e, 'code', None) not in _INDEX_CONFLICT_CODES:
+                raise
+            logger.info(f"filesinfo 인덱스 옵션 변경으로 다시 생성: {name}")
+        collection.drop_index(name)
+        try:
+            names.append(collection.create_index(keys, name=name, background=True, **options))
+        except Exception as e:
+            logger.warning(f"filesinfo 인덱스를 옵션대로 만들 수 없어 일반 인덱스로 생성: {name} - {e}")
+            names.append(collection.create_index(keys, name=name, background=True))
+    return names
+
+
+def mongo_search(collection, number: str = None, start=None, end=None, per_lv8: str = None, per_lv9: str = None,
+                 limit: int = 50, cursor: Tuple = None) -> Tuple[List[Dict], Optional[Tuple]]:
+    """filesinfo 최신순 검색 - RecordingCatalog.search와 같은 (문서 목록, 다음 cursor) 형태
+
+    cursor는 (created_at, _id)이며 skip 없이 인덱스 위치에서 이어 읽는다.
+    """
+    clauses = []
+    if number:
+        clauses.append({'$or': [{'from_number': str(number)}, {'to_number': str(number)}]})
+    created = {}
+    if start is not None:
+        created['$gte'] = start
+    if end is not None:
+        created['$lt'] = end
+    if created:
+        clauses.append({'created_at': created})
+    for field, value in (('per_lv8', per_lv8), ('per_lv9', per_lv9)):
+        if value is not None:
+            clauses.append({field: value})
+    if cursor is not None:
+        clauses.append({'$or': [{'created_at': {'$lt': cursor[0]}},
+                                {'created_at': cursor[0], '_id': {'$lt': cursor[1]}}]})
+    query = {'$and': clauses} if len(clauses) > 1 else (clauses[0] if clauses else {})
+    docs = list(collection.find(query).sort([('created_at', -1), ('_id', -1)]).limit(limit + 1))
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, (docs[-1]['created_at'], docs[-1]['_id'])
@@ -0,0 +1,223 @@
+# 녹음 저장 형식 - 원본 G.711(WAV 포맷 태그 6/7), FLAC, Opus로 보관하고 16kHz PCM은 필요할 때만 변환
+import configparser
+import io
+import os
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import audio_dsp
+import g711_codec
+from wav_stream_writer import StreamingWavWriter, WAVE_FORMAT_ALAW, WAVE_FORMAT_MULAW, WAVE_FORMAT_PCM
+
+# pcm: 16kHz 16비트 PCM (필터·정규화 적용, 기존 방식)
+# g711: 8kHz 원본 G.711 페이로드를 그대로 WAV(포맷 태그 6/7)에 보관
+# flac/opus: g711로 기록한 뒤 통화 종료 후 ffmpeg로 인코딩 (flac 무손실, opus 저비트레이트)
+FORMATS = ('pcm', 'g711', 'flac', 'opus')
+EXTENSIONS = {'pcm': '.wav', 'g711': '.wav', 'flac': '.flac', 'opus': '.opus'}
+
+# settings.ini [FFmpeg] paths가 없을 때 찾아볼 경로 (PATH, 일반적인 Windows 설치 위치)
+FFMPEG_PATHS = ('ffmpeg.exe', 'ffmpeg', 'C:/ffmpeg/bin/ffmpeg.exe', 'C:/Program Files/ffmpeg/bin/ffmpeg.exe',
+                'C:/Program Files (x86)/ffmpeg/bin/ffmpeg.exe', './ffmpeg/bin/ffmpeg.exe')
+_ffmpeg_found: Dict[Tuple[str, ...], Optional[str]] = {}
+
+_FORMAT_TAGS = {g711_codec.PCMA: WAVE_FORMAT_ALAW, g711_codec.PCMU: WAVE_FORMAT_MULAW}
+_PAYLOAD_TYPES = {WAVE_FORMAT_ALAW: g711_codec.PCMA, WAVE_FORMAT_MULAW: g711_codec.PCMU}
+
+
+def ffmpeg_paths(settings_path='settings.ini') -> List[str]:
+    """settings.ini [FFmpeg] paths (없으면 FFMPEG_PATHS)"""
+    config = configparser.ConfigParser()
+    try:
+        config.read(settings_path, encoding='utf-8')
+    except configparser.Error:
+        return list(FFMPEG_PATHS)
+    paths = [path.strip() for path in config.get('FFmpeg', 'paths', fallback='').split(',') if path.strip()]
+    return paths or list(FFMPEG_PATHS)
+
+
+def find_ffmpeg(paths: Iterable[str] = None) -> Optional[str]:
+    """실행되는 첫 ffmpeg 경로 (paths가 없으면 settings.ini 설정). 같은 후보 목록은 한 번만 확인"""
+    candidates = tuple(paths) if paths is not None else tuple(ffmpeg_paths())
+    if candidates not in _ffmpeg_found:
+        found = None
+        for path in candidates:
+            try:
+                if subprocess.run([path, '-version'], capture_output=True, timeout=5).returncode == 0:
+                    found = path
+                    break
+            except (OSError, subprocess.SubprocessError):
+                continue
+        _ffmpeg_found[candidates] = found
+    return _ffmpeg_found[candidates]
+
+
+def is_archival(storage_format: str) -> bool:
+    """8kHz 원본 G.711로 기록하는 형식인지 (g711, flac, opus)"""
+    return storage_format in ('g711', 'flac', 'opus')
+
+
+def format_tag(payload_type: int) -> int:
+    """RTP 페이로드 타입(0/8) → WAV 포맷 태그(7/6)"""
+    return _FORMAT_TAGS[payload_type]
+
+
+def g711_writer(path, payload_type: int = g711_codec.PCMA, channels: int = 1,
+                header_interval: float = 1.0) -> StreamingWavWriter:
+    """G.711 바이트를 그대로 덧붙이는 8kHz WAV writer"""
+    return StreamingWavWriter(path, channels=channels, sampwidth=1, framerate=8000,
+                              header_interval=header_interval, format_tag=format_tag(payload_type))
+
+
+def write_g711(path, payload, payload_type: int) -> int:
+    """G.711 페이로드를 변환 없이 WAV로 저장. 기록한 프레임 수 반환"""
+    with g711_writer(path, payload_type) as writer:
+        writer.write(bytes(payload))
+    return writer.frames_written
+
+
+def write_g711_from_pcm(path, samples: np.ndarray, channels: int = 1) -> int:
+    """8kHz int16 PCM(다채널은 인터리브)을 A-law로 인코딩해 저장"""
+    with g711_writer(path, g711_codec.PCMA, channels) as writer:
+        writer.write(g711_codec.encode(samples, g711_codec.PCMA))
+    return writer.frames_written
+
+
+def wav_info(source) -> Dict[str, int]:
+    """WAV 헤더의 format_tag, channels, rate, bits, data_offset, data_size
+
+    파이프로 받은 ffmpeg 출력처럼 data 크기가 비어 있거나 실제보다 크게 적힌 경우도 있으므로
+    크기는 호출하는 쪽에서 실제 길이로 잘라 쓴다.
+    """
+    handle = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        riff = handle.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise ValueError("WAV 파일이 아님")
+        info = None
+        while True:
+            chunk = handle.read(8)
+            if len(chunk) < 8:
+                raise ValueError("data 청크 없음")
+            chunk_id, size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                body = handle.read(size + (size & 1))
+                tag, channels, rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if tag == 0xFFFE and size >= 40:
+                    # WAVE_FORMAT_EXTENSIBLE - 서브포맷 GUID 앞 2바이트가 실제 포맷 태그
+                    tag = struct.unpack('<H', body[24:26])[0]
+                info = {'format_tag': tag, 'channels': channels, 'rate': rate, 'bits': bits}
+            elif chunk_id == b'data':
+                if info is None:
+                    raise ValueError("fmt 청크 없음")
+                info['data_offset'] = handle.tell()
+                info['data_size'] = size
+                return info
+            else:
+                handle.seek(size + (size & 1), os.SEEK_CUR)
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def duration(path) -> float:
+    """WAV 헤더의 data 크기로 계산한 재생 시간(초) - 파일을 디코딩하지 않음. WAV가 아니거나 읽을 수 없으면 0"""
+    path = Path(path)
+    if path.suffix.lower() != '.wav':
+        return 0.0
+    try:
+        info = wav_info(path)
+        frame_size = info['channels'] * max(info['bits'] // 8, 1)
+        # 기록 중 종료된 파일은 헤더 크기가 실제보다 작거나 클 수 있으므로 파일 크기로 제한
+        size = min(info['data_size'], path.stat().st_size - info['data_offset'])
+        return round(size / frame_size / info['rate'], 3)
+    except (OSError, ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _decode_wav(data: bytes) -> Tuple[int, int, np.ndarray]:
+    info = wav_info(io.BytesIO(data))
+    start = info['data_offset']
+    size = min(info['data_size'], len(data) - start) if info['data_size'] else len(data) - start
+    body = data[start:start + size]
+    tag, bits = info['format_tag'], info['bits']
+    if tag in _PAYLOAD_TYPES:
+        samples = g711_codec.decode(body, _PAYLOAD_TYPES[tag])
+    elif tag == WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(body[:len(body) // 2 * 2], dtype='<i2')
+    elif tag == WAVE_FORMAT_PCM and bits == 8:
+        samples = ((np.frombuffer(body, dtype=np.uint8).astype(np.int16) - 128) << 8).astype(np.int16)
+    else:
+        raise ValueError(f"지원하지 않는 WAV 형식: 태그 {tag}, {bits}비트")
+    channels = info['channels']
+    return info['rate'], channels, samples[:len(samples) // channels * channels].reshape(-1, channels)
+
+
+def read_audio(path, ffmpeg: str = 'ffmpeg', timeout: float = 120) -> Tuple[int, np.ndarray]:
+    """저장된 녹음을 (sample_rate, int16 [프레임, 채널]) 로 읽음. WAV는 직접, FLAC/Opus는 ffmpeg로 디코딩"""
+    path = Path(path)
+    if path.suffix.lower() == '.wav':
+        rate, _, samples = _decode_wav(path.read_bytes())
+        return rate, samples
+    result = subprocess.run([ffmpeg, '-v', 'error', '-i', str(path), '-f', 'wav', '-acodec', 'pcm_s16le', '-'],
+                            capture_output=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 디코딩 실패: {path.name} - {result.stderr.decode(errors='replace').strip()}")
+    rate, _, samples = _decode_wav(result.stdout)
+    return rate, samples
+
+
+def is_pcm_wav(path) -> bool:
+    """일반 PCM WAV(wave/pydub로 바로 읽을 수 있는 파일)인지. G.711 WAV, FLAC, Opus는 False"""
+    path = Path(path)
+    if path.suffix.lower() != '.wav':
+        return False
+    try:
+        return wav_info(path)['format_tag'] == WAVE_FORMAT_PCM
+    except (OSError, ValueError):
+        return False
+
+
+def transcode_to_pcm(path, out_path, sample_rate: int = 16000, gain: float = 2.0, ffmpeg: str = 'ffmpeg') -> int:
+    """보관 형식 녹음을 전사용 PCM WAV로 변환 (필터·볼륨·정규화·리샘플 - pcm 저장 형식과 같은 처리)
+
+    이미 전사용 형식(16비트 모노 sample_rate PCM)이면 복사만 한다. 2채널(정렬 MERGE)은 모노로
+    합친다. 기록한 프레임 수 반환.
+    """
+    if is_pcm_wav(path):
+        info = wav_info(path)
+        if info['bits'] == 16 and info['channels'] == 1 and info['rate'] == sample_rate:
+            shutil.copyfile(str(path), str(out_path))
+            return info['data_size'] // 2
+    rate, samples = read_audio(path, ffmpeg)
+    mono = samples[:, 0] if samples.shape[1] == 1 else g711_codec.mix(samples[:, 0], samples[:, 1])
+    return audio_dsp.write_pcm(mono, rate, out_path, audio_dsp.transcription_chain(rate, sample_rate, gain))
+
+
+def encode_archive(path, storage_format: str, ffmpeg: str = 'ffmpeg', bitrate: str = '16k',
+                   timeout: float = 120) -> Path:
+    """G.711 WAV를 FLAC/Opus로 인코딩하고 원본 WAV를 지움. 인코딩된 파일 경로 반환
+
+    pcm/g711 형식이거나 이미 인코딩된 파일은 그대로 path를 반환한다. 실패하면 원본 WAV를 남기고 RuntimeError.
+    """
+    path = Path(path)
+    if storage_format not in ('flac', 'opus') or path.suffix.lower() != '.wav':
+        return path
+    out_path = path.with_suffix(EXTENSIONS[storage_format])
+    part_path = out_path.with_name(out_path.name + '.part')
+    if storage_format == 'flac':
+        codec = ['-c:a', 'flac', '-compression_level', '8', '-f', 'flac']
+    else:
+        codec = ['-c:a', 'libopus', '-b:a', bitrate, '-application', 'voip', '-f', 'opus']
+    result = subprocess.run([ffmpeg, '-v', 'error', '-y', '-i', str(path)] + codec + [str(part_path)],
+                            capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0 or not part_path.exists() or part_path.stat().st_size == 0:
+        part_path.unlink(missing_ok=True)
+        raise RuntimeError(f"{storage_format} 인코딩 실패: {path.name} - {result.stderr.strip()}")
+    os.replace(part_path, out_path)
+    path.unlink()
+    return out_path
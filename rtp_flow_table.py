@@ -0,0 +1,167 @@
+# RTP 흐름 테이블 - SDP로 협상된 (IP, 포트)와 5-tuple을 키로 RTP 패킷을 콜에 O(1)로 매칭
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+LOCAL = 'local'
+REMOTE = 'remote'
+
+Endpoint = Tuple[str, int]
+
+
+class RtpFlow:
+    """단방향 RTP 흐름 한 개 (src → dst)와 흐름별 카운터"""
+    __slots__ = ('call_id', 'direction', 'src', 'dst', 'packets', 'bytes', 'first_seen', 'last_seen')
+
+    def __init__(self, call_id: str, direction: str, src: Endpoint, dst: Endpoint, now: float):
+        self.call_id = call_id
+        self.direction = direction  # 'IN' / 'OUT'
+        self.src = src
+        self.dst = dst
+        self.packets = 0
+        self.bytes = 0
+        self.first_seen = now
+        self.last_seen = now
+
+    def __repr__(self):
+        return f"<RtpFlow {self.call_id} {self.direction} {self.src[0]}:{self.src[1]}→{self.dst[0]}:{self.dst[1]} {self.packets}pkts>"
+
+
+class RtpFlowTable:
+    """RTP 패킷 → (call_id, 방향) 조회 테이블
+
+    SDP offer/answer의 c=/m= 주소를 endpoint로 등록하고, 처음 보는 5-tuple은 endpoint로
+    콜과 방향을 정한 뒤 흐름으로 캐시한다. 이후 같은 흐름의 패킷은 dict 조회 한 번으로
+    끝난다. 한쪽 endpoint만 알려진 흐름의 반대쪽 주소는 같은 콜의 상대편으로 학습한다
+    (NAT 뒤 단말의 symmetric RTP). 방향은 PBX 쪽(local)에서 나가면 OUT, 들어오면 IN.
+
+    SDP가 없을 때는 콜에 등록된 PBX IP가 유일하게 한 콜에만 속하면 그 콜로 매칭한다.
+    idle_timeout 동안 패킷이 없는 흐름과, 흐름 없이 오래된 콜의 endpoint는 expire()에서 정리한다.
+    """
+
+    def __init__(self, idle_timeout: float = 120.0):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._flows: Dict[Tuple[str, int, str, int], RtpFlow] = {}
+        self._endpoints: Dict[Endpoint, Tuple[str, str]] = {}  # (ip, port) -> (call_id, side)
+        self._call_endpoints: Dict[str, Set[Endpoint]] = {}
+        self._call_updated: Dict[str, float] = {}
+        self._pbx_calls: Dict[str, Set[str]] = {}  # PBX IP -> call_id
+
+    def __len__(self):
+        return len(self._flows)
+
+    def add_endpoint(self, call_id: str, ip: str, port, side: str = REMOTE, now: float = None):
+        """SDP에서 협상된 미디어 endpoint 등록. 다른 콜이 쓰던 endpoint면 새 콜이 가져감"""
+        key = (ip, int(port))
+        with self._lock:
+            previous = self._endpoints.get(key)
+            if previous is not None and previous[0] != call_id:
+                self._call_endpoints.get(previous[0], set()).discard(key)
+                self._drop_flows(lambda flow: flow.call_id == previous[0] and key in (flow.src, flow.dst))
+            self._endpoints[key] = (call_id, side)
+            self._call_endpoints.setdefault(call_id, set()).add(key)
+            self._call_updated[call_id] = now if now is not None else time.time()
+
+    def set_pbx_ip(self, call_id: str, pbx_ip: str):
+        """SDP 없이 PBX IP만으로 매칭할 때 사용할 주소 등록"""
+        with self._lock:
+            self._pbx_calls.setdefault(pbx_ip, set()).add(call_id)
+            self._call_endpoints.setdefault(call_id, set())
+            self._call_updated.setdefault(call_id, time.time())
+
+    def lookup(self, src_ip: str, src_port, dst_ip: str, dst_port, size: int = 0, now: float = None) -> Optional[RtpFlow]:
+        """패킷이 속한 흐름을 반환하고 카운터 갱신. 어느 콜에도 속하지 않으면 None"""
+        key = (src_ip, int(src_port), dst_ip, int(dst_port))
+        flow = self._flows.get(key)
+        if flow is None:
+            flow = self._learn(key, now if now is not None else time.time())
+            if flow is None:
+                return None
+        flow.packets += 1
+        flow.bytes += size
+        flow.last_seen = now if now is not None else time.time()
+        return flow
+
+    def _learn(self, key, now: float) -> Optional[RtpFlow]:
+        src, dst = (key[0], key[1]), (key[2], key[3])
+        with self._lock:
+            flow = self._flows.get(key)
+            if flow is not None:
+                return flow
+            src_owner = self._endpoints.get(src)
+            dst_owner = self._endpoints.get(dst)
+            if src_owner is not None:
+                call_id, side = src_owner
+                direction = 'OUT' if side == LOCAL else 'IN'
+                self._learn_endpoint(call_id, dst, REMOTE if side == LOCAL else LOCAL, now)
+            elif dst_owner is not None:
+                call_id, side = dst_owner
+                direction = 'IN' if side == LOCAL else 'OUT'
+                self._learn_endpoint(call_id, src, REMOTE if side == LOCAL else LOCAL, now)
+            else:
+                call_id, direction = self._match_pbx_ip(src[0], dst[0])
+                if call_id is None:
+                    return None
+                local, remote = (src, dst) if direction == 'OUT' else (dst, src)
+                self._learn_endpoint(call_id, local, LOCAL, now)
+                self._learn_endpoint(call_id, remote, REMOTE, now)
+            flow = RtpFlow(call_id, direction, src, dst, now)
+            self._flows[key] = flow
+            return flow
+
+    def _learn_endpoint(self, call_id: str, endpoint: Endpoint, side: str, now: float):
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = (call_id, side)
+            self._call_endpoints.setdefault(call_id, set()).add(endpoint)
+        self._call_updated[call_id] = now
+
+    def _match_pbx_ip(self, src_ip: str, dst_ip: str) -> Tuple[Optional[str], Optional[str]]:
+        for ip, direction in ((src_ip, 'OUT'), (dst_ip, 'IN')):
+            calls = self._pbx_calls.get(ip)
+            # 같은 PBX IP의 콜이 여러 개면 어느 콜인지 알 수 없음
+            if calls and len(calls) == 1:
+                return next(iter(calls)), direction
+        return None, None
+
+    def flows_for_call(self, call_id: str) -> List[RtpFlow]:
+        with self._lock:
+            return [flow for flow in self._flows.values() if flow.call_id == call_id]
+
+    def endpoints_for_call(self, call_id: str) -> Dict[Endpoint, str]:
+        """콜의 endpoint와 side (local/remote)"""
+        with self._lock:
+            return {key: self._endpoints[key][1] for key in self._call_endpoints.get(call_id, ())
+                    if key in self._endpoints}
+
+    def remove_call(self, call_id: str):
+        with self._lock:
+            self._remove_call(call_id)
+
+    def _remove_call(self, call_id: str):
+        for key in self._call_endpoints.pop(call_id, ()):
+            if self._endpoints.get(key, (None,))[0] == call_id:
+                del self._endpoints[key]
+        self._call_updated.pop(call_id, None)
+        for ip in [ip for ip, calls in self._pbx_calls.items() if call_id in calls]:
+            self._pbx_calls[ip].discard(call_id)
+            if not self._pbx_calls[ip]:
+                del self._pbx_calls[ip]
+        self._drop_flows(lambda flow: flow.call_id == call_id)
+
+    def _drop_flows(self, predicate):
+        for key in [key for key, flow in self._flows.items() if predicate(flow)]:
+            del self._flows[key]
+
+    def expire(self, now: float = None) -> int:
+        """idle_timeout 동안 패킷이 없는 흐름과 흐름 없는 오래된 콜 정리. 삭제한 흐름 수 반환"""
+        now = now if now is not None else time.time()
+        cutoff = now - self.idle_timeout
+        with self._lock:
+            before = len(self._flows)
+            self._drop_flows(lambda flow: flow.last_seen < cutoff)
+            live_calls = {flow.call_id for flow in self._flows.values()}
+            for call_id, updated in list(self._call_updated.items()):
+                if call_id not in live_calls and updated < cutoff:
+                    self._remove_call(call_id)
+            return before - len(self._flows)
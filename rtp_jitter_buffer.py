@@ -0,0 +1,156 @@
+# RTP 지터 버퍼 - 시퀀스/타임스탬프로 순서를 맞추고 손실 구간을 무음 또는 직전 프레임 반복으로 채운다
+from array import array
+from typing import Dict
+
+# 인코딩된 G.711의 무음 바이트 (선형 0)
+SILENCE_BYTES = {0: 0xFF, 8: 0xD5}
+
+_SEQ_MOD = 1 << 16
+# RFC 3550 A.1과 같은 기준: 이보다 크게 앞으로 뛰거나 뒤로 가면 스트림 재시작으로 간주
+_MAX_DROPOUT = 3000
+_MAX_MISORDER = 100
+
+
+class RtpJitterBuffer:
+    """스트림 하나의 고정 크기 재정렬 윈도우
+
+    push()로 들어온 페이로드를 32비트로 확장한 시퀀스 번호 슬롯에 복사해 두고,
+    윈도우(depth 패킷)를 벗어난 만큼만 순서대로 out(bytearray)에 내보낸다. 윈도우가
+    지나도록 오지 않은 패킷은 손실로 보고, 연속 손실의 첫 패킷은 직전 프레임을 반복하고
+    (간단한 PLC) 그 뒤는 무음으로 채운다. 시퀀스는 이어지는데 타임스탬프가 건너뛰면
+    (무음 억제) 그 길이만큼 무음을 넣는다. 65535→0 wraparound 이후에도 확장 시퀀스로
+    계속 이어진다.
+
+    슬롯과 무음/직전 프레임 버퍼는 생성 시 한 번만 할당하고, 패킷마다 슬롯에 제자리 복사한다.
+    """
+
+    def __init__(self, depth: int = 8, max_payload: int = 480, silence_byte: int = 0xD5,
+                 max_gap_samples: int = 8000):
+        self.depth = depth
+        self.max_payload = max_payload
+        self.max_gap_samples = max_gap_samples
+        self._slots = bytearray(depth * max_payload)
+        self._view = memoryview(self._slots)
+        self._slot_seq = array('q', [-1]) * depth
+        self._slot_len = array('l', [0]) * depth
+        self._slot_ts = array('q', [0]) * depth
+        self._silence = memoryview(bytes([silence_byte]) * max(max_payload, max_gap_samples))
+        self._last_frame = memoryview(bytearray(max_payload))
+        self._last_len = 0
+        self._last_ts = None
+        self._next = None      # 다음에 내보낼 확장 시퀀스
+        self._highest = None   # 지금까지 받은 가장 큰 확장 시퀀스
+        self._concealing = False
+        self._probation = None  # 재동기화 후보 (크게 튄 16비트 시퀀스)
+        self.stats: Dict[str, int] = {'received': 0, 'played': 0, 'lost': 0, 'concealed': 0,
+                                      'late': 0, 'duplicate': 0, 'reordered': 0, 'resync': 0}
+
+    def _extend(self, sequence: int) -> int:
+        """16비트 시퀀스를 가장 큰 확장 시퀀스 기준으로 가장 가까운 32비트 값으로 확장"""
+        if self._highest is None:
+            return sequence
+        base = self._highest - (self._highest % _SEQ_MOD)
+        candidate = base + sequence
+        if candidate - self._highest > _SEQ_MOD // 2:
+            candidate -= _SEQ_MOD
+        elif self._highest - candidate > _SEQ_MOD // 2:
+            candidate += _SEQ_MOD
+        return candidate
+
+    def push(self, sequence: int, timestamp, payload, out: bytearray) -> int:
+        """패킷 한 개를 넣고 윈도우를 벗어난 프레임을 out에 추가. 내보낸 프레임 수 반환
+
+        timestamp를 모르면 None (무음 억제 구간은 채우지 않음)
+        """
+        ext = self._extend(sequence)
+        self.stats['received'] += 1
+        if self._next is None:
+            self._next = self._highest = ext
+        elif ext - self._highest > _MAX_DROPOUT or self._next - ext > _MAX_MISORDER:
+            # 시퀀스가 크게 튀면 (발신측 재시작, 돌려주기) 연속된 두 패킷으로 확인한 뒤 다시 동기화
+            if self._probation is None or (sequence - self._probation) % _SEQ_MOD != 1:
+                self._probation = sequence
+                self.stats['late'] += 1
+                return 0
+            released = self.flush(out)
+            self.stats['resync'] += 1
+            self._probation = None
+            self._next = self._highest = sequence
+            self._last_ts = None
+            self._store(sequence, timestamp, payload)
+            return released
+        if ext < self._next:
+            self.stats['late'] += 1
+            return 0
+        index = ext % self.depth
+        if self._slot_seq[index] == ext:
+            self.stats['duplicate'] += 1
+            return 0
+        if ext < self._highest:
+            self.stats['reordered'] += 1
+        else:
+            self._highest = ext
+        released = 0
+        # 윈도우를 넘어서면 가장 오래된 프레임부터 내보내 자리를 만듦
+        while ext - self._next >= self.depth:
+            released += self._release(out)
+        self._store(ext, timestamp, payload)
+        return released
+
+    def _store(self, ext: int, timestamp: int, payload):
+        index = ext % self.depth
+        size = min(len(payload), self.max_payload)
+        start = index * self.max_payload
+        self._slots[start:start + size] = payload[:size]
+        self._slot_seq[index] = ext
+        self._slot_len[index] = size
+        self._slot_ts[index] = -1 if timestamp is None else timestamp
+
+    def _release(self, out: bytearray) -> int:
+        """_next 슬롯 하나를 내보냄 (없으면 손실 은닉)"""
+        index = self._next % self.depth
+        if self._slot_seq[index] == self._next:
+            size = self._slot_len[index]
+            timestamp = self._slot_ts[index]
+            start = index * self.max_payload
+            if self._last_ts is not None and timestamp >= 0:
+                # 시퀀스는 연속인데 타임스탬프가 건너뜀 (무음 억제 구간)
+                gap = ((timestamp - self._last_ts) & 0xFFFFFFFF) - self._last_len
+                if 0 < gap <= self.max_gap_samples:
+                    out += self._silence[:gap]
+            frame = self._view[start:start + size]
+            out += frame
+            self._last_frame[:size] = frame
+            self._last_len = size
+            self._last_ts = timestamp if timestamp >= 0 else None
+            self._slot_seq[index] = -1
+            self._concealing = False
+            self.stats['played'] += 1
+        else:
+            # 연속 손실의 첫 프레임만 직전 프레임 반복, 이후는 무음
+            size = self._last_len or 160
+            if not self._concealing and self._last_len:
+                out += self._last_frame[:size]
+                self.stats['concealed'] += 1
+            else:
+                out += self._silence[:size]
+            if self._last_ts is not None:
+                self._last_ts = (self._last_ts + size) & 0xFFFFFFFF
+            self._concealing = True
+            self.stats['lost'] += 1
+        self._next += 1
+        return 1
+
+    def flush(self, out: bytearray) -> int:
+        """윈도우에 남은 프레임을 모두 내보냄 (통화 종료)"""
+        if self._next is None:
+            return 0
+        released = 0
+        while self._next <= self._highest:
+            released += self._release(out)
+        return released
+
+    @property
+    def buffered(self) -> int:
+        """윈도우에 들어 있는 프레임 수"""
+        return sum(1 for ext in self._slot_seq if ext >= 0)
@@ -0,0 +1,181 @@
+# RTP 타임라인 병합 - IN/OUT 스트림을 RTP 타임스탬프와 캡처 도착 시각으로 한 타임라인에 맞춰 2채널 WAV로 기록
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+import g711_codec
+import recording_storage
+from pcap_io import PcapReader, parse_rtp
+from sip_parser import parse_sip
+from wav_stream_writer import StreamingWavWriter
+
+LEFT = 0
+RIGHT = 1
+
+_TS_MOD = 1 << 32
+
+
+class _ChannelClock:
+    """채널 하나의 RTP 타임스탬프 → 타임라인 샘플 위치 변환
+
+    스트림 안의 간격은 RTP 타임스탬프(네트워크 지터 없음)로, 스트림의 시작 위치는 첫
+    패킷의 캡처 도착 시각으로 정한다. SSRC가 바뀌거나 타임스탬프가 도착 시각과
+    resync 샘플 이상 어긋나면(발신측 재시작, 보류 후 재개) 그 패킷 기준으로 다시 맞춘다.
+    """
+
+    def __init__(self):
+        self.ssrc = None
+        self.base = 0          # 기준 패킷의 타임라인 위치
+        self.anchor = 0        # 기준 패킷의 확장 타임스탬프
+        self.last_raw = 0
+        self.last_ext = 0
+
+    def position(self, ssrc: int, timestamp: int, arrival_pos: int, resync: int) -> Tuple[int, bool]:
+        """(타임라인 위치, 다시 맞췄는지) - 채널의 첫 패킷은 다시 맞춘 것으로 세지 않음"""
+        if self.ssrc != ssrc:
+            changed = self.ssrc is not None
+            self.ssrc = ssrc
+            self.last_raw = self.last_ext = self.anchor = timestamp
+            self.base = arrival_pos
+            return arrival_pos, changed
+        delta = (timestamp - self.last_raw) % _TS_MOD
+        if delta >= _TS_MOD // 2:
+            delta -= _TS_MOD
+        self.last_raw = timestamp
+        self.last_ext += delta
+        position = self.base + (self.last_ext - self.anchor)
+        if abs(position - arrival_pos) > resync:
+            self.base, self.anchor = arrival_pos, self.last_ext
+            return arrival_pos, True
+        return position, False
+
+
+class TimelineMerger:
+    """두 채널 PCM을 타임라인 위치에 써 넣고 확정된 구간만 WAV로 내보내는 병합기
+
+    window초 크기의 고정 버퍼 한 개만 쓰며, 버퍼를 넘어선 위치가 들어오면 앞쪽부터
+    WAV에 쓰고 밀어낸다. 이미 내보낸 위치로 늦게 온 샘플은 버린다. 비어 있는 구간은
+    0(무음)으로 남으므로 재정렬, 손실, 무음 억제가 모두 위치 기준으로 처리된다.
+    mono=True면 두 채널을 더해(클리핑) 1채널로 쓴다. encoding에 G.711 페이로드 타입을
+    주면 16비트 PCM 대신 G.711 WAV(8kHz 보관 형식)로 쓴다.
+    """
+
+    def __init__(self, path, sample_rate: int = 8000, mono: bool = False, window: float = 2.0,
+                 resync: float = 1.0, header_interval: float = 1.0, encoding: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.mono = mono
+        self.encoding = encoding
+        self.capacity = int(sample_rate * window)
+        self.resync = int(sample_rate * resync)
+        if encoding is None:
+            self.writer = StreamingWavWriter(path, channels=1 if mono else 2, framerate=sample_rate,
+                                             header_interval=header_interval)
+        else:
+            self.writer = StreamingWavWriter(path, channels=1 if mono else 2, sampwidth=1, framerate=sample_rate,
+                                             header_interval=header_interval, format_tag=recording_storage.format_tag(encoding))
+        self._buffer = np.zeros((self.capacity, 2), dtype=np.int16)
+        self._start = 0        # _buffer[0]의 타임라인 위치
+        self._end = 0          # 지금까지 쓴 가장 뒤 위치
+        self._origin = None    # 타임라인 0의 캡처 시각 (첫 패킷)
+        self._clocks = (_ChannelClock(), _ChannelClock())
+        self.stats: Dict[str, int] = {'packets': 0, 'late': 0, 'resync': 0}
+
+    def feed(self, channel: int, arrival: float, ssrc: int, timestamp: int, samples: np.ndarray):
+        """채널에 패킷 하나의 PCM(int16 배열)을 추가"""
+        if self._origin is None:
+            self._origin = arrival
+        arrival_pos = int(round((arrival - self._origin) * self.sample_rate))
+        position, resynced = self._clocks[channel].position(ssrc, timestamp, arrival_pos, self.resync)
+        if resynced:
+            self.stats['resync'] += 1
+        self.stats['packets'] += 1
+        self._place(channel, position, samples)
+
+    def _place(self, channel: int, position: int, samples: np.ndarray):
+        if position < self._start:
+            skip = self._start - position
+            if skip >= len(samples):
+                self.stats['late'] += 1
+                return
+            samples, position = samples[skip:], self._start
+        end = position + len(samples)
+        if end - self._start > self.capacity:
+            # 한 번에 버퍼 절반 이상씩 내보내 복사 횟수를 줄임
+            self._emit(max(end - self._start - self.capacity, self.capacity // 2))
+        offset = position - self._start
+        self._buffer[offset:offset + len(samples), channel] = samples
+        self._end = max(self._end, end)
+
+    def _emit(self, count: int):
+        """앞쪽 count 샘플을 WAV로 내보냄 (버퍼보다 길면 나머지는 무음)"""
+        while count > 0:
+            size = min(count, self.capacity)
+            frames = self._buffer[:size]
+            frames = g711_codec.mix(frames[:, LEFT], frames[:, RIGHT]) if self.mono else frames
+            self.writer.write(frames.tobytes() if self.encoding is None else g711_codec.encode(frames, self.encoding))
+            self._buffer[:self.capacity - size] = self._buffer[size:]
+            self._buffer[self.capacity - size:] = 0
+            self._start += size
+            count -= size
+
+    @property
+    def frames_written(self) -> int:
+        return self.writer.frames_written
+
+    def close(self) -> int:
+        """남은 구간을 모두 쓰고 닫음. 기록한 프레임 수 반환"""
+        if self.writer.is_open:
+            self._emit(self._end - self._start)
+            self.writer.close()
+        return self.writer.frames_written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _assign_channels(streams: Sequence[Dict], caller_endpoint: Optional[Tuple[str, int]]) -> Dict[int, int]:
+    """{ssrc: 채널} - 발신자(첫 INVITE의 SDP 미디어 주소) 스트림이 왼쪽, 상대방이 오른쪽"""
+    order = list(streams)
+    if caller_endpoint is not None:
+        for stream in streams:
+            if (stream['src_ip'], stream['src_port']) == caller_endpoint:
+                order = [stream] + [other for other in streams if other is not stream]
+                break
+            if (stream['dst_ip'], stream['dst_port']) == caller_endpoint:
+                order = [other for other in streams if other is not stream] + [stream]
+                break
+    return {stream['ssrc']: channel for channel, stream in enumerate(order[:2])}
+
+
+def merge_rtp_capture(capture_path, streams: Sequence[Dict], out_path, sample_rate: int = 8000,
+                      mono: bool = False, encoding: Optional[int] = None) -> Dict[str, int]:
+    """콜 캡처를 한 번 읽어 streams(최대 2개, summarize_rtp_streams 항목)를 정렬 병합한 WAV 생성
+
+    caller/callee 구분은 캡처 안의 첫 INVITE SDP로 하고, 없으면 streams 순서를 따른다.
+    G.711이 아닌 패킷은 건너뛴다. 병합 통계(packets, late, resync, frames)를 반환한다.
+    """
+    wanted = {stream['ssrc'] for stream in streams}
+    caller_endpoint = None
+    channels = None
+    with PcapReader(capture_path) as reader, TimelineMerger(out_path, sample_rate, mono, encoding=encoding) as merger:
+        for datagram in reader.udp_datagrams():
+            rtp = parse_rtp(datagram.payload)
+            if rtp is None:
+                if caller_endpoint is None and channels is None:
+                    message = parse_sip(datagram.payload)
+                    if message is not None and message.get('method') == 'INVITE' and message.get('sdp_port'):
+                        caller_endpoint = (message.get('sdp_ip'), message.get('sdp_port'))
+                continue
+            if rtp.ssrc not in wanted or rtp.payload_type not in (g711_codec.PCMU, g711_codec.PCMA):
+                continue
+            if channels is None:
+                channels = _assign_channels(streams, caller_endpoint)
+            channel = channels.get(rtp.ssrc)
+            if channel is not None:
+                merger.feed(channel, datagram.timestamp, rtp.ssrc, rtp.timestamp,
+                            g711_codec.decode(rtp.payload, rtp.payload_type))
+        frames = merger.close()
+    return dict(merger.stats, frames=frames, caller_known=int(caller_endpoint is not None))
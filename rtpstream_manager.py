@@ -4,10 +4,11 @@ import threading
 import time
 import datetime
 import configparser
-import wave
-import audioop
 import traceback
 import hashlib
+from wav_stream_writer import StreamingWavWriter
+from rtp_jitter_buffer import RtpJitterBuffer, SILENCE_BYTES
+import g711_codec
 
 class RTPStreamManager:
 		def __init__(self):
@@ -85,11 +86,12 @@ class RTPStreamManager:
 												print(f"파일 중복 해결 실패: {base_filename}")
 												break
 								
+								# 통화가 끝날 때까지 파일을 열어 두고 샘플만 덧붙임
 								try:
-										with wave.open(filepath, 'wb') as wav_file:
-												wav_file.setnchannels(1)
-												wav_file.setsampwidth(2)
-												wav_file.setframerate(8000)
+										wav_writer = StreamingWavWriter(
+												filepath,
+												header_interval=config.getfloat('Recording', 'wav_header_interval_sec', fallback=1.0)
+										)
 								except Exception as e:
 										print(f"WAV 파일 초기화 실패: {e}")
 										return None
@@ -109,8 +111,9 @@ class RTPStreamManager:
 										'filepath': filepath,
 										'audio_data': bytearray(),
 										'sequence': 0,
+										'jitter_buffer': None,
 										'saved': False,
-										'wav_file': None,
+										'wav_file': wav_writer,
 										'current_buffer_size': 8000,
 										'packet_count': 0,
 										'last_write_time': time.time(),
@@ -153,7 +156,7 @@ class RTPStreamManager:
 				except Exception as e:
 						print(f"버퍼 크기 조정 중 오류: {e}")
 
-		def process_packet(self, stream_key, audio_data, sequence, payload_type):
+		def process_packet(self, stream_key, audio_data, sequence, payload_type, timestamp=None):
 				if not stream_key or not audio_data:
 						print("유효하지 않은 스트림 키 또는 오디오 데이터")
 						return
@@ -177,19 +180,6 @@ class RTPStreamManager:
 								try:
 										##print(f"패킷 수신 - 시퀀스: {sequence}, 크기: {len(audio_data)} bytes")
 										
-										# 시퀀스 번호 검증
-										if stream_info['sequence'] > 0:
-												expected_sequence = (stream_info['sequence'] + 1) % 65536
-												if sequence != expected_sequence:
-														print(f"시퀀스 불연속 감지: 예상={expected_sequence}, 실제={sequence}")
-														# 시퀀스 불연속 로깅
-														self._log_sequence_discontinuity(stream_key, expected_sequence, sequence)
-										
-										# 중복 패킷 체크
-										if sequence <= stream_info['sequence']:
-												print(f"중복 패킷 무시: 현재={stream_info['sequence']}, 수신={sequence}")
-												return
-
 										# 메모리 사용량 체크
 										current_memory = len(stream_info['audio_data'])
 										if current_memory > self.max_buffer_size * 2:
@@ -197,9 +187,13 @@ class RTPStreamManager:
 												self._handle_buffer_overflow(stream_key)
 												return
 
-										# 오디오 데이터 추가
+										# 지터 버퍼가 순서를 맞추고 (wraparound 포함) 손실 구간을 채워 audio_data에 내보냄
+										jitter_buffer = stream_info['jitter_buffer']
+										if jitter_buffer is None:
+												jitter_buffer = RtpJitterBuffer(silence_byte=SILENCE_BYTES.get(payload_type, 0xD5))
+												stream_info['jitter_buffer'] = jitter_buffer
 										try:
-												stream_info['audio_data'].extend(audio_data)
+												jitter_buffer.push(sequence, timestamp, audio_data, stream_info['audio_data'])
 										except Exception as extend_error:
 												print(f"오디오 데이터 추가 실패: {extend_error}")
 												return
@@ -256,40 +250,11 @@ class RTPStreamManager:
 								if not stream_info['audio_data']:
 										return
 								print(f"WAV 쓰기 시작 - 데이터크기: {len(stream_info['audio_data'])} bytes")
-								if payload_type == 8:
-										decoded = audioop.alaw2lin(bytes(stream_info['audio_data']), 2)
-										codec_type = "PCMA"
-								else:
-										decoded = audioop.ulaw2lin(bytes(stream_info['audio_data']), 2)
-										codec_type = "PCMU"
-								print(f"디코딩 완료 - 코덱: {codec_type}, 디코딩크기: {len(decoded)} bytes")
-								amplified = audioop.mul(decoded, 2, 2.0)
-								try:
-										before_size = 0
-										if os.path.exists(stream_info['filepath']):
-												before_size = os.path.getsize(stream_info['filepath'])
-												temp_filepath = stream_info['filepath'] + '.tmp'
-												with wave.open(stream_info['filepath'], 'rb') as wav_read:
-														params = wav_read.getparams()
-														existing_frames = wav_read.readframes(wav_read.getnframes())
-												with wave.open(temp_filepath, 'wb') as wav_write:
-														wav_write.setparams(params)
-														wav_write.writeframes(existing_frames)
-														wav_write.writeframes(amplified)
-												os.replace(temp_filepath, stream_info['filepath'])
-										else:
-												with wave.open(stream_info['filepath'], 'wb') as wav_file:
-														wav_file.setnchannels(1)
-														wav_file.setsampwidth(2)
-														wav_file.setframerate(8000)
-														wav_file.writeframes(amplified)
-										after_size = os.path.getsize(stream_info['filepath'])
-										print(f"WAV 파일 크기 변화: {before_size} -> {after_size} bytes (증가: {after_size - before_size} bytes)")
-								except Exception as write_error:
-										print(f"WAV 파일 쓰기 세부 오류: {write_error}")
-										if 'temp_filepath' in locals() and os.path.exists(temp_filepath):
-												os.remove(temp_filepath)
-										raise
+								codec_type = "PCMA" if payload_type == 8 else "PCMU"
+								# 디코딩과 2배 증폭(클리핑 포함)을 테이블 조회 한 번으로 처리
+								amplified = g711_codec.decode_bytes(stream_info['audio_data'], g711_codec.PCMA if payload_type == 8 else g711_codec.PCMU, gain=2.0)
+								print(f"디코딩 완료 - 코덱: {codec_type}, 디코딩크기: {len(amplified)} bytes")
+								stream_info['wav_file'].write(amplified)
 								stream_info['audio_data'] = bytearray()
 				except Exception as e:
 						print(f"WAV 파일 쓰기 중 오류: {e}")
@@ -303,8 +268,15 @@ class RTPStreamManager:
 						with self.stream_locks[stream_key]:
 								stream_info = self.active_streams[stream_key]
 								if not stream_info['saved']:
+										jitter_buffer = stream_info['jitter_buffer']
+										if jitter_buffer is not None:
+												jitter_buffer.flush(stream_info['audio_data'])
+												stream_info['loss_stats'] = dict(jitter_buffer.stats)
+												print(f"RTP 수신 통계: {stream_info['loss_stats']}")
 										if stream_info['audio_data']:
 												self._write_to_wav(stream_key, 8)
+										if stream_info['wav_file'] is not None:
+												stream_info['wav_file'].close()
 										stream_info['saved'] = True
 										print(f"스트림 종료 완료: {stream_key}")
 										print(f"최종 파일: {stream_info['filepath']}")
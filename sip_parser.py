@@ -0,0 +1,229 @@
+# 경량 SIP/SDP 파서 - UDP 페이로드에서 SIP 메시지 객체를 만들고 헤더는 접근할 때 파싱
+from typing import Dict, List, Optional, Tuple
+
+# RFC 3261 7.3.3 축약 헤더 이름
+_COMPACT_HEADERS = {
+    'i': 'call-id', 'f': 'from', 't': 'to', 'm': 'contact', 'v': 'via',
+    'l': 'content-length', 'c': 'content-type', 'k': 'supported', 'e': 'content-encoding',
+    'r': 'refer-to', 'o': 'event', 's': 'subject', 'x': 'session-expires',
+}
+
+
+def _uri_user(value: str) -> str:
+    """'"이름" <sip:1427@host>;tag=..' → '1427'"""
+    for scheme in ('sip:', 'sips:', 'tel:'):
+        start = value.find(scheme)
+        if start >= 0:
+            break
+    else:
+        return ''
+    uri = value[start + len(scheme):]
+    for sep in ('>', '?', ' '):
+        end = uri.find(sep)
+        if end >= 0:
+            uri = uri[:end]
+    if scheme == 'tel:':
+        return uri.split(';', 1)[0]
+    # sip:host 형태는 user 부분이 없음
+    user, at, _ = uri.partition('@')
+    return user.split(';', 1)[0] if at else ''
+
+
+def _header_param(value: str, name: str) -> str:
+    """헤더 값의 ;name=value 파라미터 (URI의 <> 안쪽 파라미터는 제외)"""
+    closing = value.rfind('>')
+    params = value[closing + 1:] if closing >= 0 else value
+    for param in params.split(';')[1:]:
+        key, _, param_value = param.partition('=')
+        if key.strip().lower() == name:
+            return param_value.strip().strip('"')
+    return ''
+
+
+class SipMessage:
+    """SIP 메시지 한 개
+
+    시작 줄만 생성 시점에 해석하고, 나머지 헤더와 SDP는 처음 접근할 때 한 번 파싱해
+    인스턴스에 캐시한다. 필드 이름은 기존 pyshark sip 레이어와 같게 두었고
+    (call_id, from_user, to_user, request_line, status_line, msg_body, ...),
+    메시지에 없는 필드는 AttributeError를 내므로 hasattr() 검사를 그대로 쓸 수 있다.
+    필드에 값을 대입하면(REFER 치환 등) 파싱 결과 대신 그 값이 사용된다.
+    """
+
+    def __init__(self, raw: bytes, head_end: int, start_line: str):
+        self.raw = raw
+        self._head_end = head_end
+        self._headers = None
+        if start_line.startswith('SIP/2.0'):
+            self.is_request = False
+            self.status_line = start_line
+            parts = start_line.split(' ', 2)
+            self.status_code = parts[1] if len(parts) > 1 else ''
+            self.reason = parts[2] if len(parts) > 2 else ''
+        else:
+            self.is_request = True
+            self.request_line = start_line
+            self.method, _, rest = start_line.partition(' ')
+            self.request_uri = rest.rsplit(' ', 1)[0]
+
+    # ---- 헤더 ----
+
+    def _parse_headers(self) -> Dict[str, List[str]]:
+        headers = {}
+        text = self.raw[:self._head_end].decode('utf-8', errors='replace')
+        lines = text.split('\r\n') if '\r\n' in text else text.split('\n')
+        name = None
+        for line in lines[1:]:
+            if not line:
+                continue
+            if line[0] in ' \t' and name:
+                # 접힌(folded) 헤더 줄
+                headers[name][-1] += ' ' + line.strip()
+                continue
+            header, sep, value = line.partition(':')
+            if not sep:
+                continue
+            name = header.strip().lower()
+            name = _COMPACT_HEADERS.get(name, name)
+            headers.setdefault(name, []).append(value.strip())
+        self._headers = headers
+        return headers
+
+    def header(self, name: str, default: str = None) -> Optional[str]:
+        """첫 번째 헤더 값 (이름은 대소문자 무시, 축약형 허용)"""
+        headers = self._headers if self._headers is not None else self._parse_headers()
+        name = name.lower()
+        values = headers.get(_COMPACT_HEADERS.get(name, name))
+        return values[0] if values else default
+
+    def headers(self, name: str) -> List[str]:
+        """같은 이름의 헤더 값 전체 (Via 등)"""
+        headers = self._headers if self._headers is not None else self._parse_headers()
+        name = name.lower()
+        return list(headers.get(_COMPACT_HEADERS.get(name, name), ()))
+
+    # ---- SDP ----
+
+    def sdp_media(self) -> Tuple[str, List[Tuple[str, int]]]:
+        """SDP의 (세션 c= 주소, [(media, port), ...])"""
+        body = self.raw[self._head_end:]
+        connection = ''
+        media = []
+        for line in body.split(b'\n'):
+            line = line.strip()
+            if line.startswith(b'c=IN IP') and not connection:
+                parts = line.split()
+                if len(parts) >= 3:
+                    connection = parts[2].split(b'/')[0].decode('ascii', errors='replace')
+            elif line.startswith(b'm='):
+                parts = line[2:].split()
+                if len(parts) >= 2 and parts[1].split(b'/')[0].isdigit():
+                    media.append((parts[0].decode('ascii', errors='replace'), int(parts[1].split(b'/')[0])))
+        return connection, media
+
+    # ---- 지연 필드 ----
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        getter = _LAZY_FIELDS.get(name)
+        if getter is None:
+            raise AttributeError(name)
+        value = getter(self)
+        if value is None or value == '':
+            raise AttributeError(name)
+        # 다음 접근부터는 __getattr__를 거치지 않음
+        self.__dict__[name] = value
+        return value
+
+    def get(self, name: str, default=None):
+        """필드 값, 없으면 default"""
+        return getattr(self, name, default)
+
+    def __repr__(self):
+        return f"<SipMessage {self.request_line if self.is_request else self.status_line}>"
+
+
+def _cseq(message: SipMessage) -> Tuple[str, str]:
+    number, _, method = (message.header('cseq') or '').partition(' ')
+    return number.strip(), method.strip()
+
+
+def _body(message: SipMessage) -> str:
+    return message.raw[message._head_end:].lstrip(b'\r\n').decode('utf-8', errors='replace')
+
+
+def _expires(message: SipMessage) -> str:
+    value = message.header('expires')
+    if value:
+        return value
+    contact = message.header('contact')
+    return _header_param(contact, 'expires') if contact else ''
+
+
+def _auth_username(message: SipMessage) -> str:
+    value = message.header('authorization') or message.header('proxy-authorization') or ''
+    for param in value.split(','):
+        key, _, param_value = param.partition('=')
+        if key.strip().lower().endswith('username'):
+            return param_value.strip().strip('"')
+    return ''
+
+
+def _sdp_port(message: SipMessage) -> Optional[int]:
+    for media, port in message.sdp_media()[1]:
+        if media == 'audio':
+            return port
+    return None
+
+
+_LAZY_FIELDS = {
+    'call_id': lambda m: m.header('call-id'),
+    'from': lambda m: m.header('from'),
+    'From': lambda m: m.header('from'),
+    'to': lambda m: m.header('to'),
+    'To': lambda m: m.header('to'),
+    'from_user': lambda m: _uri_user(m.header('from') or ''),
+    'from_tag': lambda m: _header_param(m.header('from') or '', 'tag'),
+    'to_user': lambda m: _uri_user(m.header('to') or ''),
+    'to_tag': lambda m: _header_param(m.header('to') or '', 'tag'),
+    'cseq': lambda m: m.header('cseq'),
+    'cseq_number': lambda m: _cseq(m)[0],
+    'cseq_method': lambda m: _cseq(m)[1],
+    'via': lambda m: m.header('via'),
+    'via_branch': lambda m: _header_param(m.header('via') or '', 'branch'),
+    'contact': lambda m: m.header('contact'),
+    'contact_user': lambda m: _uri_user(m.header('contact') or ''),
+    'expires': _expires,
+    'authorization': lambda m: m.header('authorization') or m.header('proxy-authorization'),
+    'auth_username': _auth_username,
+    'refer_to': lambda m: m.header('refer-to'),
+    'refer_to_user': lambda m: _uri_user(m.header('refer-to') or ''),
+    'content_type': lambda m: m.header('content-type'),
+    'msg_hdr': lambda m: m.raw[:m._head_end].decode('utf-8', errors='replace').split('\n', 1)[-1].strip(),
+    'msg_body': _body,
+    'sdp_ip': lambda m: m.sdp_media()[0],
+    'sdp_port': _sdp_port,
+}
+
+
+def parse_sip(payload) -> Optional[SipMessage]:
+    """UDP 페이로드가 SIP 메시지이면 SipMessage, 아니면 None"""
+    # 첫 글자가 대문자가 아니면 RTP 등 바이너리 패킷
+    if len(payload) < 12 or not 0x41 <= payload[0] <= 0x5A:
+        return None
+    raw = bytes(payload)
+    line_end = raw.find(b'\n')
+    if line_end < 0:
+        return None
+    start_line = raw[:line_end].rstrip(b'\r').decode('utf-8', errors='replace')
+    if not start_line.startswith('SIP/2.0 '):
+        method = start_line.split(' ', 1)[0]
+        if not (start_line.endswith(' SIP/2.0') and method.isalpha() and method.isupper()):
+            return None
+    head_end = raw.find(b'\r\n\r\n')
+    if head_end < 0:
+        head_end = raw.find(b'\n\n')
+    if head_end < 0:
+        head_end = len(raw)
+    return SipMessage(raw, head_end, start_line)
@@ -1,21 +1,58 @@
 import os
 import subprocess
 import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import re
 from datetime import datetime
 import wave
-import audioop
 import configparser
 import shutil
-import threading
-import time
 import glob
 
+import numpy as np
+
+import audio_dsp
+import conversion_queue
+import g711_codec
+import recording_storage
+import rtp_timeline_merger
+from pcap_io import summarize_rtp_streams
+from call_demultiplexer import CallDemultiplexer, capture_digest, safe_call_id
+from capture_segments import CaptureSegmentCatalog
+from conversion_journal import LIVE_RECORDED, ConversionJournal
+from recording_catalog import RecordingCatalog
+
+
+def _linear8_to_16(data) -> bytes:
+    """부호 있는 8비트 PCM → 16비트 PCM"""
+    return (np.frombuffer(bytes(data), dtype=np.int8).astype('<i2') << 8).tobytes()
+
+
+# 변환 프로세스 풀 워커의 grouper (프로세스마다 하나, dashboard/변환 큐 없이 부모 프로세스 설정 사용)
+_worker_grouper = None
+
+
+def _init_conversion_worker(journal_path: str = None, settings: Dict = None):
+    global _worker_grouper
+    _worker_grouper = SipRtpSessionGrouper(settings=settings, conversion_worker=True)
+    if journal_path:
+        _worker_grouper.conversion_journal = ConversionJournal(journal_path, _worker_grouper.conversion_max_attempts)
+
+
+def _convert_call_in_worker(call_info: Dict) -> Dict:
+    # WAV만 만들고 카탈로그 기록/아카이브 인코딩은 부모 프로세스에서 (내선 권한, 카탈로그 연결 하나)
+    return _worker_grouper._convert_call_session(call_info, store=False)
+
 
 class SipRtpSessionGrouper:
-    def __init__(self, dashboard_instance=None):
+    def __init__(self, dashboard_instance=None, settings: Dict = None, conversion_worker: bool = False):
+        """settings: 이미 로드한 설정 (주면 settings.ini를 다시 읽지 않음)
+        conversion_worker: 변환 프로세스 풀 워커용 - 콜 변환만 하므로 변환 큐(워커 스레드)를 만들지 않음
+        """
         self.dashboard = dashboard_instance
         self.logger = logging.getLogger(__name__)
         if not self.logger.handlers:
@@ -28,14 +65,37 @@ class SipRtpSessionGrouper:
         self.temp_dir = Path("temp_recordings")
         self.temp_dir.mkdir(exist_ok=True)
         self.refer_mapping = {}
+        self._ffmpeg_path = None
+        self.capture_catalog = None
+        self.conversion_journal = None
+        self.recording_catalog = None
+        self._process_pool = None
+        self._process_pool_lock = threading.Lock()
+        self._resumed = False
 
         # ExtensionRecordingManager 기능 통합
         self.recordings = {}  # call_id별 녹음 정보 저장
 
-        # 설정 파일 로드
-        self._load_settings()
+        # 설정 파일 로드 (설정 항목 이름을 기억해 두고 프로세스 풀 워커에 그대로 넘김)
+        loaded = set(vars(self))
+        if settings is not None:
+            vars(self).update(settings)
+        else:
+            self._load_settings()
+        self._setting_names = tuple(sorted(set(vars(self)) - loaded))
+        if conversion_worker:
+            self.conversion_queue = None
+            return
+        # 통화 종료 후 캡처 변환 작업 (고정 워커 수, 크기 제한 큐)
+        self.conversion_queue = conversion_queue.ConversionScheduler(
+            workers=self.conversion_workers, max_queue=self.conversion_queue_size, timeout=self.conversion_timeout
+        )
         self.logger.info("통합된 SipRtpSessionGrouper 초기화 완료")
 
+    def _settings_snapshot(self) -> Dict:
+        """로드된 설정 값 (프로세스 풀 워커 초기화용)"""
+        return {name: getattr(self, name) for name in self._setting_names}
+
     def set_refer_mapping(self, call_id: str, from_number: str):
         """REFER 메소드 처리 시 Call-ID와 실제 발신번호 매핑 설정"""
         self.refer_mapping[call_id] = from_number
@@ -67,9 +127,34 @@ class SipRtpSessionGrouper:
             self.extension_ip_prefixes = config.get('VoIP', 'extension_ip_prefixes', fallback='192.168.').split(',')
             self.extension_ip_prefixes = [prefix.strip() for prefix in self.extension_ip_prefixes]
             self.sample_rate = config.getint('VoIP', 'sample_rate', fallback=8000)
+            # 오디오 후처리 엔진 (numpy: 프로세스 내 DSP, ffmpeg: 외부 프로세스 필터)
+            self.audio_engine = config.get('Recording', 'audio_engine', fallback='numpy').strip().lower()
+            # MERGE 방식 (amix: 필터 적용 모노 믹스, stereo: RTP 타임라인 정렬 2채널, mono: 정렬 후 모노 합)
+            self.merge_mode = config.get('Recording', 'merge_mode', fallback='amix').strip().lower()
+            # 녹음 저장 형식 (pcm: 16kHz PCM, g711: 원본 G.711 WAV, flac/opus: G.711을 통화 종료 후 인코딩)
+            self.storage_format = config.get('Recording', 'storage_format', fallback='pcm').strip().lower()
+            if self.storage_format not in recording_storage.FORMATS:
+                self.logger.warning(f"알 수 없는 storage_format: {self.storage_format} - pcm 사용")
+                self.storage_format = 'pcm'
+            self.opus_bitrate = config.get('Recording', 'opus_bitrate', fallback='16k').strip()
+
+            # 변환 작업 큐 설정
+            self.conversion_workers = config.getint('Recording', 'conversion_workers', fallback=2)
+            self.conversion_queue_size = config.getint('Recording', 'conversion_queue_size', fallback=64)
+            self.conversion_timeout = config.getfloat('Recording', 'conversion_timeout_sec', fallback=300)
+            self.conversion_submit_wait = config.getfloat('Recording', 'conversion_submit_wait_sec', fallback=0.5)
+            self.conversion_max_attempts = config.getint('Recording', 'conversion_max_attempts', fallback=3)
+            # 전역 캡처 분리 후 콜별 WAV 변환 프로세스 수 (0: CPU 코어 수, 1: 현재 프로세스에서 순차 처리)
+            self.conversion_processes = config.getint('Recording', 'conversion_processes', fallback=0)
+            # 녹음 카탈로그(번호·날짜·Call-ID 검색 색인) 파일
+            self.catalog_path = config.get('Recording', 'catalog_path', fallback='temp_captures/recording_catalog.db').strip()
+
+            # 캡처 링 버퍼 보존 설정
+            self.ring_max_files = config.getint('Capture', 'ring_max_files', fallback=50)
+            self.ring_max_age_hours = config.getfloat('Capture', 'ring_max_age_hours', fallback=24)
 
             # FFmpeg 설정 (이후에 사용)
-            ffmpeg_paths = config.get('FFmpeg', 'paths', fallback='ffmpeg.exe').split(',')
+            ffmpeg_paths = config.get('FFmpeg', 'paths', fallback=','.join(recording_storage.FFMPEG_PATHS)).split(',')
             self.ffmpeg_paths = [path.strip() for path in ffmpeg_paths]
             ffprobe_paths = config.get('FFmpeg', 'ffprobe_paths', fallback='ffprobe.exe').split(',')
             self.ffprobe_paths = [path.strip() for path in ffprobe_paths]
@@ -82,7 +167,20 @@ class SipRtpSessionGrouper:
             self.tshark_path = "C:/Program Files/Wireshark/tshark.exe"
             self.extension_ip_prefixes = ['192.168.']
             self.sample_rate = 8000
-            self.ffmpeg_paths = ['ffmpeg.exe']
+            self.audio_engine = 'numpy'
+            self.merge_mode = 'amix'
+            self.storage_format = 'pcm'
+            self.opus_bitrate = '16k'
+            self.conversion_workers = 2
+            self.conversion_queue_size = 64
+            self.conversion_timeout = 300
+            self.conversion_submit_wait = 0.5
+            self.conversion_max_attempts = 3
+            self.conversion_processes = 0
+            self.catalog_path = 'temp_captures/recording_catalog.db'
+            self.ring_max_files = 50
+            self.ring_max_age_hours = 24
+            self.ffmpeg_paths = list(recording_storage.FFMPEG_PATHS)
             self.ffprobe_paths = ['ffprobe.exe']
 
     def _is_extension_ip(self, ip: str) -> bool:
@@ -105,139 +203,393 @@ class SipRtpSessionGrouper:
                 self.logger.error(f"입력 pcap 파일이 존재하지 않음: {input_pcap}")
                 return processed_calls
 
-            tshark_fields = ["sip.Call-ID", "sip.from.user", "sip.to.user", "sdp.connection_info.address", "sdp.media.port"]
-            tshark_cmd = [self.tshark_path, "-r", input_pcap, "-Y", "sip or sdp", "-T", "fields"] + [item for field in tshark_fields for item in ["-e", field]]
-            result = subprocess.run(tshark_cmd, capture_output=True, text=True, timeout=60)
+            # 캡처 파일을 한 번만 읽어 SIP는 Call-ID, RTP는 SDP endpoint 기준으로 콜별 pcapng 분리
+            # 이미 변환한 콜(처리 원장)은 파일을 쓰지 않고 패킷 수·해시만 계산
+            journal = self._get_conversion_journal()
+            ledger = journal.processed_calls() if journal is not None else {}
+            demuxer = CallDemultiplexer(self.temp_dir, hash_only=ledger)
 
-            if result.returncode != 0:
-                self.logger.error(f"tshark SIP 추출 실패: {result.stderr}")
-                return processed_calls
+            # active_calls 데이터가 있으면 endpoints 정보 보강
+            if active_calls_data:
+                self._seed_active_call_endpoints(demuxer, active_calls_data)
 
-            # tshark 출력 디버깅
-            self.logger.info(f"tshark 원본 출력:\n{result.stdout}")
-            sessions = self._parse_sip_sessions(result.stdout)
+            sessions = demuxer.run(input_pcap)
             self.logger.info(f"추출된 SIP 세션 수: {len(sessions)}")
 
-            # active_calls 데이터가 있으면 endpoints 정보 보강
-            if active_calls_data:
-                self._enhance_sessions_with_active_calls(sessions, active_calls_data)
+            sessions = self._skip_processed_sessions(input_pcap, sessions, ledger, active_calls_data)
 
             # 각 세션 상세 정보 로깅
             for call_id, info in sessions.items():
                 self.logger.info(f"세션 {call_id}: endpoints={len(info['endpoints'])}, 값={list(info['endpoints'])}")
 
+            prepared = []
             for call_id, info in sessions.items():
                 try:
-                    from_num = info["from"] or "unknown"
-                    to_num = info["to"] or "unknown"
-                    endpoints = list(info["endpoints"])
-
-                    if len(endpoints) < 2:
-                        self.logger.warning(f"유효하지 않은 세션 스킵: {call_id} (endpoints: {len(endpoints)})")
-                        continue
-
-                    # REFER 매핑은 최신 종료된 Call-ID에만 적용 (돌려주기 폴더 생성용)
-                    self.logger.info(f"REFER 매핑 체크: call_id={call_id}, in_refer_mapping={call_id in self.refer_mapping}, latest_terminated={latest_terminated_call_id}, is_match={call_id == latest_terminated_call_id}")
-                    
-                    if (call_id in self.refer_mapping and 
-                        latest_terminated_call_id and 
-                        call_id == latest_terminated_call_id):
-                        original_from = from_num
-                        from_num = self.refer_mapping[call_id]
-                        self.logger.info(f"✅ 최신 Call-ID REFER 매핑 적용: {call_id}, {original_from} → {from_num}")
-                    else:
-                        self.logger.info(f"❌ REFER 매핑 적용 안함: call_id={call_id}, from_num={from_num}")
-
-                    safe_call_id = re.sub(r'[<>:"/\\|?*@]', '_', call_id)
-                    pcapng_filename = f"{safe_call_id}.pcapng"
-                    pcapng_path = self.temp_dir / pcapng_filename
-
-                    # 기존 파일이 있으면 덮어쓰기 (동일한 Call-ID는 같은 내용이므로)
-                    if pcapng_path.exists():
-                        self.logger.info(f"기존 pcapng 파일 덮어쓰기: {pcapng_filename}")
-                        try:
-                            pcapng_path.unlink()
-                        except Exception as e:
-                            self.logger.warning(f"기존 pcapng 파일 삭제 실패: {e}")
-
-                    # Call-ID + 내선 RTP 포트 필터링 (완전한 패킷 추출)
-                    call_id_prefix = call_id.split('@')[0]
-                    call_id_filter = f'sip.Call-ID contains "{call_id_prefix}"'
-
-                    # RTP 포트 필터 추가 (올바른 구문 사용)
-                    port_filters = []
-                    for endpoint in endpoints:
-                        if ":" in endpoint:
-                            ip, port = endpoint.split(":")
-                            if self._is_extension_ip(ip):
-                                # tshark에서 올바른 필터 구문 사용
-                                port_filters.append(f"(ip.addr == {ip} and udp.port == {port})")
-
-                    if port_filters:
-                        rtp_filter = " or ".join(port_filters)
-                        combined_filter = f'({call_id_filter}) or ({rtp_filter})'
-                        self.logger.info(f"Call-ID + RTP 포트 필터: {combined_filter}")
-                    else:
-                        combined_filter = call_id_filter
-                        self.logger.info(f"Call-ID만 필터: {combined_filter}")
-
-                    extract_cmd = [self.tshark_path, "-r", input_pcap, "-Y", combined_filter, "-w", str(pcapng_path)]
-                    try:
-                        result = subprocess.run(extract_cmd, capture_output=True, text=True, timeout=30)
-                        if result.returncode != 0:
-                            self.logger.error(f"tshark 추출 실패: {result.stderr}")
-                            # 간단한 Call-ID만 필터로 재시도
-                            simple_filter = call_id_filter
-                            self.logger.info(f"단순 필터로 재시도: {simple_filter}")
-                            extract_cmd = [self.tshark_path, "-r", input_pcap, "-Y", simple_filter, "-w", str(pcapng_path)]
-                            subprocess.run(extract_cmd, check=True)
-                    except subprocess.TimeoutExpired:
-                        self.logger.error(f"tshark 실행 타임아웃: {call_id}")
-                        continue
-
-                    if pcapng_path.exists() and os.path.getsize(pcapng_path) > 0:
-                        self.logger.info(f"pcapng 추출 성공: {pcapng_filename} ({os.path.getsize(pcapng_path)} bytes)")
-                        call_info = {'call_id': call_id, 'from_number': from_num, 'to_number': to_num, 'pcapng_path': str(pcapng_path)}
-
-                        # WAV 변환 시도
-                        wav_success = self._convert_to_wav(call_info)
-                        if wav_success:
-                            call_info['wav_converted'] = True
-                            self.logger.info(f"WAV 변환 성공: {call_id}")
-                        else:
-                            call_info['wav_converted'] = False
-                            self.logger.warning(f"WAV 변환 실패하지만 pcapng는 보존: {call_id}")
-
-                        # pcapng 정보는 항상 processed_calls에 추가 (WAV 변환 성공 여부 관계없이)
-                        processed_calls.append(call_info)
-                        self.logger.info(f"pcapng 파일 보존됨: {pcapng_path}")
-
-                        # 콜 처리 완료 후 해당 Call-ID의 REFER 매핑 정리
-                        if call_id in self.refer_mapping:
-                            self.clear_refer_mapping(call_id)
-                            self.logger.info(f"콜 처리 완료로 REFER 매핑 자동 정리: {call_id}")
-                    else:
-                        self.logger.warning(f"pcapng 파일 생성 실패: {pcapng_filename}")
-
-                except subprocess.CalledProcessError as e:
-                    self.logger.error(f"pcapng 추출 실패: {call_id} - {e}")
-                    # 실패한 경우에도 REFER 매핑 정리
-                    if call_id in self.refer_mapping:
-                        self.clear_refer_mapping(call_id)
-                        self.logger.info(f"pcapng 추출 실패로 REFER 매핑 정리: {call_id}")
+                    call_info = self._prepare_call_session(call_id, info, latest_terminated_call_id)
                 except Exception as e:
                     self.logger.error(f"세션 처리 중 오류: {call_id} - {e}")
-                    # 예외 발생 시에도 REFER 매핑 정리
-                    if call_id in self.refer_mapping:
-                        self.clear_refer_mapping(call_id)
-                        self.logger.info(f"세션 처리 오류로 REFER 매핑 정리: {call_id}")
+                    self._finish_call_session(call_id)
+                    continue
+                if call_info:
+                    prepared.append(call_info)
+
+            # 콜별 변환은 프로세스 풀에서 병렬로, 결과는 세션 순서대로 수집
+            for call_info in self._convert_call_sessions(prepared):
+                call_id = call_info['call_id']
+                self._finish_call_session(call_id)
+                if 'wav_converted' not in call_info:
+                    continue
+                processed_calls.append(call_info)
+                if call_info['wav_converted'] and journal is not None:
+                    journal.mark_processed(call_id, sessions[call_id]['packet_count'], sessions[call_id]['digest'])
 
             return processed_calls
+        except conversion_queue.JobTimeout:
+            raise
         except Exception as e:
             self.logger.error(f"pcap 처리 중 오류 발생: {e}")
             return processed_calls
 
-    def _convert_to_wav(self, call_info: Dict) -> bool:
+    def _skip_processed_sessions(self, input_pcap: str, sessions: Dict, ledger: Dict, active_calls_data: dict = None) -> Dict:
+        """처리 원장에 있는 콜은 제외하고, 변환 후 새 패킷이 들어온 콜만 다시 분리해 반환
+
+        패킷 수가 원장보다 적은 것은 회전된 세그먼트로 일부만 보인 것이므로 변경으로 보지 않는다.
+        """
+        changed = []
+        for call_id, info in sessions.items():
+            if call_id not in ledger:
+                continue
+            count, digest = ledger[call_id]
+            if digest == LIVE_RECORDED:
+                # 실시간 녹음으로 끝난 콜 - 다시 분리하면 완성된 녹음 파일을 덮어씀
+                continue
+            if info['packet_count'] > count or (info['packet_count'] == count and info['digest'] != digest):
+                changed.append(call_id)
+        skipped = sum(1 for call_id in sessions if call_id in ledger) - len(changed)
+        if skipped:
+            self.logger.info(f"이미 변환된 콜 {skipped}개 건너뜀 (처리 원장)")
+        fresh = {call_id: info for call_id, info in sessions.items() if call_id not in ledger}
+        if changed:
+            # 원장에 있지만 패킷이 늘어난 콜만 파일로 다시 분리하고 이전 변환 단계는 무효화
+            self.logger.info(f"변환 후 새 패킷이 들어온 콜 다시 변환: {changed}")
+            demuxer = CallDemultiplexer(self.temp_dir, call_ids=changed)
+            if active_calls_data:
+                self._seed_active_call_endpoints(demuxer, active_calls_data)
+            rerun = demuxer.run(input_pcap)
+            for call_id in changed:
+                self.conversion_journal.clear_stages(call_id)
+                fresh[call_id] = rerun[call_id]
+        return fresh
+
+    def _process_call_session(self, call_id: str, info: Dict, latest_terminated_call_id: str = None) -> Dict:
+        """분리된 콜 하나의 pcapng를 WAV로 변환하고 처리 결과(call_info) 반환"""
+        try:
+            call_info = self._prepare_call_session(call_id, info, latest_terminated_call_id)
+            if call_info is None:
+                return None
+            call_info = self._convert_call_session(call_info)
+            self._finish_call_session(call_id)
+            return call_info
+        except Exception as e:
+            self.logger.error(f"세션 처리 중 오류: {call_id} - {e}")
+            # 예외 발생 시에도 REFER 매핑 정리
+            self._finish_call_session(call_id)
+        return None
+
+    def _get_process_pool(self):
+        """콜별 변환 프로세스 풀 (처음 사용할 때 생성, 프로세스 수 1이면 None)"""
+        processes = self.conversion_processes or os.cpu_count() or 1
+        if processes <= 1:
+            return None
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                journal_path = str(self.conversion_journal.db_path) if self.conversion_journal is not None else None
+                self._process_pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_conversion_worker,
+                                                         initargs=(journal_path, self._settings_snapshot()))
+                self.logger.info(f"변환 프로세스 풀 시작: {processes}개")
+            return self._process_pool
+
+    def _convert_call_sessions(self, call_infos: List[Dict]) -> List[Dict]:
+        """여러 콜을 변환하고 입력 순서대로 반환. 실패한 콜은 'wav_converted' 없이 그대로 반환"""
+        pool = self._get_process_pool() if len(call_infos) > 1 else None
+        if pool is None:
+            results = []
+            for call_info in call_infos:
+                conversion_queue.check_deadline()
+                try:
+                    results.append(self._convert_call_session(call_info))
+                except Exception as e:
+                    self.logger.error(f"세션 처리 중 오류: {call_info['call_id']} - {e}")
+                    results.append(call_info)
+            return results
+
+        futures = [pool.submit(_convert_call_in_worker, call_info) for call_info in call_infos]
+        results = []
+        try:
+            for call_info, future in zip(call_infos, futures):
+                try:
+                    result = future.result(timeout=conversion_queue.remaining())
+                except FutureTimeoutError:
+                    raise conversion_queue.JobTimeout(call_info['call_id'])
+                except BrokenProcessPool as e:
+                    # 워커 프로세스가 죽으면 풀을 버리고 다음 변환 때 새로 생성
+                    self.logger.error(f"변환 프로세스 풀 중단: {call_info['call_id']} - {e}")
+                    with self._process_pool_lock:
+                        if self._process_pool is pool:
+                            self._process_pool = None
+                    results.append(call_info)
+                except Exception as e:
+                    self.logger.error(f"세션 처리 중 오류: {call_info['call_id']} - {e}")
+                    results.append(call_info)
+                else:
+                    # 결과를 순서대로 모으면서 부모 프로세스에서 카탈로그 기록과 아카이브 인코딩
+                    recordings = result.pop('recordings', None)
+                    if recordings:
+                        self._store_recordings(result['call_id'], result['from_number'], result['to_number'], recordings)
+                    results.append(result)
+        finally:
+            for future in futures:
+                future.cancel()
+        return results
+
+    def _prepare_call_session(self, call_id: str, info: Dict, latest_terminated_call_id: str = None) -> Dict:
+        """변환할 콜인지 확인하고 REFER 매핑을 적용한 call_info 생성 (변환할 수 없으면 None)"""
+        from_num = info["from"] or "unknown"
+        to_num = info["to"] or "unknown"
+        endpoints = list(info["endpoints"])
+
+        if len(endpoints) < 2:
+            self.logger.warning(f"유효하지 않은 세션 스킵: {call_id} (endpoints: {len(endpoints)})")
+            if info['pcapng_path']:
+                Path(info['pcapng_path']).unlink(missing_ok=True)
+            return None
+
+        if not info['pcapng_path']:
+            self.logger.warning(f"캡처에 해당 콜 패킷 없음: {call_id}")
+            return None
+
+        from_num = self._resolve_refer_from(call_id, from_num, latest_terminated_call_id)
+
+        pcapng_path = Path(info['pcapng_path'])
+        if not pcapng_path.exists() or os.path.getsize(pcapng_path) == 0:
+            self.logger.warning(f"pcapng 파일 생성 실패: {pcapng_path.name}")
+            return None
+
+        self.logger.info(f"pcapng 추출 성공: {pcapng_path.name} ({os.path.getsize(pcapng_path)} bytes)")
+        return {'call_id': call_id, 'from_number': from_num, 'to_number': to_num, 'pcapng_path': str(pcapng_path)}
+
+    def _convert_call_session(self, call_info: Dict, store: bool = True) -> Dict:
+        """call_info의 pcapng를 WAV로 변환 (변환 프로세스 풀에서도 실행)
+
+        store가 False면 카탈로그 기록/아카이브 인코딩 없이 만든 파일 경로를 call_info['recordings']에 담아 반환
+        """
+        call_id = call_info['call_id']
+        # WAV 변환 시도
+        call_info['wav_converted'] = self._convert_to_wav(call_info, store)
+        if call_info['wav_converted']:
+            self.logger.info(f"WAV 변환 성공: {call_id}")
+        else:
+            self.logger.warning(f"WAV 변환 실패하지만 pcapng는 보존: {call_id}")
+
+        # pcapng 정보는 항상 processed_calls에 추가 (WAV 변환 성공 여부 관계없이)
+        self.logger.info(f"pcapng 파일 보존됨: {call_info['pcapng_path']}")
+        return call_info
+
+    def _finish_call_session(self, call_id: str):
+        """콜 처리 완료(또는 오류) 후 해당 Call-ID의 REFER 매핑 정리"""
+        if call_id in self.refer_mapping:
+            self.clear_refer_mapping(call_id)
+            self.logger.info(f"콜 처리 완료로 REFER 매핑 자동 정리: {call_id}")
+
+    def _resolve_refer_from(self, call_id: str, from_num: str, latest_terminated_call_id: str = None) -> str:
+        """REFER 매핑은 최신 종료된 Call-ID에만 적용 (돌려주기 폴더 생성용)"""
+        self.logger.info(f"REFER 매핑 체크: call_id={call_id}, in_refer_mapping={call_id in self.refer_mapping}, latest_terminated={latest_terminated_call_id}, is_match={call_id == latest_terminated_call_id}")
+
+        if (call_id in self.refer_mapping and
+            latest_terminated_call_id and
+            call_id == latest_terminated_call_id):
+            original_from = from_num
+            from_num = self.refer_mapping[call_id]
+            self.logger.info(f"✅ 최신 Call-ID REFER 매핑 적용: {call_id}, {original_from} → {from_num}")
+        else:
+            self.logger.info(f"❌ REFER 매핑 적용 안함: call_id={call_id}, from_num={from_num}")
+        return from_num
+
+    def _get_capture_catalog(self, capture_path: str = None):
+        """전역 캡처(링 버퍼 세그먼트) 카탈로그 (처음 사용할 때 생성)"""
+        if self.capture_catalog is None and capture_path:
+            try:
+                self.capture_catalog = CaptureSegmentCatalog(
+                    capture_path, max_files=self.ring_max_files, max_age_hours=self.ring_max_age_hours)
+            except Exception as e:
+                self.logger.error(f"캡처 세그먼트 카탈로그 생성 실패: {e}")
+        return self.capture_catalog
+
+    def follow_capture(self, capture_path: str):
+        """dumpcap이 쓰는 전역 캡처 세그먼트를 백그라운드에서 인덱싱 시작하고, 이전 실행에서 끝나지 않은 변환 재개"""
+        capture_catalog = self._get_capture_catalog(capture_path)
+        if capture_catalog:
+            capture_catalog.start_following()
+        self.resume_pending_conversions()
+
+    def _get_conversion_journal(self):
+        """변환 작업 저널 (처음 사용할 때 생성)"""
+        if self.conversion_journal is None:
+            try:
+                self.conversion_journal = ConversionJournal(max_attempts=self.conversion_max_attempts)
+            except Exception as e:
+                self.logger.error(f"변환 작업 저널 생성 실패: {e}")
+        return self.conversion_journal
+
+    def _completed_stage(self, call_id: str, stage: str):
+        """저널에 완료로 기록되고 결과 파일이 남아 있는 단계의 파일 경로 (없으면 None)"""
+        if self.conversion_journal is None or not call_id:
+            return None
+        try:
+            return self.conversion_journal.completed_file(call_id, stage)
+        except Exception as e:
+            self.logger.error(f"변환 저널 조회 실패: {call_id}/{stage} - {e}")
+            return None
+
+    def _stage_done(self, call_id: str, stage: str) -> bool:
+        """결과 파일 없이 완료 여부만 보는 단계(db_insert, archive)가 저널에 기록됐는지"""
+        if self.conversion_journal is None or not call_id:
+            return False
+        try:
+            return self.conversion_journal.stage_result(call_id, stage) is not None
+        except Exception as e:
+            self.logger.error(f"변환 저널 조회 실패: {call_id}/{stage} - {e}")
+            return False
+
+    def _journal_recordings(self, call_id: str) -> Dict[str, Path]:
+        """저널에 완료로 기록된 IN/OUT/MERGE 파일 경로 (아카이브 인코딩 후에는 인코딩된 파일)"""
+        paths = {}
+        for stage in ('in', 'out', 'merge'):
+            path = self._completed_stage(call_id, stage)
+            if path:
+                paths[stage] = path
+        return paths
+
+    def _mark_stage(self, call_id: str, stage: str, result: Dict):
+        if self.conversion_journal is None or not call_id:
+            return
+        try:
+            self.conversion_journal.mark_stage(call_id, stage, result)
+        except Exception as e:
+            self.logger.error(f"변환 저널 기록 실패: {call_id}/{stage} - {e}")
+
+    def _get_recording_catalog(self):
+        """녹음 카탈로그 (dashboard의 카탈로그 우선, 없으면 처음 사용할 때 생성)"""
+        if self.recording_catalog is None:
+            self.recording_catalog = getattr(self.dashboard, 'recording_catalog', None)
+        if self.recording_catalog is None:
+            try:
+                self.recording_catalog = RecordingCatalog(self.catalog_path)
+            except Exception as e:
+                self.logger.error(f"녹음 카탈로그 생성 실패: {e}")
+        return self.recording_catalog
+
+    def _catalog_recording(self, call_id: str, from_number: str, to_number: str, merge_path: Path) -> bool:
+        """MERGE 녹음을 카탈로그에 기록 (권한은 내선 디렉터리 캐시에서). 기록했으면 True"""
+        catalog = self._get_recording_catalog()
+        if catalog is None or not Path(merge_path).exists():
+            return False
+        from_number, to_number = self._extract_extension_number(from_number), self._extract_extension_number(to_number)
+        per_lv8 = per_lv9 = ''
+        directory = getattr(self.dashboard, 'extension_directory', None)
+        if directory is not None:
+            # 첫 로드 전이면 members를 직접 조회 (캐시만 보면 시작 직후 녹음의 권한이 빔)
+            for number in (from_number, to_number):
+                member = directory.lookup_member(number)
+                if member:
+                    per_lv8, per_lv9 = member.get('per_lv8', ''), member.get('per_lv9', '')
+                    break
+        try:
+            catalog.add(merge_path, call_id, from_number, to_number, datetime.now(), per_lv8, per_lv9)
+            return True
+        except Exception as e:
+            self.logger.error(f"녹음 카탈로그 기록 실패: {merge_path} - {e}")
+            return False
+
+    def resume_pending_conversions(self) -> int:
+        """비정상 종료로 끝나지 않은 변환 작업을 다시 큐에 등록 (한 번만). 등록한 작업 수 반환"""
+        if self._resumed:
+            return 0
+        self._resumed = True
+        journal = self._get_conversion_journal()
+        if journal is None:
+            return 0
+        try:
+            journal.prune()
+            jobs = journal.unfinished()
+        except Exception as e:
+            self.logger.error(f"변환 저널 읽기 실패: {e}")
+            return 0
+        resumed = 0
+        for job in jobs:
+            call_info = dict(job['info'], capture_path=job['capture_path'])
+            if self.conversion_queue.submit(job['call_id'], self._run_conversion_job, call_info,
+                                            delay=1.0, wait=self.conversion_submit_wait):
+                resumed += 1
+        if jobs:
+            self.logger.info(f"이전 실행의 미완료 변환 작업 재개: {resumed}/{len(jobs)}개")
+        return resumed
+
+    def process_indexed_call(self, capture_path: str, call_id: str, latest_terminated_call_id: str = None) -> Optional[bool]:
+        """콜과 겹치는 세그먼트의 인덱스된 오프셋만 읽어 추출하고 WAV로 변환
+
+        WAV를 만들었으면 True, 변환에 실패하면 False, 인덱스로 처리할 수 없으면(카탈로그/Call-ID 없음, 추출 실패) None
+        """
+        capture_catalog = self._get_capture_catalog(capture_path)
+        if capture_catalog is None:
+            return None
+
+        if self._completed_stage(call_id, 'merge'):
+            # MERGE 이후 단계(카탈로그 기록, 아카이브 인코딩) 중 끝나지 않은 것만 실행
+            self.logger.info(f"이미 변환 완료된 콜 (저널): {call_id}")
+            merge = self.conversion_journal.stage_result(call_id, 'merge')
+            self._store_recordings(call_id, merge.get('from_number', ''), merge.get('to_number', ''),
+                                   self._journal_recordings(call_id))
+            capture_catalog.mark_converted(call_id)
+            return True
+
+        # 재시작 전에 추출해 둔 콜 pcapng가 남아 있으면 다시 추출하지 않음
+        info = self.conversion_journal.stage_result(call_id, 'extract') if self._completed_stage(call_id, 'extract') else None
+        if info is None:
+            try:
+                # BYE 직후 아직 인덱싱되지 않은 꼬리 부분까지 반영
+                capture_catalog.refresh()
+                pcapng_path = self.temp_dir / f"{safe_call_id(call_id)}.pcapng"
+                info = capture_catalog.extract_call(call_id, pcapng_path)
+            except Exception as e:
+                self.logger.error(f"인덱스 기반 추출 실패: {call_id} - {e}")
+                return None
+            if info is None:
+                self.logger.warning(f"캡처 인덱스에 Call-ID 없음: {call_id}")
+                return None
+            if info['packet_count']:
+                self._mark_stage(call_id, 'extract', dict(info, path=info['pcapng_path']))
+        else:
+            self.logger.info(f"저널에 기록된 추출 결과 사용: {info['pcapng_path']}")
+
+        self.logger.info(f"인덱스 기반 추출: {call_id} ({info['packet_count']}개 패킷, 세그먼트 {len(info['segments'])}개, "
+                         f"endpoints={list(info['endpoints'])})")
+        call_info = self._process_call_session(call_id, info, latest_terminated_call_id)
+        converted = bool(call_info and call_info['wav_converted'])
+        if converted:
+            if self.conversion_journal is not None:
+                # 전역 캡처 전체 분리(process_captured_pcap)에서 같은 콜을 다시 변환하지 않도록 원장에 기록
+                try:
+                    self.conversion_journal.mark_processed(call_id, *capture_digest(call_info['pcapng_path']))
+                except Exception as e:
+                    self.logger.error(f"처리 원장 기록 실패: {call_id} - {e}")
+            # 변환이 끝난 콜만 남은 세그먼트는 다음 refresh에서 삭제됨 (실패한 콜의 세그먼트는 재시도를 위해 보존)
+            capture_catalog.mark_converted(call_id)
+        else:
+            self.logger.warning(f"인덱스 기반 변환 실패: {call_id}")
+        return converted
+
+    def _convert_to_wav(self, call_info: Dict, store: bool = True) -> bool:
         try:
             pcapng_path = Path(call_info['pcapng_path'])
             from_number = call_info['from_number']
@@ -248,7 +600,15 @@ class SipRtpSessionGrouper:
                 return False
 
             # RTP 스트림을 실제로 WAV로 변환
-            return self._extract_rtp_to_wav(pcapng_path, from_number, to_number, call_info.get('call_id', 'unknown'))
+            call_id = call_info.get('call_id', 'unknown')
+            paths = self._write_call_wavs(pcapng_path, from_number, to_number, call_id)
+            if paths is None:
+                return False
+            if not store:
+                call_info['recordings'] = {name: str(path) for name, path in paths.items()}
+            elif paths:
+                self._store_recordings(call_id, from_number, to_number, paths)
+            return True
 
         except Exception as e:
             self.logger.error(f"WAV 변환 중 오류: {e}")
@@ -321,87 +681,97 @@ class SipRtpSessionGrouper:
             self.logger.error(f"녹음 경로 생성 오류: {e}")
             return None
 
-    def _parse_sip_sessions(self, tshark_output: str) -> Dict:
-        sessions = {}
-        lines = tshark_output.strip().split('\n')
+    def _get_recording_paths(self, from_number: str, to_number: str, call_id: str) -> Dict[str, Path]:
+        """IN/OUT/MERGE WAV 파일 경로 (시분초만 제거, 날짜+Call-ID 해시 유지)"""
+        final_recording_path = self._get_final_recording_path(from_number, to_number)
+        if not final_recording_path:
+            return None
 
-        for line in lines:
-            if line.strip():
-                fields = line.split('\t')
-                if len(fields) >= 5:
-                    call_id = fields[0]
-                    from_user = fields[1]
-                    to_user = fields[2]
-                    rtp_ip = fields[3]
-                    rtp_port = fields[4]
+        # 안전한 call_id 생성 (파일명용)
+        safe_call_id = re.sub(r'[<>:"/\\|?*@]', '_', call_id)[:20]
 
-                    if call_id not in sessions:
-                        sessions[call_id] = {'from': from_user, 'to': to_user, 'endpoints': set()}
+        # 날짜만 포함 (시분초 제외)
+        date_only = datetime.now().strftime('%Y%m%d')
 
-                    if rtp_ip and rtp_port:
-                        sessions[call_id]['endpoints'].add(f"{rtp_ip}:{rtp_port}")
+        # 내선번호에서 숫자 부분만 추출
+        extracted_from = self._extract_extension_number(from_number)
+        extracted_to = self._extract_extension_number(to_number)
 
-        return sessions
+        return {direction: final_recording_path / f"{date_only}_{direction}_{extracted_from}_{extracted_to}_{safe_call_id}.wav"
+                for direction in ('IN', 'OUT', 'MERGE')}
 
-    def _enhance_sessions_with_active_calls(self, sessions: Dict, active_calls_data: Dict):
-        """active_calls 데이터로 sessions의 endpoints 정보 보강"""
+    def _seed_active_call_endpoints(self, demuxer: CallDemultiplexer, active_calls_data: Dict):
+        """active_calls 데이터의 내선 미디어 endpoint를 분리기에 미리 등록"""
         for call_id, call_info in active_calls_data.items():
-            if call_id in sessions:
-                # media_endpoints_set에서 내선 IP만 추출
-                if 'media_endpoints_set' in call_info:
-                    endpoints_set = call_info['media_endpoints_set']
-                    for endpoint_type in ['local', 'remote']:
-                        if endpoint_type in endpoints_set:
-                            for endpoint in endpoints_set[endpoint_type]:
-                                # 내선 IP만 추가
-                                if ':' in endpoint:
-                                    ip, port = endpoint.split(':')
-                                    if self._is_extension_ip(ip):
-                                        sessions[call_id]['endpoints'].add(endpoint)
-                                        self.logger.info(f"Active calls에서 endpoint 추가: {call_id} → {endpoint}")
-
-                # media_endpoints에서도 추출
-                if 'media_endpoints' in call_info:
-                    for endpoint_info in call_info['media_endpoints']:
-                        if 'ip' in endpoint_info and 'port' in endpoint_info:
-                            ip = endpoint_info['ip']
-                            port = endpoint_info['port']
+            # media_endpoints_set에서 내선 IP만 추출
+            if 'media_endpoints_set' in call_info:
+                endpoints_set = call_info['media_endpoints_set']
+                for endpoint_type in ['local', 'remote']:
+                    if endpoint_type in endpoints_set:
+                        for endpoint in endpoints_set[endpoint_type]:
                             # 내선 IP만 추가
-                            if self._is_extension_ip(ip):
-                                endpoint_str = f"{ip}:{port}"
-                                sessions[call_id]['endpoints'].add(endpoint_str)
-                                self.logger.info(f"Media endpoints에서 endpoint 추가: {call_id} → {endpoint_str}")
+                            if ':' in endpoint:
+                                ip, port = endpoint.rsplit(':', 1)
+                                if self._is_extension_ip(ip):
+                                    demuxer.add_endpoint(call_id, ip, port)
+                                    self.logger.info(f"Active calls에서 endpoint 추가: {call_id} → {endpoint}")
+
+            # media_endpoints에서도 추출
+            if 'media_endpoints' in call_info:
+                for endpoint_info in call_info['media_endpoints']:
+                    if 'ip' in endpoint_info and 'port' in endpoint_info:
+                        ip = endpoint_info['ip']
+                        port = endpoint_info['port']
+                        # 내선 IP만 추가
+                        if self._is_extension_ip(ip):
+                            demuxer.add_endpoint(call_id, ip, port)
+                            self.logger.info(f"Media endpoints에서 endpoint 추가: {call_id} → {ip}:{port}")
 
     def _extract_rtp_to_wav(self, pcapng_path: Path, from_number: str, to_number: str, call_id: str) -> bool:
-        """FFmpeg을 사용하여 pcapng 파일에서 RTP 스트림을 추출하여 IN/OUT/MERGE WAV 파일로 변환"""
+        """pcapng 파일에서 RTP 스트림을 추출하여 IN/OUT/MERGE WAV 파일로 변환하고 카탈로그에 기록"""
+        paths = self._write_call_wavs(pcapng_path, from_number, to_number, call_id)
+        if paths:
+            self._store_recordings(call_id, from_number, to_number, paths)
+        return paths is not None
+
+    def _store_recordings(self, call_id: str, from_number: str, to_number: str, paths: Dict):
+        """변환된 녹음을 카탈로그에 기록(db_insert)하고 FLAC/Opus 저장이면 인코딩(archive) (부모 프로세스에서 실행)
+
+        저널에 완료로 기록된 단계는 건너뛰므로 MERGE 이후 중단된 콜도 남은 단계만 다시 실행
+        """
+        paths = {name: Path(path) for name, path in paths.items()}
+        if 'merge' in paths and not self._stage_done(call_id, 'db_insert'):
+            if self._catalog_recording(call_id, from_number, to_number, paths['merge']):
+                self._mark_stage(call_id, 'db_insert', {'path': str(paths['merge'])})
+        if self.storage_format in ('flac', 'opus') and not self._stage_done(call_id, 'archive'):
+            self._archive_recordings(call_id, paths)
+
+    def _write_call_wavs(self, pcapng_path: Path, from_number: str, to_number: str, call_id: str) -> Optional[Dict[str, Path]]:
+        """pcapng 파일에서 RTP 스트림을 추출하여 IN/OUT/MERGE WAV 파일로 변환
+
+        만든 파일 경로 {'in', 'out', 'merge'}, 실패하면 None (저널에 MERGE까지 완료된 콜은 기록된 경로)
+        """
         try:
             # 최종 녹음 경로 생성
-            final_recording_path = self._get_final_recording_path(from_number, to_number)
-            if not final_recording_path:
-                return False
-
-            # 안전한 call_id 생성 (파일명용)
-            safe_call_id = re.sub(r'[<>:"/\\|?*@]', '_', call_id)[:20]
-            
-            # 날짜만 포함 (시분초 제외)
-            date_only = datetime.now().strftime('%Y%m%d')
-            
-            # 내선번호에서 숫자 부분만 추출
-            extracted_from = self._extract_extension_number(from_number)
-            extracted_to = self._extract_extension_number(to_number)
-
-            # IN/OUT/MERGE WAV 파일 경로 생성 (시분초만 제거, 날짜+Call-ID 해시 유지)
-            in_wav_path = final_recording_path / f"{date_only}_IN_{extracted_from}_{extracted_to}_{safe_call_id}.wav"
-            out_wav_path = final_recording_path / f"{date_only}_OUT_{extracted_from}_{extracted_to}_{safe_call_id}.wav"
-            merge_wav_path = final_recording_path / f"{date_only}_MERGE_{extracted_from}_{extracted_to}_{safe_call_id}.wav"
+            wav_paths = self._get_recording_paths(from_number, to_number, call_id)
+            if not wav_paths:
+                return None
+            in_wav_path, out_wav_path, merge_wav_path = wav_paths['IN'], wav_paths['OUT'], wav_paths['MERGE']
+
+            # 재시작 전에 끝난 단계는 저널에 기록된 파일을 그대로 사용 (날짜가 바뀌어도 같은 경로)
+            if self._completed_stage(call_id, 'merge'):
+                self.logger.info(f"이미 변환 완료된 콜 (저널): {call_id}")
+                return self._journal_recordings(call_id)
+            done_in, done_out = self._completed_stage(call_id, 'in'), self._completed_stage(call_id, 'out')
+            in_wav_path, out_wav_path = done_in or in_wav_path, done_out or out_wav_path
 
             self.logger.info(f"RTP 스트림 분석 시작: {pcapng_path}")
 
-            # FFmpeg을 사용하여 RTP 스트림 분석 및 추출
-            rtp_streams = self._analyze_rtp_streams_with_ffmpeg(pcapng_path)
+            # 캡처 파일을 한 번 읽어 스트림 분석과 페이로드 수집을 동시에 처리
+            rtp_streams = self._analyze_rtp_streams(pcapng_path)
             if not rtp_streams:
-                self.logger.warning("FFmpeg으로 RTP 스트림을 찾을 수 없음")
-                return False
+                self.logger.warning("RTP 스트림을 찾을 수 없음")
+                return None
 
             self.logger.info(f"발견된 RTP 스트림 수: {len(rtp_streams)}")
 
@@ -427,11 +797,19 @@ class SipRtpSessionGrouper:
                     else:
                         out_streams.append(stream)
 
+            if recording_storage.is_archival(self.storage_format):
+                extract_stream, create_merge = self._extract_rtp_stream_g711, self._create_merge_wav_g711
+            elif self.audio_engine == 'ffmpeg':
+                extract_stream, create_merge = self._extract_rtp_stream_with_ffmpeg, self._create_merge_wav_with_ffmpeg
+            else:
+                extract_stream, create_merge = self._extract_rtp_stream_with_dsp, self._create_merge_wav_with_dsp
+
             # IN 방향 RTP 추출
             if in_streams:
-                in_success = self._extract_rtp_stream_with_ffmpeg(pcapng_path, in_streams[0], in_wav_path, "IN")
+                in_success = bool(done_in) or extract_stream(in_streams[0], in_wav_path, "IN")
                 if in_success:
-                    self.logger.info(f"IN 스트림 생성 성공: {in_wav_path.name}")
+                    self.logger.info(f"IN 스트림 {'재사용' if done_in else '생성 성공'}: {in_wav_path.name}")
+                    self._mark_stage(call_id, 'in', {'path': str(in_wav_path)})
                     success = True
             else:
                 self.logger.warning("IN 방향 RTP 스트림을 찾을 수 없음")
@@ -439,32 +817,43 @@ class SipRtpSessionGrouper:
 
             # OUT 방향 RTP 추출
             if out_streams:
-                out_success = self._extract_rtp_stream_with_ffmpeg(pcapng_path, out_streams[0], out_wav_path, "OUT")
+                out_success = bool(done_out) or extract_stream(out_streams[0], out_wav_path, "OUT")
                 if out_success:
-                    self.logger.info(f"OUT 스트림 생성 성공: {out_wav_path.name}")
+                    self.logger.info(f"OUT 스트림 {'재사용' if done_out else '생성 성공'}: {out_wav_path.name}")
+                    self._mark_stage(call_id, 'out', {'path': str(out_wav_path)})
                     success = True
             else:
                 self.logger.warning("OUT 방향 RTP 스트림을 찾을 수 없음")
                 out_success = False
 
-            # MERGE 파일 생성 (FFmpeg을 사용한 믹싱)
-            if (in_success and in_wav_path.exists()) or (out_success and out_wav_path.exists()):
-                merge_success = self._create_merge_wav_with_ffmpeg(
+            # MERGE 파일 생성 (양방향 믹싱)
+            if self.merge_mode in ('stereo', 'mono') and (in_streams or out_streams):
+                if self._create_aligned_merge_wav(pcapng_path, in_streams[:1] + out_streams[:1], merge_wav_path):
+                    self.logger.info(f"MERGE 파일 생성 성공: {merge_wav_path.name}")
+                    self._mark_stage(call_id, 'merge', {'path': str(merge_wav_path), 'from_number': from_number,
+                                                         'to_number': to_number})
+                    success = True
+            elif (in_success and in_wav_path.exists()) or (out_success and out_wav_path.exists()):
+                merge_success = create_merge(
                     in_wav_path if in_success and in_wav_path.exists() else None,
                     out_wav_path if out_success and out_wav_path.exists() else None,
                     merge_wav_path
                 )
                 if merge_success:
                     self.logger.info(f"MERGE 파일 생성 성공: {merge_wav_path.name}")
+                    self._mark_stage(call_id, 'merge', {'path': str(merge_wav_path), 'from_number': from_number,
+                                                         'to_number': to_number})
                     success = True
 
-            return success
+            if not success:
+                return None
+            return {'in': in_wav_path, 'out': out_wav_path, 'merge': merge_wav_path}
 
         except Exception as e:
             self.logger.error(f"RTP to WAV 변환 중 오류: {e}")
             import traceback
             self.logger.error(traceback.format_exc())
-            return False
+            return None
 
     def _extract_rtp_stream_by_direction(self, pcapng_path: Path, wav_path: Path, direction: str, from_number: str, to_number: str) -> bool:
         """방향별 RTP 스트림 추출"""
@@ -670,75 +1059,17 @@ class SipRtpSessionGrouper:
             self.logger.error(f"간단한 MERGE 파일 생성 중 오류: {e}")
             return False
 
-    def _analyze_rtp_streams_with_ffmpeg(self, pcapng_path: Path) -> List[Dict]:
-        """FFmpeg을 사용하여 pcapng 파일에서 RTP 스트림 정보를 분석"""
+    def _analyze_rtp_streams(self, pcapng_path: Path) -> List[Dict]:
+        """pcapng 파일을 한 번 읽어 SSRC별 RTP 스트림 정보와 페이로드를 수집"""
         try:
-            # FFmpeg이 설치되어 있는지 확인
-            ffmpeg_path = self._get_ffmpeg_path()
-            if not ffmpeg_path:
-                self.logger.error("FFmpeg을 찾을 수 없음")
-                return []
-
-            # ffprobe 경로 확인 (실제로는 tshark 사용할 예정이므로 주석 처리)
-            # ffprobe_path = self._get_ffprobe_path()
-            # if not ffprobe_path:
-            #     self.logger.warning("ffprobe를 찾을 수 없음, tshark로 대체")
-            #     # ffprobe가 없어도 tshark로 진행 가능
-
-            # tshark으로 RTP 스트림 정보를 먼저 추출
-            tshark_cmd = [
-                "C:/Program Files/Wireshark/tshark.exe",
-                "-r", str(pcapng_path),
-                "-Y", "rtp",
-                "-T", "fields",
-                "-e", "ip.src",
-                "-e", "ip.dst",
-                "-e", "udp.srcport",
-                "-e", "udp.dstport",
-                "-e", "rtp.ssrc",
-                "-e", "rtp.p_type"
-            ]
-
-            result = subprocess.run(tshark_cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode != 0:
-                self.logger.error(f"tshark RTP 분석 실패: {result.stderr}")
-                return []
-
-            # RTP 스트림 정보 파싱
-            streams = []
-            lines = result.stdout.strip().split('\n')
-            stream_map = {}  # SSRC별로 스트림 정보 수집
-
-            for line in lines:
-                if line.strip():
-                    fields = line.split('\t')
-                    if len(fields) >= 6:
-                        src_ip = fields[0]
-                        dst_ip = fields[1]
-                        src_port = fields[2]
-                        dst_port = fields[3]
-                        ssrc = fields[4]
-                        payload_type = fields[5]
-
-                        if ssrc and ssrc not in stream_map:
-                            stream_map[ssrc] = {
-                                'ssrc': ssrc,
-                                'src_ip': src_ip,
-                                'dst_ip': dst_ip,
-                                'src_port': src_port,
-                                'dst_port': dst_port,
-                                'payload_type': payload_type,
-                                'packet_count': 1
-                            }
-                        elif ssrc in stream_map:
-                            stream_map[ssrc]['packet_count'] += 1
+            streams = summarize_rtp_streams(pcapng_path)
 
             # 패킷 수가 10개 이상인 스트림만 유효한 것으로 간주
-            valid_streams = [stream for stream in stream_map.values() if stream['packet_count'] >= 10]
+            valid_streams = [stream for stream in streams.values() if stream['packet_count'] >= 10]
 
             self.logger.info(f"유효한 RTP 스트림 발견: {len(valid_streams)}개")
             for stream in valid_streams:
-                self.logger.info(f"스트림 SSRC {stream['ssrc']}: {stream['src_ip']}:{stream['src_port']} -> {stream['dst_ip']}:{stream['dst_port']} (패킷: {stream['packet_count']}개)")
+                self.logger.info(f"스트림 SSRC {stream['ssrc']:#010x}: {stream['src_ip']}:{stream['src_port']} -> {stream['dst_ip']}:{stream['dst_port']} (패킷: {stream['packet_count']}개)")
 
             return valid_streams
 
@@ -746,13 +1077,141 @@ class SipRtpSessionGrouper:
             self.logger.error(f"RTP 스트림 분석 중 오류: {e}")
             return []
 
-    def _extract_rtp_stream_with_ffmpeg(self, pcapng_path: Path, stream_info: Dict, wav_path: Path, direction: str) -> bool:
-        """FFmpeg을 사용하여 특정 RTP 스트림을 WAV 파일로 추출"""
+    def _extract_rtp_stream_with_dsp(self, stream_info: Dict, wav_path: Path, direction: str) -> bool:
+        """수집된 RTP 페이로드를 디코딩하고 프로세스 내 DSP 체인(ffmpeg 필터와 동일 구성)으로 WAV 저장"""
         try:
-            ffmpeg_path = self._get_ffmpeg_path()
-            if not ffmpeg_path:
+            self.logger.info(f"{direction} 스트림 추출 시작: {stream_info['src_ip']}:{stream_info['src_port']} -> {stream_info['dst_ip']}:{stream_info['dst_port']}")
+            decoded_audio = self._decode_payload(stream_info.get('payload', b''), direction, stream_info.get('payload_type'))
+            if decoded_audio is None:
+                return False
+
+            # highpass=f=300,lowpass=f=3400,volume=2.0,dynaudnorm=f=500:g=31 → 16kHz (Whisper 최적화)
+            frames = audio_dsp.write_pcm(decoded_audio, self.sample_rate, wav_path,
+                                         audio_dsp.transcription_chain(self.sample_rate))
+            self.logger.info(f"{direction} WAV 파일 생성 성공: {wav_path.name} ({frames / 16000:.2f}초)")
+            return frames > 0
+
+        except Exception as e:
+            self.logger.error(f"DSP RTP 추출 중 오류: {e}")
+            return False
+
+    def _create_merge_wav_with_dsp(self, in_wav_path: Path, out_wav_path: Path, merge_wav_path: Path) -> bool:
+        """IN과 OUT WAV를 블록 단위로 믹싱하고 DSP 체인을 적용해 MERGE 저장 (amix=duration=longest)"""
+        try:
+            input_files = [path for path in (in_wav_path, out_wav_path) if path and path.exists()]
+            if not input_files:
+                self.logger.warning("합성할 오디오 파일이 없음")
                 return False
 
+            if len(input_files) == 1:
+                # 파일이 하나만 있으면 복사
+                shutil.copy2(str(input_files[0]), str(merge_wav_path))
+                self.logger.info(f"MERGE 파일 생성 (단일 파일): {merge_wav_path.name}")
+                return True
+
+            frames = audio_dsp.mix_wav_files(input_files, merge_wav_path, audio_dsp.transcription_chain(16000))
+            self.logger.info(f"MERGE 파일 생성 성공: {merge_wav_path.name} ({frames / 16000:.2f}초)")
+            return frames > 0
+
+        except Exception as e:
+            self.logger.error(f"DSP MERGE 생성 중 오류: {e}")
+            return self._create_merge_wav_simple(in_wav_path, out_wav_path, merge_wav_path)
+
+    def _extract_rtp_stream_g711(self, stream_info: Dict, wav_path: Path, direction: str) -> bool:
+        """수집된 G.711 페이로드를 디코딩 없이 WAV(포맷 태그 6/7)로 저장 (보관 형식)"""
+        try:
+            payload = stream_info.get('payload', b'')
+            payload_type = stream_info.get('payload_type')
+            if payload_type in (g711_codec.PCMU, g711_codec.PCMA):
+                frames = recording_storage.write_g711(wav_path, payload, payload_type)
+            else:
+                # G.711이 아니면 디코딩한 8kHz PCM을 A-law로 보관
+                decoded_audio = self._decode_payload(payload, direction, payload_type)
+                if decoded_audio is None:
+                    return False
+                frames = recording_storage.write_g711_from_pcm(wav_path, np.frombuffer(decoded_audio, dtype='<i2'))
+            self.logger.info(f"{direction} G.711 WAV 저장: {wav_path.name} ({frames / 8000:.2f}초)")
+            return frames > 0
+
+        except Exception as e:
+            self.logger.error(f"G.711 RTP 저장 중 오류: {e}")
+            return False
+
+    def _create_merge_wav_g711(self, in_wav_path: Path, out_wav_path: Path, merge_wav_path: Path) -> bool:
+        """보관 형식 IN/OUT을 8kHz로 더해 A-law MERGE 저장 (길이가 다르면 긴 쪽 기준)"""
+        try:
+            input_files = [path for path in (in_wav_path, out_wav_path) if path and path.exists()]
+            if not input_files:
+                self.logger.warning("합성할 오디오 파일이 없음")
+                return False
+
+            ffmpeg = self._get_ffmpeg_path() or 'ffmpeg'
+            tracks = []
+            for path in input_files:
+                rate, samples = recording_storage.read_audio(path, ffmpeg)
+                if rate != 8000:
+                    raise ValueError(f"8kHz 보관 파일이 아님: {path.name} ({rate}Hz)")
+                tracks.append(samples[:, 0])
+            merged = tracks[0]
+            if len(tracks) == 2:
+                length = max(len(track) for track in tracks)
+                first, second = (np.pad(track, (0, length - len(track))) for track in tracks)
+                merged = g711_codec.mix(first, second)
+            frames = recording_storage.write_g711_from_pcm(merge_wav_path, merged)
+            self.logger.info(f"MERGE G.711 WAV 저장: {merge_wav_path.name} ({frames / 8000:.2f}초)")
+            return frames > 0
+
+        except Exception as e:
+            self.logger.error(f"G.711 MERGE 생성 중 오류: {e}")
+            return False
+
+    def _archive_recordings(self, call_id: str, paths: Dict[str, Path]) -> bool:
+        """G.711 WAV를 FLAC/Opus로 인코딩하고 저널의 단계 결과 경로를 갱신 (실패하면 G.711 WAV 유지)
+
+        모두 인코딩했으면 archive 단계를 완료로 기록하고 True
+        """
+        ffmpeg = self._get_ffmpeg_path()
+        if ffmpeg is None:
+            self.logger.warning(f"FFmpeg 없음 - {self.storage_format} 인코딩 생략, G.711 WAV 유지: {call_id}")
+            return False
+        archived = True
+        for stage, path in paths.items():
+            if not path or not Path(path).exists() or Path(path).suffix.lower() != '.wav':
+                continue
+            try:
+                encoded = recording_storage.encode_archive(path, self.storage_format, ffmpeg, self.opus_bitrate,
+                                                           timeout=conversion_queue.remaining(120))
+                self._mark_stage(call_id, stage, {'path': str(encoded)})
+                if stage == 'merge' and self.recording_catalog is not None:
+                    self.recording_catalog.move(path, encoded)
+                self.logger.info(f"{self.storage_format} 인코딩 완료: {encoded.name}")
+            except Exception as e:
+                self.logger.error(f"{self.storage_format} 인코딩 실패, G.711 WAV 유지: {path} - {e}")
+                archived = False
+        if archived:
+            self._mark_stage(call_id, 'archive', {'format': self.storage_format})
+        return archived
+
+    def _create_aligned_merge_wav(self, pcapng_path: Path, streams: List[Dict], merge_wav_path: Path) -> bool:
+        """RTP 타임스탬프와 도착 시각으로 IN/OUT을 정렬해 MERGE 저장 (발신자 왼쪽, 수신자 오른쪽)
+
+        리샘플링·정규화 없이 8kHz 그대로 캡처를 한 번만 읽어 기록한다.
+        """
+        try:
+            encoding = g711_codec.PCMA if recording_storage.is_archival(self.storage_format) else None
+            stats = rtp_timeline_merger.merge_rtp_capture(pcapng_path, streams, merge_wav_path,
+                                                          self.sample_rate, mono=self.merge_mode == 'mono',
+                                                          encoding=encoding)
+            self.logger.info(f"정렬 MERGE 통계 ({self.merge_mode}): {stats}")
+            return stats['frames'] > 0
+
+        except Exception as e:
+            self.logger.error(f"정렬 MERGE 생성 중 오류: {e}")
+            return False
+
+    def _extract_rtp_stream_with_ffmpeg(self, stream_info: Dict, wav_path: Path, direction: str) -> bool:
+        """수집된 RTP 페이로드를 디코딩한 뒤 FFmpeg 필터를 적용하여 WAV 파일로 저장"""
+        try:
             src_ip = stream_info['src_ip']
             dst_ip = stream_info['dst_ip']
             src_port = stream_info['src_port']
@@ -760,33 +1219,20 @@ class SipRtpSessionGrouper:
 
             self.logger.info(f"{direction} 스트림 추출 시작: {src_ip}:{src_port} -> {dst_ip}:{dst_port}")
 
-            # 임시 raw RTP 파일 생성 (tshark 사용)
-            temp_rtp_file = wav_path.parent / f"temp_rtp_{direction}_{stream_info['ssrc']}.rtp"
-
-            # tshark로 특정 RTP 스트림 추출
-            rtp_filter = f"(ip.src == {src_ip} and ip.dst == {dst_ip} and udp.srcport == {src_port} and udp.dstport == {dst_port} and rtp)"
-
-            extract_cmd = [
-                "C:/Program Files/Wireshark/tshark.exe",
-                "-r", str(pcapng_path),
-                "-Y", rtp_filter,
-                "-w", str(temp_rtp_file)
-            ]
-
-            result = subprocess.run(extract_cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode != 0:
-                self.logger.error(f"tshark RTP 추출 실패: {result.stderr}")
-                return False
+            ffmpeg_path = self._get_ffmpeg_path()
+            if not ffmpeg_path:
+                # FFmpeg이 없으면 디코딩한 8kHz PCM을 그대로 저장
+                return self._extract_rtp_payload_fallback(stream_info, wav_path, direction)
 
-            if not temp_rtp_file.exists() or temp_rtp_file.stat().st_size == 0:
-                self.logger.warning(f"RTP 파일이 생성되지 않음: {temp_rtp_file}")
+            # G.711 페이로드를 8kHz PCM 임시 WAV로 디코딩
+            temp_wav_file = wav_path.parent / f"temp_rtp_{direction}_{stream_info['ssrc']:08x}.wav"
+            if not self._create_wav_file_from_payload(stream_info['payload'], temp_wav_file, direction, stream_info.get('payload_type')):
                 return False
 
-            # FFmpeg으로 RTP를 WAV로 변환 (Whisper 최적화: 16kHz, 노이즈 감소, 음량 정규화)
+            # FFmpeg으로 필터 적용 (Whisper 최적화: 16kHz, 노이즈 감소, 음량 정규화)
             ffmpeg_cmd = [
                 ffmpeg_path,
-                "-f", "pcap",  # 입력 형식
-                "-i", str(temp_rtp_file),
+                "-i", str(temp_wav_file),
                 "-vn",  # 비디오 스트림 무시
                 "-af", "highpass=f=300,lowpass=f=3400,volume=2.0,dynaudnorm=f=500:g=31",  # Whisper 최적화 필터
                 "-acodec", "pcm_s16le",  # 16-bit PCM
@@ -799,19 +1245,19 @@ class SipRtpSessionGrouper:
 
             self.logger.info(f"FFmpeg 명령 실행: {' '.join(ffmpeg_cmd)}")
 
-            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=60)
-
-            # 임시 파일 정리
-            try:
-                if temp_rtp_file.exists():
-                    temp_rtp_file.unlink()
-            except:
-                pass
+            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=conversion_queue.remaining(60))
 
             if result.returncode != 0:
                 self.logger.error(f"FFmpeg 변환 실패: {result.stderr}")
-                # 다른 방법으로 시도 (RTP 페이로드 직접 추출)
-                return self._extract_rtp_payload_fallback(pcapng_path, stream_info, wav_path, direction)
+                # 필터 없이 디코딩된 PCM 사용
+                shutil.move(str(temp_wav_file), str(wav_path))
+            else:
+                # 임시 파일 정리
+                try:
+                    if temp_wav_file.exists():
+                        temp_wav_file.unlink()
+                except:
+                    pass
 
             if wav_path.exists() and wav_path.stat().st_size > 0:
                 file_size = wav_path.stat().st_size
@@ -825,54 +1271,18 @@ class SipRtpSessionGrouper:
             self.logger.error(f"FFmpeg RTP 추출 중 오류: {e}")
             return False
 
-    def _extract_rtp_payload_fallback(self, pcapng_path: Path, stream_info: Dict, wav_path: Path, direction: str) -> bool:
-        """FFmpeg 실패 시 tshark으로 RTP 페이로드를 직접 추출하여 WAV 생성"""
+    def _extract_rtp_payload_fallback(self, stream_info: Dict, wav_path: Path, direction: str) -> bool:
+        """FFmpeg을 사용할 수 없을 때 RTP 페이로드를 직접 디코딩하여 WAV 생성"""
         try:
-            src_ip = stream_info['src_ip']
-            dst_ip = stream_info['dst_ip']
-            src_port = stream_info['src_port']
-            dst_port = stream_info['dst_port']
-
-            self.logger.info(f"{direction} 스트림 폴백 방법 시도: {src_ip}:{src_port} -> {dst_ip}:{dst_port}")
-
-            # tshark로 RTP 페이로드만 추출
-            rtp_filter = f"(ip.src == {src_ip} and ip.dst == {dst_ip} and udp.srcport == {src_port} and udp.dstport == {dst_port} and rtp and rtp.payload)"
-
-            extract_cmd = [
-                "C:/Program Files/Wireshark/tshark.exe",
-                "-r", str(pcapng_path),
-                "-Y", rtp_filter,
-                "-T", "fields",
-                "-e", "rtp.payload"
-            ]
-
-            result = subprocess.run(extract_cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode != 0:
-                self.logger.error(f"RTP 페이로드 추출 실패: {result.stderr}")
-                return False
-
-            lines = [line.strip() for line in result.stdout.strip().split('\n') if line.strip()]
-
-            if not lines:
-                self.logger.warning(f"{direction} RTP 페이로드가 없음")
-                return False
-
-            # 페이로드를 바이너리로 변환
-            audio_data = bytearray()
-            for line in lines:
-                try:
-                    hex_values = line.replace(':', '').replace(' ', '')
-                    if len(hex_values) >= 2 and len(hex_values) % 2 == 0:
-                        audio_data.extend(bytes.fromhex(hex_values))
-                except ValueError:
-                    continue
+            audio_data = stream_info.get('payload', b'')
+            self.logger.info(f"{direction} 스트림 폴백 방법 시도: {stream_info['src_ip']}:{stream_info['src_port']} -> {stream_info['dst_ip']}:{stream_info['dst_port']}")
 
             if len(audio_data) < 160:
                 self.logger.warning(f"{direction} 오디오 데이터가 너무 작음: {len(audio_data)} bytes")
                 return False
 
             # WAV 파일 생성
-            return self._create_wav_file_from_payload(audio_data, wav_path, direction)
+            return self._create_wav_file_from_payload(audio_data, wav_path, direction, stream_info.get('payload_type'))
 
         except Exception as e:
             self.logger.error(f"RTP 페이로드 폴백 추출 중 오류: {e}")
@@ -920,7 +1330,7 @@ class SipRtpSessionGrouper:
 
             self.logger.info(f"FFmpeg 믹싱 명령: {' '.join(ffmpeg_cmd)}")
 
-            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=60)
+            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=conversion_queue.remaining(60))
 
             if result.returncode != 0:
                 self.logger.error(f"FFmpeg 믹싱 실패: {result.stderr}")
@@ -941,28 +1351,16 @@ class SipRtpSessionGrouper:
             return self._create_merge_wav_simple(in_wav_path, out_wav_path, merge_wav_path)
 
     def _get_ffmpeg_path(self) -> str:
-        """FFmpeg 실행 파일 경로를 찾아서 반환"""
-        possible_paths = [
-            "ffmpeg.exe",  # PATH에 있는 경우
-            "ffmpeg",      # Unix-style PATH
-            "C:/ffmpeg/bin/ffmpeg.exe",
-            "C:/Program Files/ffmpeg/bin/ffmpeg.exe",
-            "C:/Program Files (x86)/ffmpeg/bin/ffmpeg.exe",
-            "./ffmpeg/bin/ffmpeg.exe",  # 로컬 설치
-        ]
+        """FFmpeg 실행 파일 경로를 찾아서 반환 (settings.ini [FFmpeg] paths 순서, 한 번 찾으면 캐시)"""
+        if self._ffmpeg_path:
+            return self._ffmpeg_path
 
-        for path in possible_paths:
-            try:
-                # 실행 가능한지 테스트
-                result = subprocess.run([path, "-version"], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    self.logger.info(f"FFmpeg 발견: {path}")
-                    return path
-            except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-                continue
-
-        self.logger.warning("FFmpeg을 찾을 수 없음. 설치가 필요합니다.")
-        return None
+        self._ffmpeg_path = recording_storage.find_ffmpeg(self.ffmpeg_paths)
+        if self._ffmpeg_path:
+            self.logger.info(f"FFmpeg 발견: {self._ffmpeg_path}")
+        else:
+            self.logger.warning("FFmpeg을 찾을 수 없음. 설치가 필요합니다.")
+        return self._ffmpeg_path
 
     def _get_ffprobe_path(self) -> str:
         """ffprobe 실행 파일 경로를 찾아서 반환"""
@@ -988,48 +1386,57 @@ class SipRtpSessionGrouper:
         self.logger.warning("ffprobe를 찾을 수 없음")
         return None
 
-    def _create_wav_file_from_payload(self, audio_data: bytearray, wav_path: Path, direction: str) -> bool:
-        """RTP 페이로드로부터 WAV 파일 생성 (개선된 버전)"""
-        try:
-            import wave
-            import audioop
+    def _decode_payload(self, audio_data, direction: str, payload_type: int = None):
+        """RTP 페이로드를 16비트 PCM으로 디코딩 (G.711 A-law/μ-law 우선). 실패하면 None"""
+        if len(audio_data) < 160:
+            self.logger.error(f"오디오 데이터가 너무 작음: {len(audio_data)} bytes")
+            return None
 
-            self.logger.info(f"{direction} WAV 파일 생성 시작: {wav_path}, 원본 데이터: {len(audio_data)} bytes")
+        decoded_audio = None
+        codec_type = "Unknown"
 
-            if len(audio_data) < 160:
-                self.logger.error(f"오디오 데이터가 너무 작음: {len(audio_data)} bytes")
-                return False
+        # 일반적인 VoIP 코덱 시도 순서 (G.711 A-law, μ-law 우선)
+        codecs_to_try = [
+            ("PCMA (A-law)", lambda data: g711_codec.decode_bytes(data, g711_codec.PCMA)),
+            ("PCMU (μ-law)", lambda data: g711_codec.decode_bytes(data, g711_codec.PCMU)),
+            ("Linear PCM 16-bit", lambda data: bytes(data)),
+            ("Linear PCM 8-bit", _linear8_to_16)
+        ]
+        # RTP payload type이 PCMU(0)이면 μ-law 우선
+        if payload_type == 0:
+            codecs_to_try[0], codecs_to_try[1] = codecs_to_try[1], codecs_to_try[0]
 
-            decoded_audio = None
-            codec_type = "Unknown"
+        for codec_name, decode_func in codecs_to_try:
+            try:
+                decoded_audio = decode_func(audio_data)
+                codec_type = codec_name
+                self.logger.info(f"{direction} 오디오 디코딩 성공: {codec_type}")
+                break
+            except ValueError as e:
+                self.logger.debug(f"{direction} {codec_name} 디코딩 실패: {e}")
+                continue
 
-            # 일반적인 VoIP 코덱 시도 순서 (G.711 A-law, μ-law 우선)
-            codecs_to_try = [
-                ("PCMA (A-law)", lambda data: audioop.alaw2lin(bytes(data), 2)),
-                ("PCMU (μ-law)", lambda data: audioop.ulaw2lin(bytes(data), 2)),
-                ("Linear PCM 16-bit", lambda data: bytes(data)),
-                ("Linear PCM 8-bit", lambda data: audioop.lin2lin(bytes(data), 1, 2))
-            ]
+        if decoded_audio is None:
+            self.logger.error(f"{direction} 모든 코덱 디코딩 실패")
+            return None
 
-            for codec_name, decode_func in codecs_to_try:
-                try:
-                    decoded_audio = decode_func(audio_data)
-                    codec_type = codec_name
-                    self.logger.info(f"{direction} 오디오 디코딩 성공: {codec_type}")
-                    break
-                except (audioop.error, ValueError) as e:
-                    self.logger.debug(f"{direction} {codec_name} 디코딩 실패: {e}")
-                    continue
+        if len(decoded_audio) < 160:
+            self.logger.error(f"{direction} 디코딩된 데이터가 너무 작음: {len(decoded_audio)} bytes")
+            return None
 
-            if decoded_audio is None:
-                self.logger.error(f"{direction} 모든 코덱 디코딩 실패")
-                return False
+        self.logger.info(f"{direction} 디코딩 완료: {codec_type}, 원본: {len(audio_data)} -> 디코딩: {len(decoded_audio)} bytes")
+        return decoded_audio
 
-            if len(decoded_audio) < 160:
-                self.logger.error(f"{direction} 디코딩된 데이터가 너무 작음: {len(decoded_audio)} bytes")
-                return False
+    def _create_wav_file_from_payload(self, audio_data: bytearray, wav_path: Path, direction: str, payload_type: int = None) -> bool:
+        """RTP 페이로드로부터 WAV 파일 생성 (개선된 버전)"""
+        try:
+            import wave
 
-            self.logger.info(f"{direction} 디코딩 완료: {codec_type}, 원본: {len(audio_data)} -> 디코딩: {len(decoded_audio)} bytes")
+            self.logger.info(f"{direction} WAV 파일 생성 시작: {wav_path}, 원본 데이터: {len(audio_data)} bytes")
+
+            decoded_audio = self._decode_payload(audio_data, direction, payload_type)
+            if decoded_audio is None:
+                return False
 
             # WAV 파일 생성
             with wave.open(str(wav_path), 'wb') as wav_file:
@@ -1055,7 +1462,6 @@ class SipRtpSessionGrouper:
         """오디오 데이터를 WAV 파일로 생성"""
         try:
             import wave
-            import audioop
 
             self.logger.info(f"WAV 파일 생성 시작: {wav_path}, 원본 데이터: {len(audio_data)} bytes")
 
@@ -1069,10 +1475,10 @@ class SipRtpSessionGrouper:
 
             # 여러 코덱 시도
             codecs_to_try = [
-                ("PCMA (A-law)", lambda data: audioop.alaw2lin(bytes(data), 2)),
-                ("PCMU (μ-law)", lambda data: audioop.ulaw2lin(bytes(data), 2)),
+                ("PCMA (A-law)", lambda data: g711_codec.decode_bytes(data, g711_codec.PCMA)),
+                ("PCMU (μ-law)", lambda data: g711_codec.decode_bytes(data, g711_codec.PCMU)),
                 ("Linear PCM 16-bit", lambda data: bytes(data)),  # 이미 PCM인 경우
-                ("Linear PCM 8-bit", lambda data: audioop.lin2lin(bytes(data), 1, 2))  # 8비트를 16비트로 확장
+                ("Linear PCM 8-bit", _linear8_to_16)  # 8비트를 16비트로 확장
             ]
 
             for codec_name, decode_func in codecs_to_try:
@@ -1081,7 +1487,7 @@ class SipRtpSessionGrouper:
                     codec_type = codec_name
                     self.logger.info(f"오디오 디코딩 성공: {codec_type}")
                     break
-                except (audioop.error, ValueError) as e:
+                except ValueError as e:
                     self.logger.debug(f"{codec_name} 디코딩 실패: {e}")
                     continue
 
@@ -1098,8 +1504,8 @@ class SipRtpSessionGrouper:
 
             # 볼륨 증폭 (1.5배로 조정)
             try:
-                amplified_audio = audioop.mul(decoded_audio, 2, 1.5)
-            except audioop.error:
+                amplified_audio = g711_codec.apply_gain(np.frombuffer(decoded_audio, dtype='<i2'), 1.5).tobytes()
+            except ValueError:
                 # 증폭 실패 시 원본 사용
                 amplified_audio = decoded_audio
                 self.logger.warning("볼륨 증폭 실패, 원본 데이터 사용")
@@ -1160,97 +1566,190 @@ class SipRtpSessionGrouper:
             return False  # 실패
 
     def stop_call_recording(self, call_id):
-        """통화 녹음 중지"""
+        """통화 녹음 중지 후 WAV 변환을 작업 큐에 등록. 등록되면 녹음 정보, 아니면 None"""
         try:
             if call_id not in self.recordings:
                 self.logger.warning(f"통화 녹음 정보 없음: {call_id}")
-                return
+                return None
 
             recording_info = self.recordings[call_id]
             self.logger.info(f"통화 녹음 중지: {call_id}")
 
-            # 별도 스레드에서 WAV 변환 처리 (1초 지연)
-            conversion_thread = threading.Thread(
-                target=self.delayed_wav_conversion,
-                args=(recording_info,),
-                daemon=True
+            # 큐에 넣기 전에 저널에 기록 (변환 전에 프로세스가 죽어도 재시작 시 재개)
+            recording_info['capture_path'] = self._capture_base()
+            journal = self._get_conversion_journal()
+            if journal is not None:
+                try:
+                    journal.add_job(call_id, recording_info, recording_info['capture_path'])
+                except Exception as e:
+                    self.logger.error(f"변환 저널 기록 실패: {call_id} - {e}")
+
+            # 짧은 통화부터 변환, 1초 뒤 실행 (pcapng 파일 안정화)
+            duration = (datetime.now() - recording_info['start_time']).total_seconds()
+            queued = self.conversion_queue.submit(
+                call_id, self._run_conversion_job, recording_info,
+                priority=duration, delay=1.0, wait=self.conversion_submit_wait
             )
-            conversion_thread.start()
 
-            # 녹음 정보 정리 (변환 스레드 시작 후)
+            # 녹음 정보 정리 (변환 작업 등록 후)
             del self.recordings[call_id]
-            self.logger.info(f"통화 녹음 정보 정리 완료: {call_id}")
+            self.logger.info(f"통화 녹음 정보 정리 완료: {call_id} (변환 큐: {self.conversion_queue.metrics()['depth']}개 대기)")
+            return recording_info if queued else None
 
         except Exception as e:
             self.logger.error(f"녹음 중지 오류: {e}")
+            return None
 
-    def delayed_wav_conversion(self, call_info):
-        """지연된 WAV 변환 (별도 스레드에서 실행)"""
+    def finish_live_recording(self, call_id, live_recorder, latest_terminated_call_id=None) -> bool:
+        """실시간 녹음을 최종 경로로 옮기고 녹음 정보 정리. 녹음된 RTP가 없으면 False (캡처 후처리로 폴백)"""
+        recording_info = self.recordings.get(call_id, {})
         try:
-            # 1초 대기 (pcapng 파일 안정화)
-            time.sleep(1)
+            from_num = recording_info.get('from_number') or "unknown"
+            to_num = recording_info.get('to_number') or "unknown"
+            from_num = self._resolve_refer_from(call_id, from_num, latest_terminated_call_id)
+            wav_paths = self._get_recording_paths(from_num, to_num, call_id)
+            if not wav_paths:
+                live_recorder.discard_call(call_id)
+                return False
+            finished = live_recorder.finish_call(call_id, wav_paths)
+        except Exception as e:
+            self.logger.error(f"실시간 녹음 완료 처리 오류: {call_id} - {e}")
+            return False
+        if not finished:
+            return False
 
-            # temp_capture 파일 찾기
-            temp_capture_file = None
+        self.recordings.pop(call_id, None)
+        if call_id in self.refer_mapping:
+            self.clear_refer_mapping(call_id)
+        if 'MERGE' in finished:
+            self._catalog_recording(call_id, from_num, to_num, finished['MERGE'])
+        # 실시간 녹음으로 끝난 콜은 캡처 세그먼트 보존 대상에서 제외 (다음 refresh에서 삭제 가능)
+        capture_catalog = self._get_capture_catalog()
+        if capture_catalog is not None:
+            try:
+                capture_catalog.mark_converted(call_id)
+            except Exception as e:
+                self.logger.error(f"캡처 인덱스 변환 완료 기록 실패: {call_id} - {e}")
+        # 전역 캡처 전체 분리(process_captured_pcap)에서 같은 콜을 다시 변환하지 않도록 원장에 기록
+        journal = self._get_conversion_journal()
+        if journal is not None:
+            try:
+                journal.mark_recorded_live(call_id)
+            except Exception as e:
+                self.logger.error(f"처리 원장 기록 실패: {call_id} - {e}")
+        if self.storage_format in ('flac', 'opus'):
+            # 인코딩은 캡처 스레드를 막지 않도록 변환 큐에서 처리
+            self.conversion_queue.submit(f"archive:{call_id}", self._archive_recordings, call_id,
+                                         {name.lower(): path for name, path in finished.items()},
+                                         wait=self.conversion_submit_wait)
+        return True
+
+    def _capture_base(self, fallback: str = None) -> str:
+        """전역 캡처 파일 경로 (링 버퍼 사용 시 세그먼트의 기준 이름) - dashboard 값 우선"""
+        if self.dashboard and hasattr(self.dashboard, 'temp_capture_file') and self.dashboard.temp_capture_file:
+            return self.dashboard.temp_capture_file
+        return fallback or "temp_captures/temp_capture.pcapng"
+
+    def _run_conversion_job(self, call_info):
+        """변환 큐 작업 - 저널에 시작/완료/실패를 기록하며 delayed_wav_conversion 실행"""
+        call_id = call_info.get('call_id')
+        journal = self.conversion_journal
+        if journal is not None:
+            journal.start_job(call_id)
+        try:
+            converted = self.delayed_wav_conversion(call_info)
+        except conversion_queue.JobTimeout:
+            if journal is not None:
+                journal.finish_job(call_id, error='시간 초과')
+            raise
+        if journal is not None:
+            journal.finish_job(call_id, error=None if converted else '변환 실패')
+
+    def delayed_wav_conversion(self, call_info) -> bool:
+        """지연된 WAV 변환 (변환 큐 워커에서 실행, 등록 1초 뒤). 이 콜의 WAV를 만들었으면(이미 변환돼 있었으면) True"""
+        try:
+            # 1. dashboard에서 temp_capture_file 확인 (재개된 작업은 저널에 기록된 경로)
+            capture_base = self._capture_base(call_info.get('capture_path'))
+            self.logger.info(f"temp_capture_file 확인: {capture_base}")
 
-            # 1. dashboard에서 temp_capture_file 확인
-            if self.dashboard and hasattr(self.dashboard, 'temp_capture_file'):
-                temp_capture_file = self.dashboard.temp_capture_file
-                self.logger.info(f"Dashboard에서 temp_capture_file 확인: {temp_capture_file}")
+            # 2. temp_captures 디렉토리 확인 및 생성
+            temp_captures_dir = "temp_captures"
+            if not os.path.exists(temp_captures_dir):
+                os.makedirs(temp_captures_dir)
+                self.logger.info(f"temp_captures 디렉토리 생성: {temp_captures_dir}")
 
-            # 2. 기본 경로 확인 (회전된 파일명도 포함)
-            if not temp_capture_file:
-                # 회전된 파일들 찾기
+            # 3. Dashboard에서 active_calls 및 최신 Call-ID 정보 가져오기
+            active_calls_data = None
+            latest_terminated_call_id = None
+
+            if self.dashboard and hasattr(self.dashboard, 'active_calls'):
+                active_calls_data = dict(self.dashboard.active_calls)
+                self.logger.info(f"Active calls 데이터 전달: {len(active_calls_data)}개 세션")
+
+            self.logger.info(f"Dashboard 연결 상태: dashboard={self.dashboard is not None}")
+            if self.dashboard:
+                self.logger.info(f"Dashboard 속성 체크: has_latest_terminated_call_id={hasattr(self.dashboard, 'latest_terminated_call_id')}")
+                if hasattr(self.dashboard, 'latest_terminated_call_id'):
+                    latest_terminated_call_id = self.dashboard.latest_terminated_call_id
+                    self.logger.info(f"✅ 최신 종료 Call-ID 전달: {latest_terminated_call_id}")
+                else:
+                    self.logger.warning("❌ Dashboard에 latest_terminated_call_id 속성이 없음")
+            else:
+                self.logger.warning("❌ Dashboard가 연결되지 않음")
+
+            # 4. 세그먼트 인덱스로 종료된 콜과 겹치는 세그먼트만 읽어 변환
+            call_id = call_info.get('call_id')
+            if call_id:
+                converted = self.process_indexed_call(capture_base, call_id, latest_terminated_call_id)
+                if converted is not None:
+                    # 인덱스에서 찾은 콜은 실패해도 전체 분리로 넘어가지 않음 (저널이 재시도)
+                    return converted
+            conversion_queue.check_deadline()
+
+            # 5. 인덱스에 없으면 캡처 파일 전체를 분리 (회전된 파일명도 포함, 가장 최근 파일 사용)
+            temp_capture_file = capture_base
+            if not os.path.exists(temp_capture_file):
                 pattern = "temp_captures/temp_capture*.pcapng"
                 capture_files = glob.glob(pattern)
                 if capture_files:
-                    # 가장 최근 파일 사용
                     temp_capture_file = max(capture_files, key=os.path.getmtime)
                     self.logger.info(f"회전된 temp_capture_file 발견: {temp_capture_file}")
-                else:
-                    temp_capture_file = "temp_captures/temp_capture.pcapng"
-                    self.logger.info(f"기본 temp_capture_file 사용: {temp_capture_file}")
-
-            # 3. temp_captures 디렉토리 확인 및 생성
-            temp_captures_dir = "temp_captures"
-            if not os.path.exists(temp_captures_dir):
-                os.makedirs(temp_captures_dir)
-                self.logger.info(f"temp_captures 디렉토리 생성: {temp_captures_dir}")
 
-            # 4. 파일 존재 확인 및 처리
             if os.path.exists(temp_capture_file):
                 file_size = os.path.getsize(temp_capture_file)
                 self.logger.info(f"전역 캡처 파일 발견: {temp_capture_file} ({file_size} bytes)")
 
                 if file_size > 0:
-                    # Dashboard에서 active_calls 및 최신 Call-ID 정보 가져오기
-                    active_calls_data = None
-                    latest_terminated_call_id = None
-                    
-                    if self.dashboard and hasattr(self.dashboard, 'active_calls'):
-                        active_calls_data = dict(self.dashboard.active_calls)
-                        self.logger.info(f"Active calls 데이터 전달: {len(active_calls_data)}개 세션")
-                    
-                    self.logger.info(f"Dashboard 연결 상태: dashboard={self.dashboard is not None}")
-                    if self.dashboard:
-                        self.logger.info(f"Dashboard 속성 체크: has_latest_terminated_call_id={hasattr(self.dashboard, 'latest_terminated_call_id')}")
-                        if hasattr(self.dashboard, 'latest_terminated_call_id'):
-                            latest_terminated_call_id = self.dashboard.latest_terminated_call_id
-                            self.logger.info(f"✅ 최신 종료 Call-ID 전달: {latest_terminated_call_id}")
-                        else:
-                            self.logger.warning("❌ Dashboard에 latest_terminated_call_id 속성이 없음")
-                    else:
-                        self.logger.warning("❌ Dashboard가 연결되지 않음")
-
                     # process_captured_pcap으로 Call-ID별 분리 및 WAV 변환 (최신 Call-ID 정보 포함)
-                    self.process_captured_pcap(temp_capture_file, active_calls_data, latest_terminated_call_id)
+                    processed = self.process_captured_pcap(temp_capture_file, active_calls_data, latest_terminated_call_id)
+                    return self._call_converted(call_id, processed)
                 else:
                     self.logger.warning(f"전역 캡처 파일이 비어있음: {temp_capture_file}")
             else:
                 self.logger.warning(f"전역 캡처 파일 없음: {temp_capture_file}")
 
+        except conversion_queue.JobTimeout:
+            raise
         except Exception as e:
             self.logger.error(f"WAV 변환 중 오류: {e}")
+        return False
+
+    def _call_converted(self, call_id: str, processed: List[Dict]) -> bool:
+        """process_captured_pcap 결과에서 이 콜의 WAV가 만들어졌는지 (Call-ID가 없으면 하나라도 변환됐는지)
+
+        처리 원장에 있어 건너뛴 콜은 이전에 변환된 것이므로 성공으로 본다.
+        """
+        if not call_id:
+            return any(call.get('wav_converted') for call in processed)
+        if any(call['call_id'] == call_id and call.get('wav_converted') for call in processed):
+            return True
+        journal = self.conversion_journal
+        if journal is not None:
+            try:
+                return call_id in journal.processed_calls()
+            except Exception as e:
+                self.logger.error(f"처리 원장 조회 실패: {call_id} - {e}")
+        return False
 
     def convert_and_save(self, call_info):
         """WAV 변환 및 저장 (호환성을 위한 메서드)"""
@@ -1258,8 +1757,14 @@ class SipRtpSessionGrouper:
         pass
 
     def cleanup_all_recordings(self):
-        """모든 녹음 정리"""
+        """모든 녹음 정리 (대기 중인 변환 작업은 최대 5초 처리 후 중단)"""
         try:
+            self.conversion_queue.shutdown(wait=5.0)
+            self.logger.info(f"변환 큐 통계: {self.conversion_queue.metrics()}")
+            with self._process_pool_lock:
+                if self._process_pool is not None:
+                    self._process_pool.shutdown(wait=False, cancel_futures=True)
+                    self._process_pool = None
             count = len(self.recordings)
             self.recordings.clear()
             self.logger.info(f"녹음 정리: {count}개 항목")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+오디오 DSP 체인 테스트 - 바이쿼드/리샘플러/정규화/믹서 동작과 ffmpeg 필터 그래프 대비 결과 비교
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import audio_dsp
+
+
+def _tone(freq, seconds, rate, amplitude=0.3):
+    return amplitude * np.sin(2 * np.pi * freq * np.arange(int(seconds * rate)) / rate)
+
+
+def _blocks(stage, data, size):
+    out = [stage.process(data[start:start + size]) for start in range(0, len(data), size)]
+    return np.concatenate(out + [stage.flush()])
+
+
+def _recursive_biquad(data, kind, cutoff, rate):
+    (b0, b1, b2), (_, a1, a2) = audio_dsp.biquad_coefficients(kind, cutoff, rate)
+    out = np.empty(len(data))
+    x1 = x2 = y1 = y2 = 0.0
+    for index, x0 in enumerate(data):
+        y0 = b0 * x0 + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        out[index] = y0
+        x2, x1, y2, y1 = x1, x0, y1, y0
+    return out
+
+
+def _read_wav(path):
+    with wave.open(str(path), 'rb') as wav_file:
+        return wav_file.getframerate(), np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2')
+
+
+def _write_wav(path, samples, rate):
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(samples.astype('<i2').tobytes())
+
+
+def _speech_like(seconds, rate, seed=1):
+    """음절처럼 켜졌다 꺼지는 톤 + 잡음 (레벨 변화가 있어야 정규화 비교가 의미 있음)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    envelope = 0.5 + 0.5 * np.sign(np.sin(2 * np.pi * 0.7 * t))
+    voice = 0.08 * np.sin(2 * np.pi * 440 * t) + 0.04 * np.sin(2 * np.pi * 1250 * t)
+    return ((voice * envelope + 0.005 * rng.standard_normal(len(t))) * 32767).astype('<i2')
+
+
+def test_biquad_matches_recursion():
+    print("=== 오디오 DSP 체인 테스트 ===")
+    data = np.random.default_rng(0).standard_normal(8000) * 0.1
+    expected = _recursive_biquad(_recursive_biquad(data, 'highpass', 300, 8000), 'lowpass', 3400, 8000)
+    filtered = _blocks(audio_dsp.BiquadFilter((('highpass', 300), ('lowpass', 3400)), 8000), data, 333)
+    assert np.max(np.abs(filtered - expected)) < 1e-12
+    # 통과 대역은 유지, 차단 대역은 감쇠
+    assert np.std(_blocks(audio_dsp.BiquadFilter((('highpass', 300),), 8000), _tone(1000, 1, 8000), 800)[800:]) > 0.2
+    assert np.std(_blocks(audio_dsp.BiquadFilter((('highpass', 300),), 8000), _tone(50, 1, 8000), 800)[800:]) < 0.01
+    print("  [OK] 블록 단위 바이쿼드 = 샘플 단위 재귀 필터")
+
+
+def test_resampler_streaming():
+    for src_rate, dst_rate in ((8000, 16000), (16000, 8000), (8000, 11025)):
+        data = _tone(1000, 2, src_rate)
+        out = _blocks(audio_dsp.PolyphaseResampler(src_rate, dst_rate), data, 777)
+        assert len(out) == 2 * dst_rate
+        expected = _tone(1000, 2, dst_rate)
+        assert np.max(np.abs(out[200:-200] - expected[200:-200])) < 1e-4
+        # 블록 크기와 무관하게 같은 결과
+        assert np.allclose(out, _blocks(audio_dsp.PolyphaseResampler(src_rate, dst_rate), data, len(data)))
+    print("  [OK] polyphase 리샘플러 길이·위상 일치 (블록 경계 무관)")
+
+
+def test_normalizer_gain_and_bounded_queue():
+    normalizer = audio_dsp.DynamicNormalizer(8000)
+    data = _tone(440, 30, 8000, amplitude=0.05)
+    out = []
+    for start in range(0, len(data), 1234):
+        out.append(normalizer.process(data[start:start + 1234]))
+        assert len(normalizer._frames) <= normalizer.window
+    out = np.concatenate(out + [normalizer.flush()])
+    assert len(out) == len(data)
+    # peak 0.95 / 0.05 = 19배 → max_gain 10에서 부드럽게 제한
+    assert 0.45 < np.max(np.abs(out[14 * 8000:16 * 8000])) < 0.5
+    print("  [OK] 동적 정규화 게인과 큐 크기 제한")
+
+
+def test_mixer_and_chain_files():
+    mixer = audio_dsp.Mixer(8000, dropout_transition=1.0)
+    mixed = mixer.mix(np.full(100, 0.2), np.full(60, 0.4))
+    assert len(mixed) == 100 and np.allclose(mixed[:60], 0.3) and mixed[60] == 0.1
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second, merged = Path(tmp, 'in.wav'), Path(tmp, 'out.wav'), Path(tmp, 'merge.wav')
+        assert audio_dsp.write_pcm(_speech_like(3, 8000), 8000, first, audio_dsp.transcription_chain(8000)) == 48000
+        _write_wav(second, _speech_like(5, 8000, seed=2), 8000)
+        frames = audio_dsp.mix_wav_files([first, second], merged, audio_dsp.merger_chain(16000), input_gain=0.85)
+        rate, samples = _read_wav(merged)
+        assert rate == 16000 and frames == len(samples) == 80000
+        assert np.max(np.abs(samples)) > 1000
+    print("  [OK] 단일 스트림 체인·두 입력 믹싱 WAV 생성")
+
+
+def test_compander_envelope_matches_recursion():
+    rate = 16000
+    magnitude = np.abs(_speech_like(10, rate).astype(np.float64) / 32768.0)
+    reference = audio_dsp.Compander(rate)
+    expected = reference._envelope_loop(magnitude)
+    compander = audio_dsp.Compander(rate)
+    # 블록 크기와 무관하게 샘플 단위 재귀와 같음 (상태는 블록 사이에 이어짐)
+    for size in (160, 1000, 8000):
+        compander.volume = 1.0
+        envelope = np.concatenate([compander._envelope(magnitude[start:start + size])
+                                   for start in range(0, len(magnitude), size)])
+        assert np.max(np.abs(envelope - expected)) < 1e-12
+        assert abs(compander.volume - reference.volume) < 1e-12
+    print("  [OK] compand 엔벨로프 블록 풀이 = 샘플 단위 재귀")
+
+
+# ffmpeg 필터 그래프(이전 구현) 결과의 20ms 프레임 RMS(dBFS) - ffmpeg 없이도 비교하도록 저장해 둠
+REFERENCE_PATH = Path(__file__).with_name('test_audio_dsp_reference.json')
+FRAME_SECONDS = 0.02
+
+TRANSCRIPTION_FILTER = 'highpass=f=300,lowpass=f=3400,volume=2.0,dynaudnorm=f=500:g=31'
+MERGER_FILTER = (
+    '[0:a]aformat=sample_fmts=s16:sample_rates=16000:channel_layouts=mono,volume=0.85[in_norm];'
+    '[1:a]aformat=sample_fmts=s16:sample_rates=16000:channel_layouts=mono,volume=0.85[out_norm];'
+    '[in_norm][out_norm]amix=inputs=2:duration=longest:dropout_transition=1,dynaudnorm=p=0.9:m=30[mixed];'
+    '[mixed]highpass=f=80,lowpass=f=8000,compand=attacks=0.3:decays=0.8:points=-80/-80|-45/-15|-27/-9|0/-7[final]')
+
+
+def _ffmpeg():
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        pytest.skip("ffmpeg 없음 - ffmpeg 필터 그래프 직접 비교 불가 (저장된 기준값 비교는 실행됨)")
+    return ffmpeg
+
+
+def _transcription_files(tmp, ffmpeg=None):
+    """전사용 체인 입력 → (ffmpeg 결과, 우리 결과). ffmpeg가 없으면 ffmpeg 결과는 None"""
+    source, reference, ours = Path(tmp, 'src.wav'), Path(tmp, 'ffmpeg.wav'), Path(tmp, 'dsp.wav')
+    pcm = _speech_like(20, 8000)
+    _write_wav(source, pcm, 8000)
+    if ffmpeg:
+        subprocess.run([ffmpeg, '-v', 'quiet', '-i', str(source), '-af', TRANSCRIPTION_FILTER,
+                        '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1', '-y', str(reference)], check=True)
+    audio_dsp.write_pcm(pcm, 8000, ours, audio_dsp.transcription_chain(8000))
+    return (reference if ffmpeg else None), ours
+
+
+def _merger_files(tmp, ffmpeg=None):
+    """WavMerger 체인 입력 (길이가 다른 두 방향 - 짧은 쪽이 끝난 뒤 dropout_transition 구간 포함)"""
+    first, second = Path(tmp, 'in.wav'), Path(tmp, 'out.wav')
+    reference, ours = Path(tmp, 'ffmpeg.wav'), Path(tmp, 'dsp.wav')
+    _write_wav(first, _speech_like(12, 8000), 8000)
+    _write_wav(second, _speech_like(15, 8000, seed=2), 8000)
+    if ffmpeg:
+        subprocess.run([ffmpeg, '-v', 'quiet', '-i', str(first), '-i', str(second), '-filter_complex', MERGER_FILTER,
+                        '-map', '[final]', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1', '-y', str(reference)],
+                       check=True)
+    audio_dsp.mix_wav_files([first, second], ours, audio_dsp.merger_chain(16000),
+                            sample_rate=16000, input_gain=0.85, dropout_transition=1.0)
+    return (reference if ffmpeg else None), ours
+
+
+def _frame_levels(path):
+    """20ms 프레임 RMS(dBFS)"""
+    rate, samples = _read_wav(path)
+    size = int(rate * FRAME_SECONDS)
+    frames = samples[:len(samples) // size * size].astype(np.float64).reshape(-1, size) / 32768.0
+    return 10 * np.log10(np.maximum(np.mean(frames ** 2, axis=1), 1e-10))
+
+
+def _compare(reference, ours, max_length_diff, min_correlation, max_level_db):
+    """파형 상관계수와 RMS 음량 차이(dB)로 ffmpeg 결과와 비교"""
+    _, expected = _read_wav(reference)
+    _, actual = _read_wav(ours)
+    size = min(len(expected), len(actual))
+    assert abs(len(expected) - len(actual)) <= max_length_diff
+    expected, actual = expected[:size].astype(np.float64), actual[:size].astype(np.float64)
+    correlation = np.corrcoef(expected, actual)[0, 1]
+    level_db = 20 * np.log10(np.sqrt(np.mean(actual ** 2)) / np.sqrt(np.mean(expected ** 2)))
+    print(f"  ffmpeg 대비 상관계수 {correlation:.4f}, 음량 차이 {level_db:+.2f}dB")
+    assert correlation > min_correlation and abs(level_db) < max_level_db
+
+
+def _compare_levels(expected, actual, max_frame_diff, min_correlation, max_level_db):
+    """프레임 RMS 곡선의 상관계수와 전체 음량 차이(dB)로 저장된 ffmpeg 결과와 비교"""
+    expected, actual = np.asarray(expected), np.asarray(actual)
+    size = min(len(expected), len(actual))
+    assert abs(len(expected) - len(actual)) <= max_frame_diff
+    expected, actual = expected[:size], actual[:size]
+    correlation = np.corrcoef(expected, actual)[0, 1]
+    level_db = 10 * np.log10(np.mean(10 ** (actual / 10)) / np.mean(10 ** (expected / 10)))
+    print(f"  ffmpeg 기준값 대비 RMS 곡선 상관계수 {correlation:.4f}, 음량 차이 {level_db:+.2f}dB")
+    assert correlation > min_correlation and abs(level_db) < max_level_db
+
+
+def _reference_levels(name):
+    return json.loads(REFERENCE_PATH.read_text(encoding='utf-8'))[name]
+
+
+def update_reference(ffmpeg):
+    """ffmpeg 필터 그래프로 기준값 파일 다시 생성 (python test_audio_dsp.py --update-reference)"""
+    levels = {}
+    for name, files in (('transcription', _transcription_files), ('merger', _merger_files)):
+        with tempfile.TemporaryDirectory() as tmp:
+            reference, _ = files(tmp, ffmpeg)
+            levels[name] = [round(float(level), 2) for level in _frame_levels(reference)]
+    REFERENCE_PATH.write_text(json.dumps(levels, separators=(',', ':')) + '\n', encoding='utf-8')
+
+
+def test_matches_ffmpeg_reference():
+    """전사용 체인 - 저장된 ffmpeg 결과의 프레임 RMS와 비교 (항상 실행)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _, ours = _transcription_files(tmp)
+        _compare_levels(_reference_levels('transcription'), _frame_levels(ours), 1, 0.999, 0.3)
+    print("  [OK] 전사용 체인이 저장된 ffmpeg 기준값과 일치")
+
+
+def test_merger_matches_ffmpeg_reference():
+    """WavMerger 체인 - 저장된 ffmpeg filter_complex 결과의 프레임 RMS와 비교 (항상 실행)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _, ours = _merger_files(tmp)
+        _compare_levels(_reference_levels('merger'), _frame_levels(ours), 2, 0.995, 1.0)
+    print("  [OK] 병합 체인이 저장된 ffmpeg 기준값과 일치")
+
+
+def test_matches_ffmpeg():
+    """전사용 체인 - ffmpeg 같은 필터 그래프 결과와 파형 비교 (ffmpeg가 없으면 skip)"""
+    ffmpeg = _ffmpeg()
+    with tempfile.TemporaryDirectory() as tmp:
+        _compare(*_transcription_files(tmp, ffmpeg), 160, 0.98, 1.0)
+    print("  [OK] ffmpeg 필터 그래프와 결과 일치")
+
+
+def test_merger_matches_ffmpeg():
+    """WavMerger 체인 - 이전 ffmpeg filter_complex(amix → dynaudnorm → highpass/lowpass → compand)와 파형 비교"""
+    ffmpeg = _ffmpeg()
+    with tempfile.TemporaryDirectory() as tmp:
+        _compare(*_merger_files(tmp, ffmpeg), 320, 0.95, 1.5)
+    print("  [OK] 병합 체인이 ffmpeg filter_complex 결과와 일치")
+
+
+if __name__ == "__main__":
+    if '--update-reference' in sys.argv:
+        update_reference(shutil.which('ffmpeg') or sys.exit("ffmpeg 없음 - 기준값을 만들 수 없음"))
+        print(f"기준값 저장: {REFERENCE_PATH.name}")
+        sys.exit(0)
+    test_biquad_matches_recursion()
+    test_resampler_streaming()
+    test_normalizer_gain_and_bounded_queue()
+    test_mixer_and_chain_files()
+    test_compander_envelope_matches_recursion()
+    test_matches_ffmpeg_reference()
+    test_merger_matches_ffmpeg_reference()
+    for ffmpeg_test in (test_matches_ffmpeg, test_merger_matches_ffmpeg):
+        try:
+            ffmpeg_test()
+        except pytest.skip.Exception as e:
+            print(f"  [SKIP] {e}")
+    print("\n테스트 완료")
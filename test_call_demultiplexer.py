@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+단일 패스 콜 분리기 테스트
+"""
+
+import tempfile
+from pathlib import Path
+
+from call_demultiplexer import CallDemultiplexer, capture_digest, parse_sip_fields
+from pcap_io import PcapReader, PcapngWriter, LINKTYPE_ETHERNET
+from test_pcap_io import SAMPLE_PCAPNG, _build_udp_frame, _build_rtp
+
+PBX_IP = '192.168.0.1'
+TRUNK_IP = '112.222.225.77'
+
+
+def _sip(first_line, call_id, from_user, to_user, rtp_ip=None, rtp_port=None):
+    message = (f"{first_line}\r\nCall-ID: {call_id}\r\n"
+               f"From: <sip:{from_user}@{TRUNK_IP}>;tag=1\r\nTo: <sip:{to_user}@{TRUNK_IP}>\r\n")
+    if rtp_ip:
+        sdp = f"v=0\r\nc=IN IP4 {rtp_ip}\r\nm=audio {rtp_port} RTP/AVP 8\r\n"
+        message += f"Content-Type: application/sdp\r\n\r\n{sdp}"
+    else:
+        message += "\r\n"
+    return message.encode()
+
+
+def _build_capture(path):
+    """콜 3개(A, B, 그리고 A의 미디어 포트를 재사용하는 C) + REGISTER가 섞인 캡처"""
+    packets = []  # (timestamp, frame)
+
+    def sip(ts, src, dst, payload):
+        packets.append((ts, _build_udp_frame(src, dst, 5060, 5060, payload)))
+
+    def rtp(ts, src, dst, count, ssrc):
+        for i in range(count):
+            payload = _build_rtp(i, i * 160, ssrc, 8, b'\xd5' * 160)
+            packets.append((ts + i * 0.02, _build_udp_frame(src[0], dst[0], src[1], dst[1], payload)))
+
+    ext_a, trunk_a = ('192.168.0.55', 4000), (TRUNK_IP, 30000)
+    ext_b, trunk_b = ('192.168.0.56', 4002), (TRUNK_IP, 30002)
+    trunk_c = (TRUNK_IP, 30004)
+
+    sip(0.0, PBX_IP, TRUNK_IP, b"REGISTER sip:" + TRUNK_IP.encode() + b" SIP/2.0\r\nCall-ID: reg-1\r\n\r\n")
+    sip(1.0, TRUNK_IP, PBX_IP, _sip("INVITE sip:1427@pbx SIP/2.0", 'call-a@trunk', '01011112222', '1427', *trunk_a))
+    sip(1.1, PBX_IP, TRUNK_IP, _sip("SIP/2.0 200 OK", 'call-a@trunk', '01011112222', '1427', *ext_a))
+    sip(1.2, TRUNK_IP, PBX_IP, _sip("INVITE sip:1428@pbx SIP/2.0", 'call-b@trunk', '01033334444', '1428', *trunk_b))
+    sip(1.3, PBX_IP, TRUNK_IP, _sip("SIP/2.0 200 OK", 'call-b@trunk', '01033334444', '1428', *ext_b))
+    rtp(2.0, ext_a, trunk_a, 50, 0xA1)
+    rtp(2.0, trunk_a, ext_a, 50, 0xA2)
+    rtp(2.01, ext_b, trunk_b, 30, 0xB1)
+    sip(4.0, TRUNK_IP, PBX_IP, _sip("BYE sip:1427@pbx SIP/2.0", 'call-a@trunk', '01011112222', '1427'))
+    # 콜 C가 콜 A의 내선 미디어 포트를 다시 협상
+    sip(5.0, TRUNK_IP, PBX_IP, _sip("INVITE sip:1427@pbx SIP/2.0", 'call-c@trunk', '01055556666', '1427', *trunk_c))
+    sip(5.1, PBX_IP, TRUNK_IP, _sip("SIP/2.0 200 OK", 'call-c@trunk', '01055556666', '1427', *ext_a))
+    rtp(6.0, ext_a, trunk_c, 20, 0xC1)
+
+    packets.sort(key=lambda item: item[0])
+    with PcapngWriter(path) as writer:
+        for ts, frame in packets:
+            writer.write(ts, LINKTYPE_ETHERNET, frame)
+
+
+def test_parse_sip_fields():
+    """SIP 헤더/SDP 추출과 RTP 패킷 거부"""
+    fields = parse_sip_fields(_sip("SIP/2.0 200 OK", 'abc@host', '1427', '01012345678', '192.168.0.55', 4000))
+    assert fields == {'call_id': 'abc@host', 'from_user': '1427', 'to_user': '01012345678',
+                      'rtp_ip': '192.168.0.55', 'rtp_port': '4000'}
+    assert parse_sip_fields(_build_rtp(1, 160, 0x1234, 8, b'\xd5' * 160)) is None
+
+
+def test_demultiplex_interleaved_calls():
+    """한 번의 읽기로 콜별 pcapng 분리"""
+    print("=== 콜 분리 테스트 ===")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        capture = Path(temp_dir) / "temp_capture.pcapng"
+        _build_capture(capture)
+        sessions = CallDemultiplexer(Path(temp_dir) / "calls").run(capture)
+
+        for call_id, info in sessions.items():
+            print(f"  {call_id}: {info['from']} -> {info['to']}, 패킷={info['packet_count']}")
+
+        # REGISTER는 미디어가 없으므로 파일을 만들지 않음
+        assert sessions['reg-1']['pcapng_path'] is None
+        assert sessions['call-a@trunk']['packet_count'] == 3 + 100
+        assert sessions['call-b@trunk']['packet_count'] == 2 + 30
+        assert sessions['call-c@trunk']['packet_count'] == 2 + 20
+        assert sessions['call-a@trunk']['from'] == '01011112222'
+        assert sessions['call-c@trunk']['endpoints'] == {'112.222.225.77:30004', '192.168.0.55:4000'}
+
+        with PcapReader(sessions['call-c@trunk']['pcapng_path']) as reader:
+            ssrcs = {rtp.ssrc for _, rtp in reader.rtp_packets()}
+        assert ssrcs == {0xC1}
+
+
+def test_demultiplex_open_file_limit():
+    """열린 파일 수 제한이 있어도 모든 패킷을 기록"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        capture = Path(temp_dir) / "temp_capture.pcapng"
+        _build_capture(capture)
+        sessions = CallDemultiplexer(Path(temp_dir) / "calls", max_open_files=1).run(capture)
+        for call_id in ('call-a@trunk', 'call-b@trunk', 'call-c@trunk'):
+            with PcapReader(sessions[call_id]['pcapng_path']) as reader:
+                assert sum(1 for _ in reader) == sessions[call_id]['packet_count']
+
+
+def test_demultiplex_hash_only():
+    """hash_only 콜은 파일 없이 추출 파일과 같은 패킷 수·해시만 계산"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        capture = Path(temp_dir) / "temp_capture.pcapng"
+        _build_capture(capture)
+        full = CallDemultiplexer(Path(temp_dir) / "calls").run(capture)
+        assert capture_digest(full['call-a@trunk']['pcapng_path']) == (103, full['call-a@trunk']['digest'])
+
+        hashed = CallDemultiplexer(Path(temp_dir) / "hashed", hash_only={'call-a@trunk'}).run(capture)
+        assert hashed['call-a@trunk']['pcapng_path'] is None
+        assert (hashed['call-a@trunk']['packet_count'], hashed['call-a@trunk']['digest']) == (103, full['call-a@trunk']['digest'])
+        assert not (Path(temp_dir) / "hashed" / "call-a_trunk.pcapng").exists()
+        assert hashed['call-b@trunk']['digest'] == full['call-b@trunk']['digest'] != full['call-a@trunk']['digest']
+
+
+def test_demultiplex_recorded_call():
+    """실제 녹음 캡처는 전체가 한 콜로 분리되어야 함"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sessions = CallDemultiplexer(temp_dir).run(SAMPLE_PCAPNG)
+        info = sessions['7555ec874880d6314f7974d931503d6771c92dea@112.222.225.77']
+        assert info['packet_count'] == 611
+        assert len(info['endpoints']) >= 2
+
+
+if __name__ == "__main__":
+    test_parse_sip_fields()
+    test_demultiplex_interleaved_calls()
+    test_demultiplex_open_file_limit()
+    test_demultiplex_hash_only()
+    test_demultiplex_recorded_call()
+    print("\n테스트 완료")
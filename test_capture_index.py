@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+증분 캡처 인덱스 테스트
+"""
+
+import tempfile
+from pathlib import Path
+
+from call_demultiplexer import CallDemultiplexer
+from capture_index import CaptureIndex
+from pcap_io import PcapReader
+from test_call_demultiplexer import _build_capture
+
+
+def test_incremental_index_matches_full_demux():
+    """파일이 자라는 동안 나눠서 인덱싱해도 전체 분리 결과와 같아야 함"""
+    print("=== 증분 인덱싱 테스트 ===")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        full_capture = temp_dir / "full.pcapng"
+        _build_capture(full_capture)
+        data = full_capture.read_bytes()
+        expected = CallDemultiplexer(temp_dir / "demux").run(full_capture)
+
+        # dumpcap이 쓰는 중인 파일: 블록 중간에서 잘린 상태로 여러 번 인덱싱
+        capture = temp_dir / "temp_capture.pcapng"
+        db_path = temp_dir / "capture_index.db"
+        index = CaptureIndex(db_path)
+        indexed = 0
+        for cut in (len(data) // 3 + 7, len(data) // 2 + 3):
+            capture.write_bytes(data[:cut])
+            indexed += index.update(capture)
+        index.close()
+
+        # 재시작 후 이어서 인덱싱
+        capture.write_bytes(data)
+        index = CaptureIndex(db_path)
+        indexed += index.update(capture)
+        assert index.update(capture) == 0
+        print(f"  인덱싱된 패킷: {indexed}")
+
+        for call_id in ('call-a@trunk', 'call-b@trunk', 'call-c@trunk'):
+            call = index.extract_call(capture, call_id, temp_dir / f"{call_id}.pcapng")
+            assert call['packet_count'] == expected[call_id]['packet_count']
+            assert call['endpoints'] == expected[call_id]['endpoints']
+            assert call['from'] == expected[call_id]['from']
+            with PcapReader(call['pcapng_path']) as extracted, PcapReader(expected[call_id]['pcapng_path']) as demuxed:
+                assert [bytes(p.data) for p in extracted] == [bytes(p.data) for p in demuxed]
+            print(f"  [OK] {call_id}: {call['packet_count']}개 패킷")
+
+        # RTP 흐름별 오프셋과 시간 표
+        offsets = index.flow_offsets(capture, '192.168.0.56', 4002, '112.222.225.77', 30002)
+        assert len(offsets) == 30
+        assert index.offset_at(capture, -1.0) == 0
+        assert index.offset_at(capture, 0.0) == index.call_offsets(capture, 'reg-1')[0]
+        assert 0 < index.offset_at(capture, 100.0) < len(data)
+        index.close()
+
+
+def test_recreated_capture_resets_index():
+    """dumpcap 재시작으로 파일이 새로 생기면 이전 인덱스를 버림"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        capture = temp_dir / "temp_capture.pcapng"
+        _build_capture(capture)
+        index = CaptureIndex(temp_dir / "capture_index.db")
+        index.update(capture)
+        assert index.get_call(capture, 'call-a@trunk') is not None
+
+        # 같은 경로에 다른 내용으로 다시 생성 (inode는 재사용될 수 있음)
+        capture.unlink()
+        _build_capture(capture)
+        data = bytearray(capture.read_bytes())
+        data[-5] ^= 0xFF
+        capture.write_bytes(bytes(data))
+        count = index.update(capture)
+        assert count > 0
+        assert len(index.call_offsets(capture, 'call-b@trunk')) == 32
+        index.close()
+
+
+if __name__ == "__main__":
+    test_incremental_index_matches_full_demux()
+    test_recreated_capture_resets_index()
+    print("\n테스트 완료")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+링 버퍼 세그먼트 카탈로그 테스트
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from capture_segments import CaptureSegmentCatalog, ring_buffer_args
+from pcap_io import PcapReader, PcapngWriter
+from test_call_demultiplexer import _build_capture
+
+
+def _write_segments(source, capture_dir, boundaries):
+    """캡처를 시간 경계로 나눠 dumpcap 링 버퍼 이름의 세그먼트 파일로 저장"""
+    with PcapReader(source) as reader:
+        packets = [(p.timestamp, p.linktype, bytes(p.data)) for p in reader]
+    paths = []
+    edges = [float('-inf')] + boundaries + [float('inf')]
+    for number in range(len(edges) - 1):
+        path = Path(capture_dir) / f"temp_capture_{number + 1:05d}_2026101710{number:02d}00.pcapng"
+        with PcapngWriter(path) as writer:
+            for packet in packets:
+                if edges[number] <= packet[0] < edges[number + 1]:
+                    writer.write(*packet)
+        paths.append(str(path))
+    return paths
+
+
+def test_ring_buffer_args():
+    assert ring_buffer_args(102400, 600) == ["-b", "filesize:102400", "-b", "duration:600"]
+    assert ring_buffer_args(0, 300) == ["-b", "duration:300"]
+
+
+def test_segment_catalog_extract_and_retention():
+    """세그먼트에 걸친 콜 추출과 변환 완료 후 세그먼트 삭제"""
+    print("=== 세그먼트 카탈로그 테스트 ===")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir) / "source.pcapng"
+        _build_capture(source)
+        capture_dir = Path(temp_dir) / "temp_captures"
+        capture_dir.mkdir()
+        seg1, seg2, seg3 = _write_segments(source, capture_dir, [2.5, 5.0])
+
+        catalog = CaptureSegmentCatalog(capture_dir / "temp_capture.pcapng")
+        assert catalog.segments() == [seg1, seg2, seg3]
+        catalog.refresh()
+        assert catalog.index.is_sealed(seg1) and catalog.index.is_sealed(seg2)
+        assert not catalog.index.is_sealed(seg3)
+
+        info = catalog.index.capture_info(seg2)
+        assert info['first_ts'] >= 2.5 and info['last_ts'] < 5.0
+        assert set(info['call_ids']) == {'call-a@trunk', 'call-b@trunk'}
+
+        # 콜 A는 세그먼트 1, 2에 걸쳐 있고 세그먼트 2에는 SDP가 없음
+        call = catalog.extract_call('call-a@trunk', Path(temp_dir) / "call-a.pcapng")
+        print(f"  call-a: {call['packet_count']}개 패킷, 세그먼트 {len(call['segments'])}개")
+        assert call['segments'] == [seg1, seg2]
+        assert call['packet_count'] == 3 + 100
+        assert call['endpoints'] == {'112.222.225.77:30000', '192.168.0.55:4000'}
+        assert catalog.extract_call('call-c@trunk', Path(temp_dir) / "call-c.pcapng")['segments'] == [seg3]
+
+        # 변환 전에는 세그먼트 보존
+        catalog.refresh()
+        assert os.path.exists(seg1) and os.path.exists(seg2)
+
+        catalog.mark_converted('call-a@trunk')
+        catalog.refresh()
+        assert os.path.exists(seg1)  # 콜 B가 아직 남아 있음
+
+        catalog.mark_converted('call-b@trunk')
+        catalog.refresh()
+        assert catalog.segments() == [seg3]
+        assert catalog.index.capture_info(seg1) is None
+        print("  [OK] 변환이 끝난 세그먼트 삭제")
+        catalog.index.close()
+
+
+def test_segment_catalog_max_files():
+    """미변환 콜이 있어도 세그먼트 수 한도를 넘으면 오래된 것부터 삭제"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir) / "source.pcapng"
+        _build_capture(source)
+        seg1, seg2, seg3 = _write_segments(source, temp_dir, [2.5, 5.0])
+        catalog = CaptureSegmentCatalog(Path(temp_dir) / "temp_capture.pcapng", max_files=2)
+        catalog.refresh()
+        assert catalog.segments() == [seg2, seg3]
+        catalog.index.close()
+
+
+if __name__ == "__main__":
+    test_ring_buffer_args()
+    test_segment_catalog_extract_and_retention()
+    test_segment_catalog_max_files()
+    print("\n테스트 완료")
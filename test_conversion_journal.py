@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+변환 작업 저널 테스트 - 작업 상태 기록, 단계별 완료/건너뛰기, 재시작 시 미완료 작업 재개
+"""
+
+import os
+import tempfile
+import wave
+from datetime import datetime
+from pathlib import Path
+
+from call_demultiplexer import CallDemultiplexer
+from conversion_journal import ConversionJournal
+from conversion_queue import ConversionScheduler
+from recording_catalog import RecordingCatalog
+from sip_rtp_session_grouper import SipRtpSessionGrouper
+from test_call_demultiplexer import _build_capture
+
+
+def test_job_states_survive_reopen():
+    print("=== 변환 작업 저널 테스트 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp, 'journal.db')
+        journal = ConversionJournal(db_path, max_attempts=2)
+        journal.add_job('done@pbx', {'call_id': 'done@pbx', 'start_time': datetime(2025, 1, 2, 3, 4, 5)})
+        journal.add_job('crashed@pbx', {'call_id': 'crashed@pbx', 'endpoints': {'10.0.0.1:4000'}}, 'cap.pcapng')
+        journal.add_job('failed@pbx', {'call_id': 'failed@pbx'})
+        journal.start_job('done@pbx')
+        journal.finish_job('done@pbx')
+        journal.start_job('crashed@pbx')
+        journal.start_job('failed@pbx')
+        journal.finish_job('failed@pbx', error='변환 실패')
+        journal.close()
+
+        # 재시작: 실행 중이던 작업과 시도 횟수가 남은 실패 작업만 재개 대상
+        journal = ConversionJournal(db_path, max_attempts=2)
+        pending = {job['call_id']: job for job in journal.unfinished()}
+        assert set(pending) == {'crashed@pbx', 'failed@pbx'}
+        assert pending['crashed@pbx']['capture_path'] == 'cap.pcapng'
+        assert pending['crashed@pbx']['info']['endpoints'] == ['10.0.0.1:4000']
+        assert journal.job('done@pbx')['info']['start_time'] == '2025-01-02T03:04:05'
+        journal.start_job('failed@pbx')
+        journal.finish_job('failed@pbx', error='변환 실패')
+        assert [job['call_id'] for job in journal.unfinished()] == ['crashed@pbx']
+        assert journal.prune(max_age_days=0) == 1 and journal.job('done@pbx') is None
+        journal.close()
+    print("  [OK] 작업 상태 재시작 후 유지, 최대 시도 횟수 제한")
+
+
+def test_stage_results():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = ConversionJournal(Path(tmp, 'journal.db'))
+        wav_path = Path(tmp, 'IN.wav')
+        journal.mark_stage('call@pbx', 'in', {'path': str(wav_path)})
+        # 결과 파일이 없으면 다시 처리해야 함
+        assert journal.stage_result('call@pbx', 'in') == {'path': str(wav_path)}
+        assert journal.completed_file('call@pbx', 'in') is None
+        wav_path.write_bytes(b'RIFF')
+        assert journal.completed_file('call@pbx', 'in') == wav_path
+        assert journal.completed_file('call@pbx', 'out') is None
+        try:
+            journal.mark_stage('call@pbx', 'upload', {})
+            assert False, "알 수 없는 단계는 거절해야 함"
+        except ValueError:
+            pass
+        journal.close()
+    print("  [OK] 단계 완료 기록과 결과 파일 확인")
+
+
+def test_grouper_resumes_unfinished_jobs():
+    with tempfile.TemporaryDirectory() as tmp:
+        merge_path = Path(tmp, 'MERGE.wav')
+        merge_path.write_bytes(b'RIFF')
+        journal = ConversionJournal(Path(tmp, 'journal.db'))
+        journal.add_job('a@pbx', {'call_id': 'a@pbx'}, 'temp_captures/temp_capture.pcapng')
+        journal.start_job('a@pbx')
+        journal.add_job('b@pbx', {'call_id': 'b@pbx'})
+        journal.mark_stage('b@pbx', 'merge', {'path': str(merge_path)})
+
+        grouper = SipRtpSessionGrouper()
+        grouper.conversion_journal = journal
+        grouper.recording_catalog = RecordingCatalog(Path(tmp, 'catalog.db'))
+        grouper.conversion_queue = ConversionScheduler(workers=1)
+        grouper._get_recording_paths = lambda *args: {kind: Path(tmp, f'{kind}.wav') for kind in ('IN', 'OUT', 'MERGE')}
+        converted = []
+
+        def fake_conversion(call_info):
+            converted.append((call_info['call_id'], call_info['capture_path']))
+            # 완료된 단계(MERGE)는 다시 만들지 않음
+            return grouper._extract_rtp_to_wav(Path(tmp, 'missing.pcapng'), '1001', '1002', call_info['call_id'])
+
+        grouper.delayed_wav_conversion = fake_conversion
+        assert grouper.resume_pending_conversions() == 2
+        assert grouper.resume_pending_conversions() == 0
+        assert grouper.conversion_queue.join(timeout=10)
+        grouper.conversion_queue.shutdown()
+
+        assert sorted(converted) == [('a@pbx', 'temp_captures/temp_capture.pcapng'), ('b@pbx', None)]
+        assert journal.job('a@pbx')['state'] == 'failed' and journal.job('a@pbx')['attempts'] == 2
+        assert journal.job('b@pbx')['state'] == 'done'
+        grouper.recording_catalog.close()
+        journal.close()
+    print("  [OK] 재시작 시 미완료 작업 재개, 완료된 단계 건너뜀")
+
+
+def test_processed_call_ledger():
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = Path(tmp, 'temp_capture.pcapng')
+        _build_capture(capture)
+        calls = CallDemultiplexer(Path(tmp, 'first')).run(capture)
+        journal = ConversionJournal(Path(tmp, 'journal.db'))
+        journal.mark_processed('call-a@trunk', calls['call-a@trunk']['packet_count'], calls['call-a@trunk']['digest'])
+        # 콜 B는 변환 당시 10개 패킷 - 이후 새 패킷이 들어옴
+        journal.mark_processed('call-b@trunk', 10, 'old')
+        journal.mark_stage('call-b@trunk', 'merge', {'path': str(capture)})
+        # 콜 C는 실시간 녹음으로 완료 - 패킷 수/해시가 없어도 다시 분리하지 않음
+        journal.mark_recorded_live('call-c@trunk')
+        ledger = journal.processed_calls()
+
+        grouper = SipRtpSessionGrouper()
+        grouper.conversion_journal = journal
+        grouper.temp_dir = Path(tmp, 'calls')
+        sessions = CallDemultiplexer(grouper.temp_dir, hash_only=ledger).run(capture)
+        fresh = grouper._skip_processed_sessions(str(capture), sessions, ledger)
+
+        assert set(fresh) == {'reg-1', 'call-b@trunk'}
+        assert Path(fresh['call-b@trunk']['pcapng_path']).exists() and fresh['call-b@trunk']['packet_count'] == 32
+        assert not Path(tmp, 'calls', 'call-a_trunk.pcapng').exists()
+        assert not Path(tmp, 'calls', 'call-c_trunk.pcapng').exists()
+        assert journal.stages('call-b@trunk') == {}
+        journal.close()
+    print("  [OK] 처리 원장: 변환된 콜(실시간 녹음 포함)은 파일 쓰기 없이 건너뛰고 패킷이 늘어난 콜만 다시 분리")
+
+
+def test_failed_conversion_is_not_done():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = ConversionJournal(Path(tmp, 'journal.db'), max_attempts=3)
+        journal.add_job('c@pbx', {'call_id': 'c@pbx'})
+        grouper = SipRtpSessionGrouper()
+        grouper.conversion_journal = journal
+        calls = []
+        # 인덱스에서 찾았지만 변환 실패 - 전체 분리로 넘어가지 않고 실패로 기록되어 재시도 대상
+        grouper.process_indexed_call = lambda *args: calls.append(args[1]) or False
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            grouper._run_conversion_job({'call_id': 'c@pbx'})
+        finally:
+            os.chdir(cwd)
+        assert calls == ['c@pbx']
+        job = journal.job('c@pbx')
+        assert (job['state'], job['attempts']) == ('failed', 1)
+        assert [row['call_id'] for row in journal.unfinished()] == ['c@pbx']
+
+        # 전체 분리 결과: 다른 콜만 변환됐으면 실패, 처리 원장에 있으면(이전 변환) 성공
+        assert not grouper._call_converted('c@pbx', [{'call_id': 'd@pbx', 'wav_converted': True},
+                                                     {'call_id': 'c@pbx', 'wav_converted': False}])
+        journal.mark_processed('c@pbx', 10, 'digest')
+        assert grouper._call_converted('c@pbx', [])
+        journal.close()
+    print("  [OK] 변환 실패는 완료로 기록하지 않음 (저널 재시도)")
+
+
+def test_stages_after_merge_resume():
+    with tempfile.TemporaryDirectory() as tmp:
+        merge_path = Path(tmp, 'MERGE.wav')
+        with wave.open(str(merge_path), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(b'\0\0' * 8000)
+        journal = ConversionJournal(Path(tmp, 'journal.db'))
+        # MERGE까지 기록하고 카탈로그 기록 전에 종료된 콜
+        journal.mark_stage('m@pbx', 'merge', {'path': str(merge_path), 'from_number': '01011112222', 'to_number': '1427'})
+        grouper = SipRtpSessionGrouper()
+        grouper.conversion_journal = journal
+        grouper.recording_catalog = RecordingCatalog(Path(tmp, 'catalog.db'))
+        grouper._get_recording_paths = lambda *args: {kind: Path(tmp, f'{kind}.wav') for kind in ('IN', 'OUT', 'MERGE')}
+
+        # 재시작: MERGE는 다시 만들지 않고 남은 db_insert 단계만 실행
+        assert grouper._extract_rtp_to_wav(Path(tmp, 'missing.pcapng'), '01011112222', '1427', 'm@pbx')
+        assert [row['extension'] for row in grouper.recording_catalog.by_call_id('m@pbx')] == ['1427']
+        assert journal.stage_result('m@pbx', 'db_insert') == {'path': str(merge_path)}
+        # 완료된 단계는 다시 실행하지 않음
+        grouper.recording_catalog.remove(merge_path)
+        assert grouper._extract_rtp_to_wav(Path(tmp, 'missing.pcapng'), '01011112222', '1427', 'm@pbx')
+        assert grouper.recording_catalog.by_call_id('m@pbx') == []
+        grouper.recording_catalog.close()
+        journal.close()
+    print("  [OK] MERGE 이후 중단된 콜은 남은 단계(카탈로그 기록)만 재실행")
+
+
+if __name__ == "__main__":
+    test_job_states_survive_reopen()
+    test_stage_results()
+    test_grouper_resumes_unfinished_jobs()
+    test_processed_call_ledger()
+    test_failed_conversion_is_not_done()
+    test_stages_after_merge_resume()
+    print("\n테스트 완료")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+변환 작업 큐 테스트 - 동시 실행 수 제한, 짧은 통화 우선, 큐 가득 참 backpressure, 작업 제한 시간, 지표
+"""
+
+import threading
+import time
+
+import conversion_queue
+from conversion_queue import ConversionScheduler
+
+
+def test_worker_limit_and_priority():
+    print("=== 변환 작업 큐 테스트 ===")
+    scheduler = ConversionScheduler(workers=2, max_queue=100)
+    lock = threading.Lock()
+    running, peak, order = [0], [0], []
+    gate = threading.Event()
+
+    def job(name):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        gate.wait(5)
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+            order.append(name)
+
+    # 두 워커가 막혀 있는 동안 30개 콜 종료 (길이 30..1초)
+    scheduler.submit('blocker-a', job, 'blocker-a', priority=0)
+    scheduler.submit('blocker-b', job, 'blocker-b', priority=0)
+    time.sleep(0.1)
+    for duration in range(30, 0, -1):
+        assert scheduler.submit(f"call-{duration}", job, duration, priority=duration)
+    gate.set()
+    assert scheduler.join(10)
+    assert peak[0] == 2
+    calls = [name for name in order if isinstance(name, int)]
+    # 워커 두 개가 번갈아 가져가므로 인접 순서만 바뀔 수 있음
+    assert all(abs(position + 1 - duration) <= 1 for position, duration in enumerate(calls))
+    metrics = scheduler.metrics()
+    assert metrics['completed'] == 32 and metrics['depth'] == 0 and metrics['max_depth'] == 30
+    assert metrics['wait_max'] >= metrics['wait_avg'] > 0 and metrics['run_avg'] > 0
+    scheduler.shutdown()
+    print(f"  [OK] 동시 실행 2개 제한, 짧은 통화 우선 (평균 대기 {metrics['wait_avg'] * 1000:.0f}ms)")
+
+
+def test_backpressure_and_coalesce():
+    scheduler = ConversionScheduler(workers=1, max_queue=2)
+    gate = threading.Event()
+    scheduler.submit('running', gate.wait, 5)
+    time.sleep(0.1)
+    assert scheduler.submit('a', lambda: None)
+    assert scheduler.submit('a', lambda: None)  # 같은 이름은 한 번만 대기
+    assert scheduler.submit('b', lambda: None)
+    started = time.monotonic()
+    assert not scheduler.submit('c', lambda: None, wait=0.2)
+    assert 0.15 < time.monotonic() - started < 1.0
+    # 자리가 나면 대기하던 등록이 진행됨
+    threading.Timer(0.2, gate.set).start()
+    assert scheduler.submit('d', lambda: None, wait=5)
+    assert scheduler.join(5)
+    metrics = scheduler.metrics()
+    assert metrics['rejected'] == 1 and metrics['coalesced'] == 1 and metrics['completed'] == 4
+    scheduler.shutdown()
+    print("  [OK] 큐 가득 참 시 대기 후 거절, 같은 콜 중복 등록 무시")
+
+
+def test_delay_timeout_and_failure():
+    scheduler = ConversionScheduler(workers=1, max_queue=10, timeout=0.2)
+    seen = {}
+
+    def slow_steps():
+        seen['remaining'] = conversion_queue.remaining(60)
+        for _ in range(50):
+            time.sleep(0.02)
+            conversion_queue.check_deadline()
+
+    def broken():
+        raise RuntimeError("변환 실패")
+
+    submitted = time.monotonic()
+    scheduler.submit('delayed', lambda: seen.setdefault('delayed', time.monotonic() - submitted), delay=0.3)
+    scheduler.submit('slow', slow_steps)
+    scheduler.submit('broken', broken)
+    assert scheduler.join(5)
+    metrics = scheduler.metrics()
+    assert metrics['timed_out'] == 1 and metrics['failed'] == 1 and metrics['completed'] == 1
+    assert seen['delayed'] >= 0.3 and seen['remaining'] <= 0.2
+    assert metrics['run_max'] < 0.5
+    # 작업 밖에서는 제한 없음
+    assert conversion_queue.remaining(60) == 60
+    scheduler.shutdown()
+    print("  [OK] 지연 실행, 작업 제한 시간 초과 중단, 실패 집계")
+
+
+if __name__ == "__main__":
+    test_worker_limit_and_priority()
+    test_backpressure_and_coalesce()
+    test_delay_timeout_and_failure()
+    print("\n테스트 완료")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+내선 디렉터리 캐시 테스트 - 일괄 로드, 조회, 로드 실패 시 기존 캐시 유지
+"""
+
+from extension_directory import ExtensionDirectory
+
+
+class _Collection:
+    """find/find_one(filter, projection)만 쓰는 컬렉션 대용"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.find_calls = 0
+
+    def find(self, query, projection):
+        self.find_calls += 1
+        if self.docs is None:
+            raise ConnectionError("MongoDB 응답 없음")
+        return [{key: doc[key] for key in projection if key in doc} for doc in self.docs]
+
+    def find_one(self, query, projection):
+        self.find_calls += 1
+        if self.docs is None:
+            raise ConnectionError("MongoDB 응답 없음")
+        for doc in self.docs:
+            if doc.get('extension_num') == query['extension_num']:
+                return {key: doc[key] for key in projection if projection[key] and key in doc}
+        return None
+
+
+def _db(internal_docs, member_docs):
+    return {'internalnumber': _Collection(internal_docs), 'members': _Collection(member_docs)}
+
+
+def test_bulk_load_and_lookup():
+    print("=== 내선 디렉터리 캐시 테스트 ===")
+    db = _db(
+        [{'internal_number': '1427', 'ip_address': '192.168.0.55'}],
+        [{'extension_num': '1427', 'default_ip': '192.168.0.155', 'per_lv8': 'Y', 'per_lv9': 'N', 'name': '홍길동'},
+         {'extension_num': '1428', 'per_lv8': 'Y'}],
+    )
+    directory = ExtensionDirectory()
+    assert not directory.loaded and directory.member('1427') is None
+    directory._db = db
+    assert directory.reload()
+
+    assert directory.internal_ip('1427') == '192.168.0.55'
+    assert directory.internal_ip(1428) is None
+    assert directory.member('1427') == {'default_ip': '192.168.0.155', 'per_lv8': 'Y', 'per_lv9': 'N'}
+    assert directory.default_ip('1428') is None
+    assert directory.permissions('1428') == ('Y', '')
+    assert directory.permissions('9999') == ('', '')
+
+    # 조회는 MongoDB를 다시 읽지 않음
+    for _ in range(100):
+        directory.member('1427')
+    assert db['members'].find_calls == 1
+
+    directory.update_member('1428', default_ip='192.168.0.156')
+    assert directory.default_ip('1428') == '192.168.0.156'
+    print("  [OK] 일괄 로드 후 메모리 조회")
+
+
+def test_failed_reload_keeps_cache():
+    directory = ExtensionDirectory()
+    directory._db = _db([], [{'extension_num': '1427', 'default_ip': '192.168.0.155'}])
+    directory.reload()
+    directory._db = _db(None, None)
+    assert not directory.reload()
+    assert directory.default_ip('1427') == '192.168.0.155'
+
+
+def test_lookup_member_before_first_load():
+    db = _db([], [{'extension_num': '1427', 'per_lv8': 'Y', 'per_lv9': 'N'}])
+    directory = ExtensionDirectory()
+    # MongoDB 연결 전에는 캐시 값만
+    assert directory.lookup_member('1427') is None
+    directory._db = db
+    # 첫 로드 전 - members를 직접 조회해 녹음 권한이 비지 않음
+    assert not directory.loaded
+    assert directory.lookup_member(1427) == {'default_ip': '', 'per_lv8': 'Y', 'per_lv9': 'N'}
+    assert directory.lookup_member('9999') is None
+    assert db['members'].find_calls == 2
+    # MongoDB 장애 중에는 조회 실패를 기록하고 None
+    db['members'].docs = None
+    assert directory.lookup_member('1427') is None
+    # 로드 후에는 캐시만 조회
+    db['members'].docs = [{'extension_num': '1427', 'per_lv8': 'Y', 'per_lv9': 'N'}]
+    assert directory.reload()
+    calls = db['members'].find_calls
+    assert directory.lookup_member('1427')['per_lv8'] == 'Y' and db['members'].find_calls == calls
+    print("  [OK] 첫 로드 전 권한 조회는 members 직접 조회")
+
+
+if __name__ == "__main__":
+    test_bulk_load_and_lookup()
+    test_failed_reload_keeps_cache()
+    test_lookup_member_before_first_load()
+    print("\n테스트 완료")
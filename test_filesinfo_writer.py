@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+filesinfo 기록기 테스트 - counters 컬렉션 원자적 id 발급, insert_many 일괄 저장, 장애 중 로컬 보관, WAV 헤더 재생 시간
+"""
+
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+import recording_storage
+from filesinfo_writer import FilesInfoWriter, SpillQueue
+
+
+class _Counters:
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def find_one_and_update(self, query, update, upsert=False, return_document=False):
+        with self.lock:
+            doc = self.docs.setdefault(query['_id'], {'_id': query['_id'], 'seq': 0})
+            doc['seq'] += update['$inc']['seq']
+            return dict(doc)
+
+    def update_one(self, query, update, upsert=False):
+        with self.lock:
+            doc = self.docs.setdefault(query['_id'], {'_id': query['_id'], 'seq': 0})
+            doc['seq'] = max(doc['seq'], update['$max']['seq'])
+
+
+class _FilesInfo:
+    def __init__(self, existing_max_id=0):
+        self.batches = []
+        self.docs = []
+        self.existing_max_id = existing_max_id
+        self.fail = False
+        self.timeout_after_write = False
+
+    def find_one(self, query, projection, sort=None):
+        return {'id': self.existing_max_id} if self.existing_max_id else None
+
+    def insert_many(self, docs, ordered=True):
+        if self.fail:
+            raise ConnectionError("MongoDB 응답 없음")
+        self.batches.append([doc['id'] for doc in docs])
+        self.docs.extend(docs)
+        if self.timeout_after_write:
+            # 서버에는 저장됐지만 응답을 받지 못한 경우
+            self.timeout_after_write = False
+            raise TimeoutError("응답 시간 초과")
+
+    def find(self, query, projection):
+        if self.fail:
+            raise ConnectionError("MongoDB 응답 없음")
+        return [{'call_id': doc['call_id']} for doc in self.docs if doc.get('call_id') in query['call_id']['$in']]
+
+
+def _db(existing_max_id=0):
+    return {'counters': _Counters(), 'filesinfo': _FilesInfo(existing_max_id)}
+
+
+def test_atomic_id_allocation():
+    print("=== filesinfo 기록기 테스트 ===")
+    writer = FilesInfoWriter()
+    writer._db = _db(existing_max_id=41)
+    allocated = []
+
+    def allocate():
+        for _ in range(50):
+            allocated.extend(writer.allocate_ids(2))
+
+    threads = [threading.Thread(target=allocate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 기존 최대 id 다음부터, 스레드 사이 중복 없이 연속 발급
+    assert sorted(allocated) == list(range(42, 442))
+    print("  [OK] counters $inc 원자적 id 발급 (기존 최대 id 이어받음)")
+
+
+def _wait_inserted(writer, count, timeout=5):
+    deadline = time.time() + timeout
+    while writer.inserted < count and time.time() < deadline:
+        time.sleep(0.02)
+
+
+def test_batched_insert_and_retry():
+    db = _db()
+    writer = FilesInfoWriter(batch_size=3, flush_interval=0.2)
+    # 연결 전에 쌓인 문서는 연결하자마자 batch_size씩 저장
+    for index in range(7):
+        writer.put({'call_id': f'call-{index}'})
+    writer.attach(db)
+    _wait_inserted(writer, 7)
+    assert db['filesinfo'].batches == [[1, 2, 3], [4, 5, 6], [7]]
+    # batch_size에 못 미치면 flush_interval 후 저장
+    writer.put({'call_id': 'single'})
+    _wait_inserted(writer, 8)
+    assert db['filesinfo'].batches[-1] == [8]
+
+    db['filesinfo'].fail = True
+    writer.put({'call_id': 'while-down'})
+    time.sleep(0.5)
+    assert writer.pending() == 1 and writer.inserted == 8
+    db['filesinfo'].fail = False
+    writer.flush()
+    # 실패했던 문서는 처음 발급받은 id 그대로 다시 저장
+    assert db['filesinfo'].batches[-1] == [9] and writer.pending() == 0
+
+    # 저장 후 응답 시간 초과 - 재시도 때 이미 저장된 call_id는 다시 넣지 않음
+    db['filesinfo'].timeout_after_write = True
+    writer.put({'call_id': 'timed-out'})
+    writer.put({'call_id': 'after'})
+    writer.close()
+    stored = [doc['call_id'] for doc in db['filesinfo'].docs]
+    assert stored.count('timed-out') == 1 and stored[-1] == 'after' and writer.pending() == 0
+    print("  [OK] insert_many 일괄 저장, 실패 시 중복 없이 재시도")
+
+
+def test_spill_while_offline():
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = Path(tmp, 'spill.db')
+        created = datetime(2025, 3, 1, 9, 0, tzinfo=timezone(timedelta(hours=9)))
+        writer = FilesInfoWriter(batch_size=2, flush_interval=0.05, spill_path=spill_path)
+        writer.start()
+        for index in range(5):
+            writer.put({'call_id': f'call-{index}', 'created_at': created})
+        writer.put({'call_id': 'call-0', 'created_at': created})
+        time.sleep(0.3)
+        # 연결 전: 메모리 큐는 비우고 로컬 보관 (같은 call_id는 한 번만)
+        metrics = writer.metrics()
+        assert metrics['pending'] == 0 and metrics['spill_depth'] == 5 and metrics['spill_age'] > 0
+        writer.close()
+
+        # 재시작 후 연결 - 보관 문서를 순서대로, 이미 저장된 call_id는 건너뛰고 저장
+        db = _db()
+        db['filesinfo'].docs.append({'id': 100, 'call_id': 'call-1'})
+        writer = FilesInfoWriter(batch_size=2, flush_interval=0.05, spill_path=spill_path)
+        writer.put({'call_id': 'call-new', 'created_at': created})
+        writer.attach(db)
+        _wait_inserted(writer, 5)
+        writer.close()
+        stored = [doc['call_id'] for doc in db['filesinfo'].docs[1:]]
+        assert stored == ['call-0', 'call-2', 'call-3', 'call-4', 'call-new']
+        assert db['filesinfo'].docs[1]['created_at'] == created
+        assert SpillQueue(spill_path).stats() == (0, 0.0)
+    print("  [OK] MongoDB 장애 중 로컬 보관, 연결 후 순서대로 중복 없이 재저장")
+
+
+def test_duration_from_header():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, 'MERGE.wav')
+        recording_storage.write_g711_from_pcm(path, np.zeros(8000 * 3, dtype=np.int16))
+        assert recording_storage.duration(path) == 3.0
+        assert recording_storage.duration(Path(tmp, 'missing.wav')) == 0.0
+    print("  [OK] WAV 헤더로 재생 시간 계산")
+
+
+if __name__ == "__main__":
+    test_atomic_id_allocation()
+    test_batched_insert_and_retry()
+    test_spill_while_offline()
+    test_duration_from_header()
+    print("\n테스트 완료")
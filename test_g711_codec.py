@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+G.711 코덱 테스트 - audioop과 같은 결과인지 확인하고 디코딩 처리량 비교
+"""
+
+import time
+import warnings
+
+import numpy as np
+
+import g711_codec
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:  # Python 3.13+
+        audioop = None
+
+_ALL_BYTES = bytes(range(256))
+
+
+def test_decode_matches_audioop():
+    print("=== G.711 코덱 테스트 ===")
+    if audioop is None:
+        print("  audioop 없음 - 비교 생략")
+        return
+    assert g711_codec.decode_bytes(_ALL_BYTES, g711_codec.PCMA) == audioop.alaw2lin(_ALL_BYTES, 2)
+    assert g711_codec.decode_bytes(_ALL_BYTES, g711_codec.PCMU) == audioop.ulaw2lin(_ALL_BYTES, 2)
+    for gain in (2.0, 1.5, 0.7):
+        assert g711_codec.decode_bytes(_ALL_BYTES, g711_codec.PCMA, gain) == audioop.mul(audioop.alaw2lin(_ALL_BYTES, 2), 2, gain)
+        assert g711_codec.decode_bytes(_ALL_BYTES, g711_codec.PCMU, gain) == audioop.mul(audioop.ulaw2lin(_ALL_BYTES, 2), 2, gain)
+    print("  [OK] 디코딩·게인 결과 audioop과 동일")
+
+
+def test_encode_and_helpers_match_audioop():
+    if audioop is None:
+        return
+    pcm = np.arange(-32768, 32768, dtype=np.int16).astype('<i2').tobytes()
+    assert g711_codec.encode(pcm, g711_codec.PCMA) == audioop.lin2alaw(pcm, 2)
+    assert g711_codec.encode(pcm, g711_codec.PCMU) == audioop.lin2ulaw(pcm, 2)
+
+    rng = np.random.default_rng(7)
+    first = rng.integers(-32768, 32768, 4000, dtype=np.int16)
+    second = rng.integers(-32768, 32768, 4000, dtype=np.int16)
+    assert g711_codec.mix(first, second).tobytes() == audioop.add(first.tobytes(), second.tobytes(), 2)
+    assert g711_codec.apply_gain(first, 2.0).tobytes() == audioop.mul(first.tobytes(), 2, 2.0)
+
+
+def test_batch_decode_and_unknown_payload():
+    payloads = [bytes([n]) * 160 for n in range(50)]
+    batch = g711_codec.decode_batch(payloads, g711_codec.PCMA, gain=2.0)
+    assert batch.dtype == np.int16 and len(batch) == 50 * 160
+    assert batch[160 * 3] == g711_codec.decode(payloads[3][:1], g711_codec.PCMA, 2.0)[0]
+    try:
+        g711_codec.decode(b'\x00', 18)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("G.729는 지원하지 않아야 함")
+
+
+def benchmark_throughput(seconds_of_audio=600, packets_per_batch=50, repeat=3):
+    """1초(50패킷) 단위 배치로 디코딩+2배 증폭 - 초당 처리한 오디오 시간(배속)"""
+    rng = np.random.default_rng(1)
+    batches = [[rng.integers(0, 256, 160, dtype=np.uint8).tobytes() for _ in range(packets_per_batch)]
+               for _ in range(seconds_of_audio * 50 // packets_per_batch)]
+    results = {}
+
+    def run(decode_batch):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for batch in batches:
+                decode_batch(batch)
+            best = min(best, time.perf_counter() - started)
+        return seconds_of_audio / best
+
+    results['numpy'] = run(lambda batch: g711_codec.decode_batch(batch, g711_codec.PCMA, 2.0).tobytes())
+    if audioop is not None:
+        results['audioop'] = run(lambda batch: audioop.mul(audioop.alaw2lin(b''.join(batch), 2), 2, 2.0))
+    for name, speed in results.items():
+        print(f"  {name}: 실시간 대비 {speed:,.0f}배")
+    return results
+
+
+def test_throughput_not_slower_than_audioop():
+    results = benchmark_throughput(seconds_of_audio=120)
+    if 'audioop' in results:
+        # 측정 편차를 고려해 여유를 둠
+        assert results['numpy'] >= results['audioop'] * 0.8
+
+
+if __name__ == "__main__":
+    test_decode_matches_audioop()
+    test_encode_and_helpers_match_audioop()
+    test_batch_decode_and_unknown_payload()
+    print("\n=== 디코딩 처리량 벤치마크 ===")
+    benchmark_throughput()
+    print("\n테스트 완료")
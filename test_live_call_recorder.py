@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+실시간 녹음기 테스트 - RTP 페이로드를 받는 즉시 IN/OUT/MERGE WAV 기록, BYE 후 1초 안에 완료
+"""
+
+import audioop
+import os
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from conversion_journal import LIVE_RECORDED, ConversionJournal
+from live_call_recorder import LiveCallRecorder
+from recording_catalog import RecordingCatalog
+from sip_rtp_session_grouper import SipRtpSessionGrouper
+
+# 20ms A-law 페이로드 (160 샘플)
+_ALAW_TONE = audioop.lin2alaw(b''.join(int(8000 * ((i % 16) - 8) / 8).to_bytes(2, 'little', signed=True)
+                                       for i in range(160)), 2)
+
+
+def _final_paths(root):
+    return {name: Path(root) / 'final' / f"{name}.wav" for name in ('IN', 'OUT', 'MERGE')}
+
+
+def _frames(path):
+    with wave.open(str(path), 'rb') as wav_file:
+        return wav_file.getframerate(), wav_file.getnframes()
+
+
+def test_live_recording_in_out_merge():
+    print("=== 실시간 녹음기 테스트 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = LiveCallRecorder(tmp)
+        assert recorder.start_call('call-a@192.168.0.1')
+        for sequence in range(50):
+            assert recorder.feed('call-a@192.168.0.1', 'IN', 8, sequence, _ALAW_TONE)
+            assert recorder.feed('call-a@192.168.0.1', 'OUT', 8, 1000 + sequence, _ALAW_TONE)
+        # 중복 캡처, DTMF(101), 녹음하지 않는 콜은 무시
+        assert not recorder.feed('call-a@192.168.0.1', 'OUT', 8, 1049, _ALAW_TONE)
+        assert not recorder.feed('call-a@192.168.0.1', 'IN', 101, 50, b'\x00' * 4)
+        assert not recorder.feed('call-b', 'IN', 8, 0, _ALAW_TONE)
+
+        finished = recorder.finish_call('call-a@192.168.0.1', _final_paths(tmp))
+        assert set(finished) == {'IN', 'OUT', 'MERGE'}
+        for path in finished.values():
+            rate, frames = _frames(path)
+            # 8kHz 1초 → 16kHz (ratecv 필터 지연으로 몇 샘플 차이 가능)
+            assert rate == 16000 and abs(frames - 16000) <= 2
+        assert not any(Path(tmp, '.live').iterdir())
+        assert 'call-a@192.168.0.1' not in recorder
+    print("  [OK] IN/OUT/MERGE 기록")
+
+
+def test_one_way_audio_and_no_rtp():
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = LiveCallRecorder(tmp, sample_rate=8000)
+        recorder.start_call('call-a')
+        for sequence in range(100):
+            recorder.feed('call-a', 'IN', 0, sequence, _ALAW_TONE)
+        finished = recorder.finish_call('call-a', _final_paths(tmp))
+        # 한쪽만 들려도 MERGE는 전체 길이, OUT 파일은 만들지 않음
+        assert set(finished) == {'IN', 'MERGE'}
+        assert _frames(finished['MERGE']) == (8000, 16000)
+
+        recorder.start_call('call-b')
+        assert recorder.finish_call('call-b', _final_paths(tmp)) is None
+        assert not any(Path(tmp, '.live').iterdir())
+
+
+def test_finish_within_one_second():
+    """10분 통화도 BYE 후 파일 완료는 rename 수준"""
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = LiveCallRecorder(tmp)
+        recorder.start_call('call-a')
+        for sequence in range(10 * 60 * 50):
+            recorder.feed('call-a', 'IN', 8, sequence & 0xFFFF, _ALAW_TONE)
+            recorder.feed('call-a', 'OUT', 8, sequence & 0xFFFF, _ALAW_TONE)
+        started = time.perf_counter()
+        finished = recorder.finish_call('call-a', _final_paths(tmp))
+        elapsed = time.perf_counter() - started
+        print(f"  10분 통화 완료 처리: {elapsed * 1000:.1f}ms")
+        assert elapsed < 1.0
+        assert os.path.getsize(finished['MERGE']) > 10 * 60 * 16000 * 2
+
+
+class _CaptureCatalog:
+    def __init__(self):
+        self.converted = []
+
+    def mark_converted(self, call_id):
+        self.converted.append(call_id)
+
+
+def test_finished_call_leaves_capture_retention():
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = LiveCallRecorder(tmp, sample_rate=8000)
+        grouper = SipRtpSessionGrouper()
+        grouper.storage_format = 'pcm'
+        grouper.capture_catalog = _CaptureCatalog()
+        grouper.recording_catalog = RecordingCatalog(Path(tmp, 'catalog.db'))
+        grouper.conversion_journal = ConversionJournal(Path(tmp, 'journal.db'))
+        grouper._get_recording_paths = lambda *args: _final_paths(tmp)
+        for call_id in ('call-a', 'call-b'):
+            grouper.recordings[call_id] = {'from_number': '1427', 'to_number': '01011112222'}
+            recorder.start_call(call_id)
+        for sequence in range(50):
+            recorder.feed('call-a', 'IN', 0, sequence, _ALAW_TONE)
+        # 녹음된 콜만 캡처 세그먼트 보존 대상에서 빠지고, RTP가 없던 콜은 캡처 후처리를 위해 남김
+        assert grouper.finish_live_recording('call-a', recorder)
+        assert not grouper.finish_live_recording('call-b', recorder)
+        assert grouper.capture_catalog.converted == ['call-a']
+        # 전체 분리로 넘어가도 완성된 실시간 녹음을 덮어쓰지 않도록 처리 원장에 기록
+        assert grouper.conversion_journal.processed_calls() == {'call-a': (0, LIVE_RECORDED)}
+        grouper.conversion_journal.close()
+        grouper.recording_catalog.close()
+
+
+if __name__ == "__main__":
+    test_live_recording_in_out_merge()
+    test_one_way_audio_and_no_rtp()
+    test_finish_within_one_second()
+    test_finished_call_leaves_capture_retention()
+    print("\n테스트 완료")
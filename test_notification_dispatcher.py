@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+알림 디스패처 테스트 - 다른 스레드에서 서버 루프로 알림 전달, 중복 합침, 세션별 크기 제한 송신 큐, 내선번호 구독, 지연 시간
+"""
+
+import asyncio
+import threading
+import time
+
+from notification_dispatcher import NotificationDispatcher
+
+
+class _Socket:
+    def __init__(self, delay=0.0):
+        self.sent = []
+        self.loops = set()
+        self.delay = delay
+        self.gate = None
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+    async def send(self, payload):
+        self.loops.add(asyncio.get_running_loop())
+        if self.gate is not None:
+            await self.gate.wait()
+        await asyncio.sleep(self.delay)
+        self.sent.append(payload)
+
+
+class _ServerLoop:
+    """WebSocket 서버 스레드 대신 이벤트 루프 하나를 별도 스레드에서 실행"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def call(self, func, *args):
+        async def run():
+            return func(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self.loop).result(5)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+
+def _wait(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_dispatch_from_other_threads():
+    print("=== 알림 디스패처 테스트 ===")
+    server = _ServerLoop()
+    dispatcher = NotificationDispatcher()
+    assert dispatcher.submit('x', None) is None  # 서버 루프 전에는 요청을 받지 않음
+    dispatcher.bind(server.loop)
+    socket = _Socket(delay=0.05)
+    server.call(dispatcher.open, '10.0.0.5', socket)
+    lookup = threading.Event()
+
+    async def notify(message, submitted=None):
+        # 실제 서버처럼 IP 조회 후 송신 큐에 넣음
+        await asyncio.get_running_loop().run_in_executor(None, lookup.wait, 5)
+        dispatcher.enqueue('10.0.0.5', ('invite', message), message, submitted)
+
+    # SIP 처리 스레드 여러 개에서 같은 INVITE 알림(재전송) - 한 번만 전송
+    futures = []
+    threads = [threading.Thread(target=lambda: futures.append(dispatcher.submit(('invite', 'c1'), notify, 'c1')))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len([future for future in futures if future is not None]) == 1
+    lookup.set()
+    _wait(lambda: len(socket.sent) == 1)
+    # 송신 중에도 같은 알림은 합쳐지고, 다른 알림은 순서대로 전송
+    dispatcher.submit(('invite', 'c2'), notify, 'c2').result(5)
+    assert dispatcher.submit(('invite', 'c2'), notify, 'c2') is None
+    dispatcher.submit(('invite', 'c3'), notify, 'c3').result(5)
+    _wait(lambda: len(socket.sent) == 3)
+    assert socket.sent == ['c1', 'c2', 'c3'] and socket.loops == {server.loop}
+
+    metrics = dispatcher.metrics()
+    assert (metrics['submitted'], metrics['coalesced'], metrics['sent']) == (3, 5, 3)
+    assert metrics['latency_max_ms'] >= 50 and metrics['pending'] == 0 and metrics['queued'] == 0
+    server.call(dispatcher.close)
+    server.stop()
+    print("  [OK] 서버 루프 하나에서 전송, 중복 알림 합침, 지연 시간 기록")
+
+
+def test_bounded_client_queue():
+    server = _ServerLoop()
+    dispatcher = NotificationDispatcher(queue_size=3)
+    dispatcher.bind(server.loop)
+    slow, other = _Socket(), _Socket()
+    slow.gate = server.call(asyncio.Event)
+    server.call(dispatcher.open, 'slow', slow)
+    server.call(dispatcher.open, 'other', other)
+
+    # 응답 없는 클라이언트: 보내는 중 1건 + 큐 3건만 유지하고 오래된 알림부터 버림
+    for index in range(6):
+        server.call(dispatcher.enqueue, 'slow', index, f'm{index}')
+    server.call(dispatcher.enqueue, 'other', 'x', 'to-other')
+    _wait(lambda: other.sent == ['to-other'])
+    assert other.sent == ['to-other']
+    assert server.call(dispatcher.enqueue, 'gone', 'y', 'nobody') == 0
+    server.loop.call_soon_threadsafe(slow.gate.set)
+    _wait(lambda: len(slow.sent) == 4)
+    assert slow.sent == ['m0', 'm3', 'm4', 'm5']
+    metrics = dispatcher.metrics()
+    assert (metrics['dropped'], metrics['undeliverable'], metrics['sent']) == (2, 1, 5)
+
+    # 다른 스레드에서 종료해도 서버 루프에서 정리
+    dispatcher.close()
+    _wait(lambda: not dispatcher._outboxes)
+    assert not dispatcher._outboxes and dispatcher.submit('z', None) is None
+    server.stop()
+    print("  [OK] 클라이언트별 크기 제한 송신 큐 (느린 클라이언트가 다른 클라이언트를 막지 않음)")
+
+
+def test_extension_subscriptions():
+    server = _ServerLoop()
+    dispatcher = NotificationDispatcher(queue_size=2, overflow_policy='disconnect')
+    dispatcher.bind(server.loop)
+    # NAT 뒤 소프트폰 두 대(같은 주소)와 다른 PC에서 같은 내선을 띄운 세션
+    phone_a, phone_b, desk, stalled = _Socket(), _Socket(), _Socket(), _Socket()
+    stalled.gate = server.call(asyncio.Event)
+    for address, socket in (('203.0.113.7', phone_a), ('203.0.113.7', phone_b), ('10.0.0.9', desk), ('10.0.0.10', stalled)):
+        server.call(dispatcher.open, address, socket)
+    for socket, extension in ((phone_a, '1427'), (phone_b, '1428'), (desk, '1427'), (stalled, '1427')):
+        assert server.call(dispatcher.subscribe, socket, extension)
+    assert dispatcher.sessions() == 4 and dispatcher.sessions('1427') == 3
+
+    # 응답 없는 세션은 큐가 넘치면 끊기고, 다른 세션의 벨울림은 지연되지 않음
+    for index in range(4):
+        assert server.call(dispatcher.publish, '1427', ('invite', index), f'ring{index}') >= 2
+    _wait(lambda: len(desk.sent) == 4)
+    assert phone_a.sent == desk.sent == ['ring0', 'ring1', 'ring2', 'ring3'] and phone_b.sent == []
+    assert stalled.closed and dispatcher.sessions('1427') == 2
+    assert server.call(dispatcher.publish, '1428', 'bye', 'bye') == 1
+    assert server.call(dispatcher.enqueue, '203.0.113.7', 'all', 'nat') == 2
+    _wait(lambda: len(phone_b.sent) == 2)
+    assert phone_b.sent == ['bye', 'nat']
+
+    # 세션 하나가 끊겨도 같은 주소의 다른 세션은 유지
+    server.call(dispatcher.close_client, '203.0.113.7', phone_a)
+    assert dispatcher.sessions('1427') == 1 and dispatcher.sessions('1428') == 1
+    assert dispatcher.metrics()['disconnected'] == 1
+    server.call(dispatcher.close)
+    assert dispatcher.sessions() == 0 and dispatcher.sessions('1428') == 0
+    server.stop()
+    print("  [OK] 내선번호 구독 - 한 내선/한 주소에 여러 세션, 응답 없는 세션만 연결 종료")
+
+
+if __name__ == "__main__":
+    test_dispatch_from_other_threads()
+    test_bounded_client_queue()
+    test_extension_subscriptions()
+    print("\n테스트 완료")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+실시간 원시 패킷 캡처(dumpcap 파이프) 디코딩 테스트
+"""
+
+import io
+import struct
+
+from packet_capture import decode_packets, read_pcap_stream
+from pcap_io import LINKTYPE_ETHERNET
+from test_call_demultiplexer import PBX_IP, TRUNK_IP, _sip
+from test_pcap_io import _build_rtp, _build_udp_frame
+
+
+class _SlowPipe(io.RawIOBase):
+    """파이프처럼 read()가 요청보다 적게 돌려주는 스트림"""
+
+    def __init__(self, data, chunk=7):
+        self._data = data
+        self._pos = 0
+        self._chunk = chunk
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        size = min(size if size >= 0 else len(self._data), self._chunk)
+        chunk = self._data[self._pos:self._pos + size]
+        self._pos += len(chunk)
+        return chunk
+
+
+def _pcap_stream(frames):
+    data = struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET)
+    for i, frame in enumerate(frames):
+        data += struct.pack('<IIII', 1000 + i, 0, len(frame), len(frame)) + frame
+    return data
+
+
+def test_decode_dumpcap_pipe():
+    """SIP 포트의 패킷에만 sip 레이어, RTP는 원시 페이로드 그대로"""
+    print("=== dumpcap 파이프 디코딩 테스트 ===")
+    invite = _sip("INVITE sip:1427@pbx SIP/2.0", 'call-a@trunk', '01011112222', '1427', TRUNK_IP, 30000)
+    rtp = _build_rtp(1, 160, 0x1234, 8, b'\xd5' * 160)
+    frames = [
+        _build_udp_frame(TRUNK_IP, PBX_IP, 5060, 5060, invite),
+        _build_udp_frame(TRUNK_IP, '192.168.0.55', 30000, 4000, rtp),
+        # SIP 포트가 아닌 곳의 SIP 형식 페이로드는 해석하지 않음
+        _build_udp_frame(TRUNK_IP, PBX_IP, 5070, 5070, invite),
+    ]
+    packets = list(decode_packets(read_pcap_stream(_SlowPipe(_pcap_stream(frames)))))
+    assert len(packets) == 3
+
+    sip_packet, rtp_packet, other = packets
+    assert sip_packet.highest_layer == 'SIP'
+    assert sip_packet.ip.src == TRUNK_IP and sip_packet.udp.dstport == 5060
+    sip_layer = sip_packet.sip
+    assert sip_layer.method == 'INVITE'
+    assert sip_layer.request_line == "INVITE sip:1427@pbx SIP/2.0"
+    assert sip_layer.call_id == 'call-a@trunk'
+    assert sip_layer.from_user == '01011112222' and sip_layer.to_user == '1427'
+    assert 'm=audio 30000' in sip_layer.msg_body
+    assert not hasattr(sip_layer, 'status_code')
+
+    assert not hasattr(rtp_packet, 'sip')
+    assert rtp_packet.highest_layer == 'RTP'
+    assert rtp_packet.udp.payload == rtp
+    assert rtp_packet.timestamp == 1001.0
+    assert not hasattr(other, 'sip')
+    print("  [OK] SIP/RTP 분리")
+
+
+def test_sip_response_fields():
+    ok = _sip("SIP/2.0 200 OK", 'call-b@trunk', '01033334444', '1428', PBX_IP, 4002)
+    frames = [_build_udp_frame(PBX_IP, TRUNK_IP, 5060, 5060, ok)]
+    packet = next(decode_packets(read_pcap_stream(io.BytesIO(_pcap_stream(frames)))))
+    assert packet.sip.status_code == '200'
+    assert packet.sip.status_line == "SIP/2.0 200 OK"
+    assert not hasattr(packet.sip, 'method')
+
+
+if __name__ == "__main__":
+    test_decode_dumpcap_pipe()
+    test_sip_response_fields()
+    print("\n테스트 완료")
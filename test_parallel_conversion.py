@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+전역 캡처 병렬 변환 테스트 - 콜별 WAV 변환을 프로세스 풀에서 실행하고 세션 순서대로 결과 수집
+"""
+
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import sip_rtp_session_grouper
+from sip_rtp_session_grouper import SipRtpSessionGrouper
+from test_call_demultiplexer import _build_capture
+
+
+class _Directory:
+    """내선 디렉터리 캐시 대신 - 1427/1428 권한"""
+
+    def lookup_member(self, number):
+        return {'per_lv8': f'lv8-{number}', 'per_lv9': 'lv9'} if number in ('1427', '1428') else None
+
+
+class _Dashboard:
+    def __init__(self):
+        self.extension_directory = _Directory()
+
+
+def _convert(tmp, processes):
+    Path(tmp, 'settings.ini').write_text(
+        f"[Recording]\nsave_path = {Path(tmp, 'rec').as_posix()}\nconversion_processes = {processes}\n", encoding='utf-8')
+    capture = Path(tmp, 'temp_capture.pcapng')
+    _build_capture(capture)
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        grouper = SipRtpSessionGrouper(_Dashboard())
+        grouper.temp_dir = Path(tmp, 'calls')
+        results = grouper.process_captured_pcap(str(capture))
+        used_pool = grouper._process_pool is not None
+        catalog = grouper._get_recording_catalog()
+        rows = sorted((row['call_id'], row['per_lv8'], row['per_lv9']) for row in catalog.search(limit=10)[0])
+        catalog.close()
+        grouper.cleanup_all_recordings()
+    finally:
+        os.chdir(cwd)
+    return results, used_pool, rows
+
+
+def test_parallel_matches_sequential():
+    print("=== 전역 캡처 병렬 변환 테스트 ===")
+    with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+        parallel, used_pool, parallel_rows = _convert(first, 2)
+        sequential, _, sequential_rows = _convert(second, 1)
+        assert used_pool
+        # 결과는 캡처에 나온 세션 순서대로, 순차 처리와 같음
+        assert [info['call_id'] for info in parallel] == ['call-a@trunk', 'call-b@trunk', 'call-c@trunk']
+        assert [(info['call_id'], info['wav_converted']) for info in parallel] == \
+            [(info['call_id'], info['wav_converted']) for info in sequential]
+        assert all(info['wav_converted'] for info in parallel)
+        merged = sorted(path.name for path in Path(first, 'rec').rglob('*_MERGE_*.wav'))
+        assert len(merged) == 3 and merged == sorted(path.name for path in Path(second, 'rec').rglob('*_MERGE_*.wav'))
+        # 카탈로그 기록은 부모 프로세스에서 - 병렬 변환도 내선 권한이 채워짐
+        assert parallel_rows == sequential_rows == [('call-a@trunk', 'lv8-1427', 'lv9'), ('call-b@trunk', 'lv8-1428', 'lv9'),
+                                                    ('call-c@trunk', 'lv8-1427', 'lv9')]
+    print("  [OK] 프로세스 풀 변환 결과 = 순차 변환 결과 (세션 순서 유지, 카탈로그 권한 포함)")
+
+
+def test_worker_uses_parent_settings():
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, 'settings.ini').write_text("[Recording]\nmerge_mode = stereo\nconversion_workers = 3\n", encoding='utf-8')
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            parent = SipRtpSessionGrouper()
+            settings = parent._settings_snapshot()
+            parent.cleanup_all_recordings()
+            threads = threading.active_count()
+            # 워커는 settings.ini를 다시 읽지 않고 변환 큐(워커 스레드)도 만들지 않음
+            os.remove('settings.ini')
+            sip_rtp_session_grouper._init_conversion_worker(None, settings)
+            worker = sip_rtp_session_grouper._worker_grouper
+            assert worker.conversion_queue is None and threading.active_count() == threads
+            assert worker.merge_mode == 'stereo' and worker._settings_snapshot() == settings
+        finally:
+            sip_rtp_session_grouper._worker_grouper = None
+            os.chdir(cwd)
+    print("  [OK] 프로세스 풀 워커는 부모 설정으로 변환기만 생성")
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_worker_uses_parent_settings()
+    print("\n테스트 완료")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pcap/pcapng 스트리밍 리더 테스트
+"""
+
+import struct
+import tempfile
+from pathlib import Path
+
+from pcap_io import PcapReader, PcapngWriter, decode_udp, parse_rtp, summarize_rtp_streams, LINKTYPE_ETHERNET
+
+SAMPLE_PCAPNG = Path(__file__).parent / "temp_recordings" / "7555ec874880d6314f7974d931503d6771c92dea_112.222.225.77.pcapng"
+
+
+def _build_udp_frame(src_ip, dst_ip, src_port, dst_port, payload):
+    """Ethernet + IPv4 + UDP 프레임 생성"""
+    udp = struct.pack('!HHHH', src_port, dst_port, 8 + len(payload), 0) + payload
+    ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0, 64, 17, 0,
+                     bytes(map(int, src_ip.split('.'))), bytes(map(int, dst_ip.split('.'))))
+    eth = b'\x00' * 12 + b'\x08\x00'
+    return eth + ip + udp
+
+
+def _build_rtp(sequence, timestamp, ssrc, payload_type, payload):
+    return struct.pack('!BBHII', 0x80, payload_type, sequence, timestamp, ssrc) + payload
+
+
+def test_read_dumpcap_pcapng():
+    """dumpcap이 생성한 pcapng에서 SIP/RTP 패킷 읽기"""
+    print("=== dumpcap pcapng 읽기 테스트 ===")
+    with PcapReader(SAMPLE_PCAPNG) as reader:
+        assert reader.format == 'pcapng'
+        packets = sum(1 for _ in reader)
+        sip_packets = sum(1 for d in reader.udp_datagrams() if 5060 in (d.src_port, d.dst_port))
+        assert reader.end_offset == SAMPLE_PCAPNG.stat().st_size
+    print(f"  전체 패킷: {packets}, SIP 패킷: {sip_packets}")
+    assert packets == 611
+    assert sip_packets == 21
+
+
+def test_summarize_rtp_streams():
+    """SSRC별 RTP 스트림 수집"""
+    print("\n=== RTP 스트림 수집 테스트 ===")
+    streams = summarize_rtp_streams(SAMPLE_PCAPNG, min_packets=10)
+    for stream in streams.values():
+        print(f"  {stream['src_ip']}:{stream['src_port']} -> {stream['dst_ip']}:{stream['dst_port']} "
+              f"PT={stream['payload_type']} 패킷={stream['packet_count']}")
+        # PCMA 20ms 패킷 = 160 bytes
+        assert len(stream['payload']) == stream['packet_count'] * 160
+    assert len(streams) == 2
+    assert {s['payload_type'] for s in streams.values()} == {8}
+
+
+def test_classic_pcap_and_rtp_header():
+    """classic pcap(마이크로초) 파일과 RTP 헤더 파싱"""
+    print("\n=== classic pcap 테스트 ===")
+    frames = [_build_udp_frame('192.168.0.55', '112.222.225.77', 3000, 40000,
+                               _build_rtp((65535 + i) & 0xFFFF, 160 * i, 0x1234, 0, bytes([i]) * 160)) for i in range(3)]
+    data = struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET)
+    for i, frame in enumerate(frames):
+        data += struct.pack('<IIII', 1000 + i, 500000, len(frame), len(frame)) + frame
+    # 쓰는 중에 잘린 마지막 레코드
+    data += struct.pack('<IIII', 2000, 0, 100, 100) + b'\x00' * 10
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "sample.pcap"
+        path.write_bytes(data)
+        with PcapReader(path) as reader:
+            results = [(d.timestamp, parse_rtp(d.payload)) for d in reader.udp_datagrams()]
+            sequences = [rtp.sequence for _, rtp in results]
+            assert [ts for ts, _ in results] == [1000.5, 1001.5, 1002.5]
+            assert sequences == [65535, 0, 1]
+            assert all(rtp.ssrc == 0x1234 and rtp.payload_type == 0 for _, rtp in results)
+            assert bytes(results[2][1].payload) == b'\x02' * 160
+            assert reader.end_offset == len(data) - 26
+    print("  [OK] 타임스탬프, 시퀀스 wraparound, 잘린 레코드 처리")
+
+
+def test_decode_udp_vlan():
+    """802.1Q VLAN 태그가 있는 프레임 디코딩"""
+    frame = _build_udp_frame('10.0.0.1', '10.0.0.2', 5060, 5060, b'OPTIONS sip:a@b SIP/2.0\r\n')
+    tagged = frame[:12] + b'\x81\x00\x00\x64' + frame[12:]
+    decoded = decode_udp(LINKTYPE_ETHERNET, memoryview(tagged))
+    assert decoded[:4] == ('10.0.0.1', '10.0.0.2', 5060, 5060)
+    assert bytes(decoded[4]).startswith(b'OPTIONS')
+
+
+def test_pcapng_writer_roundtrip():
+    """PcapngWriter로 쓴 파일을 다시 읽으면 같은 패킷이 나와야 함"""
+    print("\n=== pcapng 쓰기 테스트 ===")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "copy.pcapng"
+        with PcapReader(SAMPLE_PCAPNG) as reader:
+            original = [(p.timestamp, p.linktype, bytes(p.data)) for p in reader]
+        writer = PcapngWriter(path)
+        for i, packet in enumerate(original):
+            writer.write(*packet)
+            # 핸들을 닫았다 다시 열어도 이어 쓰기
+            if i == 100:
+                writer.close()
+        writer.close()
+
+        with PcapReader(path) as reader:
+            copied = [(p.timestamp, p.linktype, bytes(p.data)) for p in reader]
+        assert len(copied) == len(original) == writer.packet_count
+        assert all(abs(a[0] - b[0]) < 1e-6 and a[1:] == b[1:] for a, b in zip(original, copied))
+    print(f"  [OK] {len(copied)}개 패킷 일치")
+
+
+if __name__ == "__main__":
+    test_read_dumpcap_pcapng()
+    test_summarize_rtp_streams()
+    test_classic_pcap_and_rtp_header()
+    test_decode_udp_vlan()
+    test_pcapng_writer_roundtrip()
+    print("\n테스트 완료")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+녹음 카탈로그 테스트 - 번호·내선·날짜 keyset 검색, 저장 경로 병렬 재구성, filesinfo 인덱스
+"""
+
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+import recording_storage
+from recording_catalog import MONGO_INDEXES, RecordingCatalog, ensure_mongo_indexes, parse_recording_name
+
+
+def _write_merge(path, seconds=1.0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    recording_storage.write_g711_from_pcm(path, np.zeros(int(8000 * seconds), dtype=np.int16))
+    return path
+
+
+def _pages(catalog, **query):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = catalog.search(cursor=cursor, **query)
+        pages.append([row['call_id'] for row in rows])
+        if cursor is None:
+            return pages
+
+
+def test_keyset_search():
+    print("=== 녹음 카탈로그 테스트 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = RecordingCatalog(Path(tmp, 'catalog.db'))
+        base = datetime(2025, 3, 1, 9, 0, 0)
+        for index in range(7):
+            # 1427 ↔ 외부 번호, 짝수는 발신/홀수는 수신. 마지막 두 건은 같은 시각
+            remote = '01011112222' if index % 3 else '0212345678'
+            numbers = ('1427', remote) if index % 2 == 0 else (remote, '1427')
+            created = base + timedelta(hours=min(index, 5))
+            catalog.add(Path(tmp, f'{index}.wav'), f'call-{index}', *numbers, created, per_lv8='Y' if index < 4 else '')
+        catalog.add(Path(tmp, 'other.wav'), 'call-x', '1500', '0311112222', base)
+        assert catalog.count() == 8
+
+        # 최신순 페이지 - 같은 시각(5, 6)은 id 역순, 페이지 사이 중복·누락 없음
+        assert _pages(catalog, extension='1427', limit=3) == [
+            ['call-6', 'call-5', 'call-4'], ['call-3', 'call-2', 'call-1'], ['call-0']]
+        assert sum(_pages(catalog, number='01011112222', limit=2), []) == ['call-5', 'call-4', 'call-2', 'call-1']
+        assert sum(_pages(catalog, number='1427', limit=4), []) == [f'call-{index}' for index in range(6, -1, -1)]
+        rows, cursor = catalog.search(start=base + timedelta(hours=1), end=base + timedelta(hours=3), per_lv8='Y')
+        assert [row['call_id'] for row in rows] == ['call-2', 'call-1'] and cursor is None
+        assert [row['extension'] for row in catalog.by_call_id('call-x')] == ['1500']
+
+        # 검색은 인덱스 범위만 읽음 (테이블 전체 스캔 없음)
+        plans = []
+        for sql in ("SELECT id FROM recordings WHERE extension = '1427' AND created_at < 1 ORDER BY created_at DESC, id DESC",
+                    "SELECT id FROM recordings WHERE call_id = 'call-1'",
+                    "SELECT id FROM recordings WHERE from_number = '1427' ORDER BY created_at DESC, id DESC LIMIT 3"):
+            plans.extend(row[3] for row in catalog._conn.execute("EXPLAIN QUERY PLAN " + sql))
+        assert not [plan for plan in plans if plan.startswith('SCAN') or 'TEMP B-TREE' in plan], plans
+        catalog.close()
+    print("  [OK] 번호·내선·날짜 keyset 페이지 검색 (인덱스 사용)")
+
+
+def test_rebuild_from_storage_tree():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp, 'rec')
+        grouper_merge = _write_merge(root / '2025-03-01' / '1427_01011112222' / '20250301_MERGE_1427_01011112222_abc_trunk.wav', 2.0)
+        _write_merge(root / '2025-03-01' / '1427_01011112222' / '20250301_IN_1427_01011112222_abc_trunk.wav')
+        stream_merge = _write_merge(root / '20250302' / '192.168.0.55' / '101530123' / '101530123_MERGE_1428_0212345678_20250302_a1b2c3.wav')
+        (root / '20250302' / 'notes.txt').write_text('x')
+        parsed = parse_recording_name(stream_merge)
+        assert (parsed['kind'], parsed['from_number'], parsed['time'], parsed['key']) == ('MERGE', '1428', '101530123', 'a1b2c3')
+
+        catalog = RecordingCatalog(Path(tmp, 'catalog.db'))
+        # 저장할 때 기록된 행은 Call-ID·권한을 유지하고, 사라진 파일의 행은 삭제
+        catalog.add(grouper_merge, 'abc@trunk', '1427', '01011112222', datetime(2025, 3, 1, 8), per_lv8='Y')
+        catalog.add(root / '2025-02-28' / 'gone_MERGE.wav', 'gone@trunk', '1427', '0')
+        catalog.add(Path(tmp, 'elsewhere.wav'), 'elsewhere@trunk', '1427', '0')
+        assert catalog.rebuild(root, workers=2) == 2
+        assert catalog.count() == 3 and catalog.by_call_id('gone@trunk') == []
+
+        rows, _ = catalog.search(extension='1427')
+        by_path = {Path(row['path']).name: row for row in rows}
+        kept = by_path[grouper_merge.name]
+        assert (kept['call_id'], kept['per_lv8'], kept['duration']) == ('abc@trunk', 'Y', 2.0)
+        found = catalog.search(extension='1428')[0][0]
+        assert datetime.fromtimestamp(found['created_at']) == datetime(2025, 3, 2, 10, 15, 30)
+        assert found['to_number'] == '0212345678' and found['duration'] == 1.0 and found['call_id'] is None
+
+        # 인코딩 후 경로 갱신 (재생 시간 유지)
+        encoded = grouper_merge.with_suffix('.opus')
+        encoded.write_bytes(b'OggS')
+        assert catalog.move(grouper_merge, encoded)
+        assert [(Path(row['path']).suffix, row['duration']) for row in catalog.by_call_id('abc@trunk')] == [('.opus', 2.0)]
+        catalog.close()
+    print("  [OK] 저장 경로 병렬 스캔으로 카탈로그 재구성")
+
+
+class _IndexConflict(Exception):
+    code = 85
+
+
+class _IndexedCollection:
+    def __init__(self, existing=None):
+        self.indexes = dict(existing or {})
+        self.options = {}
+        self.dropped = []
+
+    def create_index(self, keys, name=None, background=False, **options):
+        if name in self.indexes and self.options.get(name, {}) != options:
+            raise _IndexConflict(f"다른 옵션의 인덱스 있음: {name}")
+        self.indexes[name] = keys
+        self.options[name] = options
+        return name
+
+    def drop_index(self, name):
+        self.dropped.append(name)
+        del self.indexes[name]
+
+
+def test_mongo_indexes():
+    collection = _IndexedCollection()
+    assert ensure_mongo_indexes(collection) == [name for name, _, _ in MONGO_INDEXES]
+    assert collection.indexes['call_id'] == [('call_id', 1)] and collection.options['call_id']['unique']
+    assert collection.indexes['from_number_created_at'][0] == ('from_number', 1)
+    assert {keys[0][0] for keys in collection.indexes.values()} >= {'call_id', 'created_at', 'from_number', 'to_number', 'per_lv8'}
+    # unique 없이 만들어진 이전 call_id 인덱스는 다시 생성
+    upgraded = _IndexedCollection({'call_id': [('call_id', 1)]})
+    ensure_mongo_indexes(upgraded)
+    assert upgraded.dropped == ['call_id'] and upgraded.options['call_id']['unique']
+    print("  [OK] filesinfo 검색 인덱스 (call_id unique)")
+
+
+if __name__ == "__main__":
+    test_keyset_search()
+    test_rebuild_from_storage_tree()
+    test_mongo_indexes()
+    print("\n테스트 완료")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+녹음 저장 형식 테스트 - 원본 G.711 WAV(포맷 태그 6/7) 보관, 전사 시 16kHz PCM 변환, FLAC/Opus 인코딩
+"""
+
+import os
+import shutil
+import tempfile
+import wave
+from pathlib import Path
+
+import numpy as np
+
+import g711_codec
+import recording_storage
+from live_call_recorder import LiveCallRecorder
+from pcap_io import summarize_rtp_streams
+from recording_catalog import RecordingCatalog
+from sip_rtp_session_grouper import SipRtpSessionGrouper
+from test_call_demultiplexer import _build_capture
+
+
+def _tone(seconds, freq=440, amplitude=8000):
+    t = np.arange(int(8000 * seconds)) / 8000
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def test_g711_wav_roundtrip():
+    print("=== 녹음 저장 형식 테스트 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        for payload_type, tag in ((g711_codec.PCMA, 6), (g711_codec.PCMU, 7)):
+            payload = g711_codec.encode(_tone(1.0), payload_type)
+            path = Path(tmp, f'{tag}.wav')
+            assert recording_storage.write_g711(path, payload, payload_type) == 8000
+            info = recording_storage.wav_info(path)
+            assert (info['format_tag'], info['bits'], info['rate'], info['data_offset']) == (tag, 8, 8000, 58)
+            # 페이로드 바이트가 그대로 저장되어 PCM의 1/2 크기 (16kHz PCM의 1/4)
+            assert path.read_bytes()[58:] == payload and path.stat().st_size == 58 + 8000
+            rate, samples = recording_storage.read_audio(path)
+            assert rate == 8000 and np.array_equal(samples[:, 0], g711_codec.decode(payload, payload_type))
+            assert not recording_storage.is_pcm_wav(path)
+    print("  [OK] G.711 WAV 기록/읽기 (포맷 태그 6/7, fact 청크)")
+
+
+def test_transcode_on_demand():
+    with tempfile.TemporaryDirectory() as tmp:
+        stored, pcm = Path(tmp, 'MERGE.wav'), Path(tmp, 'stt.wav')
+        stereo = np.stack([_tone(2.0), _tone(2.0, 1000)], axis=1)
+        assert recording_storage.write_g711_from_pcm(stored, stereo, channels=2) == 16000
+        frames = recording_storage.transcode_to_pcm(stored, pcm)
+        with wave.open(str(pcm), 'rb') as wav_file:
+            assert (wav_file.getframerate(), wav_file.getnchannels(), wav_file.getnframes()) == (16000, 1, frames)
+        assert frames == 32000 and recording_storage.is_pcm_wav(pcm)
+        # 이미 전사용 형식이면 그대로 복사
+        copied = Path(tmp, 'copy.wav')
+        assert recording_storage.transcode_to_pcm(pcm, copied) == frames
+        assert copied.read_bytes() == pcm.read_bytes()
+    print("  [OK] 전사 시에만 16kHz PCM 변환 (2채널은 모노 합)")
+
+
+def test_live_recorder_keeps_payload():
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = LiveCallRecorder(tmp, storage_format='g711')
+        payloads = [g711_codec.encode(_tone(0.02, 300 + i), g711_codec.PCMU) for i in range(50)]
+        recorder.start_call('call-a')
+        for sequence, payload in enumerate(payloads):
+            recorder.feed('call-a', 'IN', g711_codec.PCMU, sequence, payload)
+        final = {name: Path(tmp, f'{name}.wav') for name in ('IN', 'OUT', 'MERGE')}
+        finished = recorder.finish_call('call-a', final)
+        # 한 방향만 왔으므로 OUT 없음, IN은 수신한 μ-law 바이트 그대로
+        assert set(finished) == {'IN', 'MERGE'}
+        assert recording_storage.wav_info(final['IN'])['format_tag'] == 7
+        assert final['IN'].read_bytes()[58:] == b''.join(payloads)
+        assert recording_storage.wav_info(final['MERGE'])['format_tag'] == 6
+        assert recording_storage.read_audio(final['MERGE'])[1].shape == (8000, 1)
+    print("  [OK] 실시간 녹음 원본 G.711 보관")
+
+
+def test_grouper_g711_storage():
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = Path(tmp, 'call.pcapng')
+        _build_capture(capture)
+        grouper = SipRtpSessionGrouper()
+        grouper.storage_format = 'g711'
+        grouper.recording_catalog = RecordingCatalog(Path(tmp, 'catalog.db'))
+        grouper._get_recording_paths = lambda *args: {kind: Path(tmp, f'{kind}.wav') for kind in ('IN', 'OUT', 'MERGE')}
+        assert grouper._extract_rtp_to_wav(capture, '01011112222', '1427', 'call-a@trunk')
+        streams = {stream['src_port']: stream for stream in summarize_rtp_streams(capture).values()}
+        # 캡처에는 세 콜의 스트림이 있지만 방향별 첫 스트림을 보관 - 페이로드 바이트 그대로
+        stored = {Path(tmp, 'IN.wav').read_bytes()[58:], Path(tmp, 'OUT.wav').read_bytes()[58:]}
+        assert bytes(streams[30000]['payload']) in stored
+        assert recording_storage.wav_info(Path(tmp, 'MERGE.wav'))['format_tag'] == 6
+        grouper.recording_catalog.close()
+    print("  [OK] 캡처 후처리 원본 G.711 보관")
+
+
+def test_encode_archive():
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        print("  ffmpeg 없음 - FLAC/Opus 인코딩 생략")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage_format in ('flac', 'opus'):
+            path = Path(tmp, f'{storage_format}.wav')
+            recording_storage.write_g711_from_pcm(path, _tone(3.0))
+            encoded = recording_storage.encode_archive(path, storage_format, ffmpeg)
+            assert encoded.suffix == f'.{storage_format}' and not path.exists()
+            rate, samples = recording_storage.read_audio(encoded, ffmpeg)
+            assert abs(len(samples) / rate - 3.0) < 0.1
+    print("  [OK] FLAC/Opus 인코딩과 디코딩")
+
+
+def test_find_ffmpeg():
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Path(tmp, 'settings.ini')
+        settings.write_text("[FFmpeg]\npaths = D:/tools/ffmpeg.exe, ffmpeg\n", encoding='utf-8')
+        assert recording_storage.ffmpeg_paths(settings) == ['D:/tools/ffmpeg.exe', 'ffmpeg']
+        assert recording_storage.ffmpeg_paths(Path(tmp, 'missing.ini')) == list(recording_storage.FFMPEG_PATHS)
+        assert recording_storage.find_ffmpeg([str(Path(tmp, 'no-ffmpeg.exe'))]) is None
+        if os.name != 'nt':
+            # PATH에 없는 설치 경로도 설정 순서대로 찾음
+            fake = Path(tmp, 'bin', 'ffmpeg')
+            fake.parent.mkdir()
+            fake.write_text("#!/bin/sh\nexit 0\n")
+            fake.chmod(0o755)
+            assert recording_storage.find_ffmpeg([str(Path(tmp, 'no-ffmpeg.exe')), str(fake)]) == str(fake)
+    print("  [OK] settings.ini [FFmpeg] paths 순서로 ffmpeg 찾기")
+
+
+if __name__ == "__main__":
+    test_g711_wav_roundtrip()
+    test_transcode_on_demand()
+    test_live_recorder_keeps_payload()
+    test_grouper_g711_storage()
+    test_encode_archive()
+    test_find_ffmpeg()
+    print("\n테스트 완료")
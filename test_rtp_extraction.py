@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-FFmpeg 기반 RTP 추출 테스트 스크립트
+pcapng RTP 추출 테스트 스크립트
 """
 
 import sys
@@ -30,7 +30,7 @@ def test_rtp_extraction():
     try:
         # RTP 스트림 분석 테스트
         print("\n1. RTP 스트림 분석 테스트")
-        rtp_streams = grouper._analyze_rtp_streams_with_ffmpeg(test_file)
+        rtp_streams = grouper._analyze_rtp_streams(test_file)
         
         if not rtp_streams:
             print("RTP 스트림을 찾을 수 없습니다")
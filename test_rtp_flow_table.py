@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RTP 흐름 테이블 테스트 - SDP endpoint 매칭, symmetric RTP 학습, endpoint 인계, 유휴 정리
+"""
+
+from rtp_flow_table import RtpFlowTable
+
+PBX_IP = '192.168.0.1'
+TRUNK_IP = '112.222.225.77'
+
+
+def test_sdp_endpoint_lookup_and_direction():
+    print("=== RTP 흐름 테이블 테스트 ===")
+    table = RtpFlowTable()
+    table.add_endpoint('call-a', PBX_IP, 4000, 'local', now=0.0)
+    table.add_endpoint('call-a', TRUNK_IP, 30000, 'remote', now=0.0)
+
+    flow = table.lookup(PBX_IP, '4000', TRUNK_IP, '30000', 172, now=1.0)
+    assert flow.call_id == 'call-a' and flow.direction == 'OUT'
+    assert table.lookup(TRUNK_IP, 30000, PBX_IP, 4000, 172, now=1.0).direction == 'IN'
+    assert table.lookup(PBX_IP, 4000, TRUNK_IP, 30000, 172, now=2.0) is flow
+    assert flow.packets == 2 and flow.bytes == 344 and flow.last_seen == 2.0
+    assert table.lookup('10.0.0.9', 5000, '10.0.0.8', 5002) is None
+    assert len(table) == 2
+    print("  [OK] SDP endpoint 매칭과 방향")
+
+
+def test_symmetric_rtp_learning():
+    """NAT 뒤 단말이 SDP와 다른 포트로 보내도 상대 endpoint로 매칭"""
+    table = RtpFlowTable()
+    table.add_endpoint('call-a', PBX_IP, 4000, 'local')
+    # 단말 → PBX, 단말 주소는 SDP에 없음
+    assert table.lookup('203.0.113.5', 61000, PBX_IP, 4000).direction == 'IN'
+    # 학습된 주소로 반대 방향도 매칭
+    flow = table.lookup(PBX_IP, 4000, '203.0.113.5', 61000)
+    assert flow.call_id == 'call-a' and flow.direction == 'OUT'
+    assert table.endpoints_for_call('call-a') == {(PBX_IP, 4000): 'local', ('203.0.113.5', 61000): 'remote'}
+
+
+def test_endpoint_takeover_and_pbx_ip_fallback():
+    table = RtpFlowTable()
+    table.add_endpoint('call-a', PBX_IP, 4000, 'local')
+    assert table.lookup(PBX_IP, 4000, TRUNK_IP, 30000).call_id == 'call-a'
+    # 같은 포트를 다음 콜이 다시 협상
+    table.add_endpoint('call-b', PBX_IP, 4000, 'local')
+    assert table.lookup(PBX_IP, 4000, TRUNK_IP, 30000).call_id == 'call-b'
+    assert table.flows_for_call('call-a') == []
+
+    # SDP 없이 PBX IP만 아는 콜: 그 PBX IP의 콜이 하나일 때만 매칭
+    table.set_pbx_ip('call-c', '10.1.1.1')
+    assert table.lookup('10.1.1.1', 8000, TRUNK_IP, 31000).direction == 'OUT'
+    table.set_pbx_ip('call-d', '10.1.1.1')
+    assert table.lookup('10.1.1.1', 8002, TRUNK_IP, 31002) is None
+
+
+def test_idle_expiry():
+    table = RtpFlowTable(idle_timeout=60)
+    table.add_endpoint('call-a', PBX_IP, 4000, 'local', now=0.0)
+    table.add_endpoint('call-b', PBX_IP, 4002, 'local', now=0.0)
+    table.lookup(PBX_IP, 4000, TRUNK_IP, 30000, now=10.0)
+    table.lookup(PBX_IP, 4002, TRUNK_IP, 30002, now=100.0)
+    assert table.expire(now=100.0) == 1
+    # 흐름이 사라진 콜의 endpoint도 정리
+    assert table.endpoints_for_call('call-a') == {}
+    assert table.lookup(PBX_IP, 4000, TRUNK_IP, 30000, now=101.0) is None
+    assert table.lookup(PBX_IP, 4002, TRUNK_IP, 30002, now=101.0).call_id == 'call-b'
+    table.remove_call('call-b')
+    assert len(table) == 0
+    print("  [OK] 유휴 흐름 정리")
+
+
+if __name__ == "__main__":
+    test_sdp_endpoint_lookup_and_direction()
+    test_symmetric_rtp_learning()
+    test_endpoint_takeover_and_pbx_ip_fallback()
+    test_idle_expiry()
+    print("\n테스트 완료")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RTP 지터 버퍼 테스트 - 재정렬, 65535→0 wraparound, 손실 은닉, 무음 억제 구간, 재동기화
+"""
+
+from rtp_jitter_buffer import RtpJitterBuffer
+
+
+def _frame(n):
+    """프레임마다 다른 바이트로 채운 160바이트 G.711 페이로드"""
+    return bytes([n % 200 + 1]) * 160
+
+
+def _frames_in(out):
+    return [out[i] for i in range(0, len(out), 160)]
+
+
+def test_reorder_within_window():
+    print("=== RTP 지터 버퍼 테스트 ===")
+    buffer = RtpJitterBuffer(depth=4)
+    out = bytearray()
+    for sequence in (0, 2, 1, 3, 5, 4, 6, 7, 8, 9):
+        buffer.push(sequence, sequence * 160, _frame(sequence), out)
+    buffer.flush(out)
+    assert _frames_in(out) == [_frame(n)[0] for n in range(10)]
+    assert buffer.stats['reordered'] == 2 and buffer.stats['lost'] == 0
+    print("  [OK] 순서 뒤바뀐 패킷 재정렬")
+
+
+def test_wraparound_keeps_recording():
+    """22분마다 오는 65535→0 이후에도 버리지 않음"""
+    buffer = RtpJitterBuffer()
+    out = bytearray()
+    for n in range(40):
+        sequence = (65520 + n) & 0xFFFF
+        buffer.push(sequence, (n * 160) & 0xFFFFFFFF, _frame(n), out)
+    buffer.flush(out)
+    assert len(out) == 40 * 160
+    assert buffer.stats['played'] == 40 and buffer.stats['late'] == 0
+    print("  [OK] 시퀀스 wraparound")
+
+
+def test_loss_concealment_and_duplicates():
+    buffer = RtpJitterBuffer(depth=4, silence_byte=0xD5)
+    out = bytearray()
+    for sequence in (0, 1, 4, 4, 5, 6, 7, 8, 9):
+        buffer.push(sequence, sequence * 160, _frame(sequence), out)
+    # 윈도우가 지난 뒤 도착한 패킷은 버림
+    buffer.push(2, 2 * 160, _frame(2), out)
+    buffer.flush(out)
+    frames = _frames_in(out)
+    # 2번은 직전 프레임(1번) 반복, 3번은 무음
+    assert frames[:5] == [_frame(0)[0], _frame(1)[0], _frame(1)[0], 0xD5, _frame(4)[0]]
+    assert len(frames) == 10
+    assert buffer.stats == {'received': 10, 'played': 8, 'lost': 2, 'concealed': 1,
+                            'late': 1, 'duplicate': 1, 'reordered': 0, 'resync': 0}
+
+
+def test_timestamp_gap_filled_with_silence():
+    """시퀀스는 연속이지만 타임스탬프가 건너뛴 무음 억제 구간"""
+    buffer = RtpJitterBuffer(depth=2, silence_byte=0xFF)
+    out = bytearray()
+    buffer.push(10, 0, _frame(1), out)
+    buffer.push(11, 160 * 5, _frame(2), out)
+    buffer.flush(out)
+    assert len(out) == 160 * 6
+    assert out[160:160 * 5] == b'\xff' * 160 * 4
+    # 타임스탬프를 모르면 채우지 않음
+    buffer = RtpJitterBuffer(depth=2)
+    out = bytearray()
+    buffer.push(10, None, _frame(1), out)
+    buffer.push(11, None, _frame(2), out)
+    buffer.flush(out)
+    assert len(out) == 320
+
+
+def test_resync_after_sequence_jump():
+    buffer = RtpJitterBuffer(depth=4)
+    out = bytearray()
+    for sequence in range(10):
+        buffer.push(sequence, sequence * 160, _frame(sequence), out)
+    # 발신측 재시작: 연속된 두 패킷이 오면 새 시퀀스로 동기화
+    buffer.push(40000, 0, _frame(50), out)
+    buffer.push(40001, 160, _frame(51), out)
+    buffer.push(40002, 320, _frame(52), out)
+    buffer.flush(out)
+    assert buffer.stats['resync'] == 1
+    assert _frames_in(out)[-2:] == [_frame(51)[0], _frame(52)[0]]
+    assert len(out) == 12 * 160
+
+
+if __name__ == "__main__":
+    test_reorder_within_window()
+    test_wraparound_keeps_recording()
+    test_loss_concealment_and_duplicates()
+    test_timestamp_gap_filled_with_silence()
+    test_resync_after_sequence_jump()
+    print("\n테스트 완료")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RTP 타임라인 병합 테스트 - 방향별 시작 시각 정렬, 발신자 왼쪽 채널, 재정렬/손실/wraparound 처리
+"""
+
+import tempfile
+import wave
+from pathlib import Path
+
+import numpy as np
+
+import g711_codec
+from pcap_io import PcapngWriter, LINKTYPE_ETHERNET, summarize_rtp_streams
+from rtp_timeline_merger import LEFT, RIGHT, TimelineMerger, merge_rtp_capture
+from test_call_demultiplexer import _sip
+from test_pcap_io import _build_udp_frame, _build_rtp
+
+EXT = ('192.168.0.55', 4000)
+TRUNK = ('112.222.225.77', 30000)
+
+
+def _read(path):
+    with wave.open(str(path), 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        data = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2')
+        return wav_file.getframerate(), data.reshape(-1, channels)
+
+
+def _frame(value):
+    return g711_codec.encode(np.full(160, value, dtype=np.int16), g711_codec.PCMA)
+
+
+def _build_call(path):
+    """외부 발신 콜: 발신자(TRUNK)는 1.0초부터, 내선은 2.5초부터 말함. 내선 스트림은 순서 뒤바뀜 포함"""
+    packets = []
+
+    def rtp(start, src, dst, count, ssrc, value, first_ts=0, swap=()):
+        for i in range(count):
+            index = i
+            if i in swap:
+                index = i + 1
+            elif i - 1 in swap:
+                index = i - 1
+            payload = _build_rtp((1000 + index) & 0xFFFF, (first_ts + index * 160) & 0xFFFFFFFF, ssrc, 8, _frame(value))
+            packets.append((start + i * 0.02, _build_udp_frame(src[0], dst[0], src[1], dst[1], payload)))
+
+    packets.append((0.5, _build_udp_frame(TRUNK[0], '192.168.0.1', 5060, 5060,
+                                          _sip("INVITE sip:1427@pbx SIP/2.0", 'call@trunk', '01011112222', '1427', *TRUNK))))
+    rtp(1.0, TRUNK, EXT, 150, 0x11, 1000)
+    # 타임스탬프가 32비트 경계를 넘고, 10번째 패킷은 11번째와 뒤바뀌어 도착
+    rtp(2.5, EXT, TRUNK, 50, 0x22, -2000, first_ts=0xFFFFFF00, swap=(10,))
+    packets.sort(key=lambda item: item[0])
+    with PcapngWriter(path) as writer:
+        for ts, frame in packets:
+            writer.write(ts, LINKTYPE_ETHERNET, frame)
+
+
+def test_stereo_merge_alignment():
+    print("=== RTP 타임라인 병합 테스트 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        capture, merged = Path(tmp, 'call.pcapng'), Path(tmp, 'merge.wav')
+        _build_call(capture)
+        streams = sorted(summarize_rtp_streams(capture).values(), key=lambda stream: stream['ssrc'], reverse=True)
+        # streams 순서와 관계없이 INVITE를 보낸 쪽(TRUNK)이 왼쪽
+        stats = merge_rtp_capture(capture, streams, merged)
+        assert stats['caller_known'] == 1 and stats['resync'] == 0 and stats['late'] == 0
+        rate, frames = _read(merged)
+        assert rate == 8000 and frames.shape == (3 * 8000, 2) and stats['frames'] == 3 * 8000
+        left, right = frames[:, LEFT], frames[:, RIGHT]
+        assert np.all(np.abs(left[:3 * 8000] - 1000) < 64)
+        # 내선 음성은 도착 시각 기준 1.5초 뒤(캡처 시작 1.0초 기준)부터, 정확히 1초
+        assert np.all(right[:int(1.5 * 8000)] == 0)
+        assert np.all(np.abs(right[int(1.5 * 8000):int(2.5 * 8000)] + 2000) < 64)
+        assert np.all(right[int(2.5 * 8000):] == 0)
+    print("  [OK] 방향별 시작 시각 정렬, 발신자 왼쪽, 재정렬·wraparound 처리")
+
+
+def test_mono_and_bounded_buffer():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, 'mono.wav')
+        with TimelineMerger(path, mono=True, window=0.5) as merger:
+            tone = np.full(160, 100, dtype=np.int16)
+            for i in range(500):  # 10초
+                merger.feed(LEFT, i * 0.02, 1, i * 160, tone)
+                if i % 2 == 0:  # 한쪽은 패킷 절반 손실
+                    merger.feed(RIGHT, i * 0.02 + 0.005, 2, 5000 + i * 160, tone)
+                assert merger._buffer.shape[0] == 4000
+            # 이미 내보낸 구간(0.7초 전)으로 늦게 온 패킷은 버림
+            merger.feed(RIGHT, 9.9, 2, 5000 + 460 * 160, tone)
+        assert merger.stats['late'] == 1
+        _, frames = _read(path)
+        assert frames.shape == (80000, 1)
+        assert set(np.unique(frames[:, 0])) == {100, 200}
+    print("  [OK] 모노 합, 고정 크기 버퍼, 늦은 패킷 버림")
+
+
+def test_resync_on_timestamp_jump():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, 'resync.wav')
+        with TimelineMerger(path) as merger:
+            tone = np.full(160, 100, dtype=np.int16)
+            for i in range(100):
+                # 1초 뒤 발신측 재시작으로 타임스탬프가 크게 뜀
+                timestamp = i * 160 if i < 50 else 9_000_000 + i * 160
+                merger.feed(LEFT, i * 0.02, 1, timestamp, tone)
+        assert merger.stats['resync'] == 1 and merger.frames_written == 16000
+    print("  [OK] 타임스탬프 급변 시 도착 시각으로 재정렬")
+
+
+if __name__ == "__main__":
+    test_stereo_merge_alignment()
+    test_mono_and_bounded_buffer()
+    test_resync_on_timestamp_jump()
+    print("\n테스트 완료")
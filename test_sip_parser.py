@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+경량 SIP/SDP 파서 테스트와 메시지당 파싱 비용 측정
+"""
+
+import time
+
+from sip_parser import parse_sip
+from test_call_demultiplexer import _sip
+from test_pcap_io import _build_rtp
+
+INVITE = (
+    "INVITE sip:1427@192.168.0.1:5060 SIP/2.0\r\n"
+    "Via: SIP/2.0/UDP 112.222.225.77:5060;branch=z9hG4bK-524287-1;rport\r\n"
+    "Max-Forwards: 70\r\n"
+    "Contact: <sip:01011112222@112.222.225.77:5060>;expires=3600\r\n"
+    "To: <sip:1427@192.168.0.1>\r\n"
+    "From: \"07086661427,1427\" <sip:01011112222@112.222.225.77;user=phone>;tag=as1f2e\r\n"
+    "Call-ID: 5a2b7c@112.222.225.77\r\n"
+    "CSeq: 102 INVITE\r\n"
+    "User-Agent: PBX\r\n"
+    "Content-Type: application/sdp\r\n"
+    "Content-Length: 142\r\n"
+    "\r\n"
+    "v=0\r\n"
+    "o=- 1 1 IN IP4 112.222.225.77\r\n"
+    "s=-\r\n"
+    "c=IN IP4 112.222.225.77\r\n"
+    "t=0 0\r\n"
+    "m=audio 30000 RTP/AVP 8 0 101\r\n"
+    "a=rtpmap:8 PCMA/8000\r\n"
+).encode()
+
+REGISTER = (
+    "REGISTER sip:192.168.0.1 SIP/2.0\r\n"
+    "v: SIP/2.0/UDP 192.168.0.55:5060;branch=z9hG4bK77\r\n"
+    "f: <sip:192.168.0.55>;tag=8f\r\n"
+    "t: <sip:192.168.0.55>\r\n"
+    "i: reg-77@192.168.0.55\r\n"
+    "CSeq: 3 REGISTER\r\n"
+    "Expires: 120\r\n"
+    "Authorization: Digest username=\"1427\", realm=\"pbx\",\r\n"
+    " nonce=\"abc\", uri=\"sip:192.168.0.1\"\r\n"
+    "\r\n"
+).encode()
+
+
+def test_parse_invite():
+    message = parse_sip(INVITE)
+    assert message.is_request and message.method == 'INVITE'
+    assert message.request_uri == 'sip:1427@192.168.0.1:5060'
+    assert message.call_id == '5a2b7c@112.222.225.77'
+    assert message.from_user == '01011112222' and message.from_tag == 'as1f2e'
+    assert message.to_user == '1427' and not hasattr(message, 'to_tag')
+    assert message.cseq_number == '102' and message.cseq_method == 'INVITE'
+    assert message.via_branch == 'z9hG4bK-524287-1'
+    assert message.expires == '3600'
+    assert message.sdp_ip == '112.222.225.77' and message.sdp_port == 30000
+    assert message.msg_body.startswith('v=0')
+    assert message.msg_hdr.startswith('Via:')
+    # pyshark 호환: From 표시 이름
+    assert str(message.From).split(',')[1].split('"')[0] == '1427'
+    assert not hasattr(message, 'status_code') and not hasattr(message, 'refer_to')
+
+
+def test_parse_compact_register_and_response():
+    message = parse_sip(REGISTER)
+    assert message.method == 'REGISTER'
+    assert message.call_id == 'reg-77@192.168.0.55'
+    assert message.auth_username == '1427'
+    assert message.expires == '120'
+    assert message.via_branch == 'z9hG4bK77'
+    assert not hasattr(message, 'from_user')
+    assert not hasattr(message, 'msg_body')
+
+    response = parse_sip(_sip("SIP/2.0 180 Ringing", 'abc@host', '1427', '01012345678'))
+    assert not response.is_request and response.status_code == '180' and response.reason == 'Ringing'
+    assert not hasattr(response, 'method')
+
+    refer = parse_sip(b"REFER sip:1427@pbx SIP/2.0\r\nCall-ID: r1\r\nRefer-To: <sip:01099998888@pbx>\r\n\r\n")
+    assert refer.refer_to_user == '01099998888'
+
+
+def test_override_field_and_reject_non_sip():
+    message = parse_sip(INVITE)
+    assert message.from_user == '01011112222'
+    message.from_user = '07012345678'  # REFER 치환
+    assert message.from_user == '07012345678'
+    assert parse_sip(_build_rtp(1, 160, 0x1234, 8, b'\xd5' * 160)) is None
+    assert parse_sip(b"HTTP/1.1 200 OK\r\n\r\n") is None
+    assert parse_sip(b"\r\n\r\n") is None
+
+
+def benchmark_parse(iterations=20000):
+    """메시지당 파싱 비용 (시작 줄만 / Call-ID 접근 / 주요 필드 전체 접근)"""
+    results = {}
+    cases = {
+        'start line': lambda m: m.method,
+        'call_id': lambda m: m.call_id,
+        'all fields': lambda m: (m.call_id, m.from_user, m.to_user, m.from_tag, m.cseq_method,
+                                 m.via_branch, m.contact, m.sdp_ip, m.sdp_port),
+    }
+    for name, access in cases.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            access(parse_sip(INVITE))
+        results[name] = (time.perf_counter() - start) / iterations * 1e6
+        print(f"  {name:<12}: {results[name]:.2f} us/message")
+    return results
+
+
+def test_parse_cost():
+    print("\n=== SIP 파싱 비용 ===")
+    results = benchmark_parse(2000)
+    # 지연 파싱: Call-ID만 필요한 경로는 전체 필드보다 싸야 함
+    assert results['start line'] < results['all fields']
+    assert results['all fields'] < 1000
+
+
+if __name__ == "__main__":
+    test_parse_invite()
+    test_parse_compact_register_and_response()
+    test_override_field_and_reject_non_sip()
+    print("\n=== SIP 파싱 비용 ===")
+    benchmark_parse()
+    print("\n테스트 완료")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+스트리밍 WAV writer 테스트 - 덧붙이기 쓰기, 주기적 헤더 갱신, 비정상 종료 시 복구 범위, 60분 녹음 벤치마크
+"""
+
+import os
+import tempfile
+import time
+import wave
+
+from wav_stream_writer import StreamingWavWriter
+
+# 20ms 패킷 한 개 = 160 샘플 * 16비트
+_CHUNK = b'\x01\x02' * 160
+
+
+def _read_wav(path):
+    with wave.open(path, 'rb') as wav_file:
+        return wav_file.getparams(), wav_file.readframes(wav_file.getnframes())
+
+
+def test_append_and_readback():
+    print("=== 스트리밍 WAV writer 테스트 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'in.wav')
+        with StreamingWavWriter(path) as writer:
+            for _ in range(50):
+                writer.write(_CHUNK)
+            assert writer.duration == 1.0
+        params, frames = _read_wav(path)
+        assert (params.nchannels, params.sampwidth, params.framerate) == (1, 2, 8000)
+        assert params.nframes == 8000 and frames == _CHUNK * 50
+        assert os.path.getsize(path) == 44 + len(_CHUNK) * 50
+    print("  [OK] 덧붙이기 후 wave 모듈로 읽기")
+
+
+def test_header_valid_without_close():
+    """close() 없이 종료돼도 마지막 헤더 갱신까지의 샘플은 읽을 수 있음"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'crash.wav')
+        writer = StreamingWavWriter(path, header_interval=3600)
+        writer.write(_CHUNK * 10)
+        writer.flush()
+        # 갱신 주기 전의 쓰기는 파일에는 있지만 헤더 길이에는 없음
+        writer.write(_CHUNK * 5)
+        writer._file.flush()
+        params, frames = _read_wav(path)
+        assert params.nframes == 1600 and frames == _CHUNK * 10
+        writer.close()
+        assert _read_wav(path)[0].nframes == 2400
+
+
+def test_odd_length_padding():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pad.wav')
+        with StreamingWavWriter(path, sampwidth=1) as writer:
+            writer.write(b'\x80' * 7)
+        params, frames = _read_wav(path)
+        assert params.nframes == 7 and frames == b'\x80' * 7
+        assert os.path.getsize(path) == 44 + 8
+
+
+def _legacy_append(path, frames):
+    """기존 RTPStreamManager 방식: 매번 전체를 읽어 임시 파일로 다시 씀"""
+    if os.path.exists(path):
+        with wave.open(path, 'rb') as wav_read:
+            params = wav_read.getparams()
+            existing = wav_read.readframes(wav_read.getnframes())
+        with wave.open(path + '.tmp', 'wb') as wav_write:
+            wav_write.setparams(params)
+            wav_write.writeframes(existing)
+            wav_write.writeframes(frames)
+        os.replace(path + '.tmp', path)
+    else:
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(8000)
+            wav_file.writeframes(frames)
+
+
+def benchmark_60min(minutes=60, legacy_minutes=2, packets_per_write=50):
+    """60분 스트림(20ms 패킷, 1초마다 쓰기)을 기록하는 시간 - 기존 방식은 짧은 구간만 비교"""
+    chunk = _CHUNK * packets_per_write
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stream.wav')
+        started = time.perf_counter()
+        with StreamingWavWriter(path) as writer:
+            for _ in range(minutes * 60):
+                writer.write(chunk)
+        results['streaming'] = time.perf_counter() - started
+        results['streaming_bytes'] = os.path.getsize(path)
+
+        legacy_path = os.path.join(tmp, 'legacy.wav')
+        started = time.perf_counter()
+        for _ in range(legacy_minutes * 60):
+            _legacy_append(legacy_path, chunk)
+        results['legacy'] = time.perf_counter() - started
+    print(f"  스트리밍 {minutes}분: {results['streaming']:.3f}초 ({results['streaming_bytes'] / 1e6:.1f}MB)")
+    print(f"  기존 방식 {legacy_minutes}분: {results['legacy']:.3f}초")
+    return results
+
+
+def test_60min_stream():
+    results = benchmark_60min(legacy_minutes=1)
+    assert results['streaming_bytes'] == 44 + 60 * 60 * 8000 * 2
+    # 쓰기 비용은 녹음 길이에 비례 - 60분도 몇 초 안에 끝나야 함
+    assert results['streaming'] < 30
+
+
+if __name__ == "__main__":
+    test_append_and_readback()
+    test_header_valid_without_close()
+    test_odd_length_padding()
+    print("\n=== 60분 녹음 벤치마크 ===")
+    benchmark_60min()
+    print("\n테스트 완료")
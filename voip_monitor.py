@@ -13,6 +13,10 @@ from PySide6.QtGui import *
 import sys
 import threading
 import asyncio
+from rtp_flow_table import RtpFlowTable
+
+# RTP 패킷 → Call-ID 흐름 테이블 (SDP endpoint로 채움)
+rtp_flows = RtpFlowTable()
 
 def setup_logging():
 	"""로깅 설정"""
@@ -117,19 +121,8 @@ def analyze_rtp(packet, voip_monitor):
 def get_call_id_from_rtp(packet):  # stream_id 매개변수 제거
 	"""RTP 패킷과 관련된 Call-ID 찾기"""
 	try:
-		src_ip = packet.ip.src
-		dst_ip = packet.ip.dst
-		src_port = int(packet.udp.srcport)
-		dst_port = int(packet.udp.dstport)
-
-		# active_calls에서 이 RTP 스트림과 매칭되는 Call-ID 찾기
-		for call_id, call_info in active_calls.items():
-			if "media_endpoints" in call_info:
-				for endpoint in call_info["media_endpoints"]:
-					if (src_ip == endpoint["ip"] and src_port == endpoint["port"]) or \
-					   (dst_ip == endpoint["ip"] and dst_port == endpoint["port"]):
-						return call_id
-		return None
+		flow = rtp_flows.lookup(packet.ip.src, packet.udp.srcport, packet.ip.dst, packet.udp.dstport)
+		return flow.call_id if flow else None
 
 	except Exception as e:
 		log_message("오류", f"RTP Call-ID 매칭 오류: {str(e)}")
@@ -196,6 +189,13 @@ def analyze_sip(packet, voip_monitor):
 		# 디버깅을 위한 로그 추가
 		log_message("정보", f"SIP 패킷 분석 시작 - Call-ID: {call_id}")
 
+		# SDP의 미디어 endpoint를 RTP 흐름 테이블에 등록
+		if hasattr(packet, 'sdp'):
+			sdp_ip = getattr(packet.sdp, 'connection_info_address', '')
+			sdp_port = getattr(packet.sdp, 'media_port', '')
+			if sdp_ip and sdp_port:
+				rtp_flows.add_endpoint(call_id, sdp_ip, sdp_port)
+
 		if hasattr(sip_layer, 'request_line'):
 			# INVITE 요청 처리
 			if 'INVITE' in sip_layer.request_line:
@@ -356,6 +356,7 @@ def cleanup_old_calls():
 			if call_start_time and (current_time - call_start_time).seconds > 7200:
 				log_message("정보", f"오래된 통화 기록 제거: {call_id}")
 				del active_calls[call_id]
+				rtp_flows.remove_call(call_id)
 
 def capture_voip_packets(interface, voip_monitor):
 	"""패킷 캡처 함수"""
@@ -1,5 +1,6 @@
 #wav 채팅 추출 클래스
 import os
+import tempfile
 from datetime import timedelta
 #서드파티 라이브러리
 from pydub import AudioSegment
@@ -7,6 +8,8 @@ from pydub.silence import detect_nonsilent
 import speech_recognition as sr
 import datetime
 
+import recording_storage
+
 class WavChatExtractor:
 	def __init__(self):
 		print("음성 인식기 초기화 중...")
@@ -15,8 +18,16 @@ class WavChatExtractor:
 
 	def extract_audio_text_by_voice_activity(self, wav_path, min_silence_len=500, silence_thresh=-40):
 		"""음성 구간을 감지하여 텍스트로 변환"""
+		transcoded = None
 		try:
 			print(f"음성 파일 분석 시작: {wav_path}")
+			# 보관 형식(G.711 WAV, FLAC, Opus) 녹음은 전사할 때만 16kHz PCM으로 변환
+			if not recording_storage.is_pcm_wav(wav_path):
+				fd, transcoded = tempfile.mkstemp(suffix=".wav")
+				os.close(fd)
+				# 녹음 후처리와 같은 ffmpeg (settings.ini [FFmpeg] paths - PATH에 없는 설치 대응)
+				recording_storage.transcode_to_pcm(wav_path, transcoded, ffmpeg=recording_storage.find_ffmpeg() or 'ffmpeg')
+				wav_path = transcoded
 			audio = AudioSegment.from_wav(wav_path)
 
 			# 음성 구간 감지
@@ -70,6 +81,9 @@ class WavChatExtractor:
 		except Exception as e:
 			print(f"음성 인식 오류: {str(e)}")
 			return []
+		finally:
+			if transcoded:
+				os.remove(transcoded)
 
 	def clean_text(self, text):
 		"""텍스트 정제 함수"""
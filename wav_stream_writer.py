@@ -0,0 +1,117 @@
+# 추가 전용 스트리밍 WAV writer - 파일 핸들을 열어 둔 채 샘플만 덧붙이고 RIFF/data 크기는 주기적으로 갱신
+import os
+import struct
+import time
+
+# WAV fmt 청크의 포맷 태그
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_ALAW = 6
+WAVE_FORMAT_MULAW = 7
+
+
+class StreamingWavWriter:
+    """PCM WAV를 끝에 덧붙이기만 하는 writer
+
+    write()는 샘플을 파일 끝에 쓰기만 하고, RIFF/data 크기 필드는 header_interval초마다
+    그리고 flush()/close() 때 제자리에서 고친다. 비용은 쓴 샘플 양에 비례하며
+    기존 내용을 다시 읽거나 복사하지 않는다. 프로세스가 비정상 종료되면 마지막
+    헤더 갱신 이후(최대 header_interval초)의 샘플만 헤더 길이에 반영되지 않는다.
+    format_tag가 G.711(6/7)이면 바이트 그대로의 8비트 샘플을 쓰며, PCM이 아닌 WAV에
+    필요한 fmt 확장(cbSize)과 fact 청크(샘플 수)를 함께 기록한다.
+    """
+
+    def __init__(self, path, channels: int = 1, sampwidth: int = 2, framerate: int = 8000,
+                 header_interval: float = 1.0, format_tag: int = WAVE_FORMAT_PCM):
+        self.path = str(path)
+        self.channels = channels
+        self.sampwidth = sampwidth
+        self.framerate = framerate
+        self.format_tag = format_tag
+        self._header_size = 44 if format_tag == WAVE_FORMAT_PCM else 58
+        self.header_interval = header_interval
+        self.data_bytes = 0
+        self._pad = 0
+        self._patched_bytes = -1
+        self._last_patch = time.monotonic()
+        self._file = open(self.path, 'wb')
+        self._file.write(self._header(0))
+        self._file.flush()
+
+    def _header(self, data_bytes: int) -> bytes:
+        block_align = self.channels * self.sampwidth
+        if self.format_tag == WAVE_FORMAT_PCM:
+            return struct.pack(
+                '<4sI4s4sIHHIIHH4sI',
+                b'RIFF', 36 + data_bytes, b'WAVE',
+                b'fmt ', 16, 1, self.channels, self.framerate,
+                self.framerate * block_align, block_align, self.sampwidth * 8,
+                b'data', data_bytes,
+            )
+        return struct.pack(
+            '<4sI4s4sIHHIIHHH4sII4sI',
+            b'RIFF', 50 + data_bytes, b'WAVE',
+            b'fmt ', 18, self.format_tag, self.channels, self.framerate,
+            self.framerate * block_align, block_align, self.sampwidth * 8, 0,
+            b'fact', 4, data_bytes // block_align,
+            b'data', data_bytes,
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    @property
+    def frames_written(self) -> int:
+        return self.data_bytes // (self.channels * self.sampwidth)
+
+    @property
+    def duration(self) -> float:
+        return self.frames_written / self.framerate
+
+    def write(self, frames):
+        """PCM 샘플을 파일 끝에 추가"""
+        if not frames:
+            return
+        self._file.write(frames)
+        self.data_bytes += len(frames)
+        if time.monotonic() - self._last_patch >= self.header_interval:
+            self.flush()
+
+    def flush(self, fsync: bool = False):
+        """헤더의 크기 필드를 현재 길이로 갱신하고 OS로 내보냄"""
+        if self._file is None:
+            return
+        if self._patched_bytes != self.data_bytes:
+            self._file.seek(4)
+            self._file.write(struct.pack('<I', self._header_size - 8 + self.data_bytes + self._pad))
+            if self.format_tag != WAVE_FORMAT_PCM:
+                self._file.seek(46)
+                self._file.write(struct.pack('<I', self.frames_written))
+            self._file.seek(self._header_size - 4)
+            self._file.write(struct.pack('<I', self.data_bytes))
+            self._file.seek(0, os.SEEK_END)
+            self._patched_bytes = self.data_bytes
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+        self._last_patch = time.monotonic()
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            # RIFF 청크는 짝수 길이여야 함 (8비트 모노에서 홀수 바이트가 될 수 있음)
+            if self.data_bytes % 2:
+                self._file.write(b'\x00')
+                self._pad = 1
+                self._patched_bytes = -1
+            self.flush()
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
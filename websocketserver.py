@@ -2,24 +2,125 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import datetime
+import functools
 import json
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 import websockets
 from pymongo import MongoClient
 import socket
 
+from config_loader import load_config
+from notification_dispatcher import NotificationDispatcher
+
 class WebSocketServer:
 	"""WebSocket 서버 클래스: SIP 패킷 감지 시 클라이언트에게 알림을 전송합니다."""
 
-	def __init__(self, port=8765, log_callback=None, max_port_retry=5):
+	def __init__(self, port=8765, log_callback=None, max_port_retry=5, mongo_uri=None, database=None,
+				 extension_directory=None, ip_cache_ttl=300.0, notify_queue_size=None, overflow_policy=None):
 		self.port = port
 		self.max_port_retry = max_port_retry  # 최대 포트 재시도 횟수
-		self.connected_clients = {}  # ip -> websocket
 		self.log_callback = log_callback
 		self.server = None
 		self.running = False
+
+		# MongoDB 접속 정보 (settings.ini [MongoDB]) - 클라이언트는 서버당 하나만 만들어 재사용
+		config = load_config()
+		if mongo_uri is None:
+			host = config.get('MongoDB', 'host', fallback='localhost')
+			mongo_port = config.getint('MongoDB', 'port', fallback=27017)
+			username = config.get('MongoDB', 'username', fallback='')
+			password = config.get('MongoDB', 'password', fallback='')
+			if username and password:
+				mongo_uri = f"mongodb://{username}:{password}@{host}:{mongo_port}/"
+			else:
+				mongo_uri = f"mongodb://{host}:{mongo_port}/"
+		self.mongo_uri = mongo_uri
+		self.database_name = database or config.get('MongoDB', 'database', fallback='packetwave')
+		self._mongo_client = None
+		self._mongo_lock = threading.Lock()
+		# 동기 드라이버 호출은 이 스레드 풀에서 실행해 이벤트 루프를 막지 않음
+		self._db_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ws-mongo")
+
+		# 내선번호 → IP 캐시 (대시보드의 내선 디렉터리가 있으면 그쪽을 우선 사용)
+		self.extension_directory = extension_directory
+		self.ip_cache_ttl = ip_cache_ttl
+		self._ip_cache = {}  # 내선번호 -> (ip, 만료 시각)
+		self._ip_cache_lock = threading.Lock()
+
+		# SIP 스레드의 알림은 서버 루프에서 처리하고, 세션(연결)마다 송신 큐 하나로 보냄 (settings.ini [WebSocket])
+		if notify_queue_size is None:
+			notify_queue_size = config.getint('WebSocket', 'send_queue_size', fallback=32)
+		if overflow_policy is None:
+			overflow_policy = config.get('WebSocket', 'overflow_policy', fallback='drop_oldest').strip()
+		self.dispatcher = NotificationDispatcher(queue_size=notify_queue_size, overflow_policy=overflow_policy)
+		# ping 응답이 없는 연결은 websockets가 닫음 → handler의 finally에서 구독 해제
+		self.ping_interval = config.getfloat('WebSocket', 'ping_interval_sec', fallback=20.0) or None
+		self.ping_timeout = config.getfloat('WebSocket', 'ping_timeout_sec', fallback=20.0) or None
 		print(f"WebSocketServer 초기화: 포트 {port}")
 
+	def _members(self):
+		"""members 컬렉션 (MongoClient는 처음 사용할 때 한 번만 생성, 연결 풀은 드라이버가 관리)"""
+		with self._mongo_lock:
+			if self._mongo_client is None:
+				self._mongo_client = MongoClient(
+					self.mongo_uri,
+					serverSelectionTimeoutMS=2000,
+					connectTimeoutMS=2000,
+					maxPoolSize=4
+				)
+			return self._mongo_client[self.database_name]['members']
+
+	def close_mongo(self):
+		"""공유 MongoClient 종료 (다음 조회 때 다시 생성)"""
+		with self._mongo_lock:
+			if self._mongo_client is not None:
+				self._mongo_client.close()
+				self._mongo_client = None
+
+	async def _run_db(self, func, *args):
+		"""MongoDB 호출을 전용 스레드 풀에서 실행하고 결과를 기다림"""
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(self._db_executor, functools.partial(func, *args))
+
+	def _find_member_ip(self, extension):
+		member = self._members().find_one({'extension_num': extension}, {'default_ip': 1, '_id': 0})
+		return (member or {}).get('default_ip') or None
+
+	def _register_member_ip(self, extension, client_ip):
+		self._members().update_one(
+			{'extension_num': extension},
+			{'$set': {'default_ip': client_ip}},
+			upsert=True
+		)
+
+	def _cache_ip(self, extension, ip):
+		with self._ip_cache_lock:
+			self._ip_cache[str(extension)] = (ip, time.monotonic() + self.ip_cache_ttl)
+
+	async def lookup_ip(self, extension, dashboard_instance=None):
+		"""내선번호의 IP - 내선 디렉터리 → 자체 캐시 → MongoDB(스레드 풀) 순서로 조회. 없으면 None"""
+		extension = str(extension)
+		directory = getattr(dashboard_instance, 'extension_directory', None) or self.extension_directory
+		loaded = directory is not None and directory.loaded
+		if loaded:
+			ip = directory.default_ip(extension)
+			if ip:
+				return ip
+		with self._ip_cache_lock:
+			cached = self._ip_cache.get(extension)
+		if cached and cached[1] > time.monotonic():
+			return cached[0]
+		if loaded:
+			# 디렉터리는 change stream/주기 갱신으로 members 전체를 들고 있으므로 없으면 MongoDB에도 없음
+			return None
+		ip = await self._run_db(self._find_member_ip, extension)
+		if ip:
+			self._cache_ip(extension, ip)
+		return ip
+
 	def log(self, message, error=None, level="info"):
 		"""로그 메시지 기록"""
 		timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -35,9 +136,9 @@ class WebSocketServer:
 	async def handler(self, websocket):
 		"""WebSocket 연결 처리"""
 		client_ip = websocket.remote_address[0]
-		self.connected_clients[client_ip] = websocket
+		self.dispatcher.open(client_ip, websocket)
 		print(f"[연결 성공] 클라이언트 연결됨: {client_ip}")
-		print(f"[상태] 현재 연결된 클라이언트: {len(self.connected_clients)}개")
+		print(f"[상태] 현재 연결된 세션: {self.dispatcher.sessions()}개")
 		self.log(f"클라이언트 연결됨: {client_ip}", level="info")
 
 		try:
@@ -60,9 +161,8 @@ class WebSocketServer:
 			print(f"[연결 종료] 클라이언트 연결 종료: {client_ip}")
 			self.log(f"클라이언트 연결 종료: {client_ip}", level="info")
 		finally:
-			if client_ip in self.connected_clients:
-				del self.connected_clients[client_ip]
-				print(f"[상태] 현재 연결된 클라이언트: {len(self.connected_clients)}개")
+			self.dispatcher.close_client(client_ip, websocket)
+			print(f"[상태] 현재 연결된 세션: {self.dispatcher.sessions()}개")
 
 	async def handle_register(self, websocket, data, client_ip):
 		"""내선번호 등록 처리"""
@@ -76,31 +176,14 @@ class WebSocketServer:
 			return
 
 		try:
-			# MongoDB에 내선번호와 IP 매핑 저장
+			# MongoDB에 내선번호와 IP 매핑 저장 (공유 클라이언트, 스레드 풀에서 실행)
 			print(f"[MongoDB] {extension} 내선번호 등록 시도 (IP: {client_ip})")
-			mongo_client = None
-			try:
-				mongo_client = MongoClient("mongodb://localhost:27017/", serverSelectionTimeoutMS=2000)
-				# 연결 테스트
-				mongo_client.server_info()
-				print(f"[MongoDB] 서버에 성공적으로 연결됨")
-			except Exception as mongo_error:
-				print(f"[MongoDB 오류] 연결 실패: {str(mongo_error)}")
-				await websocket.send(json.dumps({
-					'type': 'error',
-					'message': '서버 오류로 등록 실패'
-				}))
-				return
-
-			db = mongo_client['packetwave']
-			members = db['members']
-
-			# 기존 IP 주소 업데이트
-			result = members.update_one(
-				{'extension_num': extension},
-				{'$set': {'default_ip': client_ip}},
-				upsert=True
-			)
+			await self._run_db(self._register_member_ip, extension, client_ip)
+			self._cache_ip(extension, client_ip)
+			# 이 세션이 내선번호 알림을 구독 (같은 내선/같은 주소의 다른 세션은 그대로 유지)
+			self.dispatcher.subscribe(websocket, extension)
+			if self.extension_directory is not None:
+				self.extension_directory.update_member(extension, default_ip=client_ip)
 
 			print(f"[MongoDB] {extension} 내선번호 등록 완료 (IP: {client_ip})")
 			await websocket.send(json.dumps({
@@ -120,7 +203,17 @@ class WebSocketServer:
 				'message': '서버 오류로 등록 실패'
 			}))
 
-	async def notify_client(self, to_number, from_number, call_id=None, dashboard_instance=None):
+	def dispatch_incoming_call(self, to_number, from_number, call_id=None, dashboard_instance=None):
+		"""수신 전화 알림 요청 (SIP 처리 스레드에서 호출, 서버 루프에서 처리). 넘기지 못했거나 합쳐지면 None"""
+		return self.dispatcher.submit(('incoming_call', to_number, call_id),
+									  self.notify_client, to_number, from_number, call_id, dashboard_instance)
+
+	def dispatch_call_end(self, to_number, from_number, call_id=None, method="BYE", dashboard_instance=None):
+		"""통화 종료 알림 요청 (SIP 처리 스레드에서 호출, 서버 루프에서 처리). 넘기지 못했거나 합쳐지면 None"""
+		return self.dispatcher.submit((method, to_number, call_id),
+									  self.notify_client_call_end, to_number, from_number, call_id, method, dashboard_instance)
+
+	async def notify_client(self, to_number, from_number, call_id=None, dashboard_instance=None, submitted=None):
 		"""클라이언트에 수신 전화 알림"""
 		try:
 			print(f"[알림 시작] 내선번호 {to_number}에 알림 시도 (발신: {from_number})")
@@ -142,96 +235,76 @@ class WebSocketServer:
 							self.log(f"내선번호 {to_number}가 이미 벨울림 중이므로 수신 알림 차단", level="info")
 							return
 			
-			# MongoDB에서 내선번호에 해당하는 IP 조회
-			mongo_client = MongoClient("mongodb://localhost:27017/")
-			db = mongo_client['packetwave']
-			members = db['members']
-
-			member = members.find_one({'extension_num': to_number})
-			if not member:
-				print(f"[MongoDB] 내선번호 {to_number}에 대한 정보 없음")
-				self.log(f"내선번호 {to_number}에 대한 정보 없음", level="warning")
-				return
-
-			ip = member.get('default_ip')
-			if not ip:
-				print(f"[MongoDB] 내선번호 {to_number}에 대한 IP 주소 없음")
-				self.log(f"내선번호 {to_number}에 대한 IP 주소 없음", level="warning")
-				return
-
-			print(f"[알림 처리] 내선번호 {to_number}의 IP 주소: {ip}")
-			# 해당 IP로 연결된 클라이언트가 있는지 확인
-			if ip in self.connected_clients:
-				message = {
-					'type': 'incoming_call',
-					'from': from_number,
-					'to': to_number,
-					'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-				}
-
-				if call_id:
-					message['call_id'] = call_id
-
-				print(f"[알림 전송] 메시지 전송: {message}")
-				await self.connected_clients[ip].send(json.dumps(message))
-				print(f"[알림 완료] 내선번호 {to_number} (IP: {ip})에 알림 전송 완료")
-				self.log(f"알림 전송 완료: {to_number} (IP: {ip})", level="info")
+			message = {
+				'type': 'incoming_call',
+				'from': from_number,
+				'to': to_number,
+				'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+			}
+
+			if call_id:
+				message['call_id'] = call_id
+
+			print(f"[알림 전송] 메시지 전송: {message}")
+			queued = await self._deliver(to_number, ('incoming_call', to_number, call_id), message, submitted, dashboard_instance)
+			if queued:
+				print(f"[알림 완료] 내선번호 {to_number} 세션 {queued}개 송신 큐에 추가")
+				self.log(f"알림 송신 큐 추가: {to_number} (세션 {queued}개)", level="info")
 			else:
-				print(f"[알림 실패] 클라이언트 연결 없음: 내선번호 {to_number} (IP: {ip})")
-				self.log(f"클라이언트 연결 없음: {ip}", level="warning")
+				print(f"[알림 실패] 연결된 세션 없음 또는 같은 알림 대기 중: 내선번호 {to_number}")
+				self.log(f"알림 대상 세션 없음: {to_number}", level="warning")
 		except Exception as e:
 			print(f"[알림 오류] 알림 전송 중 오류: {str(e)}")
 			self.log("알림 전송 중 오류", e, level="error")
 
-	async def notify_client_call_end(self, to_number, from_number, call_id=None, method="BYE"):
+	async def notify_client_call_end(self, to_number, from_number, call_id=None, method="BYE", dashboard_instance=None,
+									 submitted=None):
 		"""클라이언트에 통화 종료 알림"""
 		try:
 			print(f"[종료 알림 시작] 내선번호 {to_number}에 통화 종료 알림 시도 (발신: {from_number}, 방법: {method})")
-			# MongoDB에서 내선번호에 해당하는 IP 조회
-			mongo_client = MongoClient("mongodb://localhost:27017/")
-			db = mongo_client['packetwave']
-			members = db['members']
-
-			member = members.find_one({'extension_num': to_number})
-			if not member:
-				print(f"[MongoDB] 내선번호 {to_number}에 대한 정보 없음")
-				self.log(f"내선번호 {to_number}에 대한 정보 없음", level="warning")
-				return
-
-			ip = member.get('default_ip')
-			if not ip:
-				print(f"[MongoDB] 내선번호 {to_number}에 대한 IP 주소 없음")
-				self.log(f"내선번호 {to_number}에 대한 IP 주소 없음", level="warning")
-				return
-
-			print(f"[종료 알림 처리] 내선번호 {to_number}의 IP 주소: {ip}")
-			# 해당 IP로 연결된 클라이언트가 있는지 확인
-			if ip in self.connected_clients:
-				# method에 따라 type을 구분
-				message_type = 'call_bye' if method == 'BYE' else 'call_cancel' if method == 'CANCEL' else 'call_ended'
-
-				message = {
-					'type': message_type,
-					'method': method,
-					'from': from_number,
-					'to': to_number,
-					'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-				}
-
-				if call_id:
-					message['call_id'] = call_id
-
-				print(f"[종료 알림 전송] 메시지 전송: {message}")
-				await self.connected_clients[ip].send(json.dumps(message))
-				print(f"[종료 알림 완료] 내선번호 {to_number} (IP: {ip})에 통화 종료 알림 전송 완료")
-				self.log(f"통화 종료 알림 전송 완료: {to_number} (IP: {ip}), 방법: {method}", level="info")
+			# method에 따라 type을 구분
+			message_type = 'call_bye' if method == 'BYE' else 'call_cancel' if method == 'CANCEL' else 'call_ended'
+
+			message = {
+				'type': message_type,
+				'method': method,
+				'from': from_number,
+				'to': to_number,
+				'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+			}
+
+			if call_id:
+				message['call_id'] = call_id
+
+			print(f"[종료 알림 전송] 메시지 전송: {message}")
+			queued = await self._deliver(to_number, (method, to_number, call_id), message, submitted, dashboard_instance)
+			if queued:
+				print(f"[종료 알림 완료] 내선번호 {to_number} 세션 {queued}개 통화 종료 알림 송신 큐에 추가")
+				self.log(f"통화 종료 알림 송신 큐 추가: {to_number} (세션 {queued}개), 방법: {method}", level="info")
 			else:
-				print(f"[종료 알림 실패] 클라이언트 연결 없음: 내선번호 {to_number} (IP: {ip})")
-				self.log(f"클라이언트 연결 없음: {ip}", level="warning")
+				print(f"[종료 알림 실패] 연결된 세션 없음 또는 같은 알림 대기 중: 내선번호 {to_number}")
+				self.log(f"종료 알림 대상 세션 없음: {to_number}", level="warning")
 		except Exception as e:
 			print(f"[종료 알림 오류] 통화 종료 알림 전송 중 오류: {str(e)}")
 			self.log("통화 종료 알림 전송 중 오류", e, level="error")
 
+	async def _deliver(self, to_number, key, message, submitted, dashboard_instance):
+		"""내선번호의 세션 송신 큐에 알림 추가. 큐에 넣은 세션 수
+
+		이 내선을 구독(등록)한 세션이 있으면 바로 보내고, 없을 때만 기존처럼 members의 IP로 찾아
+		그 주소에 연결된 세션으로 보냄.
+		"""
+		payload = json.dumps(message)
+		if self.dispatcher.sessions(to_number):
+			return self.dispatcher.publish(to_number, key, payload, submitted)
+		# 내선 디렉터리 / IP 캐시에서 조회 (둘 다 없을 때만 스레드 풀에서 MongoDB 조회)
+		ip = await self.lookup_ip(to_number, dashboard_instance)
+		if not ip:
+			print(f"[MongoDB] 내선번호 {to_number}에 대한 IP 주소 없음")
+			self.log(f"내선번호 {to_number}에 대한 IP 주소 없음", level="warning")
+			return 0
+		return self.dispatcher.enqueue(ip, key, payload, submitted)
+
 	def is_port_in_use(self, port):
 		"""지정된 포트가 사용 중인지 확인"""
 		with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -257,8 +330,12 @@ class WebSocketServer:
 			try:
 				print(f"[서버 시작] WebSocket 서버 시작: 포트 {current_port}")
 				self.log(f"WebSocket 서버 시작: 포트 {current_port}", level="info")
-				self.server = await websockets.serve(self.handler, "0.0.0.0", current_port)
+				self.server = await websockets.serve(
+					self.handler, "0.0.0.0", current_port,
+					ping_interval=self.ping_interval, ping_timeout=self.ping_timeout
+				)
 				self.port = current_port  # 실제 사용 중인 포트 업데이트
+				self.dispatcher.bind(asyncio.get_running_loop())
 				self.running = True
 				print(f"[서버 상태] WebSocket 서버가 포트 {current_port}에서 실행 중")
 				return self.server
@@ -278,6 +355,9 @@ class WebSocketServer:
 				self.running = False
 				self.server.close()
 				await self.server.wait_closed()
+				self.log(f"알림 디스패처 지표: {self.dispatcher.metrics()}", level="info")
+				self.dispatcher.close()
+				self.close_mongo()
 				print("[서버 종료] WebSocket 서버가 정상적으로 종료됨")
 				self.log("WebSocket 서버 중지됨", level="info")
 			except Exception as e: